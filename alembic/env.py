@@ -50,6 +50,9 @@ def run_migrations_online():
         # Enable foreign key constraints for SQLite
         if connection.dialect.name == 'sqlite':
             connection.execute(text("PRAGMA foreign_keys=ON"))  # Modified line
+            # End the transaction the PRAGMA autobegan (SQLAlchemy 2.x) so
+            # context.begin_transaction() below owns, and commits, the migration.
+            connection.commit()
 
         context.configure(
             connection=connection,
@@ -0,0 +1,31 @@
+"""Add import_row_hashes for idempotent re-imports
+
+Revision ID: 4b8f0e6d2a91
+Revises: c5e2a7d41f08
+Create Date: 2026-10-19 12:36:05.208417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8f0e6d2a91'
+down_revision: Union[str, None] = 'c5e2a7d41f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'import_row_hashes',
+        sa.Column('natural_key', sa.String(), nullable=False),
+        sa.Column('content_hash', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('natural_key'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('import_row_hashes')
@@ -0,0 +1,27 @@
+"""Rekey import_row_hashes on the WIP number
+
+Revision ID: 7d2c9e4b1a36
+Revises: f3a9c7d15b20
+Create Date: 2026-10-19 18:02:41.730915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2c9e4b1a36'
+down_revision: Union[str, None] = 'f3a9c7d15b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Hashes were keyed by WIP number and both serials; the next import stores
+    # them again under the WIP number, treating each order as changed once
+    op.execute('DELETE FROM import_row_hashes')
+
+
+def downgrade() -> None:
+    op.execute('DELETE FROM import_row_hashes')
@@ -0,0 +1,61 @@
+"""Add change_log journal with triggers
+
+Revision ID: 93109a8bc3d7
+Revises: 66d1fa10709b
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '93109a8bc3d7'
+down_revision: Union[str, None] = '66d1fa10709b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JOURNALED_TABLES = {
+    'wips': 'wip_id',
+    'coldheads': 'coldhead_id',
+    'displacers': 'displacer_id',
+    'tests': 'test_id',
+}
+OPERATIONS = {'INSERT': 'NEW', 'UPDATE': 'NEW', 'DELETE': 'OLD'}
+
+
+def upgrade() -> None:
+    op.create_table(
+        'change_log',
+        sa.Column('seq', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('operation', sa.String(), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.Column(
+            'changed_at',
+            sa.DateTime(),
+            server_default=sa.text('(CURRENT_TIMESTAMP)'),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint('seq'),
+        sqlite_autoincrement=True,
+    )
+    for table, pk in JOURNALED_TABLES.items():
+        for operation, row in OPERATIONS.items():
+            op.execute(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{table}_{operation.lower()}_log "
+                f"AFTER {operation} ON {table} "
+                f"BEGIN "
+                f"INSERT INTO change_log (table_name, operation, row_id) "
+                f"VALUES ('{table}', '{operation}', {row}.{pk}); "
+                f"END"
+            )
+
+
+def downgrade() -> None:
+    for table in JOURNALED_TABLES:
+        for operation in OPERATIONS:
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_{operation.lower()}_log")
+    op.drop_table('change_log')
@@ -0,0 +1,55 @@
+"""Add import_journal for resumable imports
+
+Revision ID: c5e2a7d41f08
+Revises: 93109a8bc3d7
+Create Date: 2026-10-19 11:02:17.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e2a7d41f08'
+down_revision: Union[str, None] = '93109a8bc3d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'import_journal',
+        sa.Column('journal_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('fingerprint', sa.String(), nullable=False),
+        sa.Column('chunk_size', sa.Integer(), nullable=False),
+        sa.Column('chunks_committed', sa.Integer(), nullable=False),
+        sa.Column('rows_committed', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column(
+            'started_at',
+            sa.DateTime(),
+            server_default=sa.text('(CURRENT_TIMESTAMP)'),
+            nullable=False,
+        ),
+        sa.Column(
+            'updated_at',
+            sa.DateTime(),
+            server_default=sa.text('(CURRENT_TIMESTAMP)'),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint('journal_id'),
+    )
+    op.create_index(
+        op.f('ix_import_journal_fingerprint'),
+        'import_journal',
+        ['fingerprint'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_import_journal_fingerprint'), table_name='import_journal')
+    op.drop_table('import_journal')
@@ -0,0 +1,291 @@
+"""Add typed test measurement columns and backfill them from legacy tests data
+
+Revision ID: e81f4a6c2d57
+Revises: 4b8f0e6d2a91
+Create Date: 2026-10-19 14:02:51.630914
+
+"""
+import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81f4a6c2d57'
+down_revision: Union[str, None] = '4b8f0e6d2a91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tests columns of db_ops.models.Test added here, with their type
+TEST_COLUMNS = {
+    'wip_id': sa.Integer(),
+    'test_date': sa.Date(),
+    'station': sa.Integer(),
+    'pass_fail': sa.String(),
+    'mode': sa.String(),
+    'turns': sa.Integer(),
+    'first_stage_heaters': sa.Float(),
+    'second_stage_heater': sa.Float(),
+    'first_stage_temp': sa.Float(),
+    'second_stage_temp': sa.Float(),
+    'efficiency1': sa.Float(),
+    'efficiency2': sa.Float(),
+    'test_attempt': sa.Integer(),
+    'notes': sa.String(),
+}
+INDEXED_COLUMNS = ['wip_id', 'test_date', 'station']
+# Legacy test dates besides ISO ones: month first, as Excel exports them and as
+# the importers read them
+LEGACY_DATE_FORMATS = ['%m/%d/%Y', '%m/%d/%y', '%m-%d-%Y', '%Y/%m/%d']
+
+
+def affinity(declared_type):
+    """SQLite's column affinity for a declared type name (datatype3.html, 3.1)."""
+    declared = declared_type.upper()
+    if 'INT' in declared:
+        return 'INTEGER'
+    if any(name in declared for name in ('CHAR', 'CLOB', 'TEXT')):
+        return 'TEXT'
+    if 'BLOB' in declared or not declared:
+        return 'BLOB'
+    if any(name in declared for name in ('REAL', 'FLOA', 'DOUB')):
+        return 'REAL'
+    return 'NUMERIC'
+
+
+def declared_affinity(name):
+    return affinity(str(TEST_COLUMNS[name].compile(dialect=op.get_bind().dialect)))
+
+
+def legacy_date(value):
+    """
+    The YYYY-MM-DD date of a legacy test date in one of LEGACY_DATE_FORMATS,
+    with or without a time part, or None. Registered as an SQL function.
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    day = value.split()[0]
+    for date_format in LEGACY_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(day, date_format).date().isoformat()
+        except ValueError:
+            pass
+    return None
+
+
+def create_legacy_date_function():
+    """Registers legacy_date for the statements of this revision."""
+    op.get_bind().connection.driver_connection.create_function(
+        'legacy_date', 1, legacy_date, deterministic=True
+    )
+
+
+def test_date_sql(name):
+    """
+    SQL for a legacy test date as YYYY-MM-DD text, or NULL. ISO text is read by
+    date() and only other text goes through legacy_date.
+    """
+    iso = f"{name} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'"
+    return (
+        f"CASE WHEN typeof({name}) <> 'text' THEN NULL "
+        f"WHEN {iso} THEN date({name}) ELSE legacy_date({name}) END"
+    )
+
+
+def unconvertible(column, existing):
+    """
+    SQL for the text a numeric legacy column could not convert, or the value
+    of a test date that is not a date, or NULL.
+    """
+    name = existing[column]
+    if column == 'test_date':
+        return (
+            f"CASE WHEN {name} IS NOT NULL AND trim({name}) <> '' "
+            f"AND ({test_date_sql(name)}) IS NULL THEN {name} END"
+        )
+    return f"CASE WHEN typeof({name}) = 'text' AND trim({name}) <> '' THEN {name} END"
+
+
+def moved_to_notes(columns, existing):
+    """
+    SQL for the notes of a test with the text its numeric columns and test date
+    could not convert appended, e.g. 'Bad seal; turns: n/a', so cleaning them
+    loses nothing.
+
+    :param columns: Numeric legacy columns of TEST_COLUMNS, and test_date.
+    :param existing: Lower-cased column name -> name in the tests table.
+    """
+    moved = ' || '.join(
+        f"coalesce('; {column}: ' || {unconvertible(column, existing)}, '')"
+        for column in columns
+    )
+    notes = cleaned('notes', existing)
+    return f"nullif(substr(coalesce('; ' || {notes}, '') || {moved}, 3), '')"
+
+
+def cleaned(column, existing):
+    """
+    SQL for a legacy column's value as it should be stored: blank text and
+    text a numeric column could not convert become NULL (see moved_to_notes),
+    dates are stored as YYYY-MM-DD and those that are not dates become NULL
+    too, and a missing Pass/Fail is taken from the legacy passed flag.
+
+    :param column: Column of TEST_COLUMNS.
+    :param existing: Lower-cased column name -> name in the tests table.
+    """
+    name = existing.get(column, column)
+    if declared_affinity(column) in ('INTEGER', 'REAL'):
+        return f"CASE WHEN typeof({name}) = 'text' THEN NULL ELSE {name} END"
+    if column == 'test_date':
+        return test_date_sql(name)
+    value = f"CASE WHEN trim({name}) = '' THEN NULL ELSE {name} END"
+    if column == 'pass_fail':
+        # Capitalized, as db_ops.csv_import stores it
+        value = f"upper(substr(trim({value}), 1, 1)) || lower(substr(trim({value}), 2))"
+        if 'passed' in existing:
+            value = (
+                f"coalesce({value}, "
+                f"CASE trim({existing['passed']}) "
+                f"WHEN '1' THEN 'Pass' WHEN '0' THEN 'Fail' END)"
+            )
+    return value
+
+
+def drop_tests_triggers():
+    """
+    Drops the triggers on tests and returns their DDL. Recreating the table
+    drops them anyway, and a backfill is not a change to journal.
+    """
+    triggers = (
+        op.get_bind()
+        .exec_driver_sql(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type = 'trigger' AND lower(tbl_name) = 'tests'"
+        )
+        .fetchall()
+    )
+    for name, _ in triggers:
+        op.execute(f'DROP TRIGGER {name}')
+    return [sql for _, sql in triggers]
+
+
+def disable_foreign_keys():
+    """
+    Turns foreign key enforcement off, as copying tests drops it while
+    wips.test_id may still reference its rows, and returns whether it was on.
+    SQLite ignores the PRAGMA inside a transaction, which pysqlite only opens
+    at the run's first data change.
+    """
+    enabled = op.get_bind().exec_driver_sql('PRAGMA foreign_keys').scalar()
+    op.execute('PRAGMA foreign_keys = OFF')
+    return bool(enabled)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    declared = {
+        row[1].lower(): (row[1], row[2])
+        for row in bind.exec_driver_sql('PRAGMA table_info(tests)')
+    }
+    existing = {column: name for column, (name, _) in declared.items()}
+    legacy = [column for column in TEST_COLUMNS if column in existing]
+    create_legacy_date_function()
+
+    # Legacy columns whose declared type has the wrong affinity are retyped by
+    # copying the table once. The copy is a plain INSERT ... SELECT, so the new
+    # affinity converts numeric text; Alembic's CAST would turn '' into 0.
+    retyped = [
+        sa.Column(existing[column], TEST_COLUMNS[column])
+        for column in legacy
+        if affinity(declared[column][1]) != declared_affinity(column)
+    ]
+    table_sql = bind.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND lower(name) = 'tests'"
+    ).scalar()
+    indexes = {
+        row[1].lower() for row in bind.exec_driver_sql('PRAGMA index_list(tests)')
+    }
+    triggers = drop_tests_triggers()
+    foreign_keys = disable_foreign_keys()
+
+    with op.batch_alter_table(
+        'tests',
+        recreate='always' if retyped else 'auto',
+        reflect_args=retyped,
+        table_kwargs={'sqlite_autoincrement': 'AUTOINCREMENT' in table_sql.upper()},
+    ) as batch_op:
+        for column, type_ in TEST_COLUMNS.items():
+            if column not in existing:
+                batch_op.add_column(sa.Column(column, type_, nullable=True))
+        if 'wip_id' not in existing:
+            batch_op.create_foreign_key(
+                'fk_tests_wip_id_wips', 'wips', ['wip_id'], ['wip_id']
+            )
+
+    # One pass over the rows cleans every legacy column and links each test to
+    # its WIP through the legacy WIP number
+    assignments = {
+        existing[column]: cleaned(column, existing)
+        for column in legacy
+        if column != 'wip_id'
+    }
+    if 'pass_fail' not in legacy and 'passed' in existing:
+        assignments['pass_fail'] = cleaned('pass_fail', existing)
+    unconverted = [
+        column
+        for column in legacy
+        if column == 'test_date'
+        or (column != 'wip_id' and declared_affinity(column) in ('INTEGER', 'REAL'))
+    ]
+    if unconverted:
+        assignments[existing.get('notes', 'notes')] = moved_to_notes(
+            unconverted, existing
+        )
+    if 'wip' in existing:
+        assignments['wip_id'] = (
+            f"coalesce(wip_id, (SELECT w.wip_id FROM wips AS w "
+            f"WHERE w.wip_number = trim(tests.{existing['wip']})))"
+        )
+    if assignments:
+        update = 'UPDATE tests SET ' + ', '.join(
+            f'{name} = {value}' for name, value in assignments.items()
+        )
+        if 'wip_id' not in assignments:
+            # Only rows with something to clean are rewritten; linking WIPs
+            # rewrites nearly every row, and the check would cost a second
+            # evaluation of every expression
+            update += ' WHERE ' + ' OR '.join(
+                f'{name} IS NOT ({value})' for name, value in assignments.items()
+            )
+        op.execute(update)
+
+    # Built once the values are final rather than kept up to date by the UPDATE
+    for column in INDEXED_COLUMNS:
+        if f'ix_tests_{column}' not in indexes:
+            op.create_index(
+                f'ix_tests_{column}',
+                'tests',
+                [existing.get(column, column)],
+                unique=False,
+            )
+
+    for sql in triggers:
+        op.execute(sql)
+    if foreign_keys:
+        op.execute('PRAGMA foreign_keys = ON')
+
+
+def downgrade() -> None:
+    triggers = drop_tests_triggers()
+    foreign_keys = disable_foreign_keys()
+    with op.batch_alter_table('tests') as batch_op:
+        for column in INDEXED_COLUMNS:
+            batch_op.drop_index(f'ix_tests_{column}')
+        for column in TEST_COLUMNS:
+            batch_op.drop_column(column)
+    for sql in triggers:
+        op.execute(sql)
+    if foreign_keys:
+        op.execute('PRAGMA foreign_keys = ON')
@@ -0,0 +1,160 @@
+"""Add per-coldhead and per-displacer test summary tables with triggers
+
+Revision ID: f3a9c7d15b20
+Revises: e81f4a6c2d57
+Create Date: 2026-10-19 16:40:12.509377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c7d15b20'
+down_revision: Union[str, None] = 'e81f4a6c2d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SUMMARY_TABLES = {
+    'coldhead_test_summary': ('coldhead_id', 'coldheads'),
+    'displacer_test_summary': ('displacer_id', 'displacers'),
+}
+LAST_TEST_ORDER = "coalesce(t.test_date, '') DESC, t.test_id DESC"
+
+
+def result_is(column, result):
+    """1 if the pass_fail value in column is result, whatever its case, else 0."""
+    return f"(upper({column}) IS '{result.upper()}')"
+
+
+def recompute_sql(table, key, value=None):
+    """The statements of db_ops.test_summary rebuilding one part's row, or all."""
+    part = f'w.{key} = {value}' if value is not None else f'w.{key} IS NOT NULL'
+    row = f' WHERE {key} = {value}' if value is not None else ''
+    return [
+        f'DELETE FROM {table}{row}',
+        f'INSERT INTO {table} ({key}, attempts, fail_count, pass_count) '
+        f"SELECT w.{key}, count(*), total({result_is('t.pass_fail', 'Fail')}), "
+        f"total({result_is('t.pass_fail', 'Pass')}) "
+        f'FROM wips AS w JOIN tests AS t ON t.wip_id = w.wip_id '
+        f'WHERE {part} GROUP BY w.{key}',
+        f'UPDATE {table} SET (last_test_id, last_test_date, last_result) = ('
+        f'SELECT t.test_id, t.test_date, t.pass_fail '
+        f'FROM wips AS w JOIN tests AS t ON t.wip_id = w.wip_id '
+        f'WHERE w.{key} = {table}.{key} ORDER BY {LAST_TEST_ORDER} LIMIT 1){row}',
+    ]
+
+
+def insert_sql(table, key):
+    newer = (
+        f"(coalesce(excluded.last_test_date, ''), excluded.last_test_id) > "
+        f"(coalesce({table}.last_test_date, ''), {table}.last_test_id)"
+    )
+    latest = ', '.join(
+        f'{column} = CASE WHEN {newer} THEN excluded.{column} ELSE {table}.{column} END'
+        for column in ('last_test_id', 'last_test_date', 'last_result')
+    )
+    return (
+        f'INSERT INTO {table} ({key}, attempts, fail_count, pass_count, '
+        f'last_test_id, last_test_date, last_result) '
+        f"SELECT w.{key}, 1, {result_is('NEW.pass_fail', 'Fail')}, "
+        f"{result_is('NEW.pass_fail', 'Pass')}, "
+        f'NEW.test_id, NEW.test_date, NEW.pass_fail '
+        f'FROM wips AS w WHERE w.wip_id = NEW.wip_id '
+        f'ON CONFLICT ({key}) DO UPDATE SET attempts = {table}.attempts + 1, '
+        f'fail_count = {table}.fail_count + excluded.fail_count, '
+        f'pass_count = {table}.pass_count + excluded.pass_count, {latest}'
+    )
+
+
+def update_sql(table, key, value):
+    counts = ', '.join(
+        f"{column} = {column} + {result_is('NEW.pass_fail', result)} "
+        f"- {result_is('OLD.pass_fail', result)}"
+        for column, result in (('fail_count', 'Fail'), ('pass_count', 'Pass'))
+    )
+    return [
+        f'UPDATE {table} SET {counts}, '
+        f'last_result = CASE WHEN last_test_id = NEW.test_id '
+        f'THEN NEW.pass_fail ELSE last_result END '
+        f'WHERE {key} = {value}',
+        recompute_sql(table, key, value)[2] + ' AND NEW.test_date IS NOT OLD.test_date',
+    ]
+
+
+def triggers(table, key):
+    """Trigger name -> (event, statements), as in db_ops.test_summary."""
+    old_part = f'(SELECT {key} FROM wips WHERE wip_id = OLD.wip_id)'
+    new_part = f'(SELECT {key} FROM wips WHERE wip_id = NEW.wip_id)'
+    return {
+        f'trg_tests_insert_{table}': (
+            'AFTER INSERT ON tests WHEN NEW.wip_id IS NOT NULL',
+            [insert_sql(table, key)],
+        ),
+        f'trg_tests_update_{table}': (
+            'AFTER UPDATE OF test_date, pass_fail ON tests '
+            'WHEN NEW.wip_id IS OLD.wip_id',
+            update_sql(table, key, new_part),
+        ),
+        f'trg_tests_move_{table}': (
+            'AFTER UPDATE OF wip_id ON tests WHEN NEW.wip_id IS NOT OLD.wip_id',
+            recompute_sql(table, key, old_part) + recompute_sql(table, key, new_part),
+        ),
+        f'trg_tests_delete_{table}': (
+            'AFTER DELETE ON tests WHEN OLD.wip_id IS NOT NULL',
+            recompute_sql(table, key, old_part),
+        ),
+        f'trg_wips_update_{table}': (
+            f'AFTER UPDATE OF {key} ON wips WHEN NEW.{key} IS NOT OLD.{key}',
+            recompute_sql(table, key, f'OLD.{key}')
+            + recompute_sql(table, key, f'NEW.{key}'),
+        ),
+        f'trg_wips_delete_{table}': (
+            'AFTER DELETE ON wips',
+            recompute_sql(table, key, f'OLD.{key}'),
+        ),
+    }
+
+
+def upgrade() -> None:
+    # The triggers rebuild a part's row through its WIPs
+    op.create_index(
+        'ix_wips_coldhead_id', 'wips', ['coldhead_id'], unique=False, if_not_exists=True
+    )
+    op.create_index(
+        'ix_wips_displacer_id',
+        'wips',
+        ['displacer_id'],
+        unique=False,
+        if_not_exists=True,
+    )
+    for table, (key, parent) in SUMMARY_TABLES.items():
+        op.create_table(
+            table,
+            sa.Column(key, sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('fail_count', sa.Integer(), nullable=False),
+            sa.Column('pass_count', sa.Integer(), nullable=False),
+            sa.Column('last_test_id', sa.Integer(), nullable=True),
+            sa.Column('last_test_date', sa.Date(), nullable=True),
+            sa.Column('last_result', sa.String(), nullable=True),
+            sa.ForeignKeyConstraint([key], [f'{parent}.{key}']),
+            sa.PrimaryKeyConstraint(key),
+        )
+        # Summarize the tests already there once, then keep up with changes
+        for statement in recompute_sql(table, key):
+            op.execute(statement)
+        for name, (event, statements) in triggers(table, key).items():
+            body = ''.join(f'{statement}; ' for statement in statements)
+            op.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body}END')
+
+
+def downgrade() -> None:
+    for table, (key, _) in SUMMARY_TABLES.items():
+        for name in triggers(table, key):
+            op.execute(f'DROP TRIGGER IF EXISTS {name}')
+        op.drop_table(table)
+    op.drop_index('ix_wips_displacer_id', table_name='wips')
+    op.drop_index('ix_wips_coldhead_id', table_name='wips')
@@ -0,0 +1,84 @@
+# benchmarks/bench_csv_import.py
+"""
+Throughput of the tracker CSV importers on CSVs synthesized from the shipped
+samples (db_mngt/dbs/Coldhead_Trackers_SC10.csv and Repair_Tracker_tests.csv).
+
+Each sample is repeated --scale times; copies get distinct WIP numbers,
+coldhead/displacer serials and Test_IDs so every copy creates new records.
+
+Usage:
+    python benchmarks/bench_csv_import.py --scale 100
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from db_ops.csv_import import TrackerCsvImporter  # noqa: E402
+from db_ops.database import configure_sqlite_transactions  # noqa: E402
+from db_ops.models import Base  # noqa: E402
+from logger import logger  # noqa: E402
+
+SAMPLES_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'db_mngt', 'dbs')
+)
+
+
+def synthesize(sample_name, scale, out_path):
+    sample = pd.read_csv(os.path.join(SAMPLES_DIR, sample_name), dtype=str)
+    copies = []
+    for copy in range(scale):
+        frame = sample.copy()
+        suffix = f'-{copy:04d}'
+        for column in ('WIP', 'Coldhead_Serial_Number', 'Displacer_Serial_Number'):
+            if column in frame:
+                frame[column] = frame[column].where(
+                    frame[column].isna(), frame[column] + suffix
+                )
+        if 'Test_ID' in frame:
+            frame['Test_ID'] = (
+                frame['Test_ID'].astype(int) + copy * len(sample)
+            ).astype(str)
+        copies.append(frame)
+    pd.concat(copies, ignore_index=True).to_csv(out_path, index=False)
+    return len(sample) * scale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scale', type=int, default=100)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'csv.db')}")
+        configure_sqlite_transactions(engine)
+        Base.metadata.create_all(engine)
+        importer = TrackerCsvImporter(sessionmaker(bind=engine)(), args.chunk_size)
+
+        for sample_name, method in (
+            ('Coldhead_Trackers_SC10.csv', importer.import_coldhead_trackers),
+            ('Repair_Tracker_tests.csv', importer.import_repair_tests),
+        ):
+            csv_path = os.path.join(tmp_dir, sample_name)
+            rows = synthesize(sample_name, args.scale, csv_path)
+            start = time.perf_counter()
+            counts = method(csv_path)
+            elapsed = time.perf_counter() - start
+            print(f"{sample_name:<28} {rows:>7} rows in {elapsed:5.2f}s "
+                  f"({rows / elapsed:>9,.0f} rows/s) {counts}")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
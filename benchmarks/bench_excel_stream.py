@@ -0,0 +1,100 @@
+# benchmarks/bench_excel_stream.py
+"""
+Compare streaming and whole-workbook Excel imports.
+
+Writes a synthetic order workbook, then imports it in a fresh process with
+MassImporter.stream_insert_from_excel and with mass_insert_from_excel, and
+reports time to the first committed chunk, total time and peak RSS. Run at two
+sizes to see that streaming memory stays flat while the full load grows.
+
+Usage:
+    python benchmarks/bench_excel_stream.py --rows 20000 100000
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from openpyxl import Workbook  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from db_ops.database import configure_sqlite_transactions  # noqa: E402
+from db_ops.mass_import import MassImporter  # noqa: E402
+from db_ops.models import Base  # noqa: E402
+from logger import logger  # noqa: E402
+
+
+def write_workbook(path, rows, prefix=''):
+    """Write the workbook in openpyxl's write-only mode so generation stays cheap."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(['WIP', 'Coldhead_Serial_Number', 'Displacer_Serial_Number',
+                  'Arrival_Date', 'Initial_Open_Date', 'Test1_PassFail', 'Test1_Mode'])
+    for i in range(rows):
+        sheet.append([f'{prefix}WIP{i:07d}', f'{prefix}CH{i // 3:06d}',
+                      f'{prefix}D{i:07d}', f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+                      None, 'Pass' if i % 2 else 'Fail', 'A'])
+    workbook.save(path)
+
+
+def import_in_child(excel_path, db_path, mode, chunk_size, results):
+    logger.setLevel(logging.WARNING)
+    engine = create_engine(f'sqlite:///{db_path}')
+    configure_sqlite_transactions(engine)
+    Base.metadata.create_all(engine)
+    first_commit = []
+    start = time.perf_counter()
+    event.listen(engine, 'commit', lambda conn: first_commit or first_commit.append(
+        time.perf_counter() - start))
+
+    importer = MassImporter(sessionmaker(bind=engine)())
+    if mode == 'stream':
+        counts = importer.stream_insert_from_excel(excel_path, chunk_size)
+    else:
+        counts = importer.mass_insert_from_excel(excel_path, chunk_size)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put((counts['wips'], first_commit[0] if first_commit else float('nan'),
+                 elapsed, peak_mb))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[20_000, 100_000])
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    print(
+        f"{'rows':>8} {'mode':>7} {'first chunk s':>14} {'total s':>8} "
+        f"{'peak RSS MB':>12}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in args.rows:
+            excel_path = os.path.join(tmp_dir, f'orders_{rows}.xlsx')
+            write_workbook(excel_path, rows)
+            for mode in ('stream', 'full'):
+                db_path = os.path.join(tmp_dir, f'{mode}_{rows}.db')
+                results = multiprocessing.Queue()
+                process = multiprocessing.Process(
+                    target=import_in_child,
+                    args=(excel_path, db_path, mode, args.chunk_size, results),
+                )
+                process.start()
+                wips, first, elapsed, peak_mb = results.get()
+                process.join()
+                print(
+                    f"{rows:>8} {mode:>7} {first:>14.2f} {elapsed:>8.2f} "
+                    f"{peak_mb:>12.0f}"
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_mass_import.py
+"""
+Benchmark the vectorized MassImporter pipeline on a synthetic order sheet.
+
+Times the column-wise normalization (prepare_orders) and the chunked writes
+(BulkOrderWriter, or StagingOrderWriter with --mode staging) separately. With
+--excel the sheet is also written to an .xlsx file and imported end to end
+through MassImporter.mass_insert_from_excel, which adds the workbook parsing
+time.
+
+Usage:
+    python benchmarks/bench_mass_import.py --rows 100000 --excel
+    python benchmarks/bench_mass_import.py --rows 100000 --mode staging
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from db_ops.database import configure_sqlite_transactions  # noqa: E402
+from db_ops.import_profiles import prepare_orders  # noqa: E402
+from db_ops.mass_import import ORDER_WRITERS, MassImporter  # noqa: E402
+from db_ops.models import Base  # noqa: E402
+from logger import logger  # noqa: E402
+
+TARGET_ROWS_PER_SECOND = 10_000
+
+
+def make_sheet(rows, seed=0):
+    """Orders with ~1 coldhead per 3 WIPs and two test columns groups."""
+    rng = np.random.default_rng(seed)
+    index = np.arange(rows)
+    arrival = pd.Timestamp('2020-01-01') + pd.to_timedelta(
+        rng.integers(0, 1500, rows), unit='D'
+    )
+    return pd.DataFrame({
+        'WIP': [f'WIP{i:07d}' for i in index],
+        'Coldhead_Serial_Number': rng.integers(0, max(1, rows // 3), rows) + 100000,
+        'Displacer_Serial_Number': [f'D{i:07d}' for i in index],
+        'Arrival_Date': arrival,
+        'Initial_Open_Date': arrival - pd.Timedelta(days=30),
+        'Test1_PassFail': rng.choice(['Pass', 'Fail', None], rows),
+        'Test1_Mode': rng.choice(['A', 'B'], rows),
+        'Test2_PassFail': rng.choice(['Pass', None, None], rows),
+        'Test2_Mode': rng.choice(['A', None], rows),
+    })
+
+
+def make_session(db_path):
+    engine = create_engine(f'sqlite:///{db_path}')
+    configure_sqlite_transactions(engine)
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(bind=engine)()
+
+
+def report(label, rows, elapsed):
+    rate = rows / elapsed
+    verdict = 'ok' if rate >= TARGET_ROWS_PER_SECOND else 'BELOW TARGET'
+    print(
+        f"{label:<28} {rows} rows in {elapsed:6.2f}s ({rate:>9,.0f} rows/s) {verdict}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument(
+        '--excel', action='store_true', help='Also run through an .xlsx file.'
+    )
+    parser.add_argument(
+        '--mode', choices=ORDER_WRITERS, default='bulk', help='How chunks are written.'
+    )
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    sheet = make_sheet(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine, session = make_session(os.path.join(tmp_dir, 'frame.db'))
+        start = time.perf_counter()
+        prepared = prepare_orders(sheet)
+        prepare_elapsed = time.perf_counter() - start
+        counts = ORDER_WRITERS[args.mode](session, args.chunk_size).write(prepared)
+        total_elapsed = time.perf_counter() - start
+        session.close()
+        engine.dispose()
+        write_elapsed = total_elapsed - prepare_elapsed
+        print(
+            f"prepare_orders {prepare_elapsed:.2f}s, "
+            f"write {write_elapsed:.2f}s {counts}"
+        )
+        report('prepare + write', args.rows, total_elapsed)
+
+        if args.excel:
+            excel_path = os.path.join(tmp_dir, 'orders.xlsx')
+            sheet.to_excel(excel_path, index=False)
+            engine, session = make_session(os.path.join(tmp_dir, 'excel.db'))
+            start = time.perf_counter()
+            MassImporter(session, mode=args.mode).mass_insert_from_excel(
+                excel_path, args.chunk_size
+            )
+            report('mass_insert_from_excel', args.rows, time.perf_counter() - start)
+            session.close()
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
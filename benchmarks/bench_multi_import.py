@@ -0,0 +1,69 @@
+# benchmarks/bench_multi_import.py
+"""
+Scaling of MultiFileImporter with the number of parser processes.
+
+Synthesizes --files order workbooks of --rows rows each, then imports the set
+once per --workers value into a fresh database. Parsing (openpyxl) runs in the
+worker processes; all writes go through the single writer in this process, so
+throughput should rise with workers until the writer saturates.
+
+Usage:
+    python benchmarks/bench_multi_import.py --files 8 --rows 10000 --workers 1 2 4
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from bench_excel_stream import write_workbook  # noqa: E402
+from db_ops.database import configure_sqlite_transactions  # noqa: E402
+from db_ops.models import Base  # noqa: E402
+from db_ops.multi_import import MultiFileImporter  # noqa: E402
+from logger import logger  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=10_000, help='Rows per file.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    print(f"cpu_count={os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for i in range(args.files):
+            path = os.path.join(tmp_dir, f'orders_{i}.xlsx')
+            write_workbook(path, args.rows, prefix=f'F{i:02d}')
+            paths.append(path)
+
+        total_rows = args.files * args.rows
+        for workers in args.workers:
+            db_path = os.path.join(tmp_dir, f'multi_{workers}.db')
+            engine = create_engine(f'sqlite:///{db_path}')
+            configure_sqlite_transactions(engine)
+            Base.metadata.create_all(engine)
+            importer = MultiFileImporter(
+                sessionmaker(bind=engine)(), workers, args.chunk_size
+            )
+            start = time.perf_counter()
+            results = importer.import_files(paths)
+            elapsed = time.perf_counter() - start
+            errors = [path for path, result in results.items() if 'error' in result]
+            print(f"workers={workers:<3} {total_rows} rows in {elapsed:6.2f}s "
+                  f"({total_rows / elapsed:>9,.0f} rows/s) errors={len(errors)}")
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
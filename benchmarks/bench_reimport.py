@@ -0,0 +1,83 @@
+# benchmarks/bench_reimport.py
+"""
+Benchmark re-importing a mostly unchanged order sheet.
+
+Imports a synthetic sheet once, changes --changed percent of its rows and
+imports it again. The re-import compares per-row content hashes and writes only
+the changed rows, so it should take a fraction of the first import. With
+--excel both imports go through MassImporter.mass_insert_from_excel, which
+adds the workbook parsing and validation time.
+
+Usage:
+    python benchmarks/bench_reimport.py --rows 100000 --changed 1 --excel
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd  # noqa: E402
+
+from bench_mass_import import make_session, make_sheet  # noqa: E402
+from db_ops.import_pipeline import BulkOrderWriter  # noqa: E402
+from db_ops.import_profiles import prepare_orders  # noqa: E402
+from db_ops.mass_import import MassImporter  # noqa: E402
+from logger import logger  # noqa: E402
+
+
+def change_rows(sheet, percent):
+    """Moves the arrival date of every (100 / percent)th row by a day."""
+    changed = sheet.copy()
+    step = max(1, round(100 / percent))
+    changed.loc[::step, 'Arrival_Date'] += pd.Timedelta(days=1)
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument(
+        '--changed', type=float, default=1.0, help='Percent of rows changed.'
+    )
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument(
+        '--excel', action='store_true', help='Import through .xlsx files.'
+    )
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    sheet = make_sheet(args.rows)
+    sheets = {'first import': sheet, 're-import': change_rows(sheet, args.changed)}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine, session = make_session(os.path.join(tmp_dir, 'reimport.db'))
+        for label, frame in sheets.items():
+            if args.excel:
+                path = os.path.join(tmp_dir, f'{label.replace(" ", "_")}.xlsx')
+                frame.to_excel(path, index=False)
+                start = time.perf_counter()
+                counts = MassImporter(session).mass_insert_from_excel(
+                    path, args.chunk_size
+                )
+            else:
+                start = time.perf_counter()
+                counts = BulkOrderWriter(session, args.chunk_size).write(
+                    prepare_orders(frame)
+                )
+            elapsed = time.perf_counter() - start
+            print(
+                f"{label:<13} {args.rows} rows in {elapsed:6.2f}s: "
+                f"{counts['wips']} created, {counts['updated']} updated, "
+                f"{counts['unchanged']} unchanged"
+            )
+        session.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+# benchmarks/bench_schema_reconcile.py
+"""
+Benchmark bringing a fleet of site databases up to date with db_ops.models.
+
+Builds --sites copies of an older site database (no journal tables, columns
+added since missing, --rows WIPs) and updates them two ways:
+
+- per column: the old new_db.py helpers, one connection, PRAGMA and
+  committed ALTER TABLE per column, and one per missing table, index and
+  trigger;
+- reconcile: db_ops.schema_reconcile.reconcile_schema, one introspection
+  and one transaction per database.
+
+Most of the difference is commits, each of which syncs the database file to
+disk, so run it on the disk the databases live on (--dir).
+
+Usage:
+    python benchmarks/bench_schema_reconcile.py --sites 50 --dir D:\\scratch
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from db_ops.change_log import change_trigger_ddl  # noqa: E402
+from db_ops.schema_reconcile import reconcile_schema  # noqa: E402
+from logger import logger  # noqa: E402
+
+OLD_SCHEMA = '''
+    CREATE TABLE coldheads (
+        coldhead_id INTEGER PRIMARY KEY, serial_number VARCHAR NOT NULL UNIQUE
+    );
+    CREATE TABLE displacers (
+        displacer_id INTEGER PRIMARY KEY,
+        displacer_serial_number VARCHAR NOT NULL UNIQUE, status VARCHAR
+    );
+    CREATE TABLE wips (
+        wip_id INTEGER PRIMARY KEY, coldhead_id INTEGER NOT NULL,
+        displacer_id INTEGER NOT NULL, wip_number VARCHAR NOT NULL UNIQUE
+    );
+    CREATE TABLE tests (test_id INTEGER PRIMARY KEY, name VARCHAR NOT NULL);
+'''
+
+FILL_SQL = '''
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows})
+    INSERT INTO wips (coldhead_id, displacer_id, wip_number)
+    SELECT i, i, 'WIP' || i FROM n
+'''
+
+
+def make_site_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.executescript(OLD_SCHEMA)
+    conn.execute(FILL_SQL.format(rows=rows))
+    conn.commit()
+    conn.close()
+
+
+def add_column_if_missing(db_path, table_name, column_name, column_type):
+    """The old helper: a fresh connection and commit per column."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA table_info({table_name});")
+    if column_name not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(
+            f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type};"
+        )
+    conn.commit()
+    conn.close()
+
+
+def update_per_column(db_path, statements):
+    """
+    Apply a reconcile plan the old way: one connection and commit per
+    statement.
+    """
+    if any(statement.startswith('CREATE TABLE change_log') for statement in statements):
+        statements = statements + change_trigger_ddl()
+    for statement in statements:
+        words = statement.split()
+        if statement.startswith('ALTER TABLE'):
+            add_column_if_missing(db_path, words[2], words[5], ' '.join(words[6:]))
+        else:
+            conn = sqlite3.connect(db_path)
+            conn.execute(
+                statement.replace('CREATE TABLE', 'CREATE TABLE IF NOT EXISTS', 1)
+            )
+            conn.commit()
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--sites', type=int, default=50, help='Site databases to update.'
+    )
+    parser.add_argument(
+        '--rows', type=int, default=20_000, help='WIPs per site database.'
+    )
+    parser.add_argument(
+        '--dir', help='Directory for the databases (default: the system temp dir).'
+    )
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp_dir:
+        template = os.path.join(tmp_dir, 'template.db')
+        make_site_db(template, args.rows)
+        statements = reconcile_schema(template, dry_run=True)['statements']
+        print(f"{args.sites} site databases, {len(statements)} schema changes each")
+
+        for label in ('per column', 'reconcile'):
+            paths = [
+                os.path.join(tmp_dir, f'{label}-{site}.db')
+                for site in range(args.sites)
+            ]
+            for path in paths:
+                shutil.copy(template, path)
+            start = time.perf_counter()
+            for path in paths:
+                if label == 'reconcile':
+                    reconcile_schema(path)
+                else:
+                    update_per_column(path, statements)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{label:<11} {elapsed:6.2f}s "
+                f"({elapsed / args.sites * 1000:.1f} ms per database)"
+            )
+
+
+if __name__ == '__main__':
+    main()
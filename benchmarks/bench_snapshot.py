@@ -0,0 +1,114 @@
+# benchmarks/bench_snapshot.py
+"""
+Benchmark db_mngt/dbs/snapshot_db.py: how long a snapshot takes and how long
+it stalls a writer committing small transactions from another thread.
+
+The snapshot is taken in one backup step (--pages-per-step -1, the database
+read-locked for the whole copy) and in steps of snapshot_db.PAGES_PER_STEP
+pages, each while the writer commits one row every --write-interval ms. In
+the default rollback-journal mode each commit restarts a stepped copy; with
+--wal the copy reads one snapshot and is never restarted.
+
+Usage:
+    python benchmarks/bench_snapshot.py --rows 1000000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from db_mngt.dbs import snapshot_db  # noqa: E402
+
+FILL_SQL = '''
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows})
+    INSERT INTO tests (wip, station, pass_fail, turns, first_stage_temp, notes)
+    SELECT 'WIP' || i, 'S' || (i % 4), 'Pass', i % 60, 40 + (i % 50) / 10.0,
+           'Routine load test'
+    FROM n
+'''
+
+
+def make_db(path, rows, wal):
+    conn = sqlite3.connect(path)
+    if wal:
+        conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('''
+        CREATE TABLE tests (
+            test_id INTEGER PRIMARY KEY, wip TEXT, station TEXT, pass_fail TEXT,
+            turns INTEGER, first_stage_temp REAL, notes TEXT
+        )
+    ''')
+    conn.execute(FILL_SQL.format(rows=rows))
+    conn.commit()
+    conn.close()
+
+
+def run_writer(db_path, interval, stop, latencies):
+    """Commit one row every interval seconds, recording each commit's latency."""
+    conn = sqlite3.connect(db_path, timeout=60)
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.execute(
+            "INSERT INTO tests (wip, notes) VALUES ('WIP-new', 'Saved from the GUI')"
+        )
+        conn.commit()
+        latencies.append(time.perf_counter() - start)
+        time.sleep(interval)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--rows', type=int, default=1_000_000, help='Rows in the tests table.'
+    )
+    parser.add_argument(
+        '--write-interval',
+        type=float,
+        default=50,
+        help='Milliseconds between writer commits.',
+    )
+    parser.add_argument(
+        '--wal', action='store_true', help='Put the database in WAL mode.'
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'New_Database.db')
+        make_db(db_path, args.rows, args.wal)
+        print(f"Built a {os.path.getsize(db_path) / 2**20:.0f} MiB database")
+
+        for label, pages_per_step in (
+            ('one step', -1),
+            ('stepped', snapshot_db.PAGES_PER_STEP),
+        ):
+            latencies, stop = [], threading.Event()
+            writer = threading.Thread(
+                target=run_writer,
+                args=(db_path, args.write_interval / 1000, stop, latencies),
+            )
+            writer.start()
+            time.sleep(0.2)
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = snapshot_db.snapshot(
+                    db_path, os.path.join(tmp_dir, 'snapshots'), pages_per_step
+                )
+            stop.set()
+            writer.join()
+            print(
+                f"{label:<9} {stats['seconds']:6.2f}s, {stats['steps']} steps, "
+                f"{stats['restarts']} restarts; writer: {len(latencies)} commits, "
+                f"slowest {max(latencies) * 1000:.0f} ms"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+# benchmarks/bench_test_analytics.py
+"""
+Benchmark db_ops.test_analytics on a database of --rows tests spread over
+--wips WIPs.
+
+Reports the time to load the measurement arrays (one query, then one sort
+into runs per grouping and column) and to build the fleet report (statistics
+per coldhead, displacer and station) from the loaded runs, before and after
+tests change, against pandas: read_sql of the same columns and a groupby per
+grouping with the same statistics.
+
+Usage:
+    python benchmarks/bench_test_analytics.py --rows 1000000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from db_ops.models import Base  # noqa: E402
+from db_ops.test_analytics import (  # noqa: E402
+    DEFAULT_PERCENTILES,
+    GROUP_KEYS,
+    MEASUREMENTS,
+    FleetAnalytics,
+)
+from logger import logger  # noqa: E402
+
+FILL_SQL = [
+    '''
+    WITH RECURSIVE n(i) AS (
+        SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {coldheads}
+    )
+    INSERT INTO coldheads (coldhead_id, serial_number) SELECT i, 'J' || i FROM n
+    ''',
+    '''
+    WITH RECURSIVE n(i) AS (
+        SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {coldheads}
+    )
+    INSERT INTO displacers (displacer_id, displacer_serial_number)
+    SELECT i, 'R' || i FROM n
+    ''',
+    '''
+    WITH RECURSIVE n(i) AS (
+        SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {wips}
+    )
+    INSERT INTO wips (wip_id, coldhead_id, displacer_id, wip_number)
+    SELECT i, 1 + i % {coldheads}, 1 + (i * 7) % {coldheads}, 'W' || i FROM n
+    ''',
+    '''
+    WITH RECURSIVE n(i) AS (
+        SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows}
+    )
+    INSERT INTO tests (
+        name, wip_id, station, pass_fail, first_stage_temp, second_stage_temp,
+        first_stage_heaters, second_stage_heater, efficiency1, efficiency2
+    )
+    SELECT 'Test ' || i, 1 + i % {wips}, 1 + i % 4,
+        CASE WHEN i % 10 = 0 THEN 'Pending' WHEN i % 3 THEN 'Pass' ELSE 'Fail' END,
+        CASE WHEN i % 17 THEN 40 + (abs(random()) % 500) / 10.0 END,
+        15 + (abs(random()) % 70) / 10.0,
+        60 + abs(random()) % 15, 140 + abs(random()) % 20,
+        (abs(random()) % 120) / 100.0, (abs(random()) % 150) / 100.0
+    FROM n
+    ''',
+]
+
+
+def make_db(db_path, rows, wips):
+    engine = create_engine(f'sqlite:///{db_path}')
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for sql in FILL_SQL:
+            connection.exec_driver_sql(
+                sql.format(rows=rows, wips=wips, coldheads=max(wips // 3, 1))
+            )
+    return engine
+
+
+def pandas_report(engine):
+    """The same statistics with read_sql and a pandas groupby."""
+    frame = pd.read_sql(
+        'SELECT w.coldhead_id, w.displacer_id, t.station, t.pass_fail, '
+        f"{', '.join(f't.{name}' for name in MEASUREMENTS)} "
+        'FROM tests AS t LEFT JOIN wips AS w ON w.wip_id = t.wip_id',
+        engine,
+    )
+    frame['passed'] = (frame['pass_fail'] == 'Pass').astype(int)
+    frame['failed'] = (frame['pass_fail'] == 'Fail').astype(int)
+    quantiles = [percentile / 100 for percentile in DEFAULT_PERCENTILES]
+    reports = {}
+    for key, _ in GROUP_KEYS.values():
+        grouped = frame.groupby(key, dropna=False)
+        parts = [grouped[['passed', 'failed']].sum()]
+        parts.append(
+            grouped[list(MEASUREMENTS)].agg(['count', 'mean', 'std', 'min', 'max'])
+        )
+        parts.append(grouped[list(MEASUREMENTS)].quantile(quantiles).unstack())
+        reports[key] = pd.concat(parts, axis=1)
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--rows', type=int, default=1_000_000, help='Tests in the database.'
+    )
+    parser.add_argument(
+        '--wips', type=int, default=60_000, help='WIPs the tests belong to.'
+    )
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = make_db(
+            os.path.join(tmp_dir, 'New_Database.db'), args.rows, args.wips
+        )
+        session = sessionmaker(bind=engine)()
+
+        start = time.perf_counter()
+        pandas_report(engine)
+        print(f"pandas      {time.perf_counter() - start:6.2f}s (read_sql and groupby)")
+
+        analytics = FleetAnalytics(session)
+        start = time.perf_counter()
+        analytics.refresh()
+        elapsed = time.perf_counter() - start
+        print(f"load        {elapsed:6.2f}s (one query, sorted into runs)")
+        start = time.perf_counter()
+        report = analytics.fleet_report()
+        elapsed = time.perf_counter() - start
+        sizes = ', '.join(f'{len(frame)} {by}s' for by, frame in report.items())
+        print(f"report      {elapsed:6.2f}s ({sizes})")
+
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                'UPDATE tests SET first_stage_temp = first_stage_temp + 1 '
+                'WHERE test_id % 1000 = 0'
+            )
+        start = time.perf_counter()
+        analytics.fleet_report()
+        elapsed = time.perf_counter() - start
+        print(f"re-report   {elapsed:6.2f}s (after {args.rows // 1000} tests changed)")
+
+        session.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
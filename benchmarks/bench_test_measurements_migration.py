@@ -0,0 +1,205 @@
+# benchmarks/bench_test_measurements_migration.py
+"""
+Benchmark the e81f4a6c2d57 migration (typed test measurement columns) on a
+legacy tests table of --rows rows, every value stored as text as copied from
+the Repair_Tracker database.
+
+The migration is run two ways on copies of the same database:
+
+- per column: one batch_alter_table, i.e. one table copy, per retyped column
+  and one UPDATE per backfilled column, as a revision written column by
+  column would;
+- batched: the revision itself, one table copy and one UPDATE pass.
+
+Usage:
+    python benchmarks/bench_test_measurements_migration.py --rows 1000000
+"""
+
+import argparse
+import importlib.util
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from db_ops.change_log import change_trigger_ddl  # noqa: E402
+
+MIGRATION_PATH = os.path.join(
+    os.path.dirname(__file__),
+    '..',
+    'alembic',
+    'versions',
+    'e81f4a6c2d57_add_test_measurements.py',
+)
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE coldheads (
+        coldhead_id INTEGER PRIMARY KEY, serial_number VARCHAR NOT NULL UNIQUE
+    );
+    CREATE TABLE displacers (
+        displacer_id INTEGER PRIMARY KEY, displacer_serial_number VARCHAR NOT NULL
+    );
+    CREATE TABLE wips (
+        wip_id INTEGER PRIMARY KEY, test_id INTEGER REFERENCES tests (test_id),
+        coldhead_id INTEGER NOT NULL, displacer_id INTEGER NOT NULL,
+        wip_number VARCHAR NOT NULL UNIQUE
+    );
+    CREATE TABLE change_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT, table_name VARCHAR NOT NULL,
+        operation VARCHAR NOT NULL, row_id INTEGER NOT NULL,
+        changed_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL
+    );
+    CREATE TABLE tests (
+        test_id INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR NOT NULL, WIP TEXT,
+        test_date TEXT, station TEXT, pass_fail TEXT, mode TEXT, turns TEXT,
+        first_stage_heaters TEXT, second_stage_heater TEXT, first_stage_temp TEXT,
+        second_stage_temp TEXT, efficiency1 TEXT, efficiency2 TEXT, passed TEXT,
+        test_attempt TEXT, notes TEXT
+    );
+'''
+
+# One blank cell in ten, as in Repair_Tracker_tests.csv
+FILL_SQL = '''
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows})
+    INSERT INTO tests (
+        name, WIP, test_date, station, pass_fail, mode, turns, first_stage_heaters,
+        second_stage_heater, first_stage_temp, second_stage_temp, efficiency1,
+        efficiency2, passed, test_attempt, notes
+    )
+    SELECT 'Load test', CAST(i % {wips} AS TEXT),
+        date('2020-01-01', '+' || (i % 1500) || ' days'), CAST(i % 4 AS TEXT),
+        CASE WHEN i % 10 = 0 THEN '' WHEN i % 3 THEN 'PASS' ELSE 'Fail' END,
+        'LOAD', CASE WHEN i % 10 = 1 THEN '' ELSE CAST(i % 60 AS TEXT) END,
+        CAST(60 + i % 15 AS TEXT), CAST(140 + i % 20 AS TEXT),
+        CAST(40 + (i % 50) / 10.0 AS TEXT), CAST(15 + (i % 70) / 10.0 AS TEXT),
+        CAST((i % 120) / 100.0 AS TEXT),
+        CASE WHEN i % 10 = 2 THEN 'n/a' ELSE CAST((i % 150) / 100.0 AS TEXT) END,
+        CAST(i % 3 > 0 AS TEXT), CAST(1 + i % 3 AS TEXT),
+        CASE WHEN i % 10 = 3 THEN '' ELSE 'Routine' END
+    FROM n
+'''
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location(
+        'add_test_measurements', MIGRATION_PATH
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    wips = max(rows // 10, 1)
+    conn.execute("INSERT INTO coldheads VALUES (1, 'C1')")
+    conn.execute("INSERT INTO displacers VALUES (1, 'D1')")
+    conn.execute(f'''
+        WITH RECURSIVE n(i) AS (
+            SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < {wips - 1}
+        )
+        INSERT INTO wips (test_id, coldhead_id, displacer_id, wip_number)
+        SELECT NULL, 1, 1, CAST(i AS TEXT) FROM n
+    ''')
+    conn.execute(FILL_SQL.format(rows=rows, wips=wips))
+    for statement in change_trigger_ddl():
+        conn.execute(statement)
+    conn.commit()
+    conn.close()
+
+
+def upgrade_per_column(migration):
+    """The same changes, one table copy or UPDATE statement per column."""
+    bind = migration.op.get_bind()
+    existing = {
+        row[1].lower(): row[1]
+        for row in bind.exec_driver_sql('PRAGMA table_info(tests)')
+    }
+    triggers = migration.drop_tests_triggers()
+    migration.create_legacy_date_function()
+    for column, type_ in migration.TEST_COLUMNS.items():
+        if column not in existing:
+            with migration.op.batch_alter_table(
+                'tests', recreate='always'
+            ) as batch_op:
+                batch_op.add_column(sa.Column(column, type_))
+        else:
+            with migration.op.batch_alter_table(
+                'tests',
+                recreate='always',
+                reflect_args=[sa.Column(existing[column], type_)],
+            ) as batch_op:
+                pass
+    for column in migration.INDEXED_COLUMNS:
+        migration.op.create_index(f'ix_tests_{column}', 'tests', [column])
+    for column in migration.TEST_COLUMNS:
+        if column in existing:
+            value = migration.cleaned(column, existing)
+            migration.op.execute(f'UPDATE tests SET {column} = {value}')
+    migration.op.execute(
+        'UPDATE tests SET wip_id = (SELECT w.wip_id FROM wips AS w '
+        'WHERE w.wip_number = trim(tests.WIP))'
+    )
+    for sql in triggers:
+        migration.op.execute(sql)
+
+
+def run(db_path, label, migration):
+    engine = sa.create_engine(f'sqlite:///{db_path}')
+    try:
+        with engine.connect() as connection:
+            start = time.perf_counter()
+            with connection.begin():
+                with Operations.context(MigrationContext.configure(connection)):
+                    if label == 'batched':
+                        migration.upgrade()
+                    else:
+                        upgrade_per_column(migration)
+            return time.perf_counter() - start
+    finally:
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--rows', type=int, default=1_000_000, help='Rows in the legacy tests table.'
+    )
+    parser.add_argument(
+        '--dir', help='Directory for the databases (default: the system temp dir).'
+    )
+    args = parser.parse_args()
+
+    migration = load_migration()
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp_dir:
+        template = os.path.join(tmp_dir, 'template.db')
+        make_db(template, args.rows)
+        size = os.path.getsize(template) / 2**20
+        print(f"Built a {size:.0f} MiB database with {args.rows} tests")
+
+        results = {}
+        for label in ('per column', 'batched'):
+            db_path = os.path.join(tmp_dir, f'{label}.db')
+            shutil.copy(template, db_path)
+            elapsed = run(db_path, label, migration)
+            conn = sqlite3.connect(db_path)
+            results[label] = conn.execute(
+                'SELECT count(wip_id), count(turns), count(pass_fail), '
+                "total(first_stage_temp), sum(typeof(efficiency2) = 'real') FROM tests"
+            ).fetchone()
+            conn.close()
+            print(f"{label:<10} {elapsed:6.2f}s")
+        assert results['per column'] == results['batched'], results
+
+
+if __name__ == '__main__':
+    main()
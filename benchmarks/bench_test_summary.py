@@ -0,0 +1,211 @@
+# benchmarks/bench_test_summary.py
+"""
+Benchmark the trigger-maintained test summaries of db_ops.test_summary on a
+database of --rows tests spread over --wips WIPs.
+
+Reports:
+
+- reading fail count, attempts and last test for --lookups coldheads from
+  coldhead_test_summary, against computing them from tests and wips as the
+  grid would without the table;
+- the same for every coldhead;
+- the cost the triggers add to inserting --inserts tests, and to updating
+  their results;
+- rebuilding both tables from scratch.
+
+Usage:
+    python benchmarks/bench_test_summary.py --rows 1000000
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from db_ops.models import Base  # noqa: E402
+from db_ops.test_summary import (  # noqa: E402
+    LAST_TEST_ORDER,
+    rebuild_summaries,
+    summary_trigger_ddl,
+)
+from logger import logger  # noqa: E402
+
+FILL_SQL = [
+    '''
+    WITH RECURSIVE n(i) AS (
+        SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {coldheads}
+    )
+    INSERT INTO coldheads (coldhead_id, serial_number) SELECT i, 'J' || i FROM n
+    ''',
+    '''
+    WITH RECURSIVE n(i) AS (
+        SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {coldheads}
+    )
+    INSERT INTO displacers (displacer_id, displacer_serial_number)
+    SELECT i, 'R' || i FROM n
+    ''',
+    '''
+    WITH RECURSIVE n(i) AS (
+        SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {wips}
+    )
+    INSERT INTO wips (wip_id, coldhead_id, displacer_id, wip_number)
+    SELECT i, 1 + i % {coldheads}, 1 + (i * 7) % {coldheads}, 'W' || i FROM n
+    ''',
+    '''
+    WITH RECURSIVE n(i) AS (
+        SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows}
+    )
+    INSERT INTO tests (name, wip_id, pass_fail, test_date)
+    SELECT 'Test ' || i, 1 + i % {wips},
+        CASE WHEN i % 10 = 0 THEN 'Pending' WHEN i % 3 THEN 'Pass' ELSE 'Fail' END,
+        date('2020-01-01', '+' || (abs(random()) % 1500) || ' days')
+    FROM n
+    ''',
+]
+
+# What the grid computes per coldhead without the summary table
+SCAN_SQL = f'''
+    SELECT w.coldhead_id, count(*), total(upper(t.pass_fail) IS 'FAIL'),
+        (SELECT t2.pass_fail
+         FROM wips AS w2 JOIN tests AS t2 ON t2.wip_id = w2.wip_id
+         WHERE w2.coldhead_id = w.coldhead_id
+         ORDER BY {LAST_TEST_ORDER.replace('t.', 't2.')} LIMIT 1)
+    FROM wips AS w JOIN tests AS t ON t.wip_id = w.wip_id
+    {{where}} GROUP BY w.coldhead_id
+'''
+SUMMARY_SQL = (
+    'SELECT coldhead_id, attempts, fail_count, last_result '
+    'FROM coldhead_test_summary {where}'
+)
+
+
+def make_db(db_path, rows, wips):
+    engine = create_engine(f'sqlite:///{db_path}')
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        # Loaded without the triggers and summarized once, as a bulk load would be
+        for statement in summary_trigger_ddl():
+            connection.exec_driver_sql(f"DROP TRIGGER {statement.split()[5]}")
+        for sql in FILL_SQL:
+            connection.exec_driver_sql(
+                sql.format(rows=rows, wips=wips, coldheads=max(wips // 3, 1))
+            )
+        start = time.perf_counter()
+        rebuild_summaries(connection)
+        rebuild = time.perf_counter() - start
+        for statement in summary_trigger_ddl():
+            connection.exec_driver_sql(statement)
+    return engine, rebuild
+
+
+def timed(connection, sql, where):
+    start = time.perf_counter()
+    rows = connection.exec_driver_sql(sql.format(where=where)).fetchall()
+    return time.perf_counter() - start, rows
+
+
+def write_cost(engine, inserts, wips):
+    """
+    Seconds to insert, then update, --inserts tests with and without the
+    triggers.
+    """
+    wip_ids = [random.randint(1, wips) for _ in range(inserts)]
+    results = {}
+    for label in ('without triggers', 'with triggers'):
+        with engine.begin() as connection:
+            if label == 'without triggers':
+                for statement in summary_trigger_ddl():
+                    connection.exec_driver_sql(f"DROP TRIGGER {statement.split()[5]}")
+            last = connection.exec_driver_sql('SELECT max(test_id) FROM tests')
+            first = last.scalar() + 1
+            start = time.perf_counter()
+            for wip_id in wip_ids:
+                connection.exec_driver_sql(
+                    "INSERT INTO tests (name, wip_id, pass_fail, test_date) "
+                    "VALUES ('New', ?, 'Fail', '2024-06-01')",
+                    (wip_id,),
+                )
+            inserted = time.perf_counter() - start
+            start = time.perf_counter()
+            connection.exec_driver_sql(
+                "UPDATE tests SET pass_fail = 'Pass' WHERE test_id >= ?", (first,)
+            )
+            updated = time.perf_counter() - start
+            results[label] = (inserted, updated)
+            if label == 'without triggers':
+                for statement in summary_trigger_ddl():
+                    connection.exec_driver_sql(statement)
+                rebuild_summaries(connection)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--rows', type=int, default=1_000_000, help='Tests in the database.'
+    )
+    parser.add_argument(
+        '--wips', type=int, default=60_000, help='WIPs the tests belong to.'
+    )
+    parser.add_argument(
+        '--lookups', type=int, default=50, help='Coldheads shown on one grid page.'
+    )
+    parser.add_argument(
+        '--inserts',
+        type=int,
+        default=10_000,
+        help='Tests inserted to time the triggers.',
+    )
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine, rebuild = make_db(
+            os.path.join(tmp_dir, 'New_Database.db'), args.rows, args.wips
+        )
+        print(
+            f"rebuild             {rebuild:8.3f}s "
+            f"(both tables from {args.rows} tests)"
+        )
+
+        coldheads = max(args.wips // 3, 1)
+        sample = random.sample(range(1, coldheads + 1), min(args.lookups, coldheads))
+        page = ', '.join(str(i) for i in sample)
+        filters = (
+            (f'{args.lookups} coldheads', 'WHERE {key} IN ({page})'),
+            ('all coldheads', ''),
+        )
+        with engine.connect() as connection:
+            for label, where in filters:
+                scan, scanned = timed(
+                    connection, SCAN_SQL, where.format(key='w.coldhead_id', page=page)
+                )
+                read, summary = timed(
+                    connection, SUMMARY_SQL, where.format(key='coldhead_id', page=page)
+                )
+                assert sorted(
+                    (row[0], row[1], row[2], row[3]) for row in scanned
+                ) == sorted((row[0], row[1], float(row[2]), row[3]) for row in summary)
+                print(
+                    f"{label:<19} {scan:8.3f}s from tests, "
+                    f"{read:8.3f}s from the summary table"
+                )
+
+        costs = write_cost(engine, args.inserts, args.wips)
+        for label, (inserted, updated) in costs.items():
+            print(
+                f"{args.inserts} tests {label:<17} insert {inserted:6.3f}s, "
+                f"update {updated:6.3f}s"
+            )
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+# benchmarks/bench_transfer_db.py
+"""
+Benchmark the legacy migration in db_mngt/dbs/transfer_db.py.
+
+Builds a synthetic legacy database whose coldheads, displacers and tests
+tables have the new schema's shape (--rows coldhead and test rows, a quarter
+as many displacers) and migrates it three ways:
+
+- row-by-row: one execute per row, as transfer_db.py did originally;
+- stream: fetchmany batches inserted with executemany (--mode stream);
+- attach: one INSERT ... SELECT per table from the attached database
+  (--mode attach).
+
+Displacers have one to three filled history slots; the time transfer_db
+spends linking them into displacer_coldhead_wip is reported separately.
+
+With --sync the database is also synced with --mode sync, then --changed
+percent of the legacy coldheads and tests are changed, as many are added, and
+the nightly re-sync is timed.
+
+Usage:
+    python benchmarks/bench_transfer_db.py --rows 1000000
+    python benchmarks/bench_transfer_db.py --rows 1000000 --skip-row-by-row --sync
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from db_mngt.dbs import transfer_db  # noqa: E402
+from logger import logger  # noqa: E402
+
+# Row generator per legacy table; {rows} is replaced by the row count
+FILL_SQL = {
+    'coldheads': '''
+        INSERT INTO coldheads (Coldhead_Serial_Number, Organization, WIP,
+                               Arrival_Date, Tech_Notes, Fail_Count, Pass_Fail,
+                               Turns, First_Stage_Temp, Second_Stage_Temp,
+                               Efficiency1)
+        SELECT 'C' || (i % 50000), 'Org' || (i % 20), 'WIP' || i,
+               date('2020-01-01', '+' || (i % 1500) || ' days'),
+               'Replaced seals and regreased bearings', i % 3, 'Pass', i % 60,
+               40 + (i % 50) / 10.0, 4 + (i % 30) / 10.0, 0.5 + (i % 40) / 100.0
+        FROM n
+    ''',
+    'displacers': '''
+        INSERT INTO displacers (Displacer_Serial_Number, Passed, Initial_Open,
+                                WIP_1, Coldhead_Serial_Number_1, Test_Date_1,
+                                First_Stage_Temp_1, WIP_2, Coldhead_Serial_Number_2,
+                                Fail_Count_2, WIP_3, Coldhead_Serial_Number_3)
+        SELECT 'D' || i, 'Yes', date('2019-01-01', '+' || (i % 1500) || ' days'),
+               'WIP' || i, 'C' || (i % 50000),
+               date('2020-01-01', '+' || (i % 1500) || ' days'), 40 + (i % 50) / 10.0,
+               CASE WHEN i % 2 = 0 THEN 'WIP' || ({rows} - i) END,
+               CASE WHEN i % 2 = 0 THEN 'C' || (i % 7919) END, i % 3,
+               CASE WHEN i % 5 = 0 THEN 'OLD' || i END,
+               CASE WHEN i % 5 = 0 THEN 'C' || (i % 4001) END
+        FROM n WHERE i <= {rows} / 4
+    ''',
+    'tests': '''
+        INSERT INTO tests (WIP, Coldhead_Serial_Number, Displacer_Serial_Number,
+                           test_date, station, pass_fail, mode, turns,
+                           first_stage_temp, second_stage_temp, test_attempt, notes)
+        SELECT 'WIP' || i, 'C' || (i % 50000), 'D' || (i % ({rows} / 4 + 1)),
+               date('2020-01-01', '+' || (i % 1500) || ' days'), 'S' || (i % 4),
+               'Pass', 'LOAD', i % 60, 40 + (i % 50) / 10.0, 4 + (i % 30) / 10.0,
+               1 + i % 3, NULL
+        FROM n
+    ''',
+}
+
+
+def make_legacy_db(path, rows):
+    conn = sqlite3.connect(path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        transfer_db.create_new_schema(conn)
+    for table, sql in FILL_SQL.items():
+        conn.execute(
+            'WITH RECURSIVE n(i) AS '
+            f'(SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows}) '
+            + sql.format(rows=rows).strip()
+        )
+    conn.commit()
+    conn.close()
+
+
+def migrate_row_by_row(old_db, new_db):
+    """The original migration loop: one execute per row, SQL rebuilt per row."""
+    conn_old = sqlite3.connect(old_db)
+    conn_new = sqlite3.connect(new_db)
+    with contextlib.redirect_stdout(io.StringIO()):
+        transfer_db.create_new_schema(conn_new)
+    cursor_old, cursor_new = conn_old.cursor(), conn_new.cursor()
+    for table in transfer_db.MIGRATED_TABLES:
+        cursor_old.execute(f'SELECT * FROM {table}')
+        rows = cursor_old.fetchall()
+        columns = [desc[0] for desc in cursor_old.description]
+        for row in rows:
+            cursor_new.execute(f"""
+                INSERT INTO {table} ({', '.join(columns)})
+                VALUES ({', '.join(['?' for _ in columns])})
+            """, row)
+        conn_new.commit()
+    conn_old.close()
+    conn_new.close()
+
+
+def change_legacy_db(path, rows, percent):
+    """
+    Changes every (100 / percent)th coldhead and test and appends as many new
+    rows.
+    """
+    step = max(1, round(100 / percent))
+    conn = sqlite3.connect(path)
+    for table in ('coldheads', 'tests'):
+        column = 'Tech_Notes' if table == 'coldheads' else 'notes'
+        conn.execute(
+            f"UPDATE {table} SET {column} = 'Changed' WHERE rowid % {step} = 0"
+        )
+        copied = transfer_db.table_columns(conn.cursor(), table)[1:]
+        conn.execute(
+            f"INSERT INTO {table} SELECT NULL, {', '.join(copied)} "
+            f"FROM {table} WHERE rowid % {step} = 1"
+        )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--rows', type=int, default=1_000_000, help='Coldhead and test rows.'
+    )
+    parser.add_argument(
+        '--skip-row-by-row', action='store_true', help='Skip the slow baseline.'
+    )
+    parser.add_argument(
+        '--sync', action='store_true', help='Also time an initial and a nightly sync.'
+    )
+    parser.add_argument(
+        '--changed',
+        type=float,
+        default=1.0,
+        help='Percent of rows changed before the re-sync.',
+    )
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_db = os.path.join(tmp_dir, 'Repair_Tracker.db')
+        start = time.perf_counter()
+        make_legacy_db(old_db, args.rows)
+        total_rows = args.rows * 2 + args.rows // 4
+        elapsed = time.perf_counter() - start
+        print(f"Built legacy database with {total_rows} rows in {elapsed:.1f}s")
+
+        runs = {
+            'stream': lambda new_db: transfer_db.migrate_data(
+                old_db, new_db, mode='stream'
+            ),
+            'attach': lambda new_db: transfer_db.migrate_data(
+                old_db, new_db, mode='attach'
+            ),
+        }
+        if args.sync:
+            sync_db = os.path.join(tmp_dir, 'sync.db')
+            runs['initial sync'] = lambda new_db: transfer_db.migrate_data(
+                old_db, sync_db, mode='sync'
+            )
+            runs['re-sync'] = runs['initial sync']
+        if not args.skip_row_by_row:
+            runs = {
+                'row-by-row': lambda new_db: migrate_row_by_row(old_db, new_db),
+                **runs,
+            }
+        for label, run in runs.items():
+            if label == 're-sync':
+                change_legacy_db(old_db, args.rows, args.changed)
+            new_db = os.path.join(tmp_dir, f'{label}.db')
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = run(new_db)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{label:<12} {total_rows} rows in {elapsed:6.2f}s "
+                f"({total_rows / elapsed:>9,.0f} rows/s)"
+            )
+            if stats and 'displacer_coldhead_wip' in stats:
+                link = stats['displacer_coldhead_wip']
+                print(
+                    f"{'':<12} linked {link['inserted']} history slots "
+                    f"in {link['seconds']:.2f}s"
+                )
+            if label == 're-sync':
+                for table in ('coldheads', 'tests'):
+                    print(
+                        f"{'':<12} {table}: {stats[table]['inserted']} inserted, "
+                        f"{stats[table]['updated']} updated"
+                    )
+
+
+if __name__ == '__main__':
+    main()
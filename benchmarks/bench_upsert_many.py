@@ -0,0 +1,116 @@
+# benchmarks/bench_upsert_many.py
+"""
+Benchmark DBOperations.upsert_many against the per-record update_or_insert path.
+
+Usage:
+    python benchmarks/bench_upsert_many.py --rows 100000 --baseline-rows 2000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from db_ops.database import configure_sqlite_transactions  # noqa: E402
+from db_ops.db_operations import DBOperations  # noqa: E402
+from db_ops.models import Base  # noqa: E402
+from logger import logger  # noqa: E402
+
+
+def make_session(db_path):
+    engine = create_engine(f'sqlite:///{db_path}')
+    configure_sqlite_transactions(engine)
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(bind=engine)()
+
+
+def make_rows(count, prefix='R'):
+    return [
+        {
+            'displacer_serial_number': f'{prefix}{i:07d}',
+            'status': 'Open' if i % 3 else 'Closed',
+            'notes': f'bench row {i}',
+        }
+        for i in range(count)
+    ]
+
+
+def seed(session, rows):
+    """Pre-load half of the rows so the benchmark exercises both insert and update."""
+    DBOperations(session).upsert_many(
+        'displacers', rows[::2], ['displacer_serial_number']
+    )
+
+
+def run_upsert_many(db_path, rows, chunk_size):
+    engine, session = make_session(db_path)
+    seed(session, rows)
+    start = time.perf_counter()
+    counts = DBOperations(session).upsert_many(
+        'displacers', rows, ['displacer_serial_number'], chunk_size=chunk_size
+    )
+    elapsed = time.perf_counter() - start
+    session.close()
+    engine.dispose()
+    return counts, elapsed
+
+
+def run_update_or_insert(db_path, rows):
+    engine, session = make_session(db_path)
+    seed(session, rows)
+    db_operations = DBOperations(session)
+    start = time.perf_counter()
+    for row in rows:
+        db_operations.update_or_insert('displacers', row, ['displacer_serial_number'])
+    elapsed = time.perf_counter() - start
+    session.close()
+    engine.dispose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument(
+        '--baseline-rows',
+        type=int,
+        default=2_000,
+        help='Rows to run through update_or_insert (0 to skip).',
+    )
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rows = make_rows(args.rows)
+        counts, elapsed = run_upsert_many(
+            os.path.join(tmp_dir, 'upsert_many.db'), rows, args.chunk_size
+        )
+        print(
+            f"upsert_many:      {args.rows} rows in {elapsed:.2f}s "
+            f"({args.rows / elapsed:,.0f} rows/s) {counts}"
+        )
+
+        if args.baseline_rows:
+            baseline = make_rows(args.baseline_rows)
+            baseline_elapsed = run_update_or_insert(
+                os.path.join(tmp_dir, 'update_or_insert.db'), baseline
+            )
+            rate = args.baseline_rows / baseline_elapsed
+            print(
+                f"update_or_insert: {args.baseline_rows} rows in "
+                f"{baseline_elapsed:.2f}s ({rate:,.0f} rows/s), "
+                f"~{args.rows / rate:.0f}s extrapolated to {args.rows} rows"
+            )
+
+
+if __name__ == '__main__':
+    main()
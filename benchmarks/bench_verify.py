@@ -0,0 +1,122 @@
+# benchmarks/bench_verify.py
+"""
+Benchmark db_mngt/dbs/verify.py against a row-by-row comparison in Python.
+
+Builds a tests table with --rows rows, copies the database, changes --changed
+scattered rows of the copy and compares the two:
+
+- row-by-row: both tables fetched in key order and merged by key in Python;
+- buckets: verify_databases, checking --bucket-size keys at a time inside
+  SQLite and diffing only the mismatched buckets.
+
+Usage:
+    python benchmarks/bench_verify.py --rows 2000000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from db_mngt.dbs import verify  # noqa: E402
+
+FILL_SQL = '''
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows})
+    INSERT INTO tests (test_id, wip, test_date, station, pass_fail, turns,
+                       first_stage_temp, second_stage_temp, notes)
+    SELECT i, 'WIP' || i, date('2020-01-01', '+' || (i % 1500) || ' days'),
+           'S' || (i % 4), 'Pass', i % 60, 40 + (i % 50) / 10.0, 4 + (i % 30) / 10.0,
+           'Routine load test'
+    FROM n
+'''
+
+
+def make_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE tests (
+            test_id INTEGER PRIMARY KEY, wip TEXT, test_date DATE, station TEXT,
+            pass_fail TEXT, turns INTEGER, first_stage_temp REAL,
+            second_stage_temp REAL, notes TEXT
+        )
+    ''')
+    conn.execute(FILL_SQL.format(rows=rows))
+    conn.commit()
+    conn.close()
+
+
+def compare_row_by_row(source_db, target_db):
+    """Fetch both tables in key order and merge them by key in Python."""
+    conn_source, conn_target = sqlite3.connect(source_db), sqlite3.connect(target_db)
+    source = conn_source.execute('SELECT * FROM tests ORDER BY test_id')
+    target = conn_target.execute('SELECT * FROM tests ORDER BY test_id')
+    differences = 0
+    source_row, target_row = next(source, None), next(target, None)
+    while source_row is not None or target_row is not None:
+        if target_row is None or (
+            source_row is not None and source_row[0] < target_row[0]
+        ):
+            differences += 1
+            source_row = next(source, None)
+        elif source_row is None or target_row[0] < source_row[0]:
+            differences += 1
+            target_row = next(target, None)
+        else:
+            differences += source_row != target_row
+            source_row, target_row = next(source, None), next(target, None)
+    conn_source.close()
+    conn_target.close()
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--rows', type=int, default=2_000_000, help='Rows in the tests table.'
+    )
+    parser.add_argument(
+        '--changed', type=int, default=50, help='Rows changed in the copy.'
+    )
+    parser.add_argument(
+        '--bucket-size', type=int, default=verify.BUCKET_SIZE, help='Keys per bucket.'
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_db = os.path.join(tmp_dir, 'source.db')
+        target_db = os.path.join(tmp_dir, 'target.db')
+        make_db(source_db, args.rows)
+        shutil.copy(source_db, target_db)
+        conn = sqlite3.connect(target_db)
+        step = max(1, args.rows // args.changed)
+        conn.execute(f"UPDATE tests SET notes = 'Changed' WHERE test_id % {step} = 0")
+        conn.commit()
+        conn.close()
+        print(f"Built two databases with {args.rows} rows, {args.rows // step} changed")
+
+        start = time.perf_counter()
+        differences = compare_row_by_row(source_db, target_db)
+        elapsed = time.perf_counter() - start
+        print(f"{'row-by-row':<12} {elapsed:6.2f}s, {differences} rows differ")
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = verify.verify_databases(
+                source_db, target_db, bucket_size=args.bucket_size
+            )['tests']
+        elapsed = time.perf_counter() - start
+        print(
+            f"{'buckets':<12} {elapsed:6.2f}s, {stats['differences']} rows differ "
+            f"in {stats['mismatched_buckets']} of {stats['buckets']} buckets"
+        )
+
+
+if __name__ == '__main__':
+    main()
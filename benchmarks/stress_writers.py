@@ -0,0 +1,135 @@
+# benchmarks/stress_writers.py
+"""
+Multi-process write contention stress test.
+
+Each writer process runs units of work (insert a displacer, then update it)
+against one shared SQLite file, through db_ops.write_coordination.run_write_unit.
+Reports throughput, p50/p99 commit latency, retries and failures for 2-16
+concurrent writers. --uncoordinated runs the same load with plain deferred
+transactions and no retry for comparison.
+
+Usage:
+    python benchmarks/stress_writers.py --writers 2 4 8 16 --units 200
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from db_ops.database import configure_sqlite_transactions  # noqa: E402
+from db_ops.models import Base, Displacer  # noqa: E402
+from db_ops.write_coordination import run_write_unit  # noqa: E402
+from logger import logger  # noqa: E402
+
+
+def unit_of_work(session, serial):
+    displacer = Displacer(displacer_serial_number=serial, status='Open')
+    session.add(displacer)
+    session.flush()
+    displacer.status = 'Tested'
+
+
+def writer(db_path, writer_id, units, coordinated, busy_timeout_ms, results):
+    logger.setLevel(logging.CRITICAL)
+    if coordinated:
+        engine = create_engine(f'sqlite:///{db_path}')
+        configure_sqlite_transactions(engine, busy_timeout_ms=busy_timeout_ms)
+    else:
+        engine = create_engine(f'sqlite:///{db_path}', connect_args={'timeout': 0})
+    session = sessionmaker(bind=engine)()
+
+    latencies, retries, failures = [], [0], 0
+    for unit in range(units):
+        serial = f'W{writer_id:02d}-{unit:06d}'
+        start = time.perf_counter()
+        try:
+            if coordinated:
+                run_write_unit(
+                    session,
+                    lambda s: unit_of_work(s, serial),
+                    on_retry=lambda attempt, error: retries.__setitem__(
+                        0, retries[0] + 1
+                    ),
+                )
+            else:
+                unit_of_work(session, serial)
+                session.commit()
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            session.rollback()
+            failures += 1
+    session.close()
+    engine.dispose()
+    results.put((latencies, retries[0], failures))
+
+
+def run(writers, units, coordinated, busy_timeout_ms):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'stress.db')
+        engine = create_engine(f'sqlite:///{db_path}')
+        Base.metadata.create_all(engine)
+        engine.dispose()
+
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=writer,
+                args=(db_path, i, units, coordinated, busy_timeout_ms, results),
+            )
+            for i in range(writers)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(lat for outcome in outcomes for lat in outcome[0])
+    retries = sum(outcome[1] for outcome in outcomes)
+    failures = sum(outcome[2] for outcome in outcomes)
+    return latencies, retries, failures, elapsed
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--writers', type=int, nargs='+', default=[2, 4, 8, 16])
+    parser.add_argument('--units', type=int, default=200, help='Units per writer.')
+    parser.add_argument('--busy-timeout-ms', type=int, default=200)
+    parser.add_argument('--uncoordinated', action='store_true')
+    args = parser.parse_args()
+
+    coordinated = not args.uncoordinated
+    print(f"{'writers':>7} {'commits/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'retries':>8} {'failed':>7}")
+    for writers in args.writers:
+        latencies, retries, failures, elapsed = run(
+            writers, args.units, coordinated, args.busy_timeout_ms
+        )
+        print(
+            f"{writers:>7} {len(latencies) / elapsed:>10.0f} "
+            f"{percentile(latencies, 0.50) * 1000:>8.1f} "
+            f"{percentile(latencies, 0.99) * 1000:>8.1f} "
+            f"{retries:>8} {failures:>7}"
+        )
+
+
+if __name__ == '__main__':
+    main()
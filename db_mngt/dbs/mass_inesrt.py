@@ -1,51 +1,105 @@
+import argparse
+import os
 import sqlite3
-import pandas as pd
+import sys
 
-def mass_insert_from_excel(db_path, excel_path):
-    # Load the Excel file
-    df = pd.read_excel(excel_path)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-    # Ensure the required columns are present in the DataFrame
-    expected_columns = {'Arrival_Date', 'Coldhead_Serial_Number', 'WIP'}
-    if not expected_columns.issubset(df.columns):
-        raise ValueError(f"Excel file must contain columns: {', '.join(expected_columns)}")
+from db_ops.chunk_readers import iter_excel_chunks  # noqa: E402
+from db_ops.import_pipeline import to_dates, to_iso  # noqa: E402
+from logger import logger  # noqa: E402
+
+CHUNK_SIZE = 5000
+
+
+def merge_chunk(cursor, chunk):
+    """
+    Stage a chunk in a temporary table and merge it with set-based statements.
+    Existing WIPs get the sheet's coldhead and, when the sheet has one, its
+    arrival date; teardown_date and status are left as they are. Arrival dates
+    are read as the importers read them (db_ops.import_pipeline.to_dates).
+    """
+    cursor.execute('DELETE FROM temp.stage_wips')
+    cursor.executemany('''
+        INSERT INTO temp.stage_wips (wip_number, coldhead_serial_number, arrival_date)
+        VALUES (?, ?, ?)
+    ''', zip(
+        chunk['WIP'],
+        chunk['Coldhead_Serial_Number'],
+        to_iso(to_dates(chunk['Arrival_Date'])).tolist(),
+    ))
+
+    # Insert into Coldheads table if the serial number does not exist
+    cursor.execute('''
+        INSERT OR IGNORE INTO Coldheads (serial_number)
+        SELECT DISTINCT coldhead_serial_number FROM temp.stage_wips
+    ''')
+
+    # Update the WIPs that already exist
+    cursor.execute('''
+        UPDATE WIPs
+        SET coldhead_serial_number = s.coldhead_serial_number,
+            arrival_date = COALESCE(s.arrival_date, WIPs.arrival_date)
+        FROM temp.stage_wips AS s
+        WHERE s.wip_number = WIPs.wip_number
+    ''')
+
+    # Insert the new WIPs
+    cursor.execute('''
+        INSERT INTO WIPs (wip_number, coldhead_serial_number, arrival_date)
+        SELECT wip_number, coldhead_serial_number, arrival_date FROM temp.stage_wips
+        WHERE true
+        ON CONFLICT (wip_number) DO NOTHING
+    ''')
 
-    # Convert the Arrival_Date column to the correct date format
-    df['Arrival_Date'] = pd.to_datetime(df['Arrival_Date'], errors='coerce').dt.strftime('%Y-%m-%d')
 
+def mass_insert_from_excel(db_path, excel_path, chunk_size=CHUNK_SIZE):
     # Establish a connection to the database
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS stage_wips (
+            wip_number VARCHAR(255),
+            coldhead_serial_number VARCHAR(255),
+            arrival_date DATE
+        )
+    ''')
+
+    # Stream the Excel file chunk by chunk; each chunk is committed before the
+    # next is read
+    expected_columns = {'Arrival_Date', 'Coldhead_Serial_Number', 'WIP'}
+    total = 0
+    for chunk in iter_excel_chunks(excel_path, chunk_size):
+        if not expected_columns.issubset(chunk.columns):
+            conn.close()
+            raise ValueError(
+                f"Excel file must contain columns: {', '.join(expected_columns)}"
+            )
+
+        merge_chunk(cursor, chunk)
+        conn.commit()
+        total += len(chunk)
+        logger.info(f"Committed {total} rows...")
 
-    for _, row in df.iterrows():
-        # Insert into Coldheads table if the serial number does not exist
-        coldhead_serial_number = row['Coldhead_Serial_Number']
-        cursor.execute('''
-            INSERT OR IGNORE INTO Coldheads (serial_number)
-            VALUES (?)
-        ''', (coldhead_serial_number,))
-
-        # Insert into WIPs table
-        wip_data = {
-            'wip_number': row['WIP'],
-            'coldhead_serial_number': coldhead_serial_number,
-            'arrival_date': row['Arrival_Date'],
-            'teardown_date': None,  # Assuming teardown_date is not provided in Excel
-            'status': None  # Assuming status is not provided in Excel
-        }
-        cursor.execute('''
-            INSERT OR REPLACE INTO WIPs (wip_number, coldhead_serial_number, arrival_date, teardown_date, status)
-            VALUES (:wip_number, :coldhead_serial_number, :arrival_date, :teardown_date, :status)
-        ''', wip_data)
-
-    # Commit the transaction and close the connection
-    conn.commit()
     conn.close()
-    print("Data inserted successfully from Excel.")
+    logger.info("Data inserted successfully from Excel.")
 
-if __name__ == '__main__':
-    db_path = r'C:\Users\JColomba\Desktop\DBToolScratch\TestInsertion2\db_mngt\dbs\New_Database.db'
-    excel_path = r'C:\Users\JColomba\Desktop\DBToolScratch\TestInsertion2\db_mngt\dbs\arrival_date.xlsx'  # Update this path to your Excel file location
 
-    # Insert data from the Excel file
-    mass_insert_from_excel(db_path, excel_path)
+def main():
+    parser = argparse.ArgumentParser(
+        description="Merge the WIPs of an Excel sheet into a database."
+    )
+    parser.add_argument('db_path', help="Path to the database.")
+    parser.add_argument(
+        'excel_path',
+        help="Excel file with WIP, Coldhead_Serial_Number and Arrival_Date columns.",
+    )
+    parser.add_argument(
+        '--chunk-size', type=int, default=CHUNK_SIZE, help="Rows per commit."
+    )
+    args = parser.parse_args()
+    mass_insert_from_excel(args.db_path, args.excel_path, args.chunk_size)
+
+
+if __name__ == '__main__':
+    main()
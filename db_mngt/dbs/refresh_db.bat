@@ -1,2 +1 @@
-del New_Database.db
-copy "New_Database - Copy.db" New_Database.db /Y
+python snapshot_db.py --db New_Database.db restore "New_Database - Copy.db"
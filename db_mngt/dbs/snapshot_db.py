@@ -0,0 +1,328 @@
+# db_mngt/dbs/snapshot_db.py
+"""
+Take and restore snapshots of the live database with the SQLite backup API.
+
+A snapshot is copied --pages-per-step pages at a time with a short pause
+between steps. The source is only read-locked during a step, so the app keeps
+reading and writing while a snapshot is taken. If another connection writes
+to the database mid-copy, SQLite restarts the copy, so every snapshot is a
+consistent image of one moment; under a steady stream of writes the copy
+falls back to a single step after a few restarts. A database in WAL mode is
+copied from one read transaction instead, which neither blocks writers nor
+restarts. Snapshots are named after
+the database and their UTC timestamp, e.g. New_Database-20240105-173000.db,
+and are pruned to --keep copies (and optionally --max-age-days) after each
+snapshot.
+
+A restore copies a snapshot back into the database in one step, through a
+connection like any other: the app's open connections stay valid and see the
+restored data once the restore commits. The database is snapshotted first,
+so a restore can itself be undone.
+
+Usage:
+    python snapshot_db.py snapshot --keep 14
+    python snapshot_db.py list
+    python snapshot_db.py restore                       # the latest snapshot
+    python snapshot_db.py restore "New_Database - Copy.db"
+"""
+
+import argparse
+import datetime
+import os
+import sqlite3
+import time
+
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "New_Database.db"
+)
+
+# Pages copied per backup step, and the pause between steps that lets other
+# connections take the write lock
+PAGES_PER_STEP = 256
+STEP_PAUSE_SECONDS = 0.005
+
+# Restarts of a stepped copy (caused by writes) before it is redone in one step
+MAX_RESTARTS = 3
+
+# Snapshots kept by default after each snapshot
+KEEP_SNAPSHOTS = 10
+
+# Seconds to wait on a locked database, like db_ops.database.BUSY_TIMEOUT_MS
+BUSY_TIMEOUT_SECONDS = 5
+
+TIMESTAMP_FORMAT = "%Y%m%d-%H%M%S"
+
+
+def utc_now():
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def default_snapshot_dir(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "snapshots")
+
+
+def snapshot_name(db_path, taken_at):
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return f"{stem}-{taken_at.strftime(TIMESTAMP_FORMAT)}.db"
+
+
+def list_snapshots(db_path, snapshot_dir=None):
+    """
+    Return (taken_at, path) of the database's snapshots, oldest first.
+    """
+    snapshot_dir = snapshot_dir or default_snapshot_dir(db_path)
+    if not os.path.isdir(snapshot_dir):
+        return []
+    prefix = os.path.splitext(os.path.basename(db_path))[0] + "-"
+    snapshots = []
+    for name in os.listdir(snapshot_dir):
+        if not (name.startswith(prefix) and name.endswith(".db")):
+            continue
+        try:
+            stamp = os.path.splitext(name)[0].replace(prefix, "", 1)
+            taken_at = datetime.datetime.strptime(stamp, TIMESTAMP_FORMAT)
+        except ValueError:
+            continue  # Another database whose name starts with ours
+        snapshots.append((taken_at, os.path.join(snapshot_dir, name)))
+    return sorted(snapshots)
+
+
+def prune_snapshots(
+    db_path, snapshot_dir=None, keep=KEEP_SNAPSHOTS, max_age_days=None, now=None
+):
+    """
+    Delete all but the newest keep snapshots, and those older than
+    max_age_days. The newest snapshot is never deleted.
+
+    :return: Paths of the deleted snapshots.
+    """
+    snapshots = list_snapshots(db_path, snapshot_dir)
+    now = now or utc_now()
+    deleted = []
+    for index, (taken_at, path) in enumerate(snapshots[:-1]):
+        too_many = index < len(snapshots) - max(keep, 1)
+        too_old = max_age_days is not None and now - taken_at > datetime.timedelta(
+            days=max_age_days
+        )
+        if too_many or too_old:
+            os.remove(path)
+            deleted.append(path)
+    return deleted
+
+
+class TooManyRestarts(Exception):
+    """Raised from the backup progress callback to abandon a stepped copy."""
+
+
+def copy_database(source, target, pages_per_step, pause, max_restarts=MAX_RESTARTS):
+    """
+    Copy source into target (both sqlite3 connections) with the backup API.
+    pages_per_step=-1 copies everything in one step.
+
+    A write to the source by another connection restarts a stepped copy. After
+    max_restarts restarts the copy is redone in one step, which holds the
+    read lock until done but cannot be restarted.
+
+    :return: Dictionary with the pages copied, the backup steps taken, the
+             restarts and the elapsed seconds.
+    """
+    start = time.perf_counter()
+    progress = {"steps": 0, "pages": 0, "restarts": 0, "remaining": None}
+
+    def after_step(status, remaining, total):
+        progress["steps"] += 1
+        progress["pages"] = total
+        if progress["remaining"] is not None and remaining > progress["remaining"]:
+            progress["restarts"] += 1
+            if progress["restarts"] > max_restarts:
+                raise TooManyRestarts()
+        progress["remaining"] = remaining
+        if remaining and pause:
+            time.sleep(pause)
+
+    try:
+        source.backup(target, pages=pages_per_step, progress=after_step)
+    except TooManyRestarts:
+        source.backup(target, pages=-1)
+    del progress["remaining"]
+    progress["seconds"] = time.perf_counter() - start
+    return progress
+
+
+def snapshot(
+    db_path,
+    snapshot_dir=None,
+    pages_per_step=PAGES_PER_STEP,
+    pause=STEP_PAUSE_SECONDS,
+    keep=KEEP_SNAPSHOTS,
+    max_age_days=None,
+):
+    """
+    Snapshot the database into snapshot_dir (default: 'snapshots' next to it),
+    then prune old snapshots (see prune_snapshots).
+
+    The copy is written to a '.partial' file that is renamed once complete, so
+    an interrupted snapshot never looks like a usable one.
+
+    :return: Dictionary with the snapshot path, the deleted snapshots and the
+             statistics of copy_database.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database not found at {db_path}")
+    snapshot_dir = snapshot_dir or default_snapshot_dir(db_path)
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    taken_at = utc_now()
+    path = os.path.join(snapshot_dir, snapshot_name(db_path, taken_at))
+    while os.path.exists(path):
+        # Two snapshots within one second: the later one takes the next name
+        taken_at += datetime.timedelta(seconds=1)
+        path = os.path.join(snapshot_dir, snapshot_name(db_path, taken_at))
+    partial_path = path + ".partial"
+
+    source = sqlite3.connect(
+        f"file:{db_path}?mode=ro",
+        uri=True,
+        timeout=BUSY_TIMEOUT_SECONDS,
+        isolation_level=None,
+    )
+    target = sqlite3.connect(partial_path)
+    try:
+        if source.execute("PRAGMA journal_mode;").fetchone()[0] == "wal":
+            # A read transaction pins the copy to one WAL snapshot: writers keep
+            # committing and the copy never restarts
+            source.execute("BEGIN;")
+            source.execute("SELECT COUNT(*) FROM sqlite_master;").fetchone()
+        stats = copy_database(source, target, pages_per_step, pause)
+    except BaseException:
+        target.close()
+        os.remove(partial_path)
+        raise
+    finally:
+        source.close()
+    target.close()
+    os.replace(partial_path, path)
+
+    stats["path"] = path
+    stats["deleted"] = prune_snapshots(db_path, snapshot_dir, keep, max_age_days)
+    print(
+        f"Snapshot {path}: {stats['pages']} pages in {stats['steps']} steps "
+        f"({stats['restarts']} restarts), {stats['seconds']:.2f}s"
+    )
+    for deleted in stats["deleted"]:
+        print(f"Deleted old snapshot {deleted}")
+    return stats
+
+
+def restore(db_path, snapshot_path=None, snapshot_dir=None, snapshot_first=True):
+    """
+    Restore the database from snapshot_path, or from its latest snapshot.
+
+    The copy runs in one backup step, i.e. one write transaction on the
+    database: other connections wait on the busy timeout and then see either
+    the old or the restored data, never a mix.
+
+    :param snapshot_first: Snapshot the current database before restoring.
+    :return: Dictionary with the snapshot restored, the snapshot taken first
+             (or None), the pages copied and the elapsed seconds.
+    """
+    if snapshot_path is None:
+        snapshots = list_snapshots(db_path, snapshot_dir)
+        if not snapshots:
+            snapshot_dir = snapshot_dir or default_snapshot_dir(db_path)
+            raise FileNotFoundError(f"No snapshots of {db_path} in {snapshot_dir}")
+        snapshot_path = snapshots[-1][1]
+    if not os.path.exists(snapshot_path):
+        raise FileNotFoundError(f"Snapshot not found at {snapshot_path}")
+
+    before = None
+    if snapshot_first and os.path.exists(db_path):
+        # Kept whatever the retention policy; it is the only copy of the data
+        # the restore replaces
+        before = snapshot(
+            db_path, snapshot_dir, keep=len(list_snapshots(db_path, snapshot_dir)) + 1
+        )["path"]
+
+    source = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+    target = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_SECONDS)
+    try:
+        stats = copy_database(source, target, -1, 0)
+    finally:
+        source.close()
+        target.close()
+
+    stats.update(path=snapshot_path, snapshot_first=before)
+    print(
+        f"Restored {db_path} from {snapshot_path}: "
+        f"{stats['pages']} pages in {stats['seconds']:.2f}s"
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Snapshot and restore the database with the SQLite backup API."
+    )
+    parser.add_argument(
+        "--db",
+        default=DEFAULT_DB_PATH,
+        help="Path to the database (default: New_Database.db).",
+    )
+    parser.add_argument(
+        "--dir", help="Snapshot directory (default: 'snapshots' next to the database)."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    snapshot_parser = commands.add_parser(
+        "snapshot", help="Take a snapshot and prune old ones."
+    )
+    snapshot_parser.add_argument(
+        "--keep", type=int, default=KEEP_SNAPSHOTS, help="Snapshots to keep."
+    )
+    snapshot_parser.add_argument(
+        "--max-age-days", type=float, help="Also delete snapshots older than this."
+    )
+    snapshot_parser.add_argument(
+        "--pages-per-step",
+        type=int,
+        default=PAGES_PER_STEP,
+        help="Pages copied per step.",
+    )
+
+    commands.add_parser("list", help="List the snapshots, oldest first.")
+
+    restore_parser = commands.add_parser(
+        "restore", help="Restore a snapshot into the database."
+    )
+    restore_parser.add_argument(
+        "snapshot", nargs="?", help="Snapshot file (default: the latest)."
+    )
+    restore_parser.add_argument(
+        "--no-snapshot-first",
+        action="store_true",
+        help="Do not snapshot the database first.",
+    )
+
+    args = parser.parse_args()
+    if args.command == "snapshot":
+        snapshot(
+            args.db,
+            args.dir,
+            args.pages_per_step,
+            keep=args.keep,
+            max_age_days=args.max_age_days,
+        )
+    elif args.command == "list":
+        for taken_at, path in list_snapshots(args.db, args.dir):
+            print(
+                f"{taken_at:%Y-%m-%d %H:%M:%S} UTC  "
+                f"{os.path.getsize(path):>12,} bytes  {path}"
+            )
+    else:
+        restore(
+            args.db, args.snapshot, args.dir, snapshot_first=not args.no_snapshot_first
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,85 @@
-import sqlite3
+"""
+Migrate the legacy Repair_Tracker database into the CH_DB schema.
+
+Rows are streamed from the old database with fetchmany and inserted with one
+executemany per batch, all inside a single transaction on the new database:
+either every table is migrated or, on an unexpected error, nothing is. Rows
+the new database rejects (constraint violations, type mismatches) are written
+to a JSON-lines reject file instead of stopping the migration.
+
+With --mode attach the old database is attached to the new one and each table
+is copied with a single INSERT ... SELECT, which skips Python altogether.
+In both modes the new tables' indexes are rebuilt after their table is loaded.
+
+With --mode sync only the rows that are new or changed since the previous sync
+are copied, so it can be re-run (e.g. nightly) while both databases are live.
+
+Usage:
+    python transfer_db.py Repair_Tracker.db CH_DB.db --reject-file rejects.jsonl
+    python transfer_db.py Repair_Tracker.db CH_DB.db --mode attach
+    python transfer_db.py Repair_Tracker.db CH_DB.db --mode sync
+"""
+
+import argparse
+import hashlib
+import json
 import os
+import sqlite3
+import time
+
+# Tables copied from the old database, in order
+MIGRATED_TABLES = ["coldheads", "displacers", "tests"]
 
-# Paths to your databases
-OLD_DB_PATH = r"C:\Users\JColomba\Desktop\DBToolScratch\TestInsertion2\db_mngt\dbs\Repair_Tracker.db"
-NEW_DB_PATH = r"C:\Users\JColomba\Desktop\DBToolScratch\TestInsertion2\db_mngt\dbs\CH_DB.db"
+# Rows fetched from the old database and inserted per executemany
+BATCH_SIZE = 5000
+
+# Connection settings for the bulk load. The migration runs in one transaction
+# that is rolled back on failure, so the rollback journal is kept in memory
+# and not synced; a crash mid-migration leaves a new database to delete and
+# migrate again, the old database is only ever read.
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = MEMORY;",
+    "PRAGMA synchronous = OFF;",
+    "PRAGMA temp_store = MEMORY;",
+    "PRAGMA cache_size = -65536;",  # 64 MiB
+    "PRAGMA locking_mode = EXCLUSIVE;",
+]
+
+# 'stream' moves rows through Python in batches; 'attach' attaches the legacy
+# database and copies each table with one INSERT ... SELECT; 'sync' attaches
+# it and copies only the rows that are new or changed since the last sync.
+MIGRATION_MODES = ["stream", "attach", "sync"]
+
+# Schema name the legacy database is attached under in 'attach' mode
+LEGACY_SCHEMA = "legacy"
+
+# Displacers with a slot whose coldhead serial had no coldheads row yet when
+# last linked; a sync that copies coldheads relinks them
+UNRESOLVED_DISPLACERS = (
+    "SELECT displacer_id FROM displacer_coldhead_wip WHERE coldhead_id IS NULL"
+)
+
+# Displacers whose history a sync relinks: those it copied, and the unresolved
+SYNCED_DISPLACERS = (
+    "SELECT row_id FROM temp.sync_written WHERE table_name = 'displacers' "
+    f"UNION {UNRESOLVED_DISPLACERS}"
+)
+
+# Number of repeated history column groups in the legacy displacers table
+DISPLACER_HISTORY_SLOTS = 3
+
+# displacer_coldhead_wip column -> legacy displacers column prefix; slot n of
+# a displacer's history is in the columns '<prefix>_<n>'
+DISPLACER_HISTORY_COLUMNS = {
+    "wip_number": "WIP",
+    "coldhead_serial_number": "Coldhead_Serial_Number",
+    "installation_date": "Installation_Date",
+    "test_date": "Test_Date",
+    "load_no_load_status": "Load_No_Load",
+    "first_stage_temp": "First_Stage_Temp",
+    "second_stage_temp": "Second_Stage_Temp",
+    "fail_count": "Fail_Count",
+}
 
 
 def create_new_schema(conn_new):
@@ -139,6 +215,18 @@ def create_new_schema(conn_new):
     );
     """)
 
+    # Lookup indexes; migrate_data drops and rebuilds them around each table's load
+    cursor_new.execute(
+        "CREATE INDEX IF NOT EXISTS idx_coldheads_serial "
+        "ON coldheads (Coldhead_Serial_Number);"
+    )
+    cursor_new.execute("CREATE INDEX IF NOT EXISTS idx_tests_wip ON tests (WIP);")
+    # Lets a sync relink a few displacers' history without scanning it all
+    cursor_new.execute(
+        "CREATE INDEX IF NOT EXISTS idx_displacer_coldhead_wip_displacer "
+        "ON displacer_coldhead_wip (displacer_id);"
+    )
+
     conn_new.commit()
     print("New schema created successfully.")
 
@@ -147,112 +235,733 @@ def table_exists(cursor, table_name):
     """
     Check if a table exists in the database.
     """
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?;", (table_name,))
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?;", (table_name,)
+    )
     return cursor.fetchone() is not None
 
 
-def migrate_data():
+def table_columns(cursor, table_name):
     """
-    Migrates data from the old database to the new database.
+    Return the column names of a table.
     """
-    # Connect to the old database
-    conn_old = sqlite3.connect(OLD_DB_PATH)
-    cursor_old = conn_old.cursor()
+    cursor.execute(f"PRAGMA table_info({table_name});")
+    return [row[1] for row in cursor.fetchall()]
 
-    # Connect to the new database
-    conn_new = sqlite3.connect(NEW_DB_PATH)
-    cursor_new = conn_new.cursor()
 
-    # Enable foreign key constraints
-    conn_new.execute("PRAGMA foreign_keys = ON;")
+def rowid_column(cursor, table_name):
+    """
+    Return the INTEGER PRIMARY KEY column (the rowid alias) of a table, or
+    None if it has none.
+    """
+    cursor.execute(f"PRAGMA table_info({table_name});")
+    keys = [(row[1], row[2]) for row in cursor.fetchall() if row[5]]
+    if len(keys) == 1 and keys[0][1].upper() == "INTEGER":
+        return keys[0][0]
+    return None
 
-    # Step 1: Create the new schema in the new database
-    create_new_schema(conn_new)
 
-    # Step 2: Check existence of necessary tables in the old database
-    required_tables = ['coldheads', 'displacers', 'tests']
-    for table in required_tables:
-        if not table_exists(cursor_old, table):
-            print(f"Table '{table}' does not exist in the old database. Aborting migration.")
-            return
+def write_rejects(reject_file, table_name, columns, rows, error):
+    """
+    Append rejected rows to the reject file, one JSON object per line.
+    """
+    for row in rows:
+        reject_file.write(json.dumps(
+            {"table": table_name, "error": str(error), "row": dict(zip(columns, row))},
+            default=str,
+        ) + "\n")
 
-    # Step 3: Migrate coldhead data
-    print("Starting migration of coldheads data...")
-    cursor_old.execute("SELECT * FROM coldheads")
-    coldheads = cursor_old.fetchall()
 
-    if not coldheads:
-        print("No data found in 'coldheads' table.")
-    else:
-        print(f"Migrating {len(coldheads)} rows from 'coldheads' table.")
-        columns = [desc[0] for desc in cursor_old.description]  # Get column names
-        for row in coldheads:
-            try:
-                cursor_new.execute(f"""
-                    INSERT INTO coldheads ({', '.join(columns)})
-                    VALUES ({', '.join(['?' for _ in columns])})
-                """, row)
-            except sqlite3.Error as e:
-                print(f"Error inserting record into 'coldheads': {e}")
+def insert_batch(cursor_new, insert_sql, table_name, columns, rows, reject_file):
+    """
+    Insert a batch with executemany. If the batch fails, it is rolled back to
+    its savepoint and retried row by row so that only the offending rows are
+    rejected. Returns the number of rows rejected.
+    """
+    cursor_new.execute("SAVEPOINT batch;")
+    try:
+        cursor_new.executemany(insert_sql, rows)
+        cursor_new.execute("RELEASE batch;")
+        return 0
+    except sqlite3.DatabaseError:
+        cursor_new.execute("ROLLBACK TO batch;")
+
+    rejected = 0
+    for row in rows:
+        try:
+            cursor_new.execute(insert_sql, row)
+        except sqlite3.DatabaseError as e:
+            write_rejects(reject_file, table_name, columns, [row], e)
+            rejected += 1
+    cursor_new.execute("RELEASE batch;")
+    return rejected
+
+
+def shared_columns(cursor_old, cursor_new, table_name):
+    """
+    Return the columns of the old table that the new table also has, in the
+    old table's order. The others are reported and not copied.
+    """
+    new_columns = set(table_columns(cursor_new, table_name))
+    old_columns = table_columns(cursor_old, table_name)
+    dropped = [column for column in old_columns if column not in new_columns]
+    if dropped:
+        print(
+            f"'{table_name}': columns not in the new schema are not copied: "
+            f"{', '.join(dropped)}"
+        )
+    return [column for column in old_columns if column in new_columns]
+
+
+def migrate_table(
+    cursor_old, cursor_new, table_name, reject_file, batch_size=BATCH_SIZE
+):
+    """
+    Stream one table from the old database into the new one.
+
+    Only the columns both tables have are copied; the INSERT statement is
+    built once for the whole table.
+
+    :return: Dictionary with the rows read, inserted and rejected, and the
+             elapsed seconds.
+    """
+    columns = shared_columns(cursor_old, cursor_new, table_name)
+    return stream_rows(
+        cursor_old, cursor_new, table_name, columns, reject_file, batch_size
+    )
 
-    conn_new.commit()
-    print("Coldheads data migrated successfully.")
 
-    # Step 4: Migrate displacers data
-    print("Starting migration of displacers data...")
-    cursor_old.execute("SELECT * FROM displacers")
-    displacers = cursor_old.fetchall()
+def stream_rows(
+    cursor_old, cursor_new, table_name, columns, reject_file, batch_size=BATCH_SIZE
+):
+    """
+    Stream the given columns of a table in batches; see migrate_table.
+    """
+    insert_sql = (
+        f"INSERT INTO {table_name} ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' * len(columns))})"
+    )
+    start = time.perf_counter()
+    read = rejected = 0
+    cursor_old.execute(f"SELECT {', '.join(columns)} FROM {table_name}")
+    while True:
+        rows = cursor_old.fetchmany(batch_size)
+        if not rows:
+            break
+        read += len(rows)
+        rejected += insert_batch(
+            cursor_new, insert_sql, table_name, columns, rows, reject_file
+        )
+    return {
+        "read": read,
+        "inserted": read - rejected,
+        "rejected": rejected,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def copy_table(cursor_old, cursor_new, table_name, reject_file, batch_size=BATCH_SIZE):
+    """
+    Copy one table with a single INSERT ... SELECT from the attached legacy
+    database, so no row passes through Python.
+
+    A set-level copy is all or nothing: if any row violates a constraint of the
+    new schema, the copy is rolled back and the table is streamed instead
+    (see migrate_table), which writes the offending rows to the reject file.
+
+    :return: Dictionary with the rows read, inserted and rejected, and the
+             elapsed seconds.
+    """
+    columns = shared_columns(cursor_old, cursor_new, table_name)
+    column_list = ", ".join(columns)
+    start = time.perf_counter()
+    cursor_new.execute("SAVEPOINT copy;")
+    try:
+        cursor_new.execute(
+            f"INSERT INTO main.{table_name} ({column_list}) "
+            f"SELECT {column_list} FROM {LEGACY_SCHEMA}.{table_name}"
+        )
+    except sqlite3.DatabaseError as e:
+        cursor_new.execute("ROLLBACK TO copy;")
+        cursor_new.execute("RELEASE copy;")
+        print(f"'{table_name}': set copy failed ({e}); streaming rows instead")
+        stats = stream_rows(
+            cursor_old, cursor_new, table_name, columns, reject_file, batch_size
+        )
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+    inserted = cursor_new.rowcount
+    cursor_new.execute("RELEASE copy;")
+    return {
+        "read": inserted,
+        "inserted": inserted,
+        "rejected": 0,
+        "seconds": time.perf_counter() - start,
+    }
 
-    if not displacers:
-        print("No data found in 'displacers' table.")
+
+def drop_indexes(cursor_new, table_name):
+    """
+    Drop the explicit indexes of a table and return their CREATE statements,
+    so they can be rebuilt in one pass once the table is loaded. Indexes
+    backing UNIQUE or PRIMARY KEY constraints have no SQL and are kept.
+    """
+    cursor_new.execute(
+        "SELECT name, sql FROM main.sqlite_master "
+        "WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL;",
+        (table_name,),
+    )
+    indexes = cursor_new.fetchall()
+    for name, _ in indexes:
+        cursor_new.execute(f"DROP INDEX main.{name};")
+    return [sql for _, sql in indexes]
+
+
+def unpivot_displacer_history_sql(only_relinked=False):
+    """
+    Return a SELECT turning each filled history slot of the displacers table
+    into its own row (displacer_id, slot, <DISPLACER_HISTORY_COLUMNS>). A slot
+    counts as filled when it names a WIP or a coldhead; blank text is NULL.
+    With only_relinked, only the displacers in temp.relinked_displacers are read.
+    """
+    relinked = (
+        " AND displacer_id IN temp.relinked_displacers" if only_relinked else ""
+    )
+    selects = []
+    for slot in range(1, DISPLACER_HISTORY_SLOTS + 1):
+        values = ", ".join(
+            f"NULLIF(TRIM({prefix}_{slot}), '') AS {column}"
+            if column in ("wip_number", "coldhead_serial_number")
+            else f"{prefix}_{slot} AS {column}"
+            for column, prefix in DISPLACER_HISTORY_COLUMNS.items()
+        )
+        selects.append(
+            f"SELECT displacer_id, {slot} AS slot, {values} FROM displacers "
+            f"WHERE (NULLIF(TRIM(WIP_{slot}), '') IS NOT NULL "
+            f"OR NULLIF(TRIM(Coldhead_Serial_Number_{slot}), '') IS NOT NULL)"
+            f"{relinked}"
+        )
+    return " UNION ALL ".join(selects)
+
+
+def link_displacer_history(cursor_new, displacers=None):
+    """
+    Normalize the repeated history columns of the migrated displacers into
+    displacer_coldhead_wip, one row per filled slot, with set-based SQL.
+
+    The slots are unpivoted into a temporary table, then linked in bulk. The
+    wip table is filled with the WIP numbers of the coldheads table, then with
+    those only found in the slots. A slot's coldhead_id is the coldheads row
+    its WIP resolved to if that row has the slot's serial, else the first row
+    of the serial; wip_id comes from the wip table. The links of the displacers
+    being linked are replaced.
+
+    :param displacers: SQL SELECT of the displacer_ids to relink; every
+                       displacer, rebuilding displacer_coldhead_wip from
+                       scratch, if None.
+    :return: Dictionary with the slots read, the rows inserted, the WIPs
+             created and the elapsed seconds.
+    """
+    start = time.perf_counter()
+    cursor_new.execute("DROP TABLE IF EXISTS temp.relinked_displacers;")
+    if displacers is not None:
+        cursor_new.execute(
+            "CREATE TEMP TABLE relinked_displacers (displacer_id INTEGER PRIMARY KEY);"
+        )
+        cursor_new.execute(
+            f"INSERT OR IGNORE INTO temp.relinked_displacers {displacers};"
+        )
+    unpivot = unpivot_displacer_history_sql(only_relinked=displacers is not None)
+    cursor_new.execute("DROP TABLE IF EXISTS temp.displacer_slots;")
+    cursor_new.execute(f"CREATE TEMP TABLE displacer_slots AS {unpivot};")
+    cursor_new.execute(
+        "ALTER TABLE temp.displacer_slots ADD COLUMN coldhead_id INTEGER;"
+    )
+    slots = cursor_new.execute(
+        "SELECT COUNT(*) FROM temp.displacer_slots;"
+    ).fetchone()[0]
+
+    # WIPs of the coldheads table first, so they keep their own coldhead; the
+    # lowest coldhead_id of a repeated WIP wins
+    cursor_new.execute("""
+        INSERT INTO wip (wip_number, coldhead_id)
+        SELECT WIP, coldhead_id FROM coldheads WHERE true ORDER BY coldhead_id
+        ON CONFLICT (wip_number) DO NOTHING;
+    """)
+    wips = cursor_new.rowcount
+
+    # A slot's coldhead is the one its WIP resolved to when the serials agree,
+    # else the first coldheads row of its serial (a covering index lookup)
+    cursor_new.execute("""
+        UPDATE temp.displacer_slots AS s SET coldhead_id = c.coldhead_id
+        FROM wip AS w JOIN coldheads AS c ON c.coldhead_id = w.coldhead_id
+        WHERE w.wip_number = s.wip_number
+          AND c.Coldhead_Serial_Number = s.coldhead_serial_number;
+    """)
+    cursor_new.execute("""
+        UPDATE temp.displacer_slots AS s SET coldhead_id = (
+            SELECT MIN(c.coldhead_id) FROM coldheads AS c
+            WHERE c.Coldhead_Serial_Number = s.coldhead_serial_number
+        )
+        WHERE s.coldhead_id IS NULL AND s.coldhead_serial_number IS NOT NULL;
+    """)
+
+    cursor_new.execute("""
+        INSERT INTO wip (wip_number, coldhead_id)
+        SELECT wip_number, MIN(coldhead_id) FROM temp.displacer_slots
+        WHERE wip_number IS NOT NULL GROUP BY wip_number
+        ON CONFLICT (wip_number) DO NOTHING;
+    """)
+    wips += cursor_new.rowcount
+
+    if displacers is None:
+        cursor_new.execute("DELETE FROM displacer_coldhead_wip;")
     else:
-        print(f"Migrating {len(displacers)} rows from 'displacers' table.")
-        columns = [desc[0] for desc in cursor_old.description]  # Get column names
-        for row in displacers:
-            try:
-                cursor_new.execute(f"""
-                    INSERT INTO displacers ({', '.join(columns)})
-                    VALUES ({', '.join(['?' for _ in columns])})
-                """, row)
-            except sqlite3.Error as e:
-                print(f"Error inserting record into 'displacers': {e}")
+        cursor_new.execute(
+            "DELETE FROM displacer_coldhead_wip "
+            "WHERE displacer_id IN temp.relinked_displacers;"
+        )
+    cursor_new.execute("""
+        INSERT INTO displacer_coldhead_wip (
+            displacer_id, coldhead_id, wip_id, installation_date, test_date,
+            load_no_load_status, first_stage_temp, second_stage_temp, fail_count
+        )
+        SELECT s.displacer_id, s.coldhead_id, w.wip_id, s.installation_date,
+               s.test_date, s.load_no_load_status, s.first_stage_temp,
+               s.second_stage_temp, COALESCE(s.fail_count, 0)
+        FROM temp.displacer_slots AS s
+        LEFT JOIN wip AS w ON w.wip_number = s.wip_number
+        ORDER BY s.displacer_id, s.slot;
+    """)
+    inserted = cursor_new.rowcount
+    cursor_new.execute("DROP TABLE temp.displacer_slots;")
+    cursor_new.execute("DROP TABLE IF EXISTS temp.relinked_displacers;")
+    return {
+        "read": slots,
+        "inserted": inserted,
+        "rejected": 0,
+        "wips": wips,
+        "seconds": time.perf_counter() - start,
+    }
 
-    conn_new.commit()
-    print("Displacers data migrated successfully.")
 
-    # Step 5: Migrate tests data
-    print("Starting migration of tests data...")
-    cursor_old.execute("SELECT * FROM tests")
-    tests = cursor_old.fetchall()
+def row_fingerprint(text):
+    """
+    SQL function returning a signed 64-bit BLAKE2b hash of a row's quoted
+    values, stable across runs and processes (unlike hash()).
+    """
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def create_sync_tables(cursor_new):
+    """
+    Create the bookkeeping tables of the incremental sync: the high-water mark
+    (highest legacy rowid seen) per table, and per synced legacy row the id of
+    its copy and the fingerprint of its values when last copied. The ids of
+    the copies written by the current run are kept in a temporary table.
+    """
+    cursor_new.execute("""
+    CREATE TABLE IF NOT EXISTS sync_state (
+        table_name TEXT PRIMARY KEY,
+        high_water_mark INTEGER NOT NULL,
+        synced_at DATETIME NOT NULL
+    );
+    """)
+    cursor_new.execute("""
+    CREATE TABLE IF NOT EXISTS sync_rows (
+        table_name TEXT NOT NULL,
+        legacy_rowid INTEGER NOT NULL,
+        row_id INTEGER NOT NULL,
+        fingerprint INTEGER NOT NULL,
+        PRIMARY KEY (table_name, legacy_rowid)
+    ) WITHOUT ROWID;
+    """)
+    cursor_new.execute("""
+    CREATE TEMP TABLE IF NOT EXISTS sync_written (
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        PRIMARY KEY (table_name, row_id)
+    ) WITHOUT ROWID;
+    """)
+
+
+def sync_table(
+    cursor_old, cursor_new, table_name, reject_file, batch_size=BATCH_SIZE
+):
+    """
+    Copy the rows of one attached legacy table that are new or changed since
+    the last sync.
+
+    Rows above the table's high-water mark are new. Rows at or below it are
+    fingerprinted and compared with the fingerprint stored when they were
+    last copied; a difference means the legacy row changed and its copy is
+    updated. Rows rejected by an earlier run have no stored fingerprint and
+    are retried. Rows deleted from the legacy table are left alone.
 
-    if not tests:
-        print("No data found in 'tests' table.")
+    New and changed rows are written with one INSERT ... SELECT and one
+    set-based UPDATE; if either hits a constraint violation, that step is
+    redone row by row and the offending rows go to the reject file.
+
+    Legacy rows are identified by rowid, i.e. by their INTEGER PRIMARY KEY
+    (such as Test_ID) where the table has one. The new table's own id column
+    is not copied: new rows are numbered by the new database. The ids of the
+    copies inserted or updated are added to temp.sync_written.
+
+    :return: Dictionary with the new or changed rows read, the rows inserted,
+             updated and rejected, and the elapsed seconds.
+    """
+    start = time.perf_counter()
+    # The copies get their own ids; sync_rows maps legacy rows onto them
+    id_column = rowid_column(cursor_new, table_name)
+    columns = [
+        column
+        for column in shared_columns(cursor_old, cursor_new, table_name)
+        if column != id_column
+    ]
+    cursor_new.execute(
+        "SELECT high_water_mark FROM sync_state WHERE table_name = ?;", (table_name,)
+    )
+    state = cursor_new.fetchone()
+    has_rows = cursor_new.execute(
+        f"SELECT EXISTS (SELECT 1 FROM main.{table_name});"
+    ).fetchone()[0]
+    if state is None and has_rows:
+        raise ValueError(
+            f"'{table_name}' already has rows that were not copied by a sync; "
+            f"run the first sync into a new database"
+        )
+    high_water_mark = state[0] if state else 0
+
+    # Fingerprints are computed once per row by materializing the scan
+    values = " || ',' || ".join(f"quote(l.{column})" for column in columns)
+    cursor_new.execute("DROP TABLE IF EXISTS temp.sync_incoming;")
+    cursor_new.execute(f"""
+        CREATE TEMP TABLE sync_incoming AS
+        WITH known AS MATERIALIZED (
+            SELECT l.rowid AS legacy_rowid, r.row_id, r.fingerprint AS synced,
+                   row_fingerprint({values}) AS fingerprint
+            FROM {LEGACY_SCHEMA}.{table_name} AS l
+            LEFT JOIN sync_rows AS r
+                ON r.table_name = ? AND r.legacy_rowid = l.rowid
+            WHERE l.rowid <= ?
+        )
+        SELECT legacy_rowid, row_id, fingerprint FROM known
+        WHERE synced IS NOT fingerprint
+        UNION ALL
+        SELECT l.rowid, NULL, row_fingerprint({values})
+        FROM {LEGACY_SCHEMA}.{table_name} AS l WHERE l.rowid > ?;
+    """, (table_name, high_water_mark, high_water_mark))
+    read = cursor_new.execute(
+        "SELECT COUNT(*) FROM temp.sync_incoming;"
+    ).fetchone()[0]
+
+    column_list = ", ".join(columns)
+    legacy_list = ", ".join(f"l.{column}" for column in columns)
+    incoming = (
+        f"FROM temp.sync_incoming AS i "
+        f"JOIN {LEGACY_SCHEMA}.{table_name} AS l ON l.rowid = i.legacy_rowid"
+    )
+
+    # New rows get consecutive ids after the current maximum, in legacy rowid
+    # order, which is how their copies are mapped back without a round trip
+    first_id = cursor_new.execute(
+        f"SELECT MAX(COALESCE((SELECT MAX(rowid) FROM main.{table_name}), 0), "
+        f"COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0));",
+        (table_name,),
+    ).fetchone()[0]
+    cursor_new.execute("SAVEPOINT sync_insert;")
+    try:
+        cursor_new.execute(
+            f"INSERT INTO main.{table_name} ({column_list}) "
+            f"SELECT {legacy_list} {incoming} "
+            f"WHERE i.row_id IS NULL ORDER BY i.legacy_rowid;"
+        )
+        inserted = cursor_new.rowcount
+        if inserted and cursor_new.lastrowid != first_id + inserted:
+            raise sqlite3.IntegrityError(
+                f"'{table_name}' ids were not assigned consecutively"
+            )
+        cursor_new.execute(
+            "INSERT INTO sync_rows (table_name, legacy_rowid, row_id, fingerprint) "
+            "SELECT ?, legacy_rowid, "
+            "? + ROW_NUMBER() OVER (ORDER BY legacy_rowid), fingerprint "
+            "FROM temp.sync_incoming WHERE row_id IS NULL "
+            "ON CONFLICT (table_name, legacy_rowid) DO UPDATE SET "
+            "row_id = excluded.row_id, fingerprint = excluded.fingerprint;",
+            (table_name, first_id),
+        )
+        cursor_new.execute("RELEASE sync_insert;")
+        rejected = 0
+    except sqlite3.DatabaseError:
+        cursor_new.execute("ROLLBACK TO sync_insert;")
+        cursor_new.execute("RELEASE sync_insert;")
+        inserted, rejected = sync_rows_one_by_one(
+            cursor_new, table_name, columns, incoming, reject_file, new=True
+        )
+
+    # Changed rows are keyed by the id of their copy, so both updates below
+    # seek the rows they change instead of scanning the tables
+    cursor_new.execute("DROP TABLE IF EXISTS temp.sync_changed;")
+    cursor_new.execute(
+        "CREATE TEMP TABLE sync_changed "
+        "(row_id INTEGER PRIMARY KEY, legacy_rowid INTEGER NOT NULL, "
+        "fingerprint INTEGER NOT NULL);"
+    )
+    cursor_new.execute(
+        "INSERT INTO temp.sync_changed SELECT row_id, legacy_rowid, fingerprint "
+        "FROM temp.sync_incoming WHERE row_id IS NOT NULL;"
+    )
+    cursor_new.execute("SAVEPOINT sync_update;")
+    try:
+        cursor_new.execute(f"""
+            UPDATE main.{table_name} SET ({column_list}) = (
+                SELECT {legacy_list} FROM temp.sync_changed AS c
+                JOIN {LEGACY_SCHEMA}.{table_name} AS l ON l.rowid = c.legacy_rowid
+                WHERE c.row_id = main.{table_name}.rowid
+            )
+            WHERE rowid IN (SELECT row_id FROM temp.sync_changed);
+        """)
+        updated = cursor_new.rowcount
+        cursor_new.execute(
+            "UPDATE sync_rows SET fingerprint = ("
+            "SELECT c.fingerprint FROM temp.sync_changed AS c "
+            "WHERE c.row_id = sync_rows.row_id) "
+            "WHERE table_name = ? "
+            "AND legacy_rowid IN (SELECT legacy_rowid FROM temp.sync_changed);",
+            (table_name,),
+        )
+        cursor_new.execute("RELEASE sync_update;")
+    except sqlite3.DatabaseError:
+        cursor_new.execute("ROLLBACK TO sync_update;")
+        cursor_new.execute("RELEASE sync_update;")
+        updated, update_rejected = sync_rows_one_by_one(
+            cursor_new, table_name, columns, incoming, reject_file, new=False
+        )
+        rejected += update_rejected
+
+    cursor_new.execute(
+        f"INSERT INTO sync_state (table_name, high_water_mark, synced_at) "
+        f"SELECT ?, COALESCE(MAX(rowid), 0), CURRENT_TIMESTAMP "
+        f"FROM {LEGACY_SCHEMA}.{table_name} WHERE true "
+        f"ON CONFLICT (table_name) DO UPDATE SET "
+        f"high_water_mark = MAX(high_water_mark, excluded.high_water_mark), "
+        f"synced_at = excluded.synced_at;",
+        (table_name,),
+    )
+    cursor_new.execute(
+        "INSERT OR IGNORE INTO temp.sync_written (table_name, row_id) "
+        "SELECT r.table_name, r.row_id FROM temp.sync_incoming AS i "
+        "JOIN sync_rows AS r ON r.table_name = ? AND r.legacy_rowid = i.legacy_rowid;",
+        (table_name,),
+    )
+    cursor_new.execute("DROP TABLE temp.sync_incoming;")
+    cursor_new.execute("DROP TABLE temp.sync_changed;")
+    return {
+        "read": read,
+        "inserted": inserted,
+        "updated": updated,
+        "rejected": rejected,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def sync_rows_one_by_one(cursor_new, table_name, columns, incoming, reject_file, new):
+    """
+    Insert (new=True) or update the incoming rows of sync_table one at a time,
+    recording each row's sync bookkeeping and writing the rows the new schema
+    rejects to the reject file. Returns (rows written, rows rejected).
+    """
+    reader = cursor_new.connection.cursor()
+    legacy_list = ", ".join(f"l.{column}" for column in columns)
+    reader.execute(
+        f"SELECT i.legacy_rowid, i.row_id, i.fingerprint, {legacy_list} {incoming} "
+        f"WHERE i.row_id IS {'' if new else 'NOT '}NULL ORDER BY i.legacy_rowid;"
+    )
+    if new:
+        sql = (
+            f"INSERT INTO main.{table_name} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))});"
+        )
     else:
-        print(f"Migrating {len(tests)} rows from 'tests' table.")
-        columns = [desc[0] for desc in cursor_old.description]  # Get column names
-        for row in tests:
-            try:
-                cursor_new.execute(f"""
-                    INSERT INTO tests ({', '.join(columns)})
-                    VALUES ({', '.join(['?' for _ in columns])})
-                """, row)
-            except sqlite3.Error as e:
-                print(f"Error inserting record into 'tests': {e}")
+        sql = (
+            f"UPDATE main.{table_name} "
+            f"SET {', '.join(f'{column} = ?' for column in columns)} "
+            f"WHERE rowid = ?;"
+        )
+    written = rejected = 0
+    for legacy_rowid, row_id, fingerprint, *row in reader:
+        try:
+            cursor_new.execute(sql, row if new else (*row, row_id))
+        except sqlite3.DatabaseError as e:
+            write_rejects(reject_file, table_name, columns, [row], e)
+            rejected += 1
+            continue
+        cursor_new.execute(
+            "INSERT INTO sync_rows (table_name, legacy_rowid, row_id, fingerprint) "
+            "VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (table_name, legacy_rowid) DO UPDATE SET "
+            "row_id = excluded.row_id, fingerprint = excluded.fingerprint;",
+            (
+                table_name,
+                legacy_rowid,
+                cursor_new.lastrowid if new else row_id,
+                fingerprint,
+            ),
+        )
+        written += 1
+    return written, rejected
 
-    conn_new.commit()
-    print("Tests data migrated successfully.")
 
-    # Close connections
-    conn_old.close()
-    conn_new.close()
+def migrate_data(
+    old_db_path, new_db_path, reject_path=None, batch_size=BATCH_SIZE, mode="stream"
+):
+    """
+    Migrates data from the old database to the new database.
+
+    :param old_db_path: Path to the legacy database; opened read-only.
+    :param new_db_path: Path to the new database; created if missing.
+    :param reject_path: JSON-lines file for rejected rows; defaults to
+                        '<new_db_path>.rejects.jsonl'.
+    :param batch_size: Rows per fetchmany and executemany.
+    :param mode: 'stream' to move rows through Python in batches (see
+                 migrate_table), 'attach' to copy each table inside SQLite
+                 with the legacy database attached (see copy_table) or 'sync'
+                 to copy only new or changed rows (see sync_table). Only
+                 'sync' can be run repeatedly against the same new database;
+                 it skips the bulk-load PRAGMAs and index rebuilds since the
+                 new database is live.
+    :return: Dictionary of per-table statistics (see migrate_table).
+    """
+    if mode not in MIGRATION_MODES:
+        raise ValueError(
+            f"Unknown migration mode '{mode}'; "
+            f"expected one of {', '.join(MIGRATION_MODES)}"
+        )
+    if not os.path.exists(old_db_path):
+        raise FileNotFoundError(f"Old database not found at {old_db_path}")
+    reject_path = reject_path or f"{new_db_path}.rejects.jsonl"
+
+    conn_old = sqlite3.connect(f"file:{old_db_path}?mode=ro", uri=True)
+    # Autocommit mode: the transaction below is managed explicitly. URI
+    # filenames are enabled so the legacy database can be attached read-only.
+    conn_new = sqlite3.connect(new_db_path, isolation_level=None, uri=True)
+    try:
+        cursor_old = conn_old.cursor()
+        cursor_new = conn_new.cursor()
+
+        # Check existence of necessary tables in the old database
+        missing = [
+            table for table in MIGRATED_TABLES if not table_exists(cursor_old, table)
+        ]
+        if missing:
+            raise ValueError(
+                f"Tables missing from the old database: {', '.join(missing)}. "
+                f"Aborting migration."
+            )
+
+        if mode != "sync":
+            for pragma in BULK_LOAD_PRAGMAS:
+                cursor_new.execute(pragma)
+        create_new_schema(conn_new)
+        if mode == "sync":
+            create_sync_tables(cursor_new)
+            conn_new.create_function(
+                "row_fingerprint", 1, row_fingerprint, deterministic=True
+            )
+        if mode in ("attach", "sync"):
+            # ATTACH is not allowed inside a transaction
+            cursor_new.execute(
+                f"ATTACH DATABASE ? AS {LEGACY_SCHEMA};",
+                (f"file:{old_db_path}?mode=ro",),
+            )
+
+        stats = {}
+        with open(reject_path, "w") as reject_file:
+            cursor_new.execute("BEGIN IMMEDIATE;")
+            try:
+                for table_name in MIGRATED_TABLES:
+                    if mode == "sync":
+                        stats[table_name] = sync_table(
+                            cursor_old, cursor_new, table_name, reject_file, batch_size
+                        )
+                        print_table_stats(table_name, stats[table_name])
+                        continue
+                    indexes = drop_indexes(cursor_new, table_name)
+                    copy = copy_table if mode == "attach" else migrate_table
+                    table_stats = copy(
+                        cursor_old, cursor_new, table_name, reject_file, batch_size
+                    )
+                    index_start = time.perf_counter()
+                    for sql in indexes:
+                        cursor_new.execute(sql)
+                    table_stats["seconds"] += time.perf_counter() - index_start
+                    stats[table_name] = table_stats
+                    print_table_stats(table_name, table_stats)
+                changed = {
+                    table_name: bool(
+                        table_stats["inserted"] or table_stats.get("updated")
+                    )
+                    for table_name, table_stats in stats.items()
+                }
+                if mode != "sync":
+                    relinked = None
+                elif changed["displacers"]:
+                    relinked = SYNCED_DISPLACERS
+                else:
+                    relinked = UNRESOLVED_DISPLACERS
+                if changed["displacers"] or (mode == "sync" and changed["coldheads"]):
+                    linked = link_displacer_history(cursor_new, relinked)
+                    stats["displacer_coldhead_wip"] = linked
+                    print_table_stats("displacer_coldhead_wip", linked)
+                cursor_new.execute("COMMIT;")
+            except BaseException:
+                cursor_new.execute("ROLLBACK;")
+                raise
+    finally:
+        conn_old.close()
+        conn_new.close()
+
+    rejected = sum(table["rejected"] for table in stats.values())
+    if rejected:
+        print(f"{rejected} rejected row(s) written to {reject_path}")
+    else:
+        os.remove(reject_path)
     print("Data migration completed successfully.")
+    return stats
+
+
+def print_table_stats(table_name, table_stats):
+    seconds = table_stats["seconds"]
+    rate = table_stats["read"] / seconds if seconds > 0 else 0
+    updated = f", {table_stats['updated']} updated" if "updated" in table_stats else ""
+    print(
+        f"{table_name:<12} {table_stats['inserted']} rows in {seconds:.2f}s "
+        f"({rate:,.0f} rows/s){updated}, {table_stats['rejected']} rejected"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Migrate the legacy Repair_Tracker database into the CH_DB schema."
+    )
+    parser.add_argument("old_db", help="Path to the legacy database.")
+    parser.add_argument("new_db", help="Path to the new database; created if missing.")
+    parser.add_argument(
+        "--reject-file",
+        help="JSON-lines file for rejected rows (default: <new_db>.rejects.jsonl).",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=BATCH_SIZE, help="Rows per batch."
+    )
+    parser.add_argument(
+        "--mode", choices=MIGRATION_MODES, default="stream", help="How rows are copied."
+    )
+    args = parser.parse_args()
+    migrate_data(
+        args.old_db, args.new_db, args.reject_file, args.batch_size, args.mode
+    )
 
 
 if __name__ == "__main__":
-    if not os.path.exists(OLD_DB_PATH):
-        print(f"Old database not found at {OLD_DB_PATH}")
-    else:
-        # Create new database file or connect if it exists
-        if not os.path.exists(NEW_DB_PATH):
-            open(NEW_DB_PATH, 'w').close()
-        migrate_data()
+    main()
@@ -1,31 +1,385 @@
 # db_mngt/dbs/verify.py
+"""
+Verify that two SQLite databases hold the same rows, e.g. a migrated CH_DB
+against its source or a replica against the live database.
 
-from sqlalchemy import create_engine, inspect
-import os
+The target database is attached to the source and each table is split into
+buckets of consecutive keys (its INTEGER PRIMARY KEY or rowid, --bucket-size
+keys per bucket). Each bucket is checked inside SQLite with one range scan of
+the source that seeks the target by key and counts the rows that differ, so
+no value is formatted, hashed or pulled into Python. Only the buckets with
+differences are drilled into, with joins on the key that return just the
+differing rows.
 
-# Define the absolute path to the SQLite database based on the current script's location
-current_dir = os.path.dirname(os.path.abspath(__file__))
-database_path = os.path.join(current_dir, 'New_Database.db')
+Only the columns both tables have are compared. Two values match when SQLite
+finds them equal and they have the same storage class, so 5 and '5' differ,
+as do 5 and 5.0. Keys must correspond on both sides, as they do after
+transfer_db.py's stream and attach modes (which copy the ids); a database
+filled by its sync mode numbers rows itself.
 
-# Create the engine pointing to 'New_Database.db'
-engine = create_engine(f'sqlite:///{database_path}')
+Usage:
+    python verify.py Repair_Tracker.db CH_DB.db
+    python verify.py CH_DB.db replica.db --tables tests --bucket-size 50000
+"""
 
-# Create an inspector
-inspector = inspect(engine)
+import argparse
+import sqlite3
+import sys
+import time
 
-# Function to print columns of a given table
-def print_table_columns(table_name):
+# Consecutive keys checked together
+BUCKET_SIZE = 10000
+
+# Differing rows listed per table; all of them are counted
+MAX_REPORTED_ROWS = 20
+
+# Schema name the target database is attached under
+TARGET_SCHEMA = "target"
+
+
+def table_names(cursor, schema):
+    """
+    Return the names of the user tables of an attached schema.
+    """
+    cursor.execute(
+        f"SELECT name FROM {schema}.sqlite_master "
+        f"WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name;"
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def table_info(cursor, schema, table_name):
+    cursor.execute(f"PRAGMA {schema}.table_info({table_name});")
+    return cursor.fetchall()
+
+
+def key_column(cursor, schema, table_name):
+    """
+    Return the column the table's rows are keyed by: its INTEGER PRIMARY KEY,
+    else rowid, or None for a WITHOUT ROWID table.
+    """
+    keys = [
+        (row[1], row[2]) for row in table_info(cursor, schema, table_name) if row[5]
+    ]
+    if len(keys) == 1 and keys[0][1].upper() == "INTEGER":
+        return keys[0][0]
+    cursor.execute(
+        f"SELECT sql FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?;",
+        (table_name,),
+    )
+    if "WITHOUT ROWID" in (cursor.fetchone()[0] or "").upper():
+        return None
+    return "rowid"
+
+
+def column_affinity(declared_type):
+    """
+    Return the affinity SQLite gives a column of the declared type.
+    """
+    declared_type = (declared_type or "").upper()
+    if "INT" in declared_type:
+        return "INTEGER"
+    if any(name in declared_type for name in ("CHAR", "CLOB", "TEXT")):
+        return "TEXT"
+    if "BLOB" in declared_type or not declared_type:
+        return "BLOB"
+    if any(name in declared_type for name in ("REAL", "FLOA", "DOUB")):
+        return "REAL"
+    return "NUMERIC"
+
+
+def compared_columns(cursor, table_name):
+    """
+    Return the columns both tables have (matched case-insensitively, in the
+    source table's order) and the columns only the source or the target has.
+    The shared columns are (name, source affinity, target affinity) tuples.
+    """
+    source = {row[1]: row[2] for row in table_info(cursor, "main", table_name)}
+    target = {
+        row[1].lower(): (row[1], row[2])
+        for row in table_info(cursor, TARGET_SCHEMA, table_name)
+    }
+    source_lower = {column.lower() for column in source}
+    shared = [
+        (
+            column,
+            column_affinity(declared_type),
+            column_affinity(target[column.lower()][1]),
+        )
+        for column, declared_type in source.items()
+        if column.lower() in target
+    ]
+    only_source = [column for column in source if column.lower() not in target]
+    only_target = [
+        name for lower, (name, _) in target.items() if lower not in source_lower
+    ]
+    return shared, only_source, only_target
+
+
+def changed_flags(columns):
+    """
+    Return one SQL flag per compared column, true when the source row s and
+    the target row t hold different values in it.
+
+    IS NOT already tells storage classes apart, except where SQLite converts
+    between them before comparing: across columns of different affinities, and
+    between integers and reals in a column without affinity (a column with
+    affinity stores 5.0 as 5, or 5 as 5.0). Only those columns also compare
+    typeof(), which costs more than the comparison itself.
+    """
+    flags = []
+    for column, source_affinity, target_affinity in columns:
+        flag = f"s.{column} IS NOT t.{column}"
+        if source_affinity != target_affinity or source_affinity == "BLOB":
+            flag = f"({flag} OR typeof(s.{column}) <> typeof(t.{column}))"
+        flags.append(flag)
+    return flags
+
+
+def check_bucket(cursor, table_name, keys, flags, low, high):
+    """
+    Return (source rows, target rows, rows differing) for the keys low..high.
+    keys maps each schema to its key column.
+
+    The source's key range is scanned once, seeking each row's key in the
+    target; the target's range is only counted, which tells whether it has
+    rows the source has not.
+    """
+    source_key, target_key = keys.values()
+    differs = " OR ".join(flags) or "0"
+    # A key range is a rowid range scan, which visits the rows in key order
+    cursor.execute(
+        f"""
+        SELECT COUNT(*), COUNT(t.{target_key}),
+               TOTAL(t.{target_key} IS NOT NULL AND ({differs}))
+        FROM main.{table_name} AS s
+        LEFT JOIN {TARGET_SCHEMA}.{table_name} AS t ON t.{target_key} = s.{source_key}
+        WHERE s.{source_key} BETWEEN ? AND ?;
+        """,
+        (low, high),
+    )
+    source_rows, matched, changed = cursor.fetchone()
+    cursor.execute(
+        f"SELECT COUNT(*) FROM {TARGET_SCHEMA}.{table_name} "
+        f"WHERE {target_key} BETWEEN ? AND ?;",
+        (low, high),
+    )
+    target_rows = cursor.fetchone()[0]
+    return (
+        source_rows,
+        target_rows,
+        int(changed) + (source_rows - matched) + (target_rows - matched),
+    )
+
+
+def diff_bucket(cursor, table_name, keys, columns, low, high):
+    """
+    Return the rows with keys low..high that differ between the two sides:
+    (key, 'only in source' / 'only in target' / 'changed', changed columns).
+
+    Both queries walk one side's key range and seek the other side by key.
+    Values are compared as in check_bucket.
+    """
+    source_key, target_key = keys.values()
+    changed = changed_flags(columns)
+    cursor.execute(
+        f"""
+        SELECT s.{source_key}, t.{target_key} IS NULL
+               {''.join(f', {flag}' for flag in changed)}
+        FROM main.{table_name} AS s
+        LEFT JOIN {TARGET_SCHEMA}.{table_name} AS t ON t.{target_key} = s.{source_key}
+        WHERE s.{source_key} BETWEEN ? AND ?
+          AND (t.{target_key} IS NULL{''.join(f' OR {flag}' for flag in changed)});
+        """,
+        (low, high),
+    )
+    differences = []
+    for key, missing, *flags in cursor.fetchall():
+        if missing:
+            differences.append((key, "only in source", []))
+        else:
+            changed_columns = [
+                column for (column, _, _), flag in zip(columns, flags) if flag
+            ]
+            differences.append((key, "changed", changed_columns))
+
+    cursor.execute(
+        f"""
+        SELECT t.{target_key} FROM {TARGET_SCHEMA}.{table_name} AS t
+        WHERE t.{target_key} BETWEEN ? AND ?
+          AND NOT EXISTS (
+              SELECT 1 FROM main.{table_name} AS s WHERE s.{source_key} = t.{target_key}
+          );
+        """,
+        (low, high),
+    )
+    differences.extend((row[0], "only in target", []) for row in cursor.fetchall())
+    return sorted(differences, key=lambda difference: difference[0])
+
+
+def verify_table(
+    cursor, table_name, bucket_size=BUCKET_SIZE, max_rows=MAX_REPORTED_ROWS
+):
+    """
+    Compare one table of the source and target databases bucket by bucket.
+
+    :return: Dictionary with the row counts of both sides, the buckets
+             compared and mismatched, the number of differing rows, the first
+             max_rows of them, the columns only one side has and the elapsed
+             seconds.
+    """
+    start = time.perf_counter()
+    columns, only_source, only_target = compared_columns(cursor, table_name)
+    keys = {
+        schema: key_column(cursor, schema, table_name)
+        for schema in ("main", TARGET_SCHEMA)
+    }
+    if None in keys.values():
+        raise ValueError(
+            f"'{table_name}' has no rowid on one side and cannot be verified "
+            f"by key range"
+        )
+    # The key columns are not compared as values, only as keys
+    key_names = {key.lower() for key in keys.values()}
+    columns = [column for column in columns if column[0].lower() not in key_names]
+    flags = changed_flags(columns)
+
+    source_key, target_key = keys.values()
+    cursor.execute(
+        f"""
+        SELECT MIN(low), MAX(high) FROM (
+            SELECT MIN({source_key}) AS low, MAX({source_key}) AS high
+            FROM main.{table_name}
+            UNION ALL
+            SELECT MIN({target_key}), MAX({target_key})
+            FROM {TARGET_SCHEMA}.{table_name}
+        );
+        """
+    )
+    low, high = cursor.fetchone()
+    stats = {
+        "rows": [0, 0],
+        "buckets": 0,
+        "mismatched_buckets": 0,
+        "differences": 0,
+        "rows_differing": [],
+        "columns_only_in_source": only_source,
+        "columns_only_in_target": only_target,
+    }
+    if low is not None:
+        for bucket in range(low // bucket_size, high // bucket_size + 1):
+            bucket_low = bucket * bucket_size
+            bucket_high = bucket_low + bucket_size - 1
+            source_rows, target_rows, differing = check_bucket(
+                cursor, table_name, keys, flags, bucket_low, bucket_high
+            )
+            stats["rows"][0] += source_rows
+            stats["rows"][1] += target_rows
+            if not source_rows and not target_rows:
+                continue  # A gap in the keys
+            stats["buckets"] += 1
+            if not differing:
+                continue
+            stats["mismatched_buckets"] += 1
+            differences = diff_bucket(
+                cursor, table_name, keys, columns, bucket_low, bucket_high
+            )
+            stats["differences"] += len(differences)
+            reported = max_rows - len(stats["rows_differing"])
+            stats["rows_differing"].extend(differences[:reported])
+    stats["rows"] = tuple(stats["rows"])
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def verify_databases(
+    source_db_path,
+    target_db_path,
+    tables=None,
+    bucket_size=BUCKET_SIZE,
+    max_rows=MAX_REPORTED_ROWS,
+):
+    """
+    Compare the tables of two databases; both are opened read-only.
+
+    :param tables: Tables to compare; defaults to every table both have.
+    :return: Dictionary of per-table statistics (see verify_table); tables
+             only one database has map to None.
+    """
+    conn = sqlite3.connect(f"file:{source_db_path}?mode=ro", uri=True)
     try:
-        columns = inspector.get_columns(table_name)
-        print(f"Columns in '{table_name}' table:")
-        for column in columns:
-            print(f"- {column['name']} ({column['type']})")
-    except Exception as e:
-        print(f"Error inspecting table '{table_name}': {e}")
+        cursor = conn.cursor()
+        cursor.execute(
+            f"ATTACH DATABASE ? AS {TARGET_SCHEMA};",
+            (f"file:{target_db_path}?mode=ro",),
+        )
+        source_tables = table_names(cursor, "main")
+        target_tables = table_names(cursor, TARGET_SCHEMA)
+        if tables is None:
+            tables = sorted(set(source_tables) | set(target_tables))
+
+        stats = {}
+        for table_name in tables:
+            if table_name in source_tables and table_name in target_tables:
+                stats[table_name] = verify_table(
+                    cursor, table_name, bucket_size, max_rows
+                )
+            else:
+                stats[table_name] = None
+            print_table_report(table_name, stats[table_name])
+        return stats
+    finally:
+        conn.close()
+
+
+def print_table_report(table_name, table_stats):
+    if table_stats is None:
+        print(f"{table_name}: only in one database")
+        return
+    source_rows, target_rows = table_stats["rows"]
+    differences = table_stats["differences"]
+    status = f"{differences} row(s) differ" if differences else "OK"
+    print(
+        f"{table_name}: {source_rows} / {target_rows} rows, "
+        f"{table_stats['mismatched_buckets']} of {table_stats['buckets']} "
+        f"bucket(s) mismatched in {table_stats['seconds']:.2f}s: {status}"
+    )
+    for side in ("source", "target"):
+        columns = table_stats[f"columns_only_in_{side}"]
+        if columns:
+            print(f"  columns only in {side} (not compared): {', '.join(columns)}")
+    for key, kind, columns in table_stats["rows_differing"]:
+        print(f"  {key}: {kind}{' (' + ', '.join(columns) + ')' if columns else ''}")
+    if differences > len(table_stats["rows_differing"]):
+        print(f"  ... {differences - len(table_stats['rows_differing'])} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Verify that two SQLite databases hold the same rows."
+    )
+    parser.add_argument("source_db", help="Path to the reference database.")
+    parser.add_argument("target_db", help="Path to the database checked against it.")
+    parser.add_argument("--tables", nargs="+", help="Tables to compare (default: all).")
+    parser.add_argument(
+        "--bucket-size",
+        type=int,
+        default=BUCKET_SIZE,
+        help="Consecutive keys checked together.",
+    )
+    parser.add_argument(
+        "--max-rows",
+        type=int,
+        default=MAX_REPORTED_ROWS,
+        help="Differing rows listed per table.",
+    )
+    args = parser.parse_args()
+    stats = verify_databases(
+        args.source_db, args.target_db, args.tables, args.bucket_size, args.max_rows
+    )
+    if any(table is None or table["differences"] for table in stats.values()):
+        sys.exit(1)
+
 
 if __name__ == "__main__":
-    # Check if the 'tests' table exists
-    if 'tests' in inspector.get_table_names():
-        print_table_columns('tests')
-    else:
-        print("The 'tests' table does not exist in the database.")
+    main()
@@ -9,6 +9,8 @@ from .column_map import (
     TESTS_TABLE_MAPPING,
 )
 from db_ops.error_handler import DatabaseError, DuplicateEntryError, EmptyUpdateError  # Import additional exceptions
+from db_ops.database import BUSY_TIMEOUT_MS
+from db_ops.write_coordination import retry_on_busy
 from logger import logger  # Import the logger
 
 
@@ -34,7 +36,12 @@ class RepTrackerSing:
     def _initialize(self, db_path):
         try:
             self.db_path = db_path
-            self.connection = sqlite3.connect(self.db_path)
+            self.connection = sqlite3.connect(
+                self.db_path, timeout=BUSY_TIMEOUT_MS / 1000
+            )
+            # Writes open with BEGIN IMMEDIATE so the write lock is taken up front
+            # rather than failing on a read-to-write upgrade under contention.
+            self.connection.isolation_level = "IMMEDIATE"
             self.connection.row_factory = sqlite3.Row  # To access columns by name
             self.cursor = self.connection.cursor()
             self.table_map = {
@@ -79,14 +86,32 @@ class RepTrackerSing:
             logger.exception(f"SQLite error during execute_query: {e}")
             raise DatabaseError(f"SQLite error during execute_query: {e}") from e
 
+    def _execute_write(self, query, params):
+        """
+        Executes a single write statement and commits it, retrying with backoff
+        while another writer holds the database lock.
+
+        :param query: SQL statement.
+        :param params: Statement parameters.
+        """
+
+        def attempt():
+            try:
+                self.cursor.execute(query, params)
+                self.connection.commit()
+            except sqlite3.Error:
+                self.connection.rollback()
+                raise
+
+        retry_on_busy(attempt)
+
     def execute_insert(self, table, data):
         try:
             columns = ', '.join(data.keys())
             placeholders = ', '.join(['?'] * len(data))
             query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
             logger.debug(f"Executing insert: {query} with data: {tuple(data.values())}")
-            self.cursor.execute(query, tuple(data.values()))
-            self.connection.commit()
+            self._execute_write(query, tuple(data.values()))
             logger.info(f"Insert successful for table '{table}'")
         except sqlite3.IntegrityError as e:
             logger.exception(f"Integrity error during insert into '{table}': {e}")
@@ -122,8 +147,7 @@ class RepTrackerSing:
 
             query = f"UPDATE {table} SET {set_clause} WHERE {where_clause}"
             logger.debug(f"Executing update: {query} with params: {params}")
-            self.cursor.execute(query, params)
-            self.connection.commit()
+            self._execute_write(query, params)
             logger.info(f"Update successful for table '{table}'")
         except sqlite3.IntegrityError as e:
             logger.exception(f"Integrity error during execute_update: {e}")
@@ -152,8 +176,7 @@ class RepTrackerSing:
             ON CONFLICT({conflict_columns}) DO UPDATE SET {update_clause};
             """
             logger.debug(f"Executing upsert: {query} with data: {tuple(data.values())}")
-            self.cursor.execute(query, tuple(data.values()))
-            self.connection.commit()
+            self._execute_write(query, tuple(data.values()))
             logger.info(f"Upsert successful for table '{table}'")
         except sqlite3.Error as e:
             logger.exception(f"SQLite error during execute_upsert into '{table}': {e}")
@@ -178,8 +201,7 @@ class RepTrackerSing:
 
             query = f"UPDATE {table} SET {set_clause} WHERE {where_clause}"
             logger.debug(f"Executing update: {query} with params: {params}")
-            self.cursor.execute(query, params)
-            self.connection.commit()
+            self._execute_write(query, params)
             logger.info(f"Update successful for table '{table}'")
         except sqlite3.Error as e:
             logger.exception(f"SQLite error during execute_update_no_raise: {e}")
@@ -197,8 +219,7 @@ class RepTrackerSing:
             placeholders = ', '.join(['?'] * len(data))
             query = f"INSERT OR IGNORE INTO {table} ({columns}) VALUES ({placeholders})"
             logger.debug(f"Executing insert or ignore: {query} with data: {tuple(data.values())}")
-            self.cursor.execute(query, tuple(data.values()))
-            self.connection.commit()
+            self._execute_write(query, tuple(data.values()))
             logger.info(f"Insert or ignore successful for table '{table}'")
         except sqlite3.Error as e:
             logger.exception(f"SQLite error during execute_insert_or_ignore into '{table}': {e}")
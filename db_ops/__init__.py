@@ -1,7 +1,35 @@
 # db_ops/__init__.py
 
-from .models import Base, Test, Coldhead, Displacer, WIP
+from .models import (
+    Base,
+    Test,
+    Coldhead,
+    Displacer,
+    WIP,
+    ChangeLog,
+    ImportJournal,
+    ImportRowHash,
+    ColdheadTestSummary,
+    DisplacerTestSummary,
+)
 from .search import SearchOperator
 from .database import Session  # Import Session for use elsewhere
+from .change_log import ChangeJournal  # Registers the change journal triggers
+from .test_summary import PartSummaries  # Registers the test summary triggers
 
-__all__ = ['Base', 'Test', 'Coldhead', 'Displacer', 'WIP', 'SearchOperator', 'Session']
+__all__ = [
+    'Base',
+    'Test',
+    'Coldhead',
+    'Displacer',
+    'WIP',
+    'ChangeLog',
+    'ImportJournal',
+    'ImportRowHash',
+    'ColdheadTestSummary',
+    'DisplacerTestSummary',
+    'SearchOperator',
+    'Session',
+    'ChangeJournal',
+    'PartSummaries',
+]
@@ -0,0 +1,132 @@
+# db_ops/change_log.py
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.orm import Session
+
+from db_ops.models import Base, ChangeLog
+from logger import logger
+
+# Journaled tables and their primary key column
+JOURNALED_TABLES = {
+    "wips": "wip_id",
+    "coldheads": "coldhead_id",
+    "displacers": "displacer_id",
+    "tests": "test_id",
+}
+
+_OPERATIONS = {"INSERT": "NEW", "UPDATE": "NEW", "DELETE": "OLD"}
+
+
+def change_trigger_ddl() -> List[str]:
+    """
+    Returns the CREATE TRIGGER statements that journal every insert, update
+    and delete on the journaled tables into change_log.
+    """
+    statements = []
+    for table, pk in JOURNALED_TABLES.items():
+        for operation, row in _OPERATIONS.items():
+            statements.append(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{table}_{operation.lower()}_log "
+                f"AFTER {operation} ON {table} "
+                f"BEGIN "
+                f"INSERT INTO change_log (table_name, operation, row_id) "
+                f"VALUES ('{table}', '{operation}', {row}.{pk}); "
+                f"END"
+            )
+    return statements
+
+
+def install_change_triggers(connection):
+    """
+    Creates the change journal triggers if they do not exist.
+
+    :param connection: SQLAlchemy connection to a database with the journaled tables.
+    """
+    for statement in change_trigger_ddl():
+        connection.execute(text(statement))
+    logger.info("Change journal triggers installed.")
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_triggers_after_create(target, connection, **kw):
+    tables = {table.name for table in kw.get("tables") or target.sorted_tables}
+    if connection.dialect.name == "sqlite" and "change_log" in tables:
+        install_change_triggers(connection)
+
+
+class ChangeJournal:
+    def __init__(self, db_session: Session):
+        """
+        Initialize ChangeJournal with a SQLAlchemy session.
+
+        :param db_session: SQLAlchemy session object.
+        """
+        self.db_session = db_session
+
+    def latest_seq(self) -> int:
+        """
+        Returns the highest sequence number in the journal, or 0 if it is empty.
+        """
+        return self.db_session.execute(select(func.max(ChangeLog.seq))).scalar() or 0
+
+    def changes_since(
+        self,
+        seq: int,
+        tables: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Returns journal entries with a sequence number greater than seq, oldest
+        first. The lookup is a range scan on the primary key, so its cost is
+        proportional to the number of changes returned.
+
+        :param seq: Last sequence number the consumer has processed.
+        :param tables: Optional table names to restrict the result to.
+        :param limit: Optional maximum number of entries to return.
+        :return: List of dictionaries with seq, table_name, operation, row_id,
+                 changed_at.
+        """
+        query = select(ChangeLog).where(ChangeLog.seq > seq).order_by(ChangeLog.seq)
+        if tables is not None:
+            query = query.where(ChangeLog.table_name.in_(list(tables)))
+        if limit is not None:
+            query = query.limit(limit)
+
+        return [
+            {
+                "seq": entry.seq,
+                "table_name": entry.table_name,
+                "operation": entry.operation,
+                "row_id": entry.row_id,
+                "changed_at": entry.changed_at,
+            }
+            for entry in self.db_session.execute(query).scalars()
+        ]
+
+    def changed_keys_since(
+        self, seq: int, tables: Optional[Iterable[str]] = None
+    ) -> Tuple[Dict[str, Dict[str, Set[int]]], int]:
+        """
+        Collapses the changes after seq into the primary keys a consumer needs
+        to reload or remove, per table.
+
+        :param seq: Last sequence number the consumer has processed.
+        :param tables: Optional table names to restrict the result to.
+        :return: ({table: {"upserted": ids, "deleted": ids}}, new high-water seq)
+        """
+        keys: Dict[str, Dict[str, Set[int]]] = {}
+        high_water = seq
+        for change in self.changes_since(seq, tables):
+            table_keys = keys.setdefault(
+                change["table_name"], {"upserted": set(), "deleted": set()}
+            )
+            if change["operation"] == "DELETE":
+                table_keys["upserted"].discard(change["row_id"])
+                table_keys["deleted"].add(change["row_id"])
+            else:
+                table_keys["deleted"].discard(change["row_id"])
+                table_keys["upserted"].add(change["row_id"])
+            high_water = change["seq"]
+        return keys, high_water
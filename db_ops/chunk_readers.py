@@ -0,0 +1,148 @@
+# db_ops/chunk_readers.py
+
+from typing import Iterator, Optional
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from logger import logger
+
+# Rows per chunk handed to the write stage.
+READ_CHUNK_SIZE = 5000
+
+# Legacy workbook formats openpyxl cannot open; pandas reads them whole.
+PANDAS_ONLY_EXCEL_SUFFIXES = (".xls",)
+
+
+def _is_pandas_only(excel_path: str) -> bool:
+    return excel_path.lower().endswith(PANDAS_ONLY_EXCEL_SUFFIXES)
+
+
+def read_excel_sheet(excel_path: str, sheet_name: Optional[str] = None) -> pd.DataFrame:
+    """
+    Reads a whole worksheet with pandas.
+
+    Rows without any value are dropped, as iter_excel_chunks drops them, so
+    both readers cut a file into the same chunks and an interrupted import can
+    be resumed with either.
+
+    :param excel_path: Path to the Excel file.
+    :param sheet_name: Worksheet to read; the first sheet when omitted.
+    """
+    df = pd.read_excel(excel_path, sheet_name=sheet_name or 0)
+    return df.dropna(how="all").reset_index(drop=True)
+
+
+def iter_excel_chunks(
+    excel_path: str,
+    chunk_size: int = READ_CHUNK_SIZE,
+    sheet_name: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields a worksheet as DataFrames of at most chunk_size rows.
+
+    The workbook is opened read-only, so openpyxl streams rows from the file
+    instead of building the whole sheet in memory; only one chunk is held at a
+    time. The first row is taken as the header. Legacy .xls files, which
+    openpyxl cannot open, are read whole by pandas and then split.
+
+    :param excel_path: Path to the .xlsx or .xls file.
+    :param chunk_size: Maximum number of rows per chunk.
+    :param sheet_name: Worksheet to read; the first sheet when omitted.
+    """
+    if _is_pandas_only(excel_path):
+        yield from iter_frame_chunks(
+            read_excel_sheet(excel_path, sheet_name), chunk_size
+        )
+        return
+
+    workbook = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise pd.errors.EmptyDataError(f"Worksheet in {excel_path} is empty")
+        columns = [
+            str(name) if name is not None else f"Unnamed: {i}"
+            for i, name in enumerate(header)
+        ]
+
+        width = len(columns)
+        chunk = []
+        for row in rows:
+            if not any(value is not None for value in row):
+                continue  # Formatted but empty rows at the end of a sheet
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            chunk.append(row[:width])
+            if len(chunk) == chunk_size:
+                yield pd.DataFrame.from_records(chunk, columns=columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame.from_records(chunk, columns=columns)
+    finally:
+        workbook.close()
+        logger.debug(f"Closed workbook {excel_path}")
+
+
+def excel_row_count(excel_path: str, sheet_name: Optional[str] = None) -> Optional[int]:
+    """
+    Returns the number of data rows a worksheet declares, without reading them.
+
+    The count comes from the sheet's dimension record, so it includes any
+    formatted but empty rows at the end; use it for progress estimates only.
+
+    :param excel_path: Path to the .xlsx file.
+    :param sheet_name: Worksheet to count; the first sheet when omitted.
+    :return: Number of rows below the header, or None if the file does not say
+             (always for .xls files).
+    """
+    if _is_pandas_only(excel_path):
+        return None
+    workbook = load_workbook(excel_path, read_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        return max(sheet.max_row - 1, 0) if sheet.max_row else None
+    finally:
+        workbook.close()
+
+
+def iter_csv_chunks(
+    csv_path: str,
+    chunk_size: int = READ_CHUNK_SIZE,
+    usecols: Optional[list] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields a CSV file as DataFrames of at most chunk_size rows.
+
+    Every column is read as text; callers coerce types column-wise so one bad
+    cell does not fail or silently retype a whole chunk.
+
+    :param csv_path: Path to the CSV file.
+    :param chunk_size: Maximum number of rows per chunk.
+    :param usecols: Optional subset of columns to read; columns missing from the
+                    file are left out rather than raising, so validation can
+                    report them.
+    """
+    wanted = set(usecols) if usecols is not None else None
+    with pd.read_csv(
+        csv_path,
+        dtype=str,
+        chunksize=chunk_size,
+        usecols=(lambda name: name in wanted) if wanted is not None else None,
+    ) as reader:
+        yield from reader
+
+
+def iter_frame_chunks(df: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Splits an already loaded DataFrame into consecutive chunks of chunk_size rows.
+
+    :param df: DataFrame to split.
+    :param chunk_size: Number of rows per chunk.
+    :return: Iterator of DataFrame views.
+    """
+    for start in range(0, len(df), chunk_size):
+        end = start + chunk_size
+        yield df.iloc[start:end]
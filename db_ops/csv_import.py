@@ -0,0 +1,411 @@
+# db_ops/csv_import.py
+
+from typing import Dict, Iterable
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from db_ops.chunk_readers import iter_csv_chunks
+from db_ops.import_pipeline import (
+    IMPORT_CHUNK_SIZE,
+    BulkOrderWriter,
+    add_counts,
+    get_or_create,
+    insert_columns,
+    lookup_ids,
+    mapped_test_columns,
+    to_dates,
+    to_iso,
+    to_nullable,
+    to_numbers,
+    to_text,
+    to_wip_numbers,
+)
+from db_ops.import_validation import (
+    PASS_FAIL_VALUES,
+    TEST_MEASUREMENT_RANGES,
+    ImportValidator,
+)
+from db_ops.write_coordination import run_write_unit
+from logger import logger
+
+# Legacy exports carry no displacer for most WIPs; those WIPs are linked to this
+# shared placeholder, since WIP.displacer_id is required.
+PLACEHOLDER_DISPLACER = "UNASSIGNED"
+
+# Tests imported from Repair_Tracker_tests.csv are named after their legacy
+# Test_ID, which keeps re-imports from duplicating them.
+REPAIR_TEST_PREFIX = "RT-"
+
+# Coldhead_Trackers_SC10.csv columns the importer reads. Part_Number,
+# Organization, Temps, Test_Date, Date_Closed and depart_date have no model
+# field yet and are ignored.
+TRACKER_COLUMNS = [
+    "WIP",
+    "Coldhead_Serial_Number",
+    "Arrival_Date",
+    "Teardown_Date",
+    "status",
+]
+
+# Repair_Tracker_tests.csv column to Test field, with its type.
+REPAIR_TEST_FIELDS = {
+    "Test_Date": ("test_date", "date"),
+    "Station": ("station", "int"),
+    "Pass_Fail": ("pass_fail", "text"),
+    "Mode": ("mode", "text"),
+    "Turns": ("turns", "int"),
+    "First_Stage_Heaters": ("first_stage_heaters", "float"),
+    "Second_Stage_Heater": ("second_stage_heater", "float"),
+    "First_Stage_Temp": ("first_stage_temp", "float"),
+    "Second_Stage_Temp": ("second_stage_temp", "float"),
+    "Efficiency1": ("efficiency1", "float"),
+    "Efficiency2": ("efficiency2", "float"),
+    "Passed": ("passed", "int"),
+    "Test_Attempt": ("test_attempt", "int"),
+    "Notes": ("notes", "text"),
+}
+
+REPAIR_TEST_COLUMNS = [
+    "Test_ID",
+    "WIP",
+    "Coldhead_Serial_Number",
+    "Displacer_Serial_Number",
+] + list(REPAIR_TEST_FIELDS)
+
+TRACKER_RULES = {
+    "required": TRACKER_COLUMNS,
+    "not_null": ["Coldhead_Serial_Number"],
+    "dates": ["Arrival_Date", "Teardown_Date"],
+    "unique": [],
+    "ranges": {},
+    "choices": {},
+    "wip": "WIP",
+    "coldhead": "Coldhead_Serial_Number",
+    "warn_existing": False,
+}
+
+REPAIR_TEST_RULES = {
+    "required": REPAIR_TEST_COLUMNS,
+    "not_null": ["Test_ID", "WIP", "Coldhead_Serial_Number"],
+    "dates": ["Test_Date"],
+    "unique": ["Test_ID"],
+    "ranges": TEST_MEASUREMENT_RANGES,
+    "choices": {"Pass_Fail": PASS_FAIL_VALUES},
+    "wip": "WIP",
+    "coldhead": "Coldhead_Serial_Number",
+    "warn_existing": False,
+}
+
+NO_TESTS = pd.DataFrame(columns=["wip_number"])
+
+
+def require_columns(df: pd.DataFrame, required: Iterable[str], source: str):
+    """
+    Raises ValueError naming the columns of required missing from df.
+    """
+    missing = [column for column in required if column not in df.columns]
+    if missing:
+        raise ValueError(f"{source} is missing columns: {', '.join(missing)}")
+
+
+def coerce(series: pd.Series, kind: str) -> pd.Series:
+    """
+    Coerces a column to one of the REPAIR_TEST_FIELDS types.
+    """
+    if kind == "date":
+        return to_dates(series)
+    if kind == "int":
+        return to_numbers(series, integer=True)
+    if kind == "float":
+        return to_numbers(series)
+    return to_text(series)
+
+
+def prepare_tracker_rows(df: pd.DataFrame) -> Dict[str, object]:
+    """
+    Normalizes a chunk of Coldhead_Trackers_SC10.csv.
+
+    :param df: Raw chunk, all columns as text.
+    :return: Dictionary with the unique 'coldheads' serials, the 'orders' frame
+             (one row per WIP) and the 'skipped' count of
+             rows without a WIP number.
+    """
+    require_columns(df, TRACKER_COLUMNS, "Coldhead tracker CSV")
+    frame = pd.DataFrame(
+        {
+            "wip_number": to_wip_numbers(df["WIP"]),
+            "coldhead_serial_number": to_text(df["Coldhead_Serial_Number"]),
+            "displacer_serial_number": PLACEHOLDER_DISPLACER,
+            "arrival_date": to_dates(df["Arrival_Date"]),
+            "initial_open_date": None,
+            "teardown_date": to_dates(df["Teardown_Date"]),
+            "status": to_text(df["status"]),
+        }
+    )
+    coldheads = frame["coldhead_serial_number"].dropna().drop_duplicates()
+    complete = frame[["wip_number", "coldhead_serial_number"]].notna().all(axis=1)
+    # A WIP listed on several rows takes the last non-blank value of each column.
+    orders = (
+        frame[complete]
+        .groupby("wip_number", sort=False, as_index=False)
+        .last()
+        .astype(object)
+    )
+    orders = orders.where(orders.notna(), None)
+    return {
+        "coldheads": coldheads,
+        "orders": orders.reset_index(drop=True),
+        "skipped": int((~complete).sum()),
+    }
+
+
+def prepare_repair_tests(df: pd.DataFrame) -> Dict[str, object]:
+    """
+    Normalizes a chunk of Repair_Tracker_tests.csv.
+
+    :param df: Raw chunk, all columns as text.
+    :return: Dictionary with the 'orders' frame for the WIPs the tests belong
+             to, the 'tests' frame and the 'skipped' count of rows without a
+             Test_ID, WIP number or coldhead serial.
+    """
+    require_columns(df, REPAIR_TEST_COLUMNS, "Repair tracker tests CSV")
+    test_ids = to_numbers(df["Test_ID"], integer=True)
+    wip_numbers = to_wip_numbers(df["WIP"])
+    coldheads = to_text(df["Coldhead_Serial_Number"])
+    # Some rows list two displacers ("R4002/R4128"); the first is the one fitted.
+    displacers = to_text(
+        df["Displacer_Serial_Number"].astype("string").str.split("/").str[0]
+    )
+    complete = test_ids.notna() & wip_numbers.notna() & coldheads.notna()
+
+    orders = pd.DataFrame(
+        {
+            "wip_number": wip_numbers,
+            "coldhead_serial_number": coldheads,
+            "displacer_serial_number": displacers.where(
+                displacers.notna(), PLACEHOLDER_DISPLACER
+            ),
+            "arrival_date": None,
+            "initial_open_date": None,
+        }
+    )[complete].drop_duplicates("wip_number")
+
+    tests = pd.DataFrame(
+        {
+            "wip_number": wip_numbers,
+            "name": REPAIR_TEST_PREFIX + test_ids.astype(str),
+        }
+    )
+    for column, (field, kind) in REPAIR_TEST_FIELDS.items():
+        tests[field] = coerce(df[column], kind)
+    tests["pass_fail"] = to_nullable(
+        tests["pass_fail"].astype("string").str.capitalize()
+    )
+    tests = tests[complete].drop_duplicates("name")
+
+    return {
+        "orders": orders.reset_index(drop=True),
+        "tests": tests.reset_index(drop=True),
+        "skipped": int((~complete).sum()),
+    }
+
+
+class TrackerCsvImporter:
+    def __init__(self, db_session: Session, chunk_size: int = IMPORT_CHUNK_SIZE):
+        """
+        Streaming importers for the legacy tracker CSV exports.
+
+        :param db_session: SQLAlchemy session object.
+        :param chunk_size: Number of CSV rows per chunk and write transaction.
+        """
+        self.db_session = db_session
+        self.chunk_size = chunk_size
+        self.writer = BulkOrderWriter(db_session, chunk_size)
+        self.last_report = None  # Validation issues of the last import or dry run
+        logger.info("TrackerCsvImporter initialized with SQLAlchemy session")
+
+    def import_coldhead_trackers(self, csv_path: str) -> Dict[str, int]:
+        """
+        Imports Coldhead_Trackers_SC10.csv.
+
+        Every coldhead serial is get-or-create. WIPs are created when missing,
+        linked to the placeholder displacer, and their arrival date, teardown date
+        and status are filled from the CSV where it has a value; blank cells
+        never overwrite what is already stored. Rows failing TRACKER_RULES are
+        not written; see last_report.
+
+        :param csv_path: Path to the CSV file.
+        :return: Counts of rows read, rows skipped or invalid, and records
+                 created or updated.
+        """
+        return self._import(
+            csv_path,
+            TRACKER_COLUMNS,
+            TRACKER_RULES,
+            prepare_tracker_rows,
+            self.write_tracker_chunk,
+        )
+
+    def import_repair_tests(self, csv_path: str) -> Dict[str, int]:
+        """
+        Imports Repair_Tracker_tests.csv.
+
+        The WIP, coldhead and displacer of each test are get-or-create; a WIP
+        still linked to the placeholder displacer gets the displacer named in the
+        CSV. Tests whose Test_ID was imported before are left as they are. Rows
+        failing REPAIR_TEST_RULES are not written; see last_report.
+
+        :param csv_path: Path to the CSV file.
+        :return: Counts of rows read, rows skipped or invalid, and records created.
+        """
+        return self._import(
+            csv_path,
+            REPAIR_TEST_COLUMNS,
+            REPAIR_TEST_RULES,
+            prepare_repair_tests,
+            self.write_test_chunk,
+        )
+
+    def dry_run_coldhead_trackers(self, csv_path: str) -> Dict[str, object]:
+        """
+        Validates Coldhead_Trackers_SC10.csv without writing anything.
+
+        :param csv_path: Path to the CSV file.
+        :return: Dictionary with the validation 'summary' and the 'report' frame.
+        """
+        return self._dry_run(csv_path, TRACKER_COLUMNS, TRACKER_RULES)
+
+    def dry_run_repair_tests(self, csv_path: str) -> Dict[str, object]:
+        """
+        Validates Repair_Tracker_tests.csv without writing anything.
+
+        :param csv_path: Path to the CSV file.
+        :return: Dictionary with the validation 'summary' and the 'report' frame.
+        """
+        return self._dry_run(csv_path, REPAIR_TEST_COLUMNS, REPAIR_TEST_RULES)
+
+    def _import(self, csv_path, columns, rules, prepare, write_chunk) -> Dict[str, int]:
+        validator = ImportValidator(rules, self.db_session)
+        counts: Dict[str, int] = {}
+        for chunk in iter_csv_chunks(csv_path, self.chunk_size, columns):
+            clean = validator.validate(chunk)
+            prepared = prepare(chunk[clean])
+            chunk_counts = run_write_unit(
+                self.db_session, lambda session: write_chunk(session, prepared)
+            )
+            chunk_counts["rows"] = len(chunk)
+            chunk_counts["invalid"] = int((~clean).sum())
+            chunk_counts["skipped"] = prepared["skipped"]
+            add_counts(counts, chunk_counts)
+            logger.info(f"Imported {counts['rows']} row(s) from {csv_path}")
+        self.last_report = validator.report()
+        if counts.get("invalid"):
+            logger.warning(
+                f"{counts['invalid']} invalid row(s) in {csv_path} were not imported: "
+                f"{validator.summary()['by_rule']}"
+            )
+        logger.info(f"CSV import from {csv_path} finished: {counts}")
+        return counts
+
+    def _dry_run(self, csv_path, columns, rules) -> Dict[str, object]:
+        validator = ImportValidator(rules, self.db_session)
+        for chunk in iter_csv_chunks(csv_path, self.chunk_size, columns):
+            validator.validate(chunk)
+        self.last_report = validator.report()
+        summary = validator.summary()
+        logger.info(f"Dry run of {csv_path}: {summary}")
+        return {"summary": summary, "report": self.last_report}
+
+    @staticmethod
+    def _ensure_placeholder_displacer(session: Session):
+        get_or_create(
+            session,
+            "displacers",
+            "displacer_id",
+            {
+                "displacer_serial_number": pd.Series([PLACEHOLDER_DISPLACER]),
+                "status": pd.Series(["Placeholder"]),
+            },
+        )
+
+    def write_tracker_chunk(
+        self, session: Session, prepared: Dict[str, object]
+    ) -> Dict[str, int]:
+        """
+        Writes one prepare_tracker_rows chunk without committing.
+        """
+        self._ensure_placeholder_displacer(session)
+        _, new_coldheads = get_or_create(
+            session,
+            "coldheads",
+            "coldhead_id",
+            {"serial_number": prepared["coldheads"]},
+        )
+        orders: pd.DataFrame = prepared["orders"]
+        created = self.writer.write_chunk(session, orders, NO_TESTS)
+
+        rows = list(
+            zip(
+                to_iso(orders["arrival_date"]).tolist(),
+                to_iso(orders["teardown_date"]).tolist(),
+                orders["status"].tolist(),
+                orders["wip_number"].tolist(),
+            )
+        )
+        if rows:
+            session.connection().exec_driver_sql(
+                "UPDATE wips SET "
+                "arrival_date = COALESCE(?, arrival_date), "
+                "teardown_date = COALESCE(?, teardown_date), "
+                "status = COALESCE(?, status) "
+                "WHERE wip_number = ?",
+                rows,
+            )
+        created["coldheads"] += new_coldheads
+        created["wips_updated"] = len(rows) - created["wips"]
+        return created
+
+    def write_test_chunk(
+        self, session: Session, prepared: Dict[str, object]
+    ) -> Dict[str, int]:
+        """
+        Writes one prepare_repair_tests chunk without committing.
+        """
+        self._ensure_placeholder_displacer(session)
+        orders: pd.DataFrame = prepared["orders"]
+        created = self.writer.write_chunk(session, orders, NO_TESTS)
+
+        # WIPs first seen in the tracker export point at the placeholder; give
+        # them the displacer the test sheet names.
+        fitted = orders[orders["displacer_serial_number"] != PLACEHOLDER_DISPLACER]
+        if not fitted.empty:
+            session.connection().exec_driver_sql(
+                "UPDATE wips SET displacer_id = (SELECT displacer_id FROM displacers "
+                "WHERE displacer_serial_number = ?) "
+                "WHERE wip_number = ? AND displacer_id = (SELECT displacer_id "
+                "FROM displacers WHERE displacer_serial_number = ?)",
+                [
+                    (displacer, wip_number, PLACEHOLDER_DISPLACER)
+                    for displacer, wip_number in zip(
+                        fitted["displacer_serial_number"], fitted["wip_number"]
+                    )
+                ],
+            )
+
+        tests: pd.DataFrame = prepared["tests"]
+        existing = lookup_ids(session, "tests", "name", "test_id", tests["name"])
+        new_tests = tests[~tests["name"].isin(existing.keys())]
+        if not new_tests.empty:
+            wip_ids = lookup_ids(
+                session,
+                "wips",
+                "wip_number",
+                "wip_id",
+                new_tests["wip_number"].drop_duplicates(),
+            )
+            new_tests = new_tests.assign(wip_id=new_tests["wip_number"].map(wip_ids))
+            insert_columns(session, "tests", mapped_test_columns(new_tests))
+        created["tests"] = len(new_tests)
+        created["tests_existing"] = len(existing)
+        return created
@@ -1,7 +1,7 @@
 # db_ops/database.py
 
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from .models import Base
 from logger import logger  # Ensure logger is imported
@@ -16,8 +16,43 @@ if not os.path.exists(db_directory):
     os.makedirs(db_directory)
     logger.info(f"Created directory for database at {db_directory}")
 
+
+# How long SQLite waits on a lock held by another writer before reporting
+# "database is locked". Retries of whole units of work are layered on top of
+# this in db_ops.write_coordination.
+BUSY_TIMEOUT_MS = 5000
+
+
+def configure_sqlite_transactions(engine, busy_timeout_ms: int = BUSY_TIMEOUT_MS):
+    """
+    Let SQLAlchemy, rather than the pysqlite driver, emit BEGIN.
+
+    pysqlite only opens a transaction on the first DML statement, so a SAVEPOINT
+    issued before that starts its own transaction and RELEASE commits it. Taking
+    over BEGIN keeps savepoints (Session.begin_nested) inside the outer transaction.
+
+    Connections also get a busy timeout, and a transaction opened with the
+    execution option sqlite_begin="IMMEDIATE" takes the write lock up front
+    instead of failing on a read-to-write lock upgrade.
+
+    :param engine: SQLAlchemy engine bound to a SQLite database.
+    :param busy_timeout_ms: Milliseconds to wait on a locked database.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _disable_driver_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(conn):
+        mode = conn.get_execution_options().get("sqlite_begin")
+        conn.exec_driver_sql(f"BEGIN {mode}" if mode else "BEGIN")
+
+
 # Create the engine with the correct path
 engine = create_engine(f'sqlite:///{database_path}', echo=True)
+configure_sqlite_transactions(engine)
 
 # Create a configured "Session" class
 Session = sessionmaker(bind=engine)
@@ -1,10 +1,26 @@
 # db_ops/db_operations.py
 
+from itertools import islice
+from typing import Dict, Iterable, List
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from db_ops.models import WIP, Test, Coldhead, Displacer
 from logger import logger
 
+TABLE_MODELS = {
+    "coldheads": Coldhead,
+    "displacers": Displacer,
+    "wips": WIP,
+    "tests": Test,
+}
+
+# Rows per executemany batch in upsert_many. SQLite's default limit of 32766
+# bound variables is never the bottleneck at this size.
+UPSERT_CHUNK_SIZE = 1000
+
 
 class DBOperations:
     def __init__(self, db_session: Session):
@@ -16,6 +32,21 @@ class DBOperations:
         self.db_session = db_session
         logger.info("DBOperations initialized with SQLAlchemy session")
 
+    @staticmethod
+    def _resolve_model(table: str):
+        """
+        Returns the model class mapped to the given table name.
+
+        :param table: Name of the table.
+        :return: The SQLAlchemy model class.
+        """
+        model = TABLE_MODELS.get(table.lower())
+        if model is None:
+            error_msg = f"Table '{table}' is not recognized."
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+        return model
+
     def insert_record(self, table: str, data: dict):
         """
         Inserts a record into the specified table.
@@ -24,18 +55,7 @@ class DBOperations:
         :param data: Dictionary of data to insert.
         """
         try:
-            if table.lower() == "coldheads":
-                record = Coldhead(**data)
-            elif table.lower() == "displacers":
-                record = Displacer(**data)
-            elif table.lower() == "wips":
-                record = WIP(**data)
-            elif table.lower() == "tests":
-                record = Test(**data)
-            else:
-                error_msg = f"Table '{table}' is not recognized."
-                logger.error(error_msg)
-                raise ValueError(error_msg)
+            record = self._resolve_model(table)(**data)
 
             self.db_session.add(record)
             self.db_session.commit()
@@ -58,18 +78,7 @@ class DBOperations:
         :param unique_keys: List of unique keys to determine if the record exists.
         """
         try:
-            if table.lower() == "coldheads":
-                query = self.db_session.query(Coldhead)
-            elif table.lower() == "displacers":
-                query = self.db_session.query(Displacer)
-            elif table.lower() == "wips":
-                query = self.db_session.query(WIP)
-            elif table.lower() == "tests":
-                query = self.db_session.query(Test)
-            else:
-                error_msg = f"Table '{table}' is not recognized."
-                logger.error(error_msg)
-                raise ValueError(error_msg)
+            query = self.db_session.query(self._resolve_model(table))
 
             # Build filter based on unique_keys
             filters = [
@@ -97,3 +106,183 @@ class DBOperations:
             self.db_session.rollback()
             logger.exception(f"Error during upsert into table '{table}': {e}")
             raise
+
+    def upsert_many(
+        self,
+        table: str,
+        rows: Iterable[dict],
+        unique_keys: List[str],
+        chunk_size: int = UPSERT_CHUNK_SIZE,
+    ) -> Dict[str, int]:
+        """
+        Bulk inserts or updates records with SQLite INSERT ... ON CONFLICT DO UPDATE.
+
+        Rows are written in chunks inside a single transaction. Each chunk runs
+        under a savepoint; if a chunk fails, its rows are retried one at a time
+        so only the offending rows are counted as failed. Columns missing from a
+        row are left untouched on update.
+
+        :param table: Name of the table.
+        :param rows: Iterable of dictionaries of data to upsert.
+        :param unique_keys: Columns of a unique constraint used as the conflict target.
+        :param chunk_size: Number of rows sent per executemany batch.
+        :return: Dictionary with 'inserted', 'updated' and 'failed' counts.
+        """
+        model = self._resolve_model(table)
+        table_obj = model.__table__
+        self._validate_conflict_target(table_obj, unique_keys)
+
+        key_columns = [table_obj.c[key] for key in unique_keys]
+        statements = {}
+        counts = {"inserted": 0, "updated": 0, "failed": 0}
+        seen_keys = set()
+        rows = iter(rows)
+
+        try:
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+
+                valid_rows = []
+                for row in chunk:
+                    unknown = set(row) - set(table_obj.c.keys())
+                    missing = [key for key in unique_keys if row.get(key) is None]
+                    if unknown or missing:
+                        logger.warning(
+                            f"Skipping row for upsert into '{table}': "
+                            f"unknown columns {sorted(unknown)}, missing keys {missing}"
+                        )
+                        counts["failed"] += 1
+                        continue
+                    valid_rows.append(row)
+
+                existing = self._existing_keys(
+                    key_columns, {self._row_key(row, unique_keys) for row in valid_rows}
+                )
+
+                try:
+                    with self.db_session.begin_nested():
+                        self._execute_upsert_groups(
+                            table_obj, valid_rows, unique_keys, statements
+                        )
+                    succeeded = valid_rows
+                except Exception as e:
+                    logger.warning(
+                        f"Upsert chunk into '{table}' failed, retrying row by row: {e}"
+                    )
+                    succeeded = []
+                    for row in valid_rows:
+                        try:
+                            with self.db_session.begin_nested():
+                                self._execute_upsert_groups(
+                                    table_obj, [row], unique_keys, statements
+                                )
+                            succeeded.append(row)
+                        except Exception as row_error:
+                            logger.error(
+                                f"Upsert failed for table '{table}' with data {row}: "
+                                f"{row_error}"
+                            )
+                            counts["failed"] += 1
+
+                for row in succeeded:
+                    key = self._row_key(row, unique_keys)
+                    if key in existing or key in seen_keys:
+                        counts["updated"] += 1
+                    else:
+                        counts["inserted"] += 1
+                    seen_keys.add(key)
+
+            self.db_session.commit()
+            logger.info(f"Upsert into table '{table}' completed: {counts}")
+            return counts
+        except Exception as e:
+            self.db_session.rollback()
+            logger.exception(f"Error during bulk upsert into table '{table}': {e}")
+            raise
+
+    @staticmethod
+    def _validate_conflict_target(table_obj, unique_keys: List[str]):
+        """
+        Ensures unique_keys match a primary key or unique constraint of the table,
+        which SQLite requires for an ON CONFLICT target.
+
+        :param table_obj: SQLAlchemy Table object.
+        :param unique_keys: Columns used as the conflict target.
+        """
+        target = set(unique_keys)
+        candidates = [
+            {column.name for column in constraint.columns}
+            for constraint in table_obj.constraints
+            if constraint.__visit_name__
+            in ("primary_key_constraint", "unique_constraint")
+        ]
+        candidates.extend(
+            {column.name for column in index.columns}
+            for index in table_obj.indexes
+            if index.unique
+        )
+        if target not in candidates:
+            error_msg = (
+                f"Columns {unique_keys} are not a unique constraint on table "
+                f"'{table_obj.name}'."
+            )
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+
+    @staticmethod
+    def _row_key(row: dict, unique_keys: List[str]) -> tuple:
+        return tuple(row[key] for key in unique_keys)
+
+    def _existing_keys(self, key_columns: list, keys: set) -> set:
+        """
+        Returns the subset of keys that already exist, using one query per chunk.
+
+        :param key_columns: Columns forming the unique key.
+        :param keys: Set of key tuples to look up.
+        :return: Set of key tuples present in the table.
+        """
+        if not keys:
+            return set()
+        if len(key_columns) == 1:
+            condition = key_columns[0].in_([key[0] for key in keys])
+        else:
+            condition = tuple_(*key_columns).in_(list(keys))
+        result = self.db_session.execute(select(*key_columns).where(condition))
+        return {tuple(row) for row in result}
+
+    def _execute_upsert_groups(
+        self, table_obj, rows: List[dict], unique_keys: List[str], statements: dict
+    ):
+        """
+        Executes rows grouped by column set, one executemany per group.
+
+        :param table_obj: SQLAlchemy Table object.
+        :param rows: Rows to upsert.
+        :param unique_keys: Columns used as the conflict target.
+        :param statements: Cache of upsert statements keyed by column set.
+        """
+        groups: Dict[tuple, List[dict]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+
+        for columns, group_rows in groups.items():
+            statement = statements.get(columns)
+            if statement is None:
+                statement = sqlite_insert(table_obj)
+                update_columns = {
+                    column: statement.excluded[column]
+                    for column in columns
+                    if column not in unique_keys
+                }
+                if update_columns:
+                    statement = statement.on_conflict_do_update(
+                        index_elements=unique_keys, set_=update_columns
+                    )
+                else:
+                    statement = statement.on_conflict_do_nothing(
+                        index_elements=unique_keys
+                    )
+                statements[columns] = statement
+            self.db_session.execute(statement, group_rows)
@@ -34,3 +34,24 @@ class InvalidDataError(DatabaseError):
     def __init__(self, message):
         self.message = message
         super().__init__(self.message)
+
+
+class ImportCancelledError(DatabaseError):
+    """Raised when an import is cancelled; the chunks already committed stay."""
+
+    def __init__(self, counts):
+        self.counts = counts
+        self.message = (
+            f"Import cancelled after {counts.get('rows', 0)} row(s); "
+            f"re-run it to resume."
+        )
+        super().__init__(self.message)
+
+
+class SchemaReconcileError(DatabaseError):
+    """Raised when a schema change cannot be made in place; nothing is applied."""
+
+    def __init__(self, problems):
+        self.problems = problems
+        self.message = "Schema cannot be reconciled in place: " + "; ".join(problems)
+        super().__init__(self.message)
@@ -0,0 +1,153 @@
+# db_ops/import_journal.py
+
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from db_ops.models import ImportJournal
+from db_ops.write_coordination import run_write_unit
+from logger import logger
+
+RUNNING = "running"
+COMPLETED = "completed"
+ABANDONED = "abandoned"  # Superseded by a run on a changed file
+
+FINGERPRINT_BLOCK_SIZE = 1024 * 1024
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's contents.
+
+    :param path: Path to the file.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(FINGERPRINT_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ImportCheckpoints:
+    def __init__(self, db_session: Session):
+        """
+        Records how far each import has got, so an interrupted import can resume.
+
+        A run is identified by the file's fingerprint and the chunk size, which
+        together fix the chunk boundaries. The checkpoint is advanced inside the
+        transaction that writes the chunk, so it never gets ahead of or behind
+        the committed rows.
+
+        :param db_session: SQLAlchemy session object.
+        """
+        self.db_session = db_session
+
+    def start(
+        self, path: str, chunk_size: int, sheet_name: Optional[str] = None
+    ) -> Tuple[int, int]:
+        """
+        Starts an import of path, or resumes the unfinished run of the same file.
+
+        Unfinished runs of path whose file has since changed are marked
+        abandoned.
+
+        :param path: Path to the file being imported.
+        :param chunk_size: Rows per chunk.
+        :param sheet_name: Worksheet being imported, if not the first.
+        :return: (journal_id, number of chunks already committed)
+        """
+        fingerprint = file_fingerprint(path)
+        if sheet_name is not None:
+            fingerprint = f"{fingerprint}:{sheet_name}"
+
+        def work(session):
+            entry = session.execute(
+                select(ImportJournal)
+                .where(
+                    ImportJournal.fingerprint == fingerprint,
+                    ImportJournal.chunk_size == chunk_size,
+                    ImportJournal.status == RUNNING,
+                )
+                .order_by(ImportJournal.journal_id.desc())
+            ).scalar()
+            if entry is not None:
+                return entry.journal_id, entry.chunks_committed
+            session.execute(
+                update(ImportJournal)
+                .where(ImportJournal.file_path == path, ImportJournal.status == RUNNING)
+                .values(status=ABANDONED, updated_at=func.current_timestamp())
+            )
+            entry = ImportJournal(
+                file_path=path,
+                fingerprint=fingerprint,
+                chunk_size=chunk_size,
+                chunks_committed=0,
+                rows_committed=0,
+                status=RUNNING,
+            )
+            session.add(entry)
+            session.flush()
+            return entry.journal_id, 0
+
+        journal_id, done = run_write_unit(self.db_session, work)
+        if done:
+            logger.info(f"Resuming import of {path} after chunk {done}")
+        return journal_id, done
+
+    @staticmethod
+    def advance(session: Session, journal_id: int, chunk_number: int, rows: int):
+        """
+        Moves the checkpoint past a chunk. Call inside the chunk's write
+        transaction; does not commit.
+
+        :param session: SQLAlchemy session object.
+        :param journal_id: Run returned by start.
+        :param chunk_number: Number of chunks committed once this one is.
+        :param rows: Source rows in the chunk.
+        """
+        session.execute(
+            update(ImportJournal)
+            .where(ImportJournal.journal_id == journal_id)
+            .values(
+                chunks_committed=chunk_number,
+                rows_committed=ImportJournal.rows_committed + rows,
+                updated_at=func.current_timestamp(),
+            )
+        )
+
+    def finish(self, journal_id: int):
+        """
+        Marks a run as completed, so the next import of the file starts afresh.
+
+        :param journal_id: Run returned by start.
+        """
+        run_write_unit(
+            self.db_session,
+            lambda session: session.execute(
+                update(ImportJournal)
+                .where(ImportJournal.journal_id == journal_id)
+                .values(status=COMPLETED, updated_at=func.current_timestamp())
+            ),
+        )
+
+    def unfinished(self) -> List[Dict[str, object]]:
+        """
+        Returns the runs that were interrupted and can be resumed, newest first.
+        """
+        query = (
+            select(ImportJournal)
+            .where(ImportJournal.status == RUNNING)
+            .order_by(ImportJournal.journal_id.desc())
+        )
+        return [
+            {
+                "journal_id": entry.journal_id,
+                "file_path": entry.file_path,
+                "chunks_committed": entry.chunks_committed,
+                "rows_committed": entry.rows_committed,
+                "updated_at": entry.updated_at,
+            }
+            for entry in self.db_session.execute(query).scalars()
+        ]
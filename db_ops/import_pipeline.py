@@ -0,0 +1,431 @@
+# db_ops/import_pipeline.py
+
+from typing import Dict
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from db_ops.models import Test
+from db_ops.write_coordination import run_write_unit
+from logger import logger
+
+# Rows per write transaction. Well under SQLite's 32766 bound-variable limit
+# for the IN (...) lookups issued per chunk.
+IMPORT_CHUNK_SIZE = 5000
+
+# WIP cell values that mean "no WIP number".
+MISSING_WIP_VALUES = ["UNKNOWN", "N/A", "NA"]
+
+
+def to_nullable(series: pd.Series) -> pd.Series:
+    """
+    Returns the series as Python objects with missing values replaced by None.
+    """
+    return series.astype(object).where(series.notna(), None)
+
+
+def to_text(series: pd.Series) -> pd.Series:
+    """
+    Coerces a column to stripped strings; blanks and missing values become None.
+    Whole-number floats (serials read next to blank cells) lose their '.0'.
+    """
+    if pd.api.types.is_float_dtype(series) and (series.dropna() % 1 == 0).all():
+        series = series.astype("Int64")
+    text = series.astype("string").str.strip()
+    return to_nullable(text.mask(text == ""))
+
+
+def to_wip_numbers(series: pd.Series) -> pd.Series:
+    """
+    Coerces WIP numbers to text, treating placeholders like 'UNKNOWN' as missing.
+    """
+    wips = to_text(series)
+    missing = wips.astype("string").str.upper().isin(MISSING_WIP_VALUES)
+    return wips.where(~missing.fillna(False).astype(bool), None)
+
+
+def to_dates(series: pd.Series) -> pd.Series:
+    """
+    Coerces a column to datetime.date; unparseable values become None.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        dates = series
+    else:
+        # ISO strings (with 'T' or ' ' separators) parse in one vectorized pass;
+        # anything else falls back to per-value format inference.
+        dates = pd.to_datetime(series, errors="coerce", format="ISO8601")
+        retry = dates.isna() & series.notna()
+        if retry.any():
+            dates[retry] = pd.to_datetime(
+                series[retry].astype(str), errors="coerce", format="mixed"
+            )
+    return dates.dt.date.astype(object).where(dates.notna(), None)
+
+
+def to_numbers(series: pd.Series, integer: bool = False) -> pd.Series:
+    """
+    Coerces a column to numbers; unparseable values become None.
+
+    :param series: Column to coerce.
+    :param integer: Round to whole numbers (e.g. turns, attempts).
+    """
+    numbers = pd.to_numeric(series, errors="coerce")
+    if integer:
+        numbers = numbers.round().astype("Int64")
+    return to_nullable(numbers)
+
+
+def to_iso(series: pd.Series) -> pd.Series:
+    """
+    Formats a column of dates as the ISO strings SQLAlchemy stores for Date
+    columns on SQLite, for writes that bypass the ORM.
+    """
+    return series.map(lambda value: value.isoformat() if value is not None else None)
+
+
+def add_row_hashes(orders: pd.DataFrame, tests: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds the 'natural_key' and 'content_hash' columns BulkOrderWriter uses to
+    skip rows that are unchanged since the last import.
+
+    The key is the WIP number, so an order whose coldhead or displacer changed
+    keeps its key and is seen as changed. The hash is a 64-bit hash of the
+    order's values and of its tests, the latter combined by summing so their
+    order does not matter. It is computed column-wise.
+
+    :param orders: Normalized orders frame.
+    :param tests: Normalized tests frame.
+    :return: orders with the two columns added.
+    """
+    test_hashes = (
+        pd.Series(
+            pd.util.hash_pandas_object(tests, index=False).to_numpy(),
+            index=tests["wip_number"].to_numpy(),
+        )
+        .groupby(level=0)
+        .sum()
+    )
+    hashed = orders.assign(
+        tests_hash=test_hashes.reindex(orders["wip_number"], fill_value=0).to_numpy()
+    )
+    return orders.assign(
+        natural_key=orders["wip_number"],
+        content_hash=pd.util.hash_pandas_object(hashed, index=False)
+        .to_numpy()
+        .view("int64"),  # SQLite integers are signed
+    )
+
+
+def add_counts(total: Dict[str, int], counts: Dict[str, int]) -> Dict[str, int]:
+    """
+    Adds the per-chunk counts into the running total, in place.
+    """
+    for key, value in counts.items():
+        total[key] = total.get(key, 0) + value
+    return total
+
+
+def insert_columns(session: Session, table: str, columns: Dict[str, pd.Series]):
+    """
+    Inserts equal-length columns into table with a single executemany.
+
+    :param session: SQLAlchemy session object.
+    :param table: Name of the table.
+    :param columns: Column name to values; values must be bindable by sqlite3.
+    """
+    names = list(columns)
+    rows = list(zip(*(columns[name].tolist() for name in names)))
+    if not rows:
+        return
+    sql = (
+        f"INSERT INTO {table} ({', '.join(names)}) "
+        f"VALUES ({', '.join('?' * len(names))})"
+    )
+    session.connection().exec_driver_sql(sql, rows)
+
+
+def lookup_ids(
+    session: Session, table: str, key: str, id_column: str, values: pd.Series
+) -> Dict[str, int]:
+    """
+    Returns {key value: id} for the rows of table whose key is in values.
+
+    :param session: SQLAlchemy session object.
+    :param table: Name of the table.
+    :param key: Natural key column.
+    :param id_column: Primary key column.
+    :param values: Key values to look up; at most a chunk's worth.
+    """
+    values = values.tolist()
+    if not values:
+        return {}
+    sql = (
+        f"SELECT {key}, {id_column} FROM {table} "
+        f"WHERE {key} IN ({', '.join('?' * len(values))})"
+    )
+    return dict(session.connection().exec_driver_sql(sql, tuple(values)).all())
+
+
+def get_or_create(
+    session: Session, table: str, id_column: str, columns: Dict[str, pd.Series]
+):
+    """
+    Inserts the rows whose key (the first column) is not in table yet.
+
+    :param session: SQLAlchemy session object.
+    :param table: Name of the table.
+    :param id_column: Primary key column.
+    :param columns: Column name to values, natural key first; keys must be unique.
+    :return: Tuple of ({key value: id} for all rows, number of rows inserted).
+    """
+    key = next(iter(columns))
+    ids = lookup_ids(session, table, key, id_column, columns[key])
+    new = ~columns[key].isin(ids.keys())
+    if new.any():
+        insert_columns(
+            session, table, {name: col[new] for name, col in columns.items()}
+        )
+        ids = lookup_ids(session, table, key, id_column, columns[key])
+    return ids, int(new.sum())
+
+
+def mapped_test_columns(tests: pd.DataFrame) -> Dict[str, pd.Series]:
+    """
+    Selects the columns of a tests frame that the Test model maps, ready for
+    insert_columns. Fields the model does not map yet are dropped.
+
+    :param tests: Frame of test rows including a 'wip_id' column.
+    """
+    return {
+        column.key: (
+            to_iso(tests[column.key])
+            if column.key == "test_date"
+            else tests[column.key]
+        )
+        for column in Test.__table__.columns
+        if column.key != "test_id" and column.key in tests.columns
+    }
+
+
+class BulkOrderWriter:
+    def __init__(self, db_session: Session, chunk_size: int = IMPORT_CHUNK_SIZE):
+        """
+        Writes prepared order frames in chunks, one write transaction per chunk.
+
+        Rows go to the driver as plain tuples through exec_driver_sql, which skips
+        SQLAlchemy's per-row parameter processing; at import volumes that
+        processing costs more than SQLite's own work.
+
+        :param db_session: SQLAlchemy session object.
+        :param chunk_size: Number of orders per write transaction.
+        """
+        self.db_session = db_session
+        self.chunk_size = chunk_size
+
+    def write(self, prepared: Dict[str, object]) -> Dict[str, int]:
+        """
+        Writes the orders and tests produced by ImportProfile.prepare.
+
+        Rows unchanged since they were last imported are skipped; the others are
+        written by write_changed_chunk.
+
+        :param prepared: Output of ImportProfile.prepare.
+        :return: Counts of rows read, of records created and of orders updated or
+                 unchanged.
+        """
+        orders: pd.DataFrame = prepared["orders"]
+        tests: pd.DataFrame = prepared["tests"]
+        counts = {
+            "rows": len(orders) + prepared["skipped"],
+            "skipped": prepared["skipped"],
+            "coldheads": 0,
+            "displacers": 0,
+            "wips": 0,
+            "tests": 0,
+            "updated": 0,
+            "unchanged": 0,
+        }
+        for start in range(0, len(orders), self.chunk_size):
+            end = start + self.chunk_size
+            chunk = orders.iloc[start:end]
+            chunk_tests = tests[tests["wip_number"].isin(chunk["wip_number"])]
+            created = run_write_unit(
+                self.db_session,
+                lambda session: self.write_changed_chunk(session, chunk, chunk_tests),
+            )
+            add_counts(counts, created)
+            logger.info(
+                f"Imported orders {start + 1}-{start + len(chunk)} of {len(orders)}"
+            )
+        return counts
+
+    def write_changed_chunk(
+        self, session: Session, orders: pd.DataFrame, tests: pd.DataFrame
+    ) -> Dict[str, int]:
+        """
+        Writes the orders of a chunk that are new or changed since their last
+        import, without committing.
+
+        An order is unchanged when its WIP exists and the hash stored under its
+        WIP number matches; it costs two indexed lookups and nothing else. New
+        orders go through write_chunk. Changed orders of existing WIPs take the
+        coldhead and displacer of the sheet, fill in arrival and initial open
+        dates and gain the tests they do not have yet; values are never cleared.
+        Hashes of all written orders are then stored.
+
+        :param session: SQLAlchemy session object.
+        :param orders: Chunk of the 'orders' frame, with the add_row_hashes columns.
+        :param tests: Rows of the 'tests' frame belonging to the chunk.
+        :return: Counts of records created and of orders updated or unchanged.
+        """
+        stored = lookup_ids(
+            session,
+            "import_row_hashes",
+            "natural_key",
+            "content_hash",
+            orders["natural_key"],
+        )
+        existing = lookup_ids(
+            session, "wips", "wip_number", "wip_id", orders["wip_number"]
+        )
+        unchanged = orders["wip_number"].isin(existing.keys()) & (
+            orders["natural_key"].map(stored) == orders["content_hash"]
+        )
+        orders = orders[~unchanged]
+        created = self.write_chunk(session, orders, tests)
+
+        updated = orders[orders["wip_number"].isin(existing.keys())]
+        if not updated.empty:
+            created["tests"] += self._update_orders(session, updated, tests, existing)
+
+        if not orders.empty:
+            session.connection().exec_driver_sql(
+                "INSERT INTO import_row_hashes (natural_key, content_hash) "
+                "VALUES (?, ?) ON CONFLICT (natural_key) "
+                "DO UPDATE SET content_hash = excluded.content_hash",
+                list(zip(orders["natural_key"], orders["content_hash"].tolist())),
+            )
+        created["updated"] = len(updated)
+        created["unchanged"] = int(unchanged.sum())
+        return created
+
+    @staticmethod
+    def _update_orders(
+        session: Session,
+        orders: pd.DataFrame,
+        tests: pd.DataFrame,
+        wip_ids: Dict[str, int],
+    ) -> int:
+        """
+        Applies changed orders to their existing WIPs and returns the number of
+        tests added. The orders' parts exist, write_chunk having created them.
+        """
+        connection = session.connection()
+        connection.exec_driver_sql(
+            "UPDATE wips SET arrival_date = COALESCE(?, arrival_date), "
+            "coldhead_id = (SELECT coldhead_id FROM coldheads "
+            "WHERE serial_number = ?), "
+            "displacer_id = (SELECT displacer_id FROM displacers "
+            "WHERE displacer_serial_number = ?) "
+            "WHERE wip_number = ?",
+            list(
+                zip(
+                    to_iso(orders["arrival_date"]).tolist(),
+                    orders["coldhead_serial_number"],
+                    orders["displacer_serial_number"],
+                    orders["wip_number"],
+                )
+            ),
+        )
+        connection.exec_driver_sql(
+            "UPDATE displacers SET initial_open_date = COALESCE(?, initial_open_date) "
+            "WHERE displacer_serial_number = ?",
+            list(
+                zip(
+                    to_iso(orders["initial_open_date"]).tolist(),
+                    orders["displacer_serial_number"],
+                )
+            ),
+        )
+
+        tests = tests[tests["wip_number"].isin(orders["wip_number"])]
+        if tests.empty:
+            return 0
+        tests = tests.assign(wip_id=tests["wip_number"].map(wip_ids))
+        ids = tests["wip_id"].drop_duplicates().tolist()
+        present = pd.DataFrame(
+            connection.exec_driver_sql(
+                f"SELECT wip_id, name FROM tests "
+                f"WHERE wip_id IN ({', '.join('?' * len(ids))})",
+                tuple(ids),
+            ).all(),
+            columns=["wip_id", "name"],
+        )
+        new_tests = tests.merge(
+            present, on=["wip_id", "name"], how="left", indicator=True
+        )
+        new_tests = new_tests[new_tests["_merge"] == "left_only"]
+        insert_columns(session, "tests", mapped_test_columns(new_tests))
+        return len(new_tests)
+
+    def write_chunk(
+        self, session: Session, orders: pd.DataFrame, tests: pd.DataFrame
+    ) -> Dict[str, int]:
+        """
+        Writes one chunk of orders and their tests without committing.
+
+        :param session: SQLAlchemy session object.
+        :param orders: Chunk of the 'orders' frame.
+        :param tests: Rows of the 'tests' frame belonging to the chunk.
+        :return: Counts of records created.
+        """
+        coldheads = orders.drop_duplicates("coldhead_serial_number")
+        coldhead_ids, new_coldheads = get_or_create(
+            session,
+            "coldheads",
+            "coldhead_id",
+            {"serial_number": coldheads["coldhead_serial_number"]},
+        )
+
+        displacers = orders.drop_duplicates("displacer_serial_number")
+        displacer_ids, new_displacers = get_or_create(
+            session,
+            "displacers",
+            "displacer_id",
+            {
+                "displacer_serial_number": displacers["displacer_serial_number"],
+                "initial_open_date": to_iso(displacers["initial_open_date"]),
+            },
+        )
+
+        existing = lookup_ids(
+            session, "wips", "wip_number", "wip_id", orders["wip_number"]
+        )
+        new_orders = orders[~orders["wip_number"].isin(existing.keys())]
+        insert_columns(
+            session,
+            "wips",
+            {
+                "wip_number": new_orders["wip_number"],
+                "coldhead_id": new_orders["coldhead_serial_number"].map(coldhead_ids),
+                "displacer_id": new_orders["displacer_serial_number"].map(
+                    displacer_ids
+                ),
+                "arrival_date": to_iso(new_orders["arrival_date"]),
+            },
+        )
+
+        tests = tests[tests["wip_number"].isin(new_orders["wip_number"])]
+        if not tests.empty:
+            wip_ids = lookup_ids(
+                session, "wips", "wip_number", "wip_id", new_orders["wip_number"]
+            )
+            tests = tests.assign(wip_id=tests["wip_number"].map(wip_ids))
+            insert_columns(session, "tests", mapped_test_columns(tests))
+
+        return {
+            "coldheads": new_coldheads,
+            "displacers": new_displacers,
+            "wips": len(new_orders),
+            "tests": len(tests),
+        }
@@ -0,0 +1,409 @@
+# db_ops/import_profiles.py
+
+import functools
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from db_ops.import_pipeline import (
+    add_row_hashes,
+    to_dates,
+    to_numbers,
+    to_text,
+    to_wip_numbers,
+)
+from logger import logger
+
+# Profiles shipped with the application, looked up by name.
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+DEFAULT_ORDER_PROFILE = "orders"
+PROFILE_EXTENSIONS = (".json", ".yaml", ".yml")
+
+# Field types and the whole-column coercion each one applies.
+FIELD_TYPES = {
+    "text": to_text,
+    "wip": to_wip_numbers,
+    "date": to_dates,
+    "number": to_numbers,
+    "integer": functools.partial(to_numbers, integer=True),
+}
+
+# Linear unit conversions as (scale, offset): stored = value * scale + offset.
+UNIT_CONVERSIONS = {
+    ("C", "K"): (1.0, 273.15),
+    ("K", "C"): (1.0, -273.15),
+    ("mW", "W"): (0.001, 0.0),
+    ("kW", "W"): (1000.0, 0.0),
+    ("ratio", "%"): (100.0, 0.0),
+    ("%", "ratio"): (0.01, 0.0),
+}
+
+# Fields BulkOrderWriter needs from an order profile, and the optional ones it
+# writes when the profile maps them.
+ORDER_FIELDS = ["wip_number", "coldhead_serial_number", "displacer_serial_number"]
+OPTIONAL_ORDER_FIELDS = ["arrival_date", "initial_open_date"]
+
+# Placeholder a repeated group's column templates number their columns with.
+GROUP_INDEX = "{n}"
+
+
+def read_profile_file(path: str) -> Dict[str, object]:
+    """
+    Reads a profile definition from a .json or .yaml/.yml file.
+
+    :param path: Path to the profile file.
+    :return: The profile as a dictionary.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            return json.load(f)
+        try:
+            import yaml
+        except ImportError as e:
+            raise ImportError(
+                f"PyYAML is required to read {path}; install it or use a .json profile"
+            ) from e
+        return yaml.safe_load(f)
+
+
+def load_profile(name_or_path: str = DEFAULT_ORDER_PROFILE) -> "ImportProfile":
+    """
+    Loads and compiles a profile, once per process and profile file.
+
+    :param name_or_path: Name of a profile in PROFILE_DIR, or a file path.
+    :return: The compiled ImportProfile, shared by every caller.
+    """
+    path = name_or_path
+    if not os.path.isfile(path):
+        candidates = [
+            os.path.join(PROFILE_DIR, name_or_path + extension)
+            for extension in PROFILE_EXTENSIONS
+        ]
+        path = next((c for c in candidates if os.path.isfile(c)), None)
+        if path is None:
+            raise FileNotFoundError(f"No import profile named {name_or_path!r}")
+    return _compile_profile(os.path.abspath(path))
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_profile(path: str) -> "ImportProfile":
+    profile = ImportProfile(read_profile_file(path))
+    logger.info(f"Compiled import profile {profile.name!r} from {path}")
+    return profile
+
+
+def prepare_orders(
+    df: pd.DataFrame, profile: Optional["ImportProfile"] = None
+) -> Dict[str, object]:
+    """
+    Normalizes an order sheet with the given profile, the default one if omitted.
+
+    :param df: Raw spreadsheet frame.
+    :param profile: Compiled profile.
+    :return: See ImportProfile.prepare.
+    """
+    return (profile or load_profile()).prepare(df)
+
+
+class ProfileField:
+    def __init__(self, name: str, spec: Dict[str, object]):
+        """
+        One spreadsheet column mapped to a model field.
+
+        :param name: Model field name.
+        :param spec: Field definition: 'column' and 'type', optionally 'default',
+                     'unit' (stored unit), 'source_unit' (the sheet's unit),
+                     'required', 'not_null', 'unique', 'min', 'max', 'choices'.
+        """
+        unknown = set(spec) - {
+            "column",
+            "type",
+            "default",
+            "unit",
+            "source_unit",
+            "required",
+            "not_null",
+            "unique",
+            "min",
+            "max",
+            "choices",
+        }
+        if unknown:
+            raise ValueError(f"Field {name!r}: unknown keys {sorted(unknown)}")
+        if "column" not in spec:
+            raise ValueError(f"Field {name!r} has no 'column'")
+        field_type = spec.get("type", "text")
+        if field_type not in FIELD_TYPES:
+            raise ValueError(f"Field {name!r}: unknown type {field_type!r}")
+
+        self.name = name
+        self.column: str = spec["column"]
+        self.type = field_type
+        self.coerce = FIELD_TYPES[field_type]
+        self.default = spec.get("default")
+        self.required = bool(spec.get("required", False))
+        self.not_null = bool(spec.get("not_null", False))
+        self.unique = bool(spec.get("unique", False))
+        self.choices = [str(choice).upper() for choice in spec.get("choices", [])]
+
+        self.scale, self.offset = 1.0, 0.0
+        unit, source_unit = spec.get("unit"), spec.get("source_unit")
+        if source_unit is not None and source_unit != unit:
+            if (source_unit, unit) not in UNIT_CONVERSIONS:
+                raise ValueError(
+                    f"Field {name!r}: no conversion from {source_unit} to {unit}"
+                )
+            if self.type not in ("number", "integer"):
+                raise ValueError(f"Field {name!r}: units need a numeric type")
+            self.scale, self.offset = UNIT_CONVERSIONS[(source_unit, unit)]
+
+        # The validator checks raw sheet values, so bounds given in the stored
+        # unit are converted back to the sheet's unit.
+        self.range: Optional[Tuple[float, float]] = None
+        if "min" in spec or "max" in spec:
+            bounds = [
+                (spec.get(key, default) - self.offset) / self.scale
+                for key, default in (("min", float("-inf")), ("max", float("inf")))
+            ]
+            self.range = (min(bounds), max(bounds))
+
+    def read(self, df: pd.DataFrame, column: Optional[str] = None) -> pd.Series:
+        """
+        Reads the field from df, coerced, converted and with defaults filled in.
+
+        :param df: Raw spreadsheet frame.
+        :param column: Actual column name, for fields of repeated groups.
+        :return: Object series aligned with df; the default where the column is
+                 missing.
+        """
+        if column is None:
+            column = self.column
+        if column not in df.columns:
+            return pd.Series(self.default, index=df.index, dtype=object)
+        values = self.coerce(df[column])
+        if self.scale != 1.0 or self.offset != 0.0:
+            numbers = pd.to_numeric(values) * self.scale + self.offset
+            if self.type == "integer":
+                numbers = numbers.round().astype("Int64")
+            values = numbers.astype(object).where(numbers.notna(), None)
+        if self.default is not None:
+            values = values.where(values.notna(), self.default)
+        return values
+
+
+class ProfileGroup:
+    def __init__(self, name: str, spec: Dict[str, object]):
+        """
+        A repeated group of columns, e.g. Test1_PassFail .. TestN_Mode, read into
+        one long-form row per group instance.
+
+        :param name: Group name ('tests' for order profiles).
+        :param spec: 'name' template for the instance name (e.g. 'Test{n}') and
+                     'fields' whose column templates contain {n}.
+        """
+        self.name = name
+        self.instance_name: str = spec.get("name", f"{name}{GROUP_INDEX}")
+        self.fields = {
+            field: ProfileField(field, field_spec)
+            for field, field_spec in spec.get("fields", {}).items()
+        }
+        self.patterns = {}
+        for field in self.fields.values():
+            if field.column.count(GROUP_INDEX) != 1:
+                raise ValueError(
+                    f"Group {name!r}: column template {field.column!r} needs one "
+                    f"{GROUP_INDEX}"
+                )
+            before, after = field.column.split(GROUP_INDEX)
+            self.patterns[field.name] = re.compile(
+                f"{re.escape(before)}(\\d+){re.escape(after)}"
+            )
+
+    def match(self, columns: Iterable[str]) -> Dict[int, Dict[str, str]]:
+        """
+        Finds the group's columns in a header.
+
+        :param columns: Column names of the sheet.
+        :return: {instance number: {field name: column}}, ordered by number.
+        """
+        instances: Dict[int, Dict[str, str]] = {}
+        for column in columns:
+            for field, pattern in self.patterns.items():
+                match = pattern.fullmatch(str(column))
+                if match:
+                    instances.setdefault(int(match.group(1)), {})[field] = column
+        return dict(sorted(instances.items()))
+
+    def read(
+        self,
+        df: pd.DataFrame,
+        keys: pd.Series,
+        key_name: str,
+        instances: Dict[int, Dict[str, str]],
+    ) -> pd.DataFrame:
+        """
+        Reads every instance of the group into one long-form frame. An instance
+        gives a row where any of its columns has a value.
+        """
+        frames = []
+        for number, columns in instances.items():
+            part = pd.DataFrame({key_name: keys}, index=df.index)
+            part["name"] = self.instance_name.replace(GROUP_INDEX, str(number))
+            present = pd.Series(False, index=df.index)
+            for field in self.fields.values():
+                column = columns.get(field.name)
+                if column is not None:
+                    present |= df[column].notna()
+                part[field.name] = field.read(df, column)
+            frames.append(part[present])
+        if not frames:
+            return pd.DataFrame(columns=[key_name, "name", *self.fields])
+        tests = pd.concat(frames, ignore_index=True)
+        return tests.astype(object).where(tests.notna(), None)
+
+
+class ImportProfile:
+    def __init__(self, spec: Dict[str, object]):
+        """
+        A compiled import profile: how a spreadsheet layout maps onto orders and
+        their tests.
+
+        Compiling resolves types, unit conversions and group column patterns
+        once; prepare() then only runs whole-column operations. Header matches
+        are cached, so reusing one profile across files and chunks costs nothing
+        extra.
+
+        :param spec: Profile definition with 'name', 'key' (the field that
+                     identifies a row), 'fields' and optional 'groups'.
+        """
+        self.name: str = spec.get("name", "unnamed")
+        self.description: str = spec.get("description", "")
+        self.fields = {
+            name: ProfileField(name, field_spec)
+            for name, field_spec in spec.get("fields", {}).items()
+        }
+        self.groups = {
+            name: ProfileGroup(name, group_spec)
+            for name, group_spec in spec.get("groups", {}).items()
+        }
+        self.key: str = spec.get("key", "wip_number")
+
+        missing = [name for name in ORDER_FIELDS if name not in self.fields]
+        if missing:
+            raise ValueError(f"Profile {self.name!r} lacks fields {missing}")
+        if self.key not in self.fields:
+            raise ValueError(f"Profile {self.name!r}: key {self.key!r} is not a field")
+        if set(self.groups) - {"tests"}:
+            raise ValueError(f"Profile {self.name!r}: only a 'tests' group is written")
+
+        self.required_columns: List[str] = [
+            field.column for field in self.fields.values() if field.required
+        ]
+        self._not_null = [name for name, f in self.fields.items() if f.not_null]
+        self._header_cache: Dict[tuple, Dict[str, Dict[int, Dict[str, str]]]] = {}
+
+    def match_groups(
+        self, columns: Iterable[str]
+    ) -> Dict[str, Dict[int, Dict[str, str]]]:
+        """
+        Returns each group's instances in a header (see ProfileGroup.match),
+        cached per header.
+        """
+        header = tuple(columns)
+        if header not in self._header_cache:
+            self._header_cache[header] = {
+                name: group.match(header) for name, group in self.groups.items()
+            }
+        return self._header_cache[header]
+
+    def rules(self, columns: Optional[Iterable[str]] = None) -> Dict[str, object]:
+        """
+        Builds the ImportValidator rule set for this profile.
+
+        :param columns: Header of the file; group columns are only checked when
+                        given.
+        :return: Rule set dictionary.
+        """
+        fields = [(field, field.column) for field in self.fields.values()]
+        if columns is not None:
+            for name, instances in self.match_groups(columns).items():
+                group = self.groups[name]
+                for instance in instances.values():
+                    fields += [
+                        (group.fields[field], column)
+                        for field, column in instance.items()
+                    ]
+        return {
+            "required": self.required_columns,
+            "not_null": [column for field, column in fields if field.not_null],
+            "dates": [column for field, column in fields if field.type == "date"],
+            "unique": [column for field, column in fields if field.unique],
+            "ranges": {column: field.range for field, column in fields if field.range},
+            "choices": {
+                column: field.choices for field, column in fields if field.choices
+            },
+            "wip": self.fields[self.key].column,
+            "coldhead": self.fields["coldhead_serial_number"].column,
+            "warn_existing": True,
+        }
+
+    def prepare(self, df: pd.DataFrame) -> Dict[str, object]:
+        """
+        Normalizes a spreadsheet frame into order and test frames using whole-column
+        operations.
+
+        Rows missing a not_null field are dropped, as are repeated keys (the first
+        occurrence wins). Each order gets a 'natural_key' and a 'content_hash'
+        covering the order and its tests (see add_row_hashes).
+
+        :param df: Raw spreadsheet frame.
+        :return: Dictionary with 'orders' and 'tests' frames and the 'skipped' row
+                 count.
+        """
+        missing = [column for column in self.required_columns if column not in df]
+        if missing:
+            raise ValueError(
+                f"Excel file must contain columns: "
+                f"{', '.join(sorted(self.required_columns))}"
+            )
+
+        orders = pd.DataFrame(
+            {name: field.read(df) for name, field in self.fields.items()},
+            index=df.index,
+        )
+        for name in OPTIONAL_ORDER_FIELDS:
+            if name not in orders:
+                orders[name] = None
+        complete = orders[self._not_null].notna().all(axis=1)
+        kept = complete & ~orders[self.key].duplicated(keep="first")
+        orders = orders[kept]
+
+        instances = self.match_groups(df.columns)
+        if "tests" in self.groups:
+            tests = self.groups["tests"].read(
+                df[kept], orders[self.key], self.key, instances["tests"]
+            )
+        else:
+            tests = pd.DataFrame(columns=[self.key, "name"])
+
+        return {
+            "orders": add_row_hashes(orders.reset_index(drop=True), tests),
+            "tests": tests,
+            "skipped": int(len(df) - kept.sum()),
+        }
+
+
+ProfileSource = Union[str, ImportProfile, None]
+
+
+def resolve_profile(profile: ProfileSource) -> ImportProfile:
+    """
+    Returns profile compiled: an ImportProfile as is, a name or path loaded, and
+    None as the default order profile.
+    """
+    if isinstance(profile, ImportProfile):
+        return profile
+    return load_profile(profile or DEFAULT_ORDER_PROFILE)
@@ -0,0 +1,321 @@
+# db_ops/import_validation.py
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from db_ops.import_pipeline import to_dates, to_text, to_wip_numbers
+from db_ops.import_profiles import load_profile
+from db_ops.models import WIP, Coldhead
+from logger import logger
+
+ERROR = "error"  # The row is not written
+WARNING = "warning"  # The row is written; the issue is reported
+
+ISSUE_COLUMNS = ["row", "column", "rule", "severity", "value", "message"]
+
+# Plausible ranges for test measurements: temperatures in kelvin, heater
+# settings in watts, efficiencies as recorded (values around 1; the bound is
+# loose).
+TEST_MEASUREMENT_RANGES = {
+    "Turns": (0, 100),
+    "First_Stage_Heaters": (0, 500),
+    "Second_Stage_Heater": (0, 500),
+    "First_Stage_Temp": (0, 400),
+    "Second_Stage_Temp": (0, 400),
+    "Efficiency1": (0, 100),
+    "Efficiency2": (0, 100),
+}
+
+PASS_FAIL_VALUES = ["PASS", "FAIL", "PENDING"]
+
+# Rule set for order sheets in the default profile's layout, without the
+# repeated test columns (ImportProfile.rules(columns) adds those per file).
+# 'wip' and 'coldhead' name the columns checked against existing WIPs;
+# 'warn_existing' reports rows whose WIP already exists.
+ORDER_RULES = load_profile().rules()
+
+
+class ImportValidator:
+    def __init__(self, rules: Dict[str, object], db_session: Optional[Session] = None):
+        """
+        Runs an import rule set over a file chunk by chunk, column-wise.
+
+        Issues accumulate across chunks, so uniqueness is checked across the whole
+        file and report() covers every chunk validated so far. Without a session
+        the checks against existing rows are skipped.
+
+        :param rules: Rule set such as ImportProfile.rules() or
+                      csv_import.TRACKER_RULES.
+        :param db_session: Optional SQLAlchemy session used for read-only lookups.
+        """
+        self.rules = rules
+        self.db_session = db_session
+        self.rows_seen = 0
+        self.error_rows = 0
+        self.seen: Dict[str, set] = {column: set() for column in rules["unique"]}
+        self.issues: List[pd.DataFrame] = []
+
+    def validate(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Validates a chunk and records its issues.
+
+        :param df: Raw chunk as read from the file.
+        :return: Boolean array, True for rows without errors.
+        """
+        offset = self.rows_seen
+        self.rows_seen += len(df)
+        df = df.reset_index(drop=True)
+        errors = np.zeros(len(df), dtype=bool)
+
+        missing = [
+            column for column in self.rules["required"] if column not in df.columns
+        ]
+        if missing:
+            for column in missing:
+                self._record(
+                    pd.Series([True]),
+                    column,
+                    "missing_column",
+                    ERROR,
+                    pd.Series([None]),
+                    "Required column is missing",
+                    row_offset=None,
+                )
+            self.error_rows += len(df)
+            return ~np.ones(len(df), dtype=bool)
+
+        text = {column: to_text(df[column]) for column in self._text_columns(df)}
+
+        for column in self.rules["not_null"]:
+            mask = text[column].isna()
+            errors |= self._record(
+                mask,
+                column,
+                "missing_value",
+                ERROR,
+                df[column],
+                "Value is required",
+                offset,
+            )
+
+        for column in self.rules["dates"]:
+            bad = text[column].notna() & pd.Series(to_dates(df[column])).isna()
+            errors |= self._record(
+                bad,
+                column,
+                "invalid_date",
+                ERROR,
+                df[column],
+                "Value is not a date",
+                offset,
+            )
+
+        for column, (low, high) in self.rules["ranges"].items():
+            numbers = pd.to_numeric(df[column], errors="coerce")
+            not_number = text[column].notna() & numbers.isna()
+            errors |= self._record(
+                not_number,
+                column,
+                "not_a_number",
+                ERROR,
+                df[column],
+                "Value is not a number",
+                offset,
+            )
+            out_of_range = (numbers < low) | (numbers > high)
+            errors |= self._record(
+                out_of_range,
+                column,
+                "out_of_range",
+                ERROR,
+                df[column],
+                f"Value is outside {low}-{high}",
+                offset,
+            )
+
+        for column, choices in self.rules["choices"].items():
+            values = text[column].astype("string").str.upper()
+            unexpected = values.notna() & ~values.isin(choices)
+            self._record(
+                unexpected.fillna(False).astype(bool),
+                column,
+                "unexpected_value",
+                WARNING,
+                df[column],
+                f"Expected one of {', '.join(choices)}",
+                offset,
+            )
+
+        for column in self.rules["unique"]:
+            keys = text[column]
+            duplicate = keys.notna() & (
+                keys.duplicated(keep="first") | keys.isin(self.seen[column])
+            )
+            errors |= self._record(
+                duplicate,
+                column,
+                "duplicate",
+                ERROR,
+                df[column],
+                "Value repeats an earlier row of the file",
+                offset,
+            )
+            self.seen[column].update(keys.dropna())
+
+        if self.db_session is not None:
+            errors |= self._check_existing(df, text, offset)
+
+        self.error_rows += int(errors.sum())
+        return ~errors
+
+    def skip(self, df: pd.DataFrame):
+        """
+        Accounts for a chunk that was validated and committed by an earlier run:
+        its keys count for the duplicate check but no issues are recorded.
+
+        :param df: Raw chunk as read from the file.
+        """
+        self.rows_seen += len(df)
+        for column in self.rules["unique"]:
+            if column in df.columns:
+                self.seen[column].update(to_text(df[column]).dropna())
+
+    def check_existing(self, df: pd.DataFrame, offset: int) -> np.ndarray:
+        """
+        Runs only the checks against existing rows, for a chunk whose other
+        rules were checked without a session, and records their issues.
+
+        :param df: The chunk's WIP and coldhead columns as read from the file,
+                   with the WIP left empty on rows that failed the other rules.
+        :param offset: Rows of the file before the chunk.
+        :return: Boolean array, True for rows whose WIP exists with a different
+                 coldhead serial.
+        """
+        df = df.reset_index(drop=True)
+        coldhead_column = self.rules["coldhead"]
+        text = {coldhead_column: to_text(df[coldhead_column])}
+        errors = self._check_existing(df, text, offset)
+        self.error_rows += int(errors.sum())
+        return errors
+
+    def report(self) -> pd.DataFrame:
+        """
+        Returns every issue found so far, one row per issue, ordered by file row.
+        Row numbers count the header as row 1, as a spreadsheet shows them.
+        """
+        if not self.issues:
+            return pd.DataFrame(columns=ISSUE_COLUMNS)
+        return (
+            pd.concat(self.issues, ignore_index=True)
+            .sort_values(["row", "column"], na_position="first", kind="stable")
+            .reset_index(drop=True)
+        )
+
+    def summary(self) -> Dict[str, object]:
+        """
+        Returns row and issue counts for the chunks validated so far.
+        """
+        report = self.report()
+        return {
+            "rows": self.rows_seen,
+            "error_rows": self.error_rows,
+            "errors": int((report["severity"] == ERROR).sum()),
+            "warnings": int((report["severity"] == WARNING).sum()),
+            "by_rule": report["rule"].value_counts().to_dict(),
+        }
+
+    def _text_columns(self, df: pd.DataFrame) -> List[str]:
+        columns = set(self.rules["not_null"]) | set(self.rules["dates"])
+        columns |= set(self.rules["ranges"]) | set(self.rules["choices"])
+        columns |= set(self.rules["unique"]) | {
+            self.rules["wip"],
+            self.rules["coldhead"],
+        }
+        return [column for column in columns if column in df.columns]
+
+    def _check_existing(
+        self, df: pd.DataFrame, text: Dict[str, pd.Series], offset: int
+    ) -> np.ndarray:
+        """
+        Flags rows whose WIP already exists with a different coldhead serial and,
+        if the rule set asks for it, warns about WIPs that already exist.
+        """
+        wip_column, coldhead_column = self.rules["wip"], self.rules["coldhead"]
+        wips = to_wip_numbers(df[wip_column])
+        coldheads = text[coldhead_column]
+        keys = wips.dropna().unique().tolist()
+        if not keys:
+            return np.zeros(len(df), dtype=bool)
+        existing = dict(
+            self.db_session.execute(
+                select(WIP.wip_number, Coldhead.serial_number)
+                .join(Coldhead, WIP.coldhead_id == Coldhead.coldhead_id)
+                .where(WIP.wip_number.in_(keys))
+            ).all()
+        )
+        stored = wips.map(existing)
+        exists = wips.notna() & stored.notna()
+        conflict = exists & coldheads.notna() & (stored != coldheads)
+        errors = self._record(
+            conflict,
+            coldhead_column,
+            "conflict",
+            ERROR,
+            df[coldhead_column],
+            "WIP exists with a different coldhead serial",
+            offset,
+        )
+        if self.rules["warn_existing"]:
+            self._record(
+                exists & ~conflict,
+                wip_column,
+                "exists",
+                WARNING,
+                df[wip_column],
+                "WIP already exists; only changed values are written",
+                offset,
+            )
+        return errors
+
+    def _record(
+        self,
+        mask: pd.Series,
+        column: str,
+        rule: str,
+        severity: str,
+        values: pd.Series,
+        message: str,
+        row_offset: Optional[int],
+    ) -> np.ndarray:
+        """
+        Adds one issue per True entry of mask and returns mask as an array.
+        """
+        mask = mask.fillna(False).to_numpy(dtype=bool)
+        if mask.any():
+            positions = np.flatnonzero(mask)
+            rows = (
+                positions + row_offset + 2
+                if row_offset is not None
+                else [pd.NA] * len(positions)
+            )
+            self.issues.append(
+                pd.DataFrame(
+                    {
+                        "row": rows,
+                        "column": column,
+                        "rule": rule,
+                        "severity": severity,
+                        "value": values.reset_index(drop=True)
+                        .iloc[positions]
+                        .astype(str)
+                        .to_numpy(),
+                        "message": message,
+                    }
+                )
+            )
+            logger.debug(f"{len(positions)} row(s) failed {rule} on {column}")
+        return mask
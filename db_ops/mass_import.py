@@ -1,148 +1,308 @@
 # db_ops/mass_import.py
 
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
 import pandas as pd
 from sqlalchemy.orm import Session
-from db_ops.new_order import NewOrderInserter
+from db_ops.chunk_readers import (
+    excel_row_count,
+    iter_excel_chunks,
+    iter_frame_chunks,
+    read_excel_sheet,
+)
+from db_ops.error_handler import ImportCancelledError
+from db_ops.import_journal import ImportCheckpoints
+from db_ops.import_pipeline import IMPORT_CHUNK_SIZE, BulkOrderWriter, add_counts
+from db_ops.import_profiles import ProfileSource, resolve_profile
+from db_ops.import_validation import ImportValidator
+from db_ops.staging_import import StagingOrderWriter
+from db_ops.write_coordination import run_write_unit
 from logger import logger
-from typing import Dict, Any, Optional, List  # Import Optional and List
+
+ProgressCallback = Callable[[Dict[str, object]], None]
+
+# Ways of writing a prepared chunk: 'bulk' resolves records in pandas and
+# writes them with executemany, 'staging' loads the raw rows into temporary
+# tables and merges them with set-based SQL. Both give the same result.
+ORDER_WRITERS = {"bulk": BulkOrderWriter, "staging": StagingOrderWriter}
 
 
 class MassImporter:
-    def __init__(self, db_session: Session):
+    def __init__(
+        self, db_session: Session, profile: ProfileSource = None, mode: str = "bulk"
+    ):
         """
         Initialize MassImporter with a SQLAlchemy session.
 
         :param db_session: SQLAlchemy session object.
+        :param profile: Import profile describing the sheet layout: a compiled
+                        ImportProfile, a profile name or path, or None for the
+                        default 'orders' profile.
+        :param mode: How chunks are written, one of ORDER_WRITERS.
         """
+        if mode not in ORDER_WRITERS:
+            raise ValueError(
+                f"Unknown import mode {mode!r}; expected one of "
+                f"{', '.join(ORDER_WRITERS)}"
+            )
         self.db_session = db_session
-        self.new_order_inserter = NewOrderInserter(db_session)
+        self.profile = resolve_profile(profile)
+        self.writer_class = ORDER_WRITERS[mode]
+        self.last_report = None  # Validation issues of the last import or dry run
+        self.last_timings = []  # Per-chunk timings of the last import
         logger.info("MassImporter initialized with SQLAlchemy session")
 
-    def mass_insert_from_excel(self, excel_path: str) -> None:
+    def mass_insert_from_excel(
+        self,
+        excel_path: str,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Dict[str, int]:
         """
         Imports data from an Excel file and inserts it into the database.
 
+        Rows are validated against the profile's rules; rows with errors are left
+        out and listed in last_report. The rest is normalized column-wise by the
+        profile (see ImportProfile.prepare) and written in chunks of chunk_size
+        rows, each chunk in its own transaction together with its checkpoint in
+        the import journal.
+        If an earlier import of the same file was interrupted, the chunks it
+        committed are skipped.
+
+        After each chunk, progress (if given) is called with a progress report
+        (see _import_chunks) and per-chunk timings are appended to last_timings.
+        Setting cancel stops the import before the next chunk with
+        ImportCancelledError; re-running the import resumes it.
+
         :param excel_path: Path to the Excel file.
+        :param chunk_size: Number of rows per write transaction.
+        :param progress: Optional callback receiving a dictionary per chunk.
+        :param cancel: Optional event that cancels the import when set.
+        :return: Counts of rows read, rows skipped or invalid, and records created;
+                 'resumed' counts rows committed by an interrupted earlier run.
         """
         try:
             # Load the Excel file
-            df = pd.read_excel(excel_path)
+            df = read_excel_sheet(excel_path)
             logger.info(f"Loaded Excel file from {excel_path}")
-
-            # Ensure the required columns are present in the DataFrame
-            required_columns = {
-                "Arrival_Date",
-                "Coldhead_Serial_Number",
-                "WIP",
-                "Displacer_Serial_Number",
-                "Initial_Open_Date",
-            }
-            if not required_columns.issubset(df.columns):
-                error_msg = (
-                    f"Excel file must contain columns: {', '.join(required_columns)}"
-                )
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-
-            # Identify test columns (assuming Test1_PassFail, Test1_Mode, etc.)
-            test_columns: Dict[str, Dict[str, str]] = {}
-            for col in df.columns:
-                if "Test" in col and ("PassFail" in col or "Mode" in col):
-                    test_num = "".join(filter(str.isdigit, col))
-                    if test_num:
-                        if test_num not in test_columns:
-                            test_columns[test_num] = {}
-                        if "PassFail" in col:
-                            test_columns[test_num]["PassFail"] = col
-                        elif "Mode" in col:
-                            test_columns[test_num]["Mode"] = col
-
-            # Iterate over the DataFrame and insert each record
-            for _, row in df.iterrows():
-                coldhead_serial = None  # Initialize before try block
-                try:
-                    # Extract WIP and related data
-                    arrival_date = row["Arrival_Date"]
-                    coldhead_serial = row["Coldhead_Serial_Number"]
-                    wip_number = row["WIP"]
-                    displacer_serial = row.get("Displacer_Serial_Number", None)
-                    initial_open_date = row.get("Initial_Open_Date", None)
-
-                    coldhead_data: Dict[str, Any] = {
-                        "serial_number": coldhead_serial,
-                        # Add other Coldhead fields if necessary
-                    }
-
-                    wip_data: Dict[str, Any] = {
-                        "wip_number": wip_number if pd.notnull(wip_number) else None,
-                        "arrival_date": arrival_date
-                        if pd.notnull(arrival_date)
-                        else None,
-                        # Add other WIP fields if necessary
-                    }
-
-                    # Handle Displacer data
-                    displacer_data: Optional[Dict[str, Any]] = None
-                    if pd.notnull(displacer_serial) or pd.notnull(initial_open_date):
-                        displacer_data = {
-                            "displacer_serial_number": displacer_serial
-                            if pd.notnull(displacer_serial)
-                            else None,
-                            "initial_open_date": initial_open_date
-                            if pd.notnull(initial_open_date)
-                            else None,
-                            # Add other Displacer fields if necessary
-                        }
-
-                    # Handle tests
-                    test_data_list: Optional[List[Dict[str, Any]]] = []
-                    for test_num, cols in test_columns.items():
-                        pass_fail = row.get(cols.get("PassFail"), None)
-                        mode = row.get(cols.get("Mode"), None)
-                        if pd.notnull(pass_fail) or pd.notnull(mode):
-                            test_data = {
-                                "pass_fail": pass_fail
-                                if pd.notnull(pass_fail)
-                                else "Pending",
-                                "notes": "",  # Populate if available
-                                "mode": mode if pd.notnull(mode) else "",
-                                "turns": 0,  # Default or extract if available
-                                "first_stage_heaters": 0.0,  # Default or extract if available
-                                "second_stage_heater": 0.0,  # Default or extract if available
-                                "first_stage_temp": 0.0,  # Default or extract if available
-                                "second_stage_temp": 0.0,  # Default or extract if available
-                                "efficiency1": 0.0,  # Default or extract if available
-                                "efficiency2": 0.0,  # Default or extract if available
-                                "test_attempt": 1,  # Default or extract if available
-                                "test_date": None,  # Can be set to current date if desired
-                                # 'wip_number' will be set in inserter
-                            }
-                            test_data_list.append(test_data)
-
-                    # Use the NewOrderInserter to insert the new order
-                    self.new_order_inserter.insert_new_order(
-                        coldhead_data=coldhead_data,
-                        wip_data=wip_data,
-                        displacer_data=displacer_data,
-                        test_data_list=test_data_list if test_data_list else None,
-                    )
-                except Exception as e:
-                    # Safeguard to check if 'coldhead_serial' is defined
-                    if coldhead_serial:
-                        logger.exception(
-                            f"Error inserting record for Coldhead Serial Number {coldhead_serial}: {e}"
-                        )
-                    else:
-                        logger.exception(
-                            f"Error inserting record: Coldhead Serial Number is undefined. Error: {e}"
-                        )
-                    continue  # Skip to the next record
+            chunks = iter_frame_chunks(df, chunk_size)
+            return self._import_chunks(
+                excel_path,
+                chunks,
+                chunk_size,
+                len(df),
+                progress=progress,
+                cancel=cancel,
+            )
         except FileNotFoundError as fnfe:
             logger.exception(f"Excel file not found: {fnfe}")
             raise
         except pd.errors.EmptyDataError as ede:
             logger.exception(f"Excel file is empty: {ede}")
             raise
+        except ValueError as ve:
+            logger.error(str(ve))
+            raise
+        except ImportCancelledError as ice:
+            logger.info(str(ice))
+            raise
         except Exception as e:
             logger.exception(f"Error loading or processing the Excel file: {e}")
             raise
+
+    def stream_insert_from_excel(
+        self,
+        excel_path: str,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        sheet_name: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Dict[str, int]:
+        """
+        Imports an Excel file chunk by chunk without loading the whole workbook.
+
+        Each chunk of chunk_size rows is read, validated, normalized and committed
+        before the next one is read, so memory use does not grow with the file.
+        Invalid rows, interrupted imports, progress and cancellation are handled
+        as in mass_insert_from_excel; the row total for progress comes from the
+        sheet's declared size.
+
+        :param excel_path: Path to the .xlsx file.
+        :param chunk_size: Number of rows per chunk and write transaction.
+        :param sheet_name: Worksheet to import; the first sheet when omitted.
+        :param progress: Optional callback receiving a dictionary per chunk.
+        :param cancel: Optional event that cancels the import when set.
+        :return: Counts of rows read, rows skipped or invalid, and records created;
+                 'resumed' counts rows committed by an interrupted earlier run.
+        """
+        try:
+            chunks = iter_excel_chunks(excel_path, chunk_size, sheet_name)
+            return self._import_chunks(
+                excel_path,
+                chunks,
+                chunk_size,
+                excel_row_count(excel_path, sheet_name),
+                sheet_name,
+                progress,
+                cancel,
+            )
+        except FileNotFoundError as fnfe:
+            logger.exception(f"Excel file not found: {fnfe}")
+            raise
+        except pd.errors.EmptyDataError as ede:
+            logger.exception(f"Excel file is empty: {ede}")
+            raise
+        except ValueError as ve:
+            logger.error(str(ve))
+            raise
+        except ImportCancelledError as ice:
+            logger.info(str(ice))
+            raise
+        except Exception as e:
+            logger.exception(f"Error streaming the Excel file: {e}")
+            raise
+
+    def _import_chunks(
+        self,
+        excel_path: str,
+        chunks: Iterable[pd.DataFrame],
+        chunk_size: int,
+        rows_total: Optional[int],
+        sheet_name: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Dict[str, int]:
+        """
+        Validates, prepares and writes source chunks in order, checkpointing each.
+
+        A WIP number repeated in a later chunk is caught by the validator, which
+        tracks keys across chunks, including chunks skipped on resume.
+
+        The progress report has 'chunk', 'rows_done', 'rows_total' (None when
+        unknown), 'rows_per_second' over the rows written by this run and
+        'eta_seconds' (None when unknown).
+        """
+        checkpoints = ImportCheckpoints(self.db_session)
+        journal_id, done = checkpoints.start(excel_path, chunk_size, sheet_name)
+        writer = self.writer_class(self.db_session, chunk_size)
+        validator = None
+        counts: Dict[str, int] = {}
+        self.last_timings = []
+        start = chunk_start = time.perf_counter()
+        for chunk_number, df in enumerate(chunks, start=1):
+            if validator is None:
+                validator = self._validator(df.columns)
+            if chunk_number <= done:
+                validator.skip(df)
+                add_counts(counts, {"rows": len(df), "resumed": len(df)})
+                chunk_start = time.perf_counter()
+                continue
+            if cancel is not None and cancel.is_set():
+                self.last_report = validator.report()
+                raise ImportCancelledError(counts)
+
+            clean = validator.validate(df)
+            prepared = self.profile.prepare(df[clean])
+
+            def work(session, prepared=prepared, chunk_number=chunk_number, df=df):
+                created = writer.write_changed_chunk(
+                    session, prepared["orders"], prepared["tests"]
+                )
+                checkpoints.advance(session, journal_id, chunk_number, len(df))
+                return created
+
+            chunk_counts = run_write_unit(self.db_session, work)
+            chunk_counts["rows"] = len(df)
+            chunk_counts["invalid"] = int((~clean).sum())
+            chunk_counts["skipped"] = prepared["skipped"]
+            add_counts(counts, chunk_counts)
+
+            now = time.perf_counter()
+            self.last_timings.append(
+                {"chunk": chunk_number, "rows": len(df), "seconds": now - chunk_start}
+            )
+            chunk_start = now
+            if chunk_number == done + 1:
+                logger.info(
+                    f"First chunk of {excel_path} committed after {now - start:.2f}s"
+                )
+            if progress is not None:
+                progress(self._progress(chunk_number, counts, rows_total, now - start))
+        checkpoints.finish(journal_id)
+
+        validator = validator or self._validator()
+        self.last_report = validator.report()
+        self._log_invalid(excel_path, validator)
+        if counts.get("skipped"):
+            logger.warning(
+                f"Skipped {counts['skipped']} row(s) with a missing WIP, coldhead or "
+                f"displacer serial number, or a repeated WIP number"
+            )
+        logger.info(f"Import from {excel_path} finished: {counts}")
+        return counts
+
+    @staticmethod
+    def _progress(
+        chunk_number: int,
+        counts: Dict[str, int],
+        rows_total: Optional[int],
+        elapsed: float,
+    ) -> Dict[str, object]:
+        rows_done = counts["rows"]
+        written = rows_done - counts.get("resumed", 0)
+        rate = written / elapsed if elapsed > 0 else None
+        if rows_total is not None and rows_total < rows_done:
+            rows_total = rows_done  # The sheet's declared size was short
+        eta = (
+            (rows_total - rows_done) / rate if rows_total is not None and rate else None
+        )
+        return {
+            "chunk": chunk_number,
+            "rows_done": rows_done,
+            "rows_total": rows_total,
+            "rows_per_second": rate,
+            "eta_seconds": eta,
+        }
+
+    def dry_run_from_excel(
+        self, excel_path: str, chunk_size: int = IMPORT_CHUNK_SIZE
+    ) -> Dict[str, object]:
+        """
+        Validates an Excel file against the profile's rules without writing
+        anything.
+
+        The workbook is streamed, so a dry run of a large file needs no more
+        memory than an import. Checks against existing WIPs are read-only.
+
+        :param excel_path: Path to the .xlsx file.
+        :param chunk_size: Number of rows validated at a time.
+        :return: Dictionary with the validation 'summary' and the 'report' frame
+                 (one row per issue: row, column, rule, severity, value, message).
+        """
+        validator = None
+        for df in iter_excel_chunks(excel_path, chunk_size):
+            validator = validator or self._validator(df.columns)
+            validator.validate(df)
+        validator = validator or self._validator()
+        self.last_report = validator.report()
+        summary = validator.summary()
+        logger.info(f"Dry run of {excel_path}: {summary}")
+        return {"summary": summary, "report": self.last_report}
+
+    def _validator(self, columns: Optional[Iterable[str]] = None) -> ImportValidator:
+        """
+        Returns a validator for the profile's rules, including the repeated
+        group columns found in columns.
+        """
+        return ImportValidator(self.profile.rules(columns), self.db_session)
+
+    @staticmethod
+    def _log_invalid(excel_path: str, validator: ImportValidator):
+        if validator.error_rows:
+            logger.warning(
+                f"{validator.error_rows} invalid row(s) in {excel_path} were not "
+                f"imported: {validator.summary()['by_rule']}"
+            )
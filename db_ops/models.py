@@ -1,7 +1,7 @@
 # db_ops/models.py
 
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, func
 from sqlalchemy.orm import relationship
 
 Base = declarative_base()
@@ -10,7 +10,20 @@ class Test(Base):
     __tablename__ = 'tests'
     test_id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, nullable=False)
-    wip_id = Column(Integer, ForeignKey('wips.wip_id'))
+    wip_id = Column(Integer, ForeignKey('wips.wip_id'), index=True)
+    test_date = Column(Date, nullable=True, index=True)
+    station = Column(Integer, nullable=True, index=True)
+    pass_fail = Column(String, nullable=True)  # Pass, Fail or Pending
+    mode = Column(String, nullable=True)  # e.g. LOAD
+    turns = Column(Integer, nullable=True)
+    first_stage_heaters = Column(Float, nullable=True)
+    second_stage_heater = Column(Float, nullable=True)
+    first_stage_temp = Column(Float, nullable=True)
+    second_stage_temp = Column(Float, nullable=True)
+    efficiency1 = Column(Float, nullable=True)
+    efficiency2 = Column(Float, nullable=True)
+    test_attempt = Column(Integer, nullable=True)
+    notes = Column(String, nullable=True)
     wip = relationship("WIP", back_populates="tests")
 
 class Coldhead(Base):
@@ -38,8 +51,12 @@ class Displacer(Base):
 class WIP(Base):
     __tablename__ = 'wips'
     wip_id = Column(Integer, primary_key=True, autoincrement=True)
-    coldhead_id = Column(Integer, ForeignKey('coldheads.coldhead_id'), nullable=False)
-    displacer_id = Column(Integer, ForeignKey('displacers.displacer_id'), nullable=False)
+    coldhead_id = Column(
+        Integer, ForeignKey('coldheads.coldhead_id'), nullable=False, index=True
+    )
+    displacer_id = Column(
+        Integer, ForeignKey('displacers.displacer_id'), nullable=False, index=True
+    )
     wip_number = Column(String, nullable=False, unique=True)
     arrival_date = Column(Date, nullable=True)
     teardown_date = Column(Date, nullable=True)
@@ -49,3 +66,76 @@ class WIP(Base):
     coldhead = relationship("Coldhead", back_populates="wips")
     displacer = relationship("Displacer", back_populates="wips")
     tests = relationship("Test", back_populates="wip")
+
+
+# Test history per coldhead and per displacer, maintained by triggers on tests
+# and wips (see db_ops.test_summary)
+class ColdheadTestSummary(Base):
+    __tablename__ = 'coldhead_test_summary'
+    coldhead_id = Column(
+        Integer,
+        ForeignKey('coldheads.coldhead_id'),
+        primary_key=True,
+        autoincrement=False,
+    )
+    attempts = Column(Integer, nullable=False, default=0)  # Tests of any result
+    fail_count = Column(Integer, nullable=False, default=0)
+    pass_count = Column(Integer, nullable=False, default=0)
+    last_test_id = Column(Integer, nullable=True)
+    last_test_date = Column(Date, nullable=True)
+    last_result = Column(String, nullable=True)  # pass_fail of the last test
+
+
+class DisplacerTestSummary(Base):
+    __tablename__ = 'displacer_test_summary'
+    displacer_id = Column(
+        Integer,
+        ForeignKey('displacers.displacer_id'),
+        primary_key=True,
+        autoincrement=False,
+    )
+    attempts = Column(Integer, nullable=False, default=0)  # Tests of any result
+    fail_count = Column(Integer, nullable=False, default=0)
+    pass_count = Column(Integer, nullable=False, default=0)
+    last_test_id = Column(Integer, nullable=True)
+    last_test_date = Column(Date, nullable=True)
+    last_result = Column(String, nullable=True)  # pass_fail of the last test
+
+
+# Append-only journal of row changes, maintained by triggers (see db_ops.change_log)
+class ChangeLog(Base):
+    __tablename__ = 'change_log'
+    __table_args__ = {'sqlite_autoincrement': True}  # Never reuse a sequence number
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String, nullable=False)
+    operation = Column(String, nullable=False)  # INSERT, UPDATE or DELETE
+    row_id = Column(Integer, nullable=False)
+    changed_at = Column(
+        DateTime, nullable=False, server_default=func.current_timestamp()
+    )
+
+
+# One row per import run; the checkpoint lets an interrupted import resume (see
+# db_ops.import_journal)
+class ImportJournal(Base):
+    __tablename__ = 'import_journal'
+    journal_id = Column(Integer, primary_key=True, autoincrement=True)
+    file_path = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False, index=True)  # SHA-256 of the file
+    chunk_size = Column(Integer, nullable=False)
+    chunks_committed = Column(Integer, nullable=False, default=0)
+    rows_committed = Column(Integer, nullable=False, default=0)
+    status = Column(String, nullable=False)  # running, completed or abandoned
+    started_at = Column(
+        DateTime, nullable=False, server_default=func.current_timestamp()
+    )
+    updated_at = Column(
+        DateTime, nullable=False, server_default=func.current_timestamp()
+    )
+
+
+# Content hash of each order row as last imported, keyed by WIP number
+class ImportRowHash(Base):
+    __tablename__ = 'import_row_hashes'
+    natural_key = Column(String, primary_key=True)
+    content_hash = Column(Integer, nullable=False)  # Signed 64-bit row hash
@@ -0,0 +1,340 @@
+# db_ops/multi_import.py
+
+import multiprocessing
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from db_ops.chunk_readers import iter_csv_chunks, iter_excel_chunks
+from db_ops.csv_import import (
+    REPAIR_TEST_COLUMNS,
+    REPAIR_TEST_RULES,
+    TRACKER_COLUMNS,
+    TRACKER_RULES,
+    TrackerCsvImporter,
+    prepare_repair_tests,
+    prepare_tracker_rows,
+)
+from db_ops.import_pipeline import (
+    IMPORT_CHUNK_SIZE,
+    BulkOrderWriter,
+    add_counts,
+    to_wip_numbers,
+)
+from db_ops.import_profiles import load_profile
+from db_ops.import_validation import ISSUE_COLUMNS, ImportValidator
+from db_ops.write_coordination import run_write_unit
+from logger import logger
+
+# File kinds the pipeline understands.
+ORDERS = "orders"  # MassImporter order sheets (.xlsx or .csv)
+TRACKERS = "trackers"  # Coldhead_Trackers_SC10.csv exports
+REPAIR_TESTS = "repair_tests"  # Repair_Tracker_tests.csv exports
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm", ".xls")
+
+# Validation rules of the CSV exports; order files use their profile's rules.
+KIND_RULES = {
+    TRACKERS: TRACKER_RULES,
+    REPAIR_TESTS: REPAIR_TEST_RULES,
+}
+
+
+def detect_kind(path: str) -> str:
+    """
+    Works out which importer a file belongs to from its extension and header.
+
+    :param path: Path to an .xlsx or .csv file.
+    :return: ORDERS, TRACKERS or REPAIR_TESTS.
+    """
+    if path.lower().endswith(EXCEL_EXTENSIONS):
+        return ORDERS
+    if not path.lower().endswith(".csv"):
+        raise ValueError(f"Unsupported file type: {path}")
+    columns = set(pd.read_csv(path, nrows=0).columns)
+    if set(REPAIR_TEST_COLUMNS) <= columns:
+        return REPAIR_TESTS
+    if set(load_profile().required_columns) <= columns:
+        return ORDERS
+    if set(TRACKER_COLUMNS) <= columns:
+        return TRACKERS
+    raise ValueError(f"Unrecognized CSV layout: {path}")
+
+
+def iter_file_chunks(path: str, kind: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Reads a file of the given kind as raw DataFrame chunks.
+    """
+    if kind == ORDERS:
+        if path.lower().endswith(EXCEL_EXTENSIONS):
+            return iter_excel_chunks(path, chunk_size)
+        return iter_csv_chunks(path, chunk_size)
+    if kind == TRACKERS:
+        return iter_csv_chunks(path, chunk_size, TRACKER_COLUMNS)
+    if kind == REPAIR_TESTS:
+        return iter_csv_chunks(path, chunk_size, REPAIR_TEST_COLUMNS)
+    raise ValueError(f"Unknown import kind: {kind}")
+
+
+def make_validator(
+    kind: str, columns: Optional[Iterable[str]], db_session: Optional[Session] = None
+) -> ImportValidator:
+    """
+    Returns a validator for a file of the given kind and header.
+    """
+    if kind == ORDERS:
+        return ImportValidator(load_profile().rules(columns), db_session)
+    return ImportValidator(KIND_RULES[kind], db_session)
+
+
+def parse_file(path: str, kind: str, chunk_size: int) -> Iterator[Dict[str, object]]:
+    """
+    Reads, validates and prepares a file chunk by chunk.
+
+    Only the in-file rules run here (workers have no database session); rows
+    with errors are dropped before preparing. Order chunks carry the WIP and
+    coldhead columns of their rows as 'keys', and the file rows before them
+    as 'offset', for the writer to check against existing WIPs.
+
+    :param path: Path to the file.
+    :param kind: File kind from detect_kind.
+    :param chunk_size: Rows per chunk.
+    :return: Iterator of prepared chunks, each with 'rows' and 'invalid' counts
+             and the chunk's validation 'issues' added.
+    """
+    validator = None
+    for df in iter_file_chunks(path, kind, chunk_size):
+        validator = validator or make_validator(kind, df.columns)
+        issues_before, offset = len(validator.issues), validator.rows_seen
+        clean = validator.validate(df)
+        if kind == ORDERS:
+            wip_column = validator.rules["wip"]
+            keys = df.reindex(columns=[wip_column, validator.rules["coldhead"]])
+            keys[wip_column] = keys[wip_column].where(clean)
+        df = df[clean]
+        if kind == ORDERS:
+            prepared = load_profile().prepare(df)
+            prepared["keys"], prepared["offset"] = keys, offset
+        elif kind == TRACKERS:
+            prepared = prepare_tracker_rows(df)
+        else:
+            prepared = prepare_repair_tests(df)
+        prepared["rows"] = len(clean)
+        prepared["invalid"] = int((~clean).sum())
+        prepared["issues"] = validator.issues[issues_before:]
+        yield prepared
+
+
+def validate_file(
+    path: str, db_session: Optional[Session] = None, chunk_size: int = IMPORT_CHUNK_SIZE
+) -> Dict[str, object]:
+    """
+    Dry run: validates a file of any supported kind without writing anything.
+
+    :param path: Path to the file.
+    :param db_session: Optional session for the read-only checks against
+                       existing rows.
+    :param chunk_size: Rows validated at a time.
+    :return: Dictionary with the validation 'summary' and the 'report' frame.
+    """
+    kind = detect_kind(path)
+    validator = None
+    for df in iter_file_chunks(path, kind, chunk_size):
+        validator = validator or make_validator(kind, df.columns, db_session)
+        validator.validate(df)
+    validator = validator or make_validator(kind, None, db_session)
+    return {"summary": validator.summary(), "report": validator.report()}
+
+
+def parse_worker(path: str, kind: str, chunk_size: int, batches) -> int:
+    """
+    Process pool entry point: parses one file and sends its prepared chunks to
+    the writer through the batches queue, followed by a ('done', path) marker.
+
+    :return: Number of chunks sent.
+    """
+    sent = 0
+    try:
+        for prepared in parse_file(path, kind, chunk_size):
+            batches.put(("batch", path, kind, prepared))
+            sent += 1
+        batches.put(("done", path, None, None))
+    except Exception as e:
+        batches.put(("error", path, None, f"{type(e).__name__}: {e}"))
+    return sent
+
+
+class MultiFileImporter:
+    def __init__(
+        self,
+        db_session: Session,
+        workers: Optional[int] = None,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+    ):
+        """
+        Imports many files at once: a process pool parses and validates them in
+        parallel while this process, the only writer, commits their chunks.
+
+        :param db_session: SQLAlchemy session object used by the writer.
+        :param workers: Parser processes; defaults to one per core minus the writer's.
+        :param chunk_size: Rows per chunk and write transaction.
+        """
+        self.db_session = db_session
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.chunk_size = chunk_size
+        self.order_writer = BulkOrderWriter(db_session, chunk_size)
+        self.csv_importer = TrackerCsvImporter(db_session, chunk_size)
+        self.last_reports: Dict[str, pd.DataFrame] = {}
+        logger.info(
+            f"MultiFileImporter initialized with {self.workers} parser process(es)"
+        )
+
+    def write_batch(self, kind: str, prepared: Dict[str, object]) -> Dict[str, int]:
+        """
+        Commits one prepared chunk in its own write transaction.
+
+        :param kind: File kind the chunk came from.
+        :param prepared: Prepared chunk from parse_file.
+        :return: Counts for the chunk.
+        """
+        if kind == ORDERS:
+            counts = run_write_unit(
+                self.db_session,
+                lambda session: self.write_orders(session, prepared),
+            )
+        elif kind == TRACKERS:
+            counts = run_write_unit(
+                self.db_session,
+                lambda session: self.csv_importer.write_tracker_chunk(
+                    session, prepared
+                ),
+            )
+        else:
+            counts = run_write_unit(
+                self.db_session,
+                lambda session: self.csv_importer.write_test_chunk(session, prepared),
+            )
+        counts["rows"] = prepared["rows"]
+        counts["invalid"] = prepared["invalid"] + counts.pop("conflicts", 0)
+        counts["skipped"] = prepared["skipped"]
+        return counts
+
+    def write_orders(
+        self, session: Session, prepared: Dict[str, object]
+    ) -> Dict[str, int]:
+        """
+        Writes a prepared order chunk without committing. Orders whose WIP
+        exists with a different coldhead serial are left out, as MassImporter's
+        validator leaves them out, and their issues are stored in
+        prepared['write_issues'].
+
+        :param session: SQLAlchemy session of the write transaction.
+        :param prepared: Prepared order chunk from parse_file.
+        :return: Counts for the chunk, with the orders left out as 'conflicts'.
+        """
+        keys = prepared["keys"]
+        validator = make_validator(ORDERS, keys.columns, session)
+        conflicts = validator.check_existing(keys, prepared["offset"])
+        orders, tests = prepared["orders"], prepared["tests"]
+        if conflicts.any():
+            wips = to_wip_numbers(keys[validator.rules["wip"]])[conflicts]
+            orders = orders[~orders["wip_number"].isin(wips)]
+            tests = tests[~tests["wip_number"].isin(wips)]
+        prepared["write_issues"] = validator.issues
+        counts = self.order_writer.write_changed_chunk(session, orders, tests)
+        counts["conflicts"] = int(conflicts.sum())
+        return counts
+
+    def dry_run(self, paths: Iterable[str]) -> Dict[str, Dict[str, object]]:
+        """
+        Validates the given files without writing anything.
+
+        :param paths: Paths of .xlsx and .csv files.
+        :return: Per-file dictionaries with 'summary' and 'report', or an 'error'.
+        """
+        results = {}
+        for path in dict.fromkeys(paths):
+            try:
+                results[path] = validate_file(path, self.db_session, self.chunk_size)
+            except Exception as e:
+                logger.error(f"Dry run of {path} failed: {e}")
+                results[path] = {"error": str(e)}
+        return results
+
+    def import_files(self, paths: Iterable[str]) -> Dict[str, Dict[str, object]]:
+        """
+        Imports the given files.
+
+        A file that fails to parse, or one of whose chunks fails to write, is
+        reported and does not stop the others; no further chunks of it are
+        written, and the chunks committed before the failure stay committed.
+        Rows failing the in-file validation rules are left out; their issues are
+        kept per file in last_reports.
+
+        :param paths: Paths of .xlsx and .csv files.
+        :return: Per-file results: counts, or an 'error' message.
+        """
+        paths: List[str] = list(dict.fromkeys(paths))
+        self.last_reports = {}
+        results: Dict[str, Dict[str, object]] = {path: {} for path in paths}
+        kinds = {}
+        for path in paths:
+            try:
+                kinds[path] = detect_kind(path)
+            except Exception as e:
+                logger.error(f"Skipping {path}: {e}")
+                results[path] = {"error": str(e)}
+
+        if not kinds:
+            return results
+
+        context = multiprocessing.get_context("spawn")  # Never fork the Tk process
+        with context.Manager() as manager:
+            # Bounded so parsers cannot run unboundedly ahead of the writer.
+            batches = manager.Queue(maxsize=self.workers * 2)
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(kinds)), mp_context=context
+            ) as pool:
+                futures = [
+                    pool.submit(parse_worker, path, kind, self.chunk_size, batches)
+                    for path, kind in kinds.items()
+                ]
+                pending = set(kinds)
+                issues: Dict[str, List[pd.DataFrame]] = {}
+                while pending:
+                    try:
+                        message, path, kind, payload = batches.get(timeout=1.0)
+                    except queue.Empty:
+                        failed = [f for f in futures if f.done() and f.exception()]
+                        if failed:
+                            raise failed[0].exception()
+                        continue
+                    if message == "batch":
+                        if "error" in results[path]:
+                            # The file failed; its remaining chunks are dropped
+                            continue
+                        issues.setdefault(path, []).extend(payload.pop("issues"))
+                        try:
+                            add_counts(results[path], self.write_batch(kind, payload))
+                            issues[path].extend(payload.get("write_issues", []))
+                        except Exception as e:
+                            logger.exception(f"Writing a chunk of {path} failed: {e}")
+                            results[path]["error"] = str(e)
+                    elif message == "done":
+                        pending.discard(path)
+                        logger.info(f"Imported {path}: {results[path]}")
+                    else:
+                        pending.discard(path)
+                        logger.error(f"Parsing {path} failed: {payload}")
+                        results[path]["error"] = payload
+        for path, frames in issues.items():
+            self.last_reports[path] = (
+                pd.concat(frames, ignore_index=True)
+                if frames
+                else pd.DataFrame(columns=ISSUE_COLUMNS)
+            )
+        return results
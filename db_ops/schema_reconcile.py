@@ -0,0 +1,211 @@
+# db_ops/schema_reconcile.py
+
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import MetaData, create_engine, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import Column, CreateIndex, CreateTable, Table
+
+import db_ops.change_log  # noqa: F401  Installs the journal triggers on create_all
+import db_ops.test_summary  # noqa: F401  Installs the summary triggers on create_all
+from db_ops.database import configure_sqlite_transactions
+from db_ops.error_handler import SchemaReconcileError
+from db_ops.models import Base
+from logger import logger
+
+# Every table's columns, and every index name, in one round trip
+INTROSPECT_SQL = """
+    SELECT m.type, m.name, c.name
+    FROM sqlite_master AS m
+    LEFT JOIN pragma_table_info(m.name) AS c ON m.type = 'table'
+    WHERE m.type IN ('table', 'index') AND m.name NOT LIKE 'sqlite_%'
+"""
+
+# Server defaults ALTER TABLE ADD COLUMN accepts, given as text()
+CONSTANT_DEFAULT = re.compile(r"^\s*(-?\d+(\.\d+)?|'[^']*'|NULL)\s*$", re.IGNORECASE)
+
+
+def introspect(connection: Connection) -> Tuple[Dict[str, List[str]], List[str]]:
+    """
+    Returns the database's tables with their column names, and its index
+    names. Names are lower-cased, as SQLite compares them case-insensitively.
+
+    :param connection: SQLAlchemy connection to a SQLite database.
+    """
+    tables: Dict[str, List[str]] = {}
+    indexes = []
+    for kind, name, column in connection.exec_driver_sql(INTROSPECT_SQL):
+        if kind == "index":
+            indexes.append(name.lower())
+        else:
+            tables.setdefault(name.lower(), [])
+            if column is not None:
+                tables[name.lower()].append(column.lower())
+    return tables, indexes
+
+
+class SchemaPlan:
+    def __init__(self):
+        """
+        The changes that bring a database up to date with the models: tables
+        to create, columns to add (as ALTER TABLE statements), indexes to
+        create, changes SQLite cannot make in place, and the columns the
+        database has that the models do not (left alone).
+        """
+        self.tables: List[Table] = []
+        self.statements: List[str] = []
+        self.problems: List[str] = []
+        self.extra_columns: Dict[str, List[str]] = {}
+
+    def describe(self, connection: Connection) -> List[str]:
+        """
+        Returns the DDL of the plan in the order it is applied: changes to
+        existing tables first, then table creations.
+
+        :param connection: Connection whose dialect compiles the DDL.
+        """
+        created = []
+        for table in self.tables:
+            created.append(str(CreateTable(table).compile(dialect=connection.dialect)))
+            created.extend(
+                str(CreateIndex(index).compile(dialect=connection.dialect))
+                for index in table.indexes
+            )
+        return self.statements + [statement.strip() for statement in created]
+
+
+def _add_column_sql(connection: Connection, table: Table, column: Column) -> str:
+    compiler = connection.dialect.ddl_compiler(connection.dialect, None)
+    spec = compiler.get_column_specification(column)
+    foreign_keys = list(column.foreign_keys)
+    if len(foreign_keys) == 1:
+        target = foreign_keys[0].column
+        spec += f" REFERENCES {target.table.name} ({target.name})"
+    return f"ALTER TABLE {table.name} ADD COLUMN {spec}"
+
+
+def _add_column_problem(column: Column) -> Optional[str]:
+    """
+    Returns why SQLite's ALTER TABLE ADD COLUMN cannot add column, or None.
+    """
+    default = getattr(column.server_default, "arg", None)
+    if column.primary_key:
+        return "is part of the primary key"
+    if not column.nullable and default is None:
+        return "is NOT NULL without a server default"
+    if default is not None and not isinstance(default, str):
+        if not CONSTANT_DEFAULT.match(getattr(default, "text", "")):
+            return "has a non-constant server default"
+    return None
+
+
+def plan_schema_changes(
+    connection: Connection, metadata: MetaData = Base.metadata
+) -> SchemaPlan:
+    """
+    Diffs the database against metadata after introspecting it once.
+
+    Missing tables are created with their indexes; missing columns are added
+    with ALTER TABLE, a unique column with a unique index beside it; missing
+    named indexes are created. Columns SQLite cannot add in place (primary
+    key, NOT NULL without a default, non-constant default) are reported as
+    problems. Column types and the database's extra tables and columns are
+    not changed.
+
+    :param connection: SQLAlchemy connection to a SQLite database.
+    :param metadata: Metadata describing the wanted schema.
+    """
+    tables, indexes = introspect(connection)
+    plan = SchemaPlan()
+    for table in metadata.sorted_tables:
+        existing = tables.get(table.name.lower())
+        if existing is None:
+            plan.tables.append(table)
+            continue
+
+        wanted = {column.name.lower() for column in table.columns}
+        extra = [column for column in existing if column not in wanted]
+        if extra:
+            plan.extra_columns[table.name] = extra
+        for column in table.columns:
+            if column.name.lower() in existing:
+                continue
+            problem = _add_column_problem(column)
+            if problem:
+                plan.problems.append(f"{table.name}.{column.name} {problem}")
+                continue
+            plan.statements.append(_add_column_sql(connection, table, column))
+            if column.unique:
+                plan.statements.append(
+                    f"CREATE UNIQUE INDEX uq_{table.name}_{column.name} "
+                    f"ON {table.name} ({column.name})"
+                )
+
+        for index in table.indexes:
+            if index.name and index.name.lower() not in indexes:
+                plan.statements.append(
+                    str(CreateIndex(index).compile(dialect=connection.dialect)).strip()
+                )
+    return plan
+
+
+def reconcile_schema(
+    bind, metadata: MetaData = Base.metadata, dry_run: bool = False
+) -> dict:
+    """
+    Brings a database's schema up to date with metadata in one transaction:
+    either every change is applied or, if any fails, none is.
+
+    The plan is made inside the transaction, which takes the write lock up
+    front, so a concurrent reconcile of the same database cannot apply the
+    same changes twice.
+
+    :param bind: Path to a SQLite database, or an engine for one.
+    :param metadata: Metadata describing the wanted schema.
+    :param dry_run: Plan the changes and roll back instead of applying them.
+    :return: Dictionary with the DDL statements, the tables created, the
+             extra columns left alone and the elapsed seconds.
+    :raises SchemaReconcileError: If a change cannot be made in place;
+             nothing is applied.
+    """
+    start = time.perf_counter()
+    engine = bind
+    if not isinstance(bind, Engine):
+        engine = create_engine(f"sqlite:///{bind}")
+        configure_sqlite_transactions(engine)
+    try:
+        with engine.connect() as connection:
+            connection = connection.execution_options(sqlite_begin="IMMEDIATE")
+            with connection.begin() as transaction:
+                plan = plan_schema_changes(connection, metadata)
+                if plan.problems:
+                    raise SchemaReconcileError(plan.problems)
+                statements = plan.describe(connection)
+                for statement in plan.statements:
+                    connection.execute(text(statement))
+                if plan.tables:
+                    # create_all also fires the metadata's after_create hooks,
+                    # e.g. the change journal triggers and the test summaries,
+                    # which read the columns added above
+                    metadata.create_all(
+                        connection, tables=plan.tables, checkfirst=False
+                    )
+                if dry_run:
+                    transaction.rollback()
+    finally:
+        if engine is not bind:
+            engine.dispose()
+
+    result = {
+        "statements": statements,
+        "tables_created": [table.name for table in plan.tables],
+        "extra_columns": plan.extra_columns,
+        "seconds": time.perf_counter() - start,
+    }
+    logger.info(
+        f"Schema reconciled{' (dry run)' if dry_run else ''}: "
+        f"{len(statements)} change(s) in {result['seconds']:.3f}s"
+    )
+    return result
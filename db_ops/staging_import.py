@@ -0,0 +1,194 @@
+# db_ops/staging_import.py
+
+from typing import Dict, List
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from db_ops.import_pipeline import (
+    BulkOrderWriter,
+    insert_columns,
+    mapped_test_columns,
+    to_iso,
+)
+
+STAGE_ORDERS = "temp.import_stage_orders"
+STAGE_TESTS = "temp.import_stage_tests"
+
+# Staged order columns, as prepared by ImportProfile.prepare and add_row_hashes.
+# wip_id is filled in by the merge for orders whose WIP already exists.
+STAGE_ORDER_COLUMNS = [
+    "wip_number",
+    "coldhead_serial_number",
+    "displacer_serial_number",
+    "arrival_date",
+    "initial_open_date",
+    "natural_key",
+    "content_hash",
+]
+
+# The merge, in order. Each statement is a single set-based pass over the
+# staged chunk; their row counts give the import counts.
+MERGE_STATEMENTS = [
+    (
+        "unchanged",
+        f"DELETE FROM {STAGE_ORDERS} "
+        f"WHERE wip_number IN (SELECT wip_number FROM wips) "
+        f"AND content_hash = (SELECT h.content_hash FROM import_row_hashes h "
+        f"WHERE h.natural_key = {STAGE_ORDERS}.natural_key)",
+    ),
+    (
+        "updated",
+        f"UPDATE {STAGE_ORDERS} SET wip_id = w.wip_id "
+        f"FROM wips w WHERE w.wip_number = {STAGE_ORDERS}.wip_number",
+    ),
+    (
+        "coldheads",
+        f"INSERT INTO coldheads (serial_number) "
+        f"SELECT DISTINCT coldhead_serial_number FROM {STAGE_ORDERS} WHERE true "
+        f"ON CONFLICT (serial_number) DO NOTHING",
+    ),
+    (
+        # A displacer repeated in the chunk takes the first row's open date
+        "displacers",
+        f"INSERT INTO displacers (displacer_serial_number, initial_open_date) "
+        f"SELECT displacer_serial_number, initial_open_date FROM ("
+        f"SELECT displacer_serial_number, initial_open_date, MIN(rowid) "
+        f"FROM {STAGE_ORDERS} GROUP BY displacer_serial_number) WHERE true "
+        f"ON CONFLICT (displacer_serial_number) DO NOTHING",
+    ),
+    (
+        None,
+        f"UPDATE displacers SET initial_open_date = "
+        f"COALESCE(s.initial_open_date, displacers.initial_open_date) "
+        f"FROM {STAGE_ORDERS} s "
+        f"WHERE s.wip_id IS NOT NULL "
+        f"AND s.displacer_serial_number = displacers.displacer_serial_number",
+    ),
+    (
+        None,
+        f"UPDATE wips SET arrival_date = COALESCE(s.arrival_date, wips.arrival_date), "
+        f"coldhead_id = c.coldhead_id, displacer_id = d.displacer_id "
+        f"FROM {STAGE_ORDERS} s "
+        f"JOIN coldheads c ON c.serial_number = s.coldhead_serial_number "
+        f"JOIN displacers d ON d.displacer_serial_number = s.displacer_serial_number "
+        f"WHERE s.wip_id = wips.wip_id",
+    ),
+    (
+        "wips",
+        f"INSERT INTO wips (wip_number, coldhead_id, displacer_id, arrival_date) "
+        f"SELECT s.wip_number, c.coldhead_id, d.displacer_id, s.arrival_date "
+        f"FROM {STAGE_ORDERS} s "
+        f"JOIN coldheads c ON c.serial_number = s.coldhead_serial_number "
+        f"JOIN displacers d ON d.displacer_serial_number = s.displacer_serial_number "
+        f"WHERE s.wip_id IS NULL ORDER BY s.rowid",
+    ),
+    (
+        None,
+        f"INSERT INTO import_row_hashes (natural_key, content_hash) "
+        f"SELECT natural_key, content_hash FROM {STAGE_ORDERS} WHERE true "
+        f"ON CONFLICT (natural_key) DO UPDATE SET content_hash = excluded.content_hash",
+    ),
+]
+
+
+class StagingOrderWriter(BulkOrderWriter):
+    """
+    Writes prepared order frames by staging each chunk in temporary tables and
+    merging it into the database with set-based SQL.
+
+    Python only binds the raw rows (one executemany per table); resolving
+    coldheads and displacers, linking WIPs and tests, and skipping unchanged
+    rows all happen inside SQLite as INSERT ... SELECT and UPDATE ... FROM
+    statements. The result is the same as BulkOrderWriter's: new records are
+    created, existing ones only gain values (dates are never cleared) and the
+    columns the sheet does not carry are left alone.
+    """
+
+    def write_changed_chunk(
+        self, session: Session, orders: pd.DataFrame, tests: pd.DataFrame
+    ) -> Dict[str, int]:
+        """
+        Stages one chunk and merges it without committing.
+
+        :param session: SQLAlchemy session object.
+        :param orders: Chunk of the 'orders' frame, with the add_row_hashes columns.
+        :param tests: Rows of the 'tests' frame belonging to the chunk.
+        :return: Counts of records created and of orders updated or unchanged.
+        """
+        test_columns = mapped_test_columns(tests)
+        self._stage(session, orders, tests["wip_number"], test_columns)
+        connection = session.connection()
+
+        counts = {"coldheads": 0, "displacers": 0, "wips": 0, "tests": 0}
+        for key, sql in MERGE_STATEMENTS:
+            rowcount = connection.exec_driver_sql(sql).rowcount
+            if key is not None:
+                counts[key] = rowcount
+        counts["tests"] = self._merge_tests(session, list(test_columns))
+        return counts
+
+    @staticmethod
+    def _stage(
+        session: Session,
+        orders: pd.DataFrame,
+        test_wips: pd.Series,
+        test_columns: Dict[str, pd.Series],
+    ):
+        """
+        (Re)creates the staging tables on the session's connection and loads the
+        chunk into them. The tables are TEMP, so they live in the connection's
+        private temp database and never reach the database file.
+        """
+        connection = session.connection()
+        for table in (STAGE_ORDERS, STAGE_TESTS):
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {table}")
+        connection.exec_driver_sql(
+            f"CREATE TABLE {STAGE_ORDERS} ("
+            f"wip_number TEXT PRIMARY KEY, coldhead_serial_number TEXT, "
+            f"displacer_serial_number TEXT, arrival_date TEXT, "
+            f"initial_open_date TEXT, natural_key TEXT, content_hash INTEGER, "
+            f"wip_id INTEGER)"
+        )
+        connection.exec_driver_sql(
+            f"CREATE TABLE {STAGE_TESTS} "
+            f"(wip_number TEXT, {', '.join(test_columns)})"
+        )
+        staged = orders.assign(
+            arrival_date=to_iso(orders["arrival_date"]),
+            initial_open_date=to_iso(orders["initial_open_date"]),
+            content_hash=orders["content_hash"].astype(object),
+        )
+        insert_columns(
+            session,
+            STAGE_ORDERS,
+            {column: staged[column] for column in STAGE_ORDER_COLUMNS},
+        )
+        insert_columns(
+            session,
+            STAGE_TESTS,
+            {"wip_number": test_wips, **test_columns},
+        )
+
+    @staticmethod
+    def _merge_tests(session: Session, test_columns: List[str]) -> int:
+        """
+        Links the staged tests of the orders still staged to their WIPs and
+        inserts the ones the WIP does not have yet (by name); returns the number
+        inserted. Tests of WIPs that existed before the chunk are compared
+        against one materialized list of their (wip_id, name) pairs.
+        """
+        if not test_columns:
+            return 0
+        selected = ", ".join(f"t.{column}" for column in test_columns)
+        sql = (
+            f"INSERT INTO tests (wip_id, {', '.join(test_columns)}) "
+            f"SELECT w.wip_id, {selected} FROM {STAGE_TESTS} t "
+            f"JOIN {STAGE_ORDERS} s ON s.wip_number = t.wip_number "
+            f"JOIN wips w ON w.wip_number = t.wip_number "
+            f"WHERE s.wip_id IS NULL OR (w.wip_id, t.name) NOT IN ("
+            f"SELECT wip_id, name FROM tests WHERE wip_id IN "
+            f"(SELECT wip_id FROM {STAGE_ORDERS} WHERE wip_id IS NOT NULL)) "
+            f"ORDER BY t.rowid"
+        )
+        return session.connection().exec_driver_sql(sql).rowcount
@@ -0,0 +1,470 @@
+# db_ops/test_analytics.py
+
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from db_ops.change_log import ChangeJournal
+from logger import logger
+
+# Measurement columns of tests loaded for the reports.
+MEASUREMENTS = (
+    "first_stage_temp",
+    "second_stage_temp",
+    "first_stage_heaters",
+    "second_stage_heater",
+    "efficiency1",
+    "efficiency2",
+)
+
+# Report groupings: name -> (key array, table and columns labelling the keys).
+# Tests are linked to coldheads and displacers through their WIP; a test
+# without one, or without a station, is grouped under None. Part numbers are
+# not stored in the database yet.
+GROUP_KEYS = {
+    "coldhead": ("coldhead_id", ("coldheads", "coldhead_id", "serial_number")),
+    "displacer": (
+        "displacer_id",
+        ("displacers", "displacer_id", "displacer_serial_number"),
+    ),
+    "station": ("station", None),
+}
+
+DEFAULT_PERCENTILES = (10, 50, 90)
+
+# Above this many journal entries since the last load, the tests are reloaded
+# in one query rather than row by row.
+FULL_RELOAD_CHANGES = 50_000
+
+# Test ids per IN (...) lookup of changed rows.
+LOOKUP_CHUNK_SIZE = 5000
+
+
+def _numeric(column: str) -> str:
+    # Text left in a numeric column by a legacy import reads as NULL
+    return f"CASE WHEN typeof({column}) IN ('integer', 'real') THEN {column} END"
+
+
+# One row per test: its id, WIP and station, 1/0 for a Pass/Fail result (-1
+# while pending) and its measurements, every value numeric or NULL.
+TEST_COLUMNS = ("test_id", "wip_id", "station", "passed") + MEASUREMENTS
+TESTS_SQL = f"""
+    SELECT test_id, wip_id, {_numeric("station")},
+           CASE upper(pass_fail) WHEN 'PASS' THEN 1 WHEN 'FAIL' THEN 0 ELSE -1 END,
+           {", ".join(_numeric(name) for name in MEASUREMENTS)}
+    FROM tests
+"""
+
+TEST_DTYPE = np.dtype([(name, "f8") for name in TEST_COLUMNS])
+
+
+def fetch_arrays(db_session: Session, sql: str, params=()) -> Dict[str, np.ndarray]:
+    """
+    Runs a TESTS_SQL query into a float array per column of TEST_COLUMNS, NaN
+    where the value is NULL. Rows go from the driver's cursor straight into a
+    structured array, without a list of rows being built first.
+
+    :param db_session: SQLAlchemy session object.
+    :param sql: TESTS_SQL, optionally with a WHERE clause.
+    :param params: Parameters of the WHERE clause.
+    """
+    result = db_session.connection().exec_driver_sql(sql, params)
+    rows = np.fromiter(result.cursor, dtype=TEST_DTYPE, count=-1)
+    return {name: np.ascontiguousarray(rows[name]) for name in TEST_COLUMNS}
+
+
+def group_codes(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the distinct keys (NaN last) and the group number of each entry,
+    as the smallest unsigned type that holds it.
+    """
+    distinct, codes = np.unique(keys, return_inverse=True, equal_nan=True)
+    return distinct, codes.astype(np.min_scalar_type(max(len(distinct) - 1, 0)))
+
+
+def pairs(keys, values) -> np.ndarray:
+    """
+    Packs group keys and values, broadcast together, into complex numbers
+    key + value * 1j. NumPy orders complex numbers by real part, then by
+    imaginary part, so a sorted array of pairs holds each key's values as one
+    ascending run and searchsorted finds a (key, value) pair in it. A missing
+    key is stored as +inf, sorting last.
+    """
+    keys, values = np.broadcast_arrays(keys, values)
+    result = np.empty(keys.shape, dtype=np.complex128)
+    result.real = np.where(np.isnan(keys), np.inf, keys)
+    result.imag = values
+    return result
+
+
+def run_entries(keys: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Pairs of the entries that have a value, unsorted."""
+    has_value = ~np.isnan(values)
+    return pairs(keys[has_value], values[has_value])
+
+
+def patch_runs(runs: np.ndarray, taken: np.ndarray, added: np.ndarray) -> np.ndarray:
+    """
+    Removes the taken pairs from sorted runs and inserts the added ones in
+    their place, in time linear in the length of runs. Runs are left as they
+    are when both hold the same pairs.
+    """
+    taken = np.sort(taken)
+    added = np.sort(added)
+    if np.array_equal(taken, added):
+        return runs
+    # Equal pairs taken more than once come out of consecutive slots
+    slots = np.searchsorted(runs, taken)
+    slots += np.arange(len(taken)) - np.searchsorted(taken, taken)
+    runs = np.delete(runs, slots)
+    return np.insert(runs, np.searchsorted(runs, added), added)
+
+
+def run_counts(runs: np.ndarray, keys: np.ndarray, low: float, high: float):
+    """
+    Returns, per key, the position of its first value of at least low in runs
+    and the number of its values from low to high.
+    """
+    starts = np.searchsorted(runs, pairs(keys, low))
+    return starts, np.searchsorted(runs, pairs(keys, high), side="right") - starts
+
+
+def measurement_stats(
+    runs: np.ndarray, keys: np.ndarray, percentiles: Sequence[float]
+) -> Dict[str, np.ndarray]:
+    """
+    Count, mean, standard deviation and percentiles of a measurement per
+    group, every group computed at once. Percentiles are interpolated linearly
+    as numpy.percentile does.
+
+    Each group's values form an ascending run, so a percentile is a lookup at
+    an offset into the group's run and sums are taken run by run with
+    numpy.add.reduceat.
+
+    :param runs: Sorted pairs of the tests that have a value.
+    :param keys: Key of each group, as returned by FleetAnalytics.groups.
+    :param percentiles: Percentiles to compute, 0 to 100.
+    :return: Dictionary with the 'count', 'mean' and 'std' arrays, one entry
+             per group, and 'percentiles' of shape (groups, len(percentiles)),
+             NaN for groups without values.
+    """
+    starts, count = run_counts(runs, keys, -np.inf, np.inf)
+    ordered = np.ascontiguousarray(runs.imag)
+    has_values = count > 0
+    valid = count[has_values]
+    # Every value belongs to a group, so the runs of the groups with values
+    # follow one another and cover the array
+    starts = starts[has_values]
+    mean = np.full(len(keys), np.nan)
+    std = np.full(len(keys), np.nan)
+    if len(valid):
+        mean[has_values] = np.add.reduceat(ordered, starts) / valid
+        deviation = ordered - np.repeat(mean[has_values], valid)
+        std[has_values] = np.sqrt(
+            np.add.reduceat(deviation * deviation, starts) / valid
+        )
+
+    result = np.full((len(keys), len(percentiles)), np.nan)
+    for i, percentile in enumerate(percentiles):
+        position = (valid - 1) * (percentile / 100.0)
+        below = np.floor(position).astype(np.int64)
+        above = np.minimum(below + 1, valid - 1)
+        low = ordered[starts + below]
+        high = ordered[starts + above]
+        result[has_values, i] = low + (high - low) * (position - below)
+    return {"count": count, "mean": mean, "std": std, "percentiles": result}
+
+
+class FleetAnalytics:
+    def __init__(self, db_session: Session):
+        """
+        Grouped test statistics over the whole fleet, computed with NumPy.
+
+        Every test is loaded once, with a single query, into an array per
+        column, and its values are sorted into runs per group: for each
+        grouping and column, the sorted pairs of every test's group key and
+        value. Later refreshes read the change journal, reload only the tests
+        changed since and patch their pairs into the runs, so a report reads
+        the runs without sorting anything.
+
+        :param db_session: SQLAlchemy session object.
+        """
+        self.db_session = db_session
+        self.journal = ChangeJournal(db_session)
+        self.tests: Optional[Dict[str, np.ndarray]] = None
+        self.seq: Optional[int] = None
+        self.wip_links: Dict[str, np.ndarray] = {}
+        self.labels: Dict[str, Dict[int, str]] = {}
+        # (grouping, column) -> sorted pairs, kept in step with the arrays
+        self.runs: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def refresh(self) -> Dict[str, np.ndarray]:
+        """
+        Brings the arrays and runs up to date with the database and returns
+        the arrays: the TEST_COLUMNS of every test, plus the coldhead_id and
+        displacer_id of its WIP.
+        """
+        seq = self.journal.latest_seq()
+        if self.tests is not None and seq == self.seq:
+            return self.tests
+
+        removed = written = None
+        if self.tests is None or seq - self.seq > FULL_RELOAD_CHANGES:
+            self.tests = fetch_arrays(self.db_session, TESTS_SQL)
+            changed_tables: Iterable[str] = ("wips", "coldheads", "displacers")
+            logger.info(f"Loaded {len(self.tests['test_id'])} tests for analytics.")
+        else:
+            changes, seq = self.journal.changed_keys_since(self.seq)
+            if "tests" in changes:
+                removed, written = self._apply_test_changes(**changes["tests"])
+            else:
+                removed = {name: values[:0] for name, values in self.tests.items()}
+                written = np.empty(0, dtype=np.int64)
+            changed_tables = changes
+        self.seq = seq
+
+        for by, (_, label_source) in GROUP_KEYS.items():
+            if label_source is not None and label_source[0] in changed_tables:
+                table, key, label = label_source
+                self.labels[by] = dict(
+                    self.db_session.connection()
+                    .exec_driver_sql(f"SELECT {key}, {label} FROM {table}")
+                    .all()
+                )
+        # Every test is linked again when WIPs changed, else only those written
+        previous = {}
+        if "wips" in changed_tables:
+            self._load_wip_links()
+            previous = {name: self.tests.get(name) for name in self.wip_links}
+            self.tests.update(self._link_wips(self.tests["wip_id"]))
+        else:
+            links = self._link_wips(self.tests["wip_id"][written])
+            for name, values in links.items():
+                self.tests[name][written] = values
+
+        if removed is None:
+            self._build_runs()
+        else:
+            self._patch_runs(removed, written, previous)
+        return self.tests
+
+    def _apply_test_changes(
+        self, upserted: Set[int], deleted: Set[int]
+    ) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """
+        Writes the current values of changed tests over their rows, drops the
+        rows of deleted ones, moving the last rows into their place, and
+        appends new ones. Row order carries no meaning. WIP links of the rows
+        written are left for refresh to fill in.
+
+        :return: The rows overwritten or dropped, every column as it was, and
+                 the positions of the rows written.
+        """
+        stale = np.flatnonzero(np.isin(self.tests["test_id"], list(upserted | deleted)))
+        removed = {name: values[stale] for name, values in self.tests.items()}
+        parts = [{name: values[:0] for name, values in self.tests.items()}]
+        ids = sorted(upserted)
+        for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+            end = start + LOOKUP_CHUNK_SIZE
+            chunk = ids[start:end]
+            parts.append(
+                fetch_arrays(
+                    self.db_session,
+                    f"{TESTS_SQL} WHERE test_id IN ({', '.join('?' * len(chunk))})",
+                    tuple(chunk),
+                )
+            )
+        current = {
+            name: np.concatenate([part[name] for part in parts])
+            for name in TEST_COLUMNS
+        }
+
+        # Test ids are unique, so both sides sorted by id pair up row by row
+        exists = np.isin(removed["test_id"], current["test_id"])
+        new = ~np.isin(current["test_id"], removed["test_id"])
+        slots = stale[exists][np.argsort(removed["test_id"][exists])]
+        sources = np.flatnonzero(~new)[np.argsort(current["test_id"][~new])]
+        for name in TEST_COLUMNS:
+            self.tests[name][slots] = current[name][sources]
+
+        dropped = stale[~exists]
+        size = len(self.tests["test_id"]) - len(dropped)
+        holes = dropped[dropped < size]
+        tail = np.setdiff1d(np.arange(size, size + len(dropped)), dropped)
+        for name, values in self.tests.items():
+            values[holes] = values[tail]
+            self.tests[name] = values[:size]
+        moved = slots >= size
+        slots[moved] = holes[np.searchsorted(tail, slots[moved])]
+
+        added = np.flatnonzero(new)
+        if len(added):
+            for name, values in self.tests.items():
+                extra = current[name][added] if name in current else np.nan
+                self.tests[name] = np.concatenate(
+                    [values, np.broadcast_to(extra, len(added))]
+                )
+        return removed, np.concatenate([slots, np.arange(size, size + len(added))])
+
+    def _load_wip_links(self):
+        # Lookup arrays indexed by wip_id
+        links = np.array(
+            self.db_session.connection()
+            .exec_driver_sql("SELECT wip_id, coldhead_id, displacer_id FROM wips")
+            .all(),
+            dtype=float,
+        ).reshape(-1, 3)
+        size = int(links[:, 0].max()) + 1 if len(links) else 1
+        for column, name in ((1, "coldhead_id"), (2, "displacer_id")):
+            lookup = np.full(size, np.nan)
+            lookup[links[:, 0].astype(np.int64)] = links[:, column]
+            self.wip_links[name] = lookup
+
+    def _link_wips(self, wip_ids: np.ndarray) -> Dict[str, np.ndarray]:
+        # coldhead_id and displacer_id of each WIP, NaN for tests without one
+        linked = ~np.isnan(wip_ids) & (wip_ids < len(self.wip_links["coldhead_id"]))
+        positions = np.where(linked, wip_ids, 0).astype(np.int64)
+        return {
+            name: np.where(linked, lookup[positions], np.nan)
+            for name, lookup in self.wip_links.items()
+        }
+
+    def _build_runs(self):
+        # Sorting by value, then stably by group number, leaves each group's
+        # values contiguous and ascending; group numbers of up to 16 bits sort
+        # in linear time. 'passed' has a value for every test, so its runs
+        # hold each group's tests.
+        codes = {
+            by: group_codes(self.tests[key])[1] for by, (key, _) in GROUP_KEYS.items()
+        }
+        for name in ("passed",) + MEASUREMENTS:
+            values = self.tests[name]
+            present = np.argsort(values)[: np.count_nonzero(~np.isnan(values))]
+            for by, (key, _) in GROUP_KEYS.items():
+                order = present[np.argsort(codes[by][present], kind="stable")]
+                self.runs[by, name] = pairs(self.tests[key][order], values[order])
+
+    def _patch_runs(
+        self,
+        removed: Dict[str, np.ndarray],
+        written: np.ndarray,
+        previous: Dict[str, np.ndarray],
+    ):
+        # Rows overwritten or dropped leave the runs and rows written enter
+        # them. When WIPs changed, the other tests of a WIP moved to another
+        # part change groups too.
+        moved = {}
+        for name, before in previous.items():
+            after = self.tests[name]
+            changed = (before != after) & ~(np.isnan(before) & np.isnan(after))
+            changed[written] = False
+            moved[name] = np.flatnonzero(changed)
+        for (by, name), runs in self.runs.items():
+            key = GROUP_KEYS[by][0]
+            keys, values = self.tests[key], self.tests[name]
+            taken = run_entries(removed[key], removed[name])
+            rows = written
+            if key in moved:
+                rows = np.concatenate([moved[key], written])
+                taken = np.concatenate(
+                    [taken, run_entries(previous[key][moved[key]], values[moved[key]])]
+                )
+            added = run_entries(keys[rows], values[rows])
+            self.runs[by, name] = patch_runs(runs, taken, added)
+
+    def groups(self, by: str) -> Tuple[List, np.ndarray]:
+        """
+        Returns the labels of the groups of a grouping, and the key of each
+        group (+inf for tests without one), in the order of the runs.
+
+        :param by: Grouping, a key of GROUP_KEYS.
+        """
+        if by not in GROUP_KEYS:
+            raise ValueError(f"Unknown grouping '{by}'; use one of {list(GROUP_KEYS)}")
+        self.refresh()
+        keys = np.ascontiguousarray(self.runs[by, "passed"].real)
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))[: len(keys)]]
+        # Tests without a key are the last group, if any
+        known = keys[: np.searchsorted(keys, np.inf)].astype(np.int64).tolist()
+        names = self.labels.get(by, {})
+        labels = [names.get(key, key) for key in known]
+        return labels + [None] * (len(keys) - len(known)), keys
+
+    def group_stats(
+        self,
+        by: str,
+        measurements: Iterable[str] = MEASUREMENTS,
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    ) -> pd.DataFrame:
+        """
+        Statistics of the tests grouped by coldhead, displacer or station.
+
+        :param by: Grouping, a key of GROUP_KEYS.
+        :param measurements: Measurements to summarize, from MEASUREMENTS.
+        :param percentiles: Percentiles to report per measurement.
+        :return: Frame indexed by group label with the number of tests, passes
+                 and failures, the pass rate over decided tests and, per
+                 measurement, its count, mean, standard deviation, minimum,
+                 percentiles and maximum.
+        """
+        labels, keys = self.groups(by)
+        results = self.runs[by, "passed"]
+        columns = {
+            "tests": run_counts(results, keys, -np.inf, np.inf)[1],
+            "passed": run_counts(results, keys, 1, 1)[1],
+            "failed": run_counts(results, keys, 0, 0)[1],
+        }
+        with np.errstate(invalid="ignore", divide="ignore"):
+            columns["pass_rate"] = columns["passed"] / (
+                columns["passed"] + columns["failed"]
+            )
+        for name in measurements:
+            stats = measurement_stats(self.runs[by, name], keys, (0, *percentiles, 100))
+            columns[f"{name}_count"] = stats["count"]
+            columns[f"{name}_mean"] = stats["mean"]
+            columns[f"{name}_std"] = stats["std"]
+            columns[f"{name}_min"] = stats["percentiles"][:, 0]
+            for i, percentile in enumerate(percentiles, start=1):
+                columns[f"{name}_p{percentile:g}"] = stats["percentiles"][:, i]
+            columns[f"{name}_max"] = stats["percentiles"][:, -1]
+
+        frame = pd.DataFrame(columns, index=pd.Index(labels, dtype=object, name=by))
+        for name in ("tests", "passed", "failed"):
+            frame[name] = frame[name].astype(np.int64)
+        return frame
+
+    def distribution(
+        self, by: str, measurement: str, bins: Sequence[float]
+    ) -> pd.DataFrame:
+        """
+        Histogram of a measurement per group.
+
+        :param by: Grouping, a key of GROUP_KEYS.
+        :param measurement: Measurement, from MEASUREMENTS.
+        :param bins: Increasing bin edges; values outside them are not counted.
+        :return: Frame indexed by group label with one column of counts per
+                 bin, named by its lower edge.
+        """
+        labels, keys = self.groups(by)
+        edges = np.asarray(bins, dtype=float)
+        runs = self.runs[by, measurement]
+        # Where each edge falls in each group's run; the last bin includes its
+        # upper edge, as in numpy.histogram
+        bounds = np.searchsorted(runs, pairs(keys[:, None], edges))
+        bounds[:, -1] = np.searchsorted(runs, pairs(keys, edges[-1]), side="right")
+        counts = np.diff(bounds, axis=1)
+        return pd.DataFrame(
+            counts,
+            index=pd.Index(labels, dtype=object, name=by),
+            columns=[f"{edge:g}" for edge in edges[:-1]],
+        )
+
+    def fleet_report(self, **kwargs) -> Dict[str, pd.DataFrame]:
+        """
+        Returns group_stats for every grouping of GROUP_KEYS.
+
+        :param kwargs: Passed on to group_stats.
+        """
+        return {by: self.group_stats(by, **kwargs) for by in GROUP_KEYS}
@@ -0,0 +1,257 @@
+# db_ops/test_summary.py
+
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+
+from db_ops.models import Base, ColdheadTestSummary, DisplacerTestSummary
+from logger import logger
+
+# Summary table -> the wips column its rows are keyed by
+SUMMARY_TABLES = {
+    "coldhead_test_summary": "coldhead_id",
+    "displacer_test_summary": "displacer_id",
+}
+
+SUMMARY_COLUMNS = (
+    "attempts",
+    "fail_count",
+    "pass_count",
+    "last_test_id",
+    "last_test_date",
+    "last_result",
+)
+
+# A part's last test is its latest by date, tests without one counting as the
+# earliest, and by id among tests on the same day
+LAST_TEST_ORDER = "coalesce(t.test_date, '') DESC, t.test_id DESC"
+
+
+def _result_is(column: str, result: str) -> str:
+    """
+    SQL that is 1 if the pass_fail value in column is result, whatever its
+    case, and 0 otherwise, a NULL one included.
+    """
+    return f"(upper({column}) IS '{result.upper()}')"
+
+
+def _recompute_sql(table: str, key: str, value: Optional[str] = None) -> List[str]:
+    """
+    Statements that rebuild summary rows from the tests. A part left without
+    tests loses its row.
+
+    :param table: Summary table.
+    :param key: wips column the summary is keyed by.
+    :param value: SQL expression for the id of the one part to rebuild (nothing
+                  is done if it is NULL); every part if None.
+    """
+    part = f"w.{key} = {value}" if value is not None else f"w.{key} IS NOT NULL"
+    row = f" WHERE {key} = {value}" if value is not None else ""
+    return [
+        f"DELETE FROM {table}{row}",
+        f"INSERT INTO {table} ({key}, attempts, fail_count, pass_count) "
+        f"SELECT w.{key}, count(*), total({_result_is('t.pass_fail', 'Fail')}), "
+        f"total({_result_is('t.pass_fail', 'Pass')}) "
+        f"FROM wips AS w JOIN tests AS t ON t.wip_id = w.wip_id "
+        f"WHERE {part} GROUP BY w.{key}",
+        f"UPDATE {table} SET (last_test_id, last_test_date, last_result) = ("
+        f"SELECT t.test_id, t.test_date, t.pass_fail "
+        f"FROM wips AS w JOIN tests AS t ON t.wip_id = w.wip_id "
+        f"WHERE w.{key} = {table}.{key} ORDER BY {LAST_TEST_ORDER} LIMIT 1)"
+        f"{row}",
+    ]
+
+
+def _insert_sql(table: str, key: str) -> str:
+    """
+    Statement that counts a new test into its part's summary row in constant
+    time.
+    """
+    newer = (
+        f"(coalesce(excluded.last_test_date, ''), excluded.last_test_id) > "
+        f"(coalesce({table}.last_test_date, ''), {table}.last_test_id)"
+    )
+    latest = ", ".join(
+        f"{column} = CASE WHEN {newer} THEN excluded.{column} ELSE {table}.{column} END"
+        for column in ("last_test_id", "last_test_date", "last_result")
+    )
+    # The SELECT needs its WHERE for SQLite to parse the upsert clause
+    return (
+        f"INSERT INTO {table} ({key}, {', '.join(SUMMARY_COLUMNS)}) "
+        f"SELECT w.{key}, 1, {_result_is('NEW.pass_fail', 'Fail')}, "
+        f"{_result_is('NEW.pass_fail', 'Pass')}, "
+        f"NEW.test_id, NEW.test_date, NEW.pass_fail "
+        f"FROM wips AS w WHERE w.wip_id = NEW.wip_id "
+        f"ON CONFLICT ({key}) DO UPDATE SET "
+        f"attempts = {table}.attempts + 1, "
+        f"fail_count = {table}.fail_count + excluded.fail_count, "
+        f"pass_count = {table}.pass_count + excluded.pass_count, "
+        f"{latest}"
+    )
+
+
+def _update_sql(table: str, key: str, value: str) -> List[str]:
+    """
+    Statements that apply a change of a test's result or date, the test staying
+    with its WIP, to its part's summary row. Only a new date can change which
+    test is the part's last.
+    """
+    counts = ", ".join(
+        f"{column} = {column} + {_result_is('NEW.pass_fail', result)} "
+        f"- {_result_is('OLD.pass_fail', result)}"
+        for column, result in (("fail_count", "Fail"), ("pass_count", "Pass"))
+    )
+    return [
+        f"UPDATE {table} SET {counts}, "
+        f"last_result = CASE WHEN last_test_id = NEW.test_id "
+        f"THEN NEW.pass_fail ELSE last_result END "
+        f"WHERE {key} = {value}",
+        _recompute_sql(table, key, value)[2]
+        + " AND NEW.test_date IS NOT OLD.test_date",
+    ]
+
+
+def _trigger(name: str, event_sql: str, statements: List[str]) -> str:
+    body = "".join(f"{statement}; " for statement in statements)
+    return f"CREATE TRIGGER IF NOT EXISTS {name} {event_sql} BEGIN {body}END"
+
+
+def summary_trigger_ddl() -> List[str]:
+    """
+    Returns the CREATE TRIGGER statements that keep the per-coldhead and
+    per-displacer test summaries current.
+
+    An inserted test is counted into its part's row with one upsert, and a new
+    result or date of a test adjusts the row in place. A test moved to another
+    WIP, a deleted test, and a WIP moved to another coldhead or displacer
+    rebuild the rows of the parts involved from their tests, which the wips
+    and tests indexes keep to a few rows each.
+    """
+    part = "(SELECT {key} FROM wips WHERE wip_id = {row}.wip_id)"
+    statements = []
+    for table, key in SUMMARY_TABLES.items():
+        old_part = part.format(key=key, row="OLD")
+        new_part = part.format(key=key, row="NEW")
+        statements.append(
+            _trigger(
+                f"trg_tests_insert_{table}",
+                "AFTER INSERT ON tests WHEN NEW.wip_id IS NOT NULL",
+                [_insert_sql(table, key)],
+            )
+        )
+        statements.append(
+            _trigger(
+                f"trg_tests_update_{table}",
+                "AFTER UPDATE OF test_date, pass_fail ON tests "
+                "WHEN NEW.wip_id IS OLD.wip_id",
+                _update_sql(table, key, new_part),
+            )
+        )
+        statements.append(
+            _trigger(
+                f"trg_tests_move_{table}",
+                "AFTER UPDATE OF wip_id ON tests WHEN NEW.wip_id IS NOT OLD.wip_id",
+                _recompute_sql(table, key, old_part)
+                + _recompute_sql(table, key, new_part),
+            )
+        )
+        statements.append(
+            _trigger(
+                f"trg_tests_delete_{table}",
+                "AFTER DELETE ON tests WHEN OLD.wip_id IS NOT NULL",
+                _recompute_sql(table, key, old_part),
+            )
+        )
+        statements.append(
+            _trigger(
+                f"trg_wips_update_{table}",
+                f"AFTER UPDATE OF {key} ON wips WHEN NEW.{key} IS NOT OLD.{key}",
+                _recompute_sql(table, key, f"OLD.{key}")
+                + _recompute_sql(table, key, f"NEW.{key}"),
+            )
+        )
+        statements.append(
+            _trigger(
+                f"trg_wips_delete_{table}",
+                "AFTER DELETE ON wips",
+                _recompute_sql(table, key, f"OLD.{key}"),
+            )
+        )
+    return statements
+
+
+def rebuild_summaries(connection):
+    """
+    Recomputes both summary tables from every test, e.g. after the triggers
+    were missing while tests were loaded.
+
+    :param connection: SQLAlchemy connection to a database with the summary tables.
+    """
+    for table, key in SUMMARY_TABLES.items():
+        for statement in _recompute_sql(table, key):
+            connection.execute(text(statement))
+    logger.info("Test summaries rebuilt.")
+
+
+def install_summary_triggers(connection):
+    """
+    Creates the test summary triggers if they do not exist.
+
+    :param connection: SQLAlchemy connection to a database with the summary tables.
+    """
+    for statement in summary_trigger_ddl():
+        connection.execute(text(statement))
+    logger.info("Test summary triggers installed.")
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_triggers_after_create(target, connection, **kw):
+    tables = {table.name for table in kw.get("tables") or target.sorted_tables}
+    if connection.dialect.name == "sqlite" and set(SUMMARY_TABLES) <= tables:
+        install_summary_triggers(connection)
+        # Tables added to an existing database start from its tests
+        rebuild_summaries(connection)
+
+
+class PartSummaries:
+    def __init__(self, db_session: Session):
+        """
+        Initialize PartSummaries with a SQLAlchemy session.
+
+        :param db_session: SQLAlchemy session object.
+        """
+        self.db_session = db_session
+
+    @staticmethod
+    def _as_dict(row) -> dict:
+        return {column: getattr(row, column) for column in SUMMARY_COLUMNS}
+
+    def _read(self, model, key, ids: Optional[Iterable[int]]) -> Dict[int, dict]:
+        query = select(model)
+        if ids is not None:
+            query = query.where(key.in_(list(ids)))
+        return {
+            getattr(row, key.key): self._as_dict(row)
+            for row in self.db_session.execute(query).scalars()
+        }
+
+    def for_coldheads(self, ids: Optional[Iterable[int]] = None) -> Dict[int, dict]:
+        """
+        Returns the test summary of each coldhead with tests.
+
+        :param ids: Optional coldhead ids to restrict the result to.
+        :return: {coldhead_id: {attempts, fail_count, pass_count, last_test_id,
+                 last_test_date, last_result}}
+        """
+        return self._read(ColdheadTestSummary, ColdheadTestSummary.coldhead_id, ids)
+
+    def for_displacers(self, ids: Optional[Iterable[int]] = None) -> Dict[int, dict]:
+        """
+        Returns the test summary of each displacer with tests.
+
+        :param ids: Optional displacer ids to restrict the result to.
+        :return: {displacer_id: {attempts, fail_count, pass_count, last_test_id,
+                 last_test_date, last_result}}
+        """
+        return self._read(DisplacerTestSummary, DisplacerTestSummary.displacer_id, ids)
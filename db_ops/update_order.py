@@ -1,17 +1,112 @@
 # db_ops/update_order.py
 
+import datetime
+from typing import Dict, List, Optional
+
 from sqlalchemy.orm import Session
 
 from db_ops.error_handler import InvalidDataError
-from db_ops.models import WIP, Coldhead, Test
+from db_ops.models import WIP, Coldhead, Displacer, Test
+from db_ops.write_coordination import run_write_unit
 from logger import logger
 
+# Editable WIP fields, mapped to the WIP attribute they are written to.
+WIP_FIELDS = {
+    "coldhead_id": "coldhead_id",
+    "arrival_date": "arrival_date",
+    "teardown_date": "teardown_date",
+    "wip_status": "status",
+}
+
+# Editable Test fields.
+TEST_FIELDS = (
+    "pass_fail",
+    "notes",
+    "mode",
+    "turns",
+    "first_stage_heaters",
+    "second_stage_heater",
+    "first_stage_temp",
+    "second_stage_temp",
+    "efficiency1",
+    "efficiency2",
+    "test_attempt",
+    "test_date",
+)
+
+# Fields stored in Date columns; the detail window edits them as text.
+DATE_FIELDS = ("arrival_date", "teardown_date", "test_date")
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def parse_date(value, field: str) -> Optional[datetime.date]:
+    """
+    Converts an edited date to datetime.date. Blanks and the "N/A" and "None"
+    placeholders mean no date.
+
+    :param value: Date, or its text in YYYY-MM-DD format.
+    :param field: Name of the field, for the error message.
+    :raises InvalidDataError: If the text is not a YYYY-MM-DD date.
+    """
+    if value is None or isinstance(value, datetime.date):
+        return value
+    text = str(value).strip()
+    if text in ("", "N/A", "None"):
+        return None
+    try:
+        return datetime.datetime.strptime(text, DATE_FORMAT).date()
+    except ValueError:
+        raise InvalidDataError(
+            f"{field.replace('_', ' ').title()} must be in YYYY-MM-DD format, "
+            f"not '{text}'."
+        ) from None
+
 
 class UpdateOrder:
     def __init__(self, db_session: Session):
         self.db_session = db_session
 
-    def update_wip(self, wip_data: dict):
+    @staticmethod
+    def with_dates(data: Optional[dict]) -> Optional[dict]:
+        """
+        Returns a copy of data with its DATE_FIELDS converted by parse_date, so
+        that text and date values of the same day compare equal.
+        """
+        if data is None:
+            return None
+        return {
+            key: parse_date(value, key) if key in DATE_FIELDS else value
+            for key, value in data.items()
+        }
+
+    @staticmethod
+    def changed_fields(original: Optional[dict], edited: dict) -> dict:
+        """
+        Returns the entries of edited that differ from the originally loaded snapshot.
+
+        :param original: Snapshot of the values as loaded, or None to treat every
+                         field as changed.
+        :param edited: Values after editing.
+        :return: Dictionary of changed fields only.
+        """
+        if original is None:
+            return dict(edited)
+        return {
+            key: value
+            for key, value in edited.items()
+            if key not in original or original[key] != value
+        }
+
+    def update_wip(
+        self, wip_data: dict, original: Optional[dict] = None, commit: bool = True
+    ):
+        """
+        Updates a WIP, writing only the fields that differ from the original snapshot.
+
+        :param wip_data: Dictionary of WIP data; must include 'wip_number'.
+        :param original: Optional snapshot of the WIP data as originally loaded.
+        :param commit: Commit the change; pass False to let the caller batch saves.
+        """
         try:
             wip = (
                 self.db_session.query(WIP)
@@ -23,46 +118,75 @@ class UpdateOrder:
                     f"WIP with number '{wip_data['wip_number']}' does not exist."
                 )
 
+            changes = self.changed_fields(
+                self.with_dates(original), self.with_dates(wip_data)
+            )
+            changes.pop("wip_number", None)
+            if not changes:
+                logger.debug(
+                    f"WIP '{wip_data['wip_number']}' unchanged; skipping update."
+                )
+                return
+
             # Update fields
-            wip.coldhead_id = wip_data["coldhead_id"]
-            wip.displacer_serial_number = wip_data["displacer_serial_number"]
-            wip.arrival_date = wip_data["arrival_date"]
-            wip.teardown_date = wip_data["teardown_date"]
-            wip.wip_status = wip_data["wip_status"]
-            # Update other fields as necessary
+            for field, attribute in WIP_FIELDS.items():
+                if field in changes:
+                    setattr(wip, attribute, changes[field])
 
             # Handle Coldhead Serial Number
-            if (
-                "coldhead_serial_number" in wip_data
-                and wip_data["coldhead_serial_number"]
-            ):
+            if changes.get("coldhead_serial_number"):
                 coldhead = (
                     self.db_session.query(Coldhead)
+                    .filter_by(serial_number=changes["coldhead_serial_number"])
+                    .first()
+                )
+                if not coldhead:
+                    # Create a new Coldhead if it doesn't exist
+                    coldhead = Coldhead(serial_number=changes["coldhead_serial_number"])
+                    self.db_session.add(coldhead)
+                    self.db_session.flush()
+                wip.coldhead_id = coldhead.coldhead_id
+
+            # Handle Displacer Serial Number
+            if changes.get("displacer_serial_number"):
+                displacer = (
+                    self.db_session.query(Displacer)
                     .filter_by(
-                        coldhead_serial_number=wip_data["coldhead_serial_number"]
+                        displacer_serial_number=changes["displacer_serial_number"]
                     )
                     .first()
                 )
-                if coldhead:
-                    wip.coldhead_id = coldhead.coldhead_id
-                else:
-                    # Create a new Coldhead if it doesn't exist
-                    new_coldhead = Coldhead(
-                        coldhead_serial_number=wip_data["coldhead_serial_number"]
+                if not displacer:
+                    displacer = Displacer(
+                        displacer_serial_number=changes["displacer_serial_number"]
                     )
-                    self.db_session.add(new_coldhead)
-                    self.db_session.commit()
-                    wip.coldhead_id = new_coldhead.coldhead_id
+                    self.db_session.add(displacer)
+                    self.db_session.flush()
+                wip.displacer_id = displacer.displacer_id
 
-            self.db_session.commit()
-            logger.info(f"WIP '{wip_data['wip_number']}' updated successfully.")
+            if commit:
+                self.db_session.commit()
+            logger.info(
+                f"WIP '{wip_data['wip_number']}' updated fields: {sorted(changes)}"
+            )
         except Exception as e:
+            if commit:
+                self.db_session.rollback()
             logger.exception(
                 f"Error updating WIP '{wip_data.get('wip_number', 'N/A')}': {e}"
             )
             raise
 
-    def update_test(self, test_data: dict):
+    def update_test(
+        self, test_data: dict, original: Optional[dict] = None, commit: bool = True
+    ):
+        """
+        Updates a Test, writing only the fields that differ from the original snapshot.
+
+        :param test_data: Dictionary of Test data; must include 'test_id'.
+        :param original: Optional snapshot of the Test data as originally loaded.
+        :param commit: Commit the change; pass False to let the caller batch saves.
+        """
         try:
             test = (
                 self.db_session.query(Test)
@@ -74,25 +198,84 @@ class UpdateOrder:
                     f"Test with ID '{test_data['test_id']}' does not exist."
                 )
 
+            changes = {
+                field: value
+                for field, value in self.changed_fields(
+                    self.with_dates(original), self.with_dates(test_data)
+                ).items()
+                if field in TEST_FIELDS
+            }
+            if not changes:
+                logger.debug(
+                    f"Test '{test_data['test_id']}' unchanged; skipping update."
+                )
+                return
+
             # Update fields
-            test.pass_fail = test_data["pass_fail"]
-            test.notes = test_data["notes"]
-            test.mode = test_data["mode"]
-            test.turns = test_data["turns"]
-            test.first_stage_heaters = test_data["first_stage_heaters"]
-            test.second_stage_heater = test_data["second_stage_heater"]
-            test.first_stage_temp = test_data["first_stage_temp"]
-            test.second_stage_temp = test_data["second_stage_temp"]
-            test.efficiency1 = test_data["efficiency1"]
-            test.efficiency2 = test_data["efficiency2"]
-            test.test_attempt = test_data["test_attempt"]
-            test.test_date = test_data["test_date"]
-            # Update other fields as necessary
-
-            self.db_session.commit()
-            logger.info(f"Test '{test_data['test_id']}' updated successfully.")
+            for field, value in changes.items():
+                setattr(test, field, value)
+
+            if commit:
+                self.db_session.commit()
+            logger.info(
+                f"Test '{test_data['test_id']}' updated fields: {sorted(changes)}"
+            )
         except Exception as e:
+            if commit:
+                self.db_session.rollback()
             logger.exception(
                 f"Error updating Test '{test_data.get('test_id', 'N/A')}': {e}"
             )
             raise
+
+    def apply_changes(
+        self,
+        wip_data: Optional[dict] = None,
+        test_data_list: Optional[List[dict]] = None,
+        original_wip: Optional[dict] = None,
+        original_tests: Optional[Dict[int, dict]] = None,
+    ):
+        """
+        Applies changes to a WIP and its tests without committing.
+
+        :param wip_data: Optional dictionary of edited WIP data.
+        :param test_data_list: Optional list of dictionaries of edited Test data.
+        :param original_wip: Optional snapshot of the WIP data as originally loaded.
+        :param original_tests: Optional snapshots of the Test data keyed by test_id.
+        """
+        original_tests = original_tests or {}
+        if wip_data:
+            self.update_wip(wip_data, original=original_wip, commit=False)
+        for test_data in test_data_list or []:
+            self.update_test(
+                test_data,
+                original=original_tests.get(test_data["test_id"]),
+                commit=False,
+            )
+
+    def save_changes(
+        self,
+        wip_data: Optional[dict] = None,
+        test_data_list: Optional[List[dict]] = None,
+        original_wip: Optional[dict] = None,
+        original_tests: Optional[Dict[int, dict]] = None,
+    ):
+        """
+        Saves a WIP and its tests in a single write transaction, retried as a
+        whole if another writer holds the database lock.
+
+        :param wip_data: Optional dictionary of edited WIP data.
+        :param test_data_list: Optional list of dictionaries of edited Test data.
+        :param original_wip: Optional snapshot of the WIP data as originally loaded.
+        :param original_tests: Optional snapshots of the Test data keyed by test_id.
+        """
+        try:
+            run_write_unit(
+                self.db_session,
+                lambda session: self.apply_changes(
+                    wip_data, test_data_list, original_wip, original_tests
+                ),
+            )
+        except Exception as e:
+            logger.error(f"Save rolled back: {e}")
+            raise
@@ -0,0 +1,127 @@
+# db_ops/write_coordination.py
+
+import random
+import sqlite3
+import time
+from typing import Callable, Optional
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from db_ops.error_handler import DatabaseError
+from logger import logger
+
+MAX_WRITE_ATTEMPTS = 8
+BASE_BACKOFF_SECONDS = 0.05
+MAX_BACKOFF_SECONDS = 2.0
+
+
+def is_busy_error(error: BaseException) -> bool:
+    """
+    Returns True if the error is SQLite reporting a locked or busy database.
+
+    :param error: Exception raised by sqlite3 or SQLAlchemy.
+    """
+    if not isinstance(error, (sqlite3.OperationalError, OperationalError)):
+        return False
+    message = str(getattr(error, "orig", error)).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def backoff_delay(
+    attempt: int,
+    base_delay: float = BASE_BACKOFF_SECONDS,
+    max_delay: float = MAX_BACKOFF_SECONDS,
+) -> float:
+    """
+    Returns a full-jitter exponential backoff delay for the given attempt number.
+
+    :param attempt: Zero-based number of the attempt that just failed.
+    :param base_delay: Delay ceiling for the first retry, in seconds.
+    :param max_delay: Upper bound on the delay ceiling, in seconds.
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def retry_on_busy(
+    work: Callable,
+    attempts: int = MAX_WRITE_ATTEMPTS,
+    base_delay: float = BASE_BACKOFF_SECONDS,
+    max_delay: float = MAX_BACKOFF_SECONDS,
+    on_retry: Optional[Callable[[int, BaseException], None]] = None,
+):
+    """
+    Calls work() and retries it with jittered exponential backoff while the
+    database is locked. Any other error is raised immediately.
+
+    work() must be a whole unit of work that leaves nothing behind when it
+    fails, i.e. it rolls back its own transaction before raising.
+
+    :param work: Callable performing the unit of work.
+    :param attempts: Maximum number of attempts.
+    :param base_delay: Delay ceiling for the first retry, in seconds.
+    :param max_delay: Upper bound on the delay ceiling, in seconds.
+    :param on_retry: Optional callback receiving the attempt number and error.
+    :return: Whatever work() returns.
+    """
+    for attempt in range(attempts):
+        try:
+            return work()
+        except Exception as e:
+            if not is_busy_error(e) or attempt == attempts - 1:
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            logger.warning(
+                f"Database locked (attempt {attempt + 1}/{attempts}); "
+                f"retrying in {delay:.3f}s"
+            )
+            if on_retry:
+                on_retry(attempt, e)
+            time.sleep(delay)
+
+
+def run_write_unit(
+    session: Session,
+    work: Callable[[Session], object],
+    attempts: int = MAX_WRITE_ATTEMPTS,
+    base_delay: float = BASE_BACKOFF_SECONDS,
+    max_delay: float = MAX_BACKOFF_SECONDS,
+    on_retry: Optional[Callable[[int, BaseException], None]] = None,
+):
+    """
+    Runs work(session) in a BEGIN IMMEDIATE transaction and commits it, retrying
+    the whole unit when another writer holds the lock.
+
+    A read transaction already open on the session (autobegun by earlier
+    queries) is committed first, so the unit starts on a fresh BEGIN IMMEDIATE.
+    The engine must be set up with db_ops.database.configure_sqlite_transactions
+    for that to take effect. An open transaction with pending changes raises
+    DatabaseError instead of being committed along with the unit.
+
+    :param session: SQLAlchemy session object.
+    :param work: Callable receiving the session; must not commit.
+    :param attempts: Maximum number of attempts.
+    :param base_delay: Delay ceiling for the first retry, in seconds.
+    :param max_delay: Upper bound on the delay ceiling, in seconds.
+    :param on_retry: Optional callback receiving the attempt number and error.
+    :return: Whatever work(session) returns.
+    """
+    if session.in_transaction():
+        if session.new or session.dirty or session.deleted:
+            raise DatabaseError(
+                "The session has uncommitted changes; commit or roll them back "
+                "before running a write unit."
+            )
+        session.commit()
+
+    def attempt():
+        try:
+            session.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+            result = work(session)
+            session.commit()
+            return result
+        except Exception:
+            session.rollback()
+            raise
+
+    return retry_on_busy(attempt, attempts, base_delay, max_delay, on_retry)
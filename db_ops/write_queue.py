@@ -0,0 +1,196 @@
+# db_ops/write_queue.py
+
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from db_ops.write_coordination import is_busy_error, run_write_unit
+from logger import logger
+
+# Most commands coalesced into one transaction, and how long the writer waits
+# for more commands to join a batch once the first one arrives.
+MAX_BATCH = 50
+LINGER_SECONDS = 0.02
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Single background writer for GUI saves.
+
+    Windows submit mutation commands; the writer thread runs them against its
+    own session, grouping whatever is queued into one write transaction with a
+    savepoint per command. Success and failure callbacks are handed back to the
+    Tk thread through deliver_callbacks, so the UI never blocks on the database.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        max_batch: int = MAX_BATCH,
+        linger: float = LINGER_SECONDS,
+    ):
+        """
+        Initialize the queue and start the writer thread.
+
+        :param session_factory: Factory for the writer thread's own session.
+        :param max_batch: Maximum number of commands per transaction.
+        :param linger: Seconds to wait for more commands before writing a batch.
+        """
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.linger = linger
+        self._commands = queue.Queue()
+        self._completed = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="WriteBehindQueue", daemon=True
+        )
+        self._thread.start()
+        logger.info("WriteBehindQueue writer thread started.")
+
+    def submit(
+        self,
+        work: Callable[[Session], object],
+        on_success: Optional[Callable[[object], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        """
+        Queue a mutation command.
+
+        work runs on the writer thread with the writer's session and must not
+        commit. It should return plain values (ids, numbers), not ORM objects,
+        since the result is handed to another thread.
+
+        :param work: Callable receiving the writer session.
+        :param on_success: Called with work's return value after commit.
+        :param on_error: Called with the exception if the command failed.
+        """
+        self._commands.put((work, on_success, on_error))
+
+    def deliver_callbacks(self):
+        """
+        Run the callbacks of completed commands on the calling thread.
+        """
+        while True:
+            try:
+                callback, value = self._completed.get_nowait()
+            except queue.Empty:
+                return
+            if callback is None:
+                continue
+            try:
+                callback(value)
+            except Exception as e:
+                logger.exception(f"Error in write callback: {e}")
+
+    def attach(self, widget, interval_ms: int = 50):
+        """
+        Deliver callbacks periodically on the Tk thread that owns widget.
+
+        :param widget: Any Tk widget; its after() loop drives delivery.
+        :param interval_ms: Polling interval in milliseconds.
+        """
+
+        def pump():
+            self.deliver_callbacks()
+            if self._thread.is_alive() or not self._completed.empty():
+                widget.after(interval_ms, pump)
+
+        widget.after(interval_ms, pump)
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Stop the writer after the commands already queued have been written.
+
+        :param timeout: Seconds to wait for the writer thread to finish.
+        """
+        self._commands.put(_STOP)
+        self._thread.join(timeout)
+        logger.info("WriteBehindQueue writer thread stopped.")
+
+    def _run(self):
+        session = self.session_factory()
+        stopping = False
+        try:
+            while not stopping:
+                command = self._commands.get()
+                if command is _STOP:
+                    break
+                batch = [command]
+                deadline = time.monotonic() + self.linger
+                while len(batch) < self.max_batch:
+                    try:
+                        command = self._commands.get(
+                            timeout=max(0.0, deadline - time.monotonic())
+                        )
+                    except queue.Empty:
+                        break
+                    if command is _STOP:
+                        stopping = True
+                        break
+                    batch.append(command)
+                self._write_batch(session, batch)
+        finally:
+            session.close()
+
+    def _write_batch(self, session: Session, batch: list):
+        """
+        Write a batch of commands in one transaction, one savepoint per command.
+
+        :param session: The writer thread's session.
+        :param batch: List of (work, on_success, on_error) commands.
+        """
+        outcomes = []
+
+        def write(write_session: Session):
+            outcomes.clear()
+            for work, on_success, on_error in batch:
+                try:
+                    with write_session.begin_nested():
+                        result = work(write_session)
+                    outcomes.append((on_success, result))
+                except Exception as e:
+                    if is_busy_error(e):
+                        raise  # Lost the lock; retry the whole batch
+                    logger.error(f"Queued write failed: {e}")
+                    outcomes.append((on_error, e))
+
+        try:
+            run_write_unit(session, write)
+            logger.debug(f"Wrote batch of {len(batch)} queued command(s).")
+        except Exception as e:
+            logger.exception(f"Queued write batch failed: {e}")
+            outcomes = [(on_error, e) for _, _, on_error in batch]
+
+        for outcome in outcomes:
+            self._completed.put(outcome)
+
+
+class InlineWriter:
+    """
+    Synchronous stand-in for WriteBehindQueue with the same submit() interface,
+    used when a window is opened without a background writer.
+    """
+
+    def __init__(self, db_session: Session):
+        self.db_session = db_session
+
+    def submit(
+        self,
+        work: Callable[[Session], object],
+        on_success: Optional[Callable[[object], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        try:
+            result = run_write_unit(self.db_session, work)
+        except Exception as e:
+            logger.error(f"Write failed: {e}")
+            if on_error:
+                on_error(e)
+            return
+        if on_success:
+            on_success(result)
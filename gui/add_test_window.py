@@ -3,24 +3,33 @@
 import tkinter as tk
 from datetime import datetime
 from tkinter import ttk, messagebox
+from typing import Optional
 
 from sqlalchemy.orm import Session
 
 from db_ops.error_handler import EmptyUpdateError, InvalidDataError, DatabaseError
 from db_ops.models import Test, WIP, Coldhead
+from db_ops.write_queue import InlineWriter, WriteBehindQueue
 from logger import logger
 
 
 class AddTestWindow:
-    def __init__(self, parent: tk.Tk, db_session: Session):
+    def __init__(
+        self,
+        parent: tk.Tk,
+        db_session: Session,
+        write_queue: Optional[WriteBehindQueue] = None,
+    ):
         """
         Initialize the AddTestWindow.
 
         :param parent: The parent Tkinter window.
         :param db_session: SQLAlchemy session object.
+        :param write_queue: Optional background writer; saves run inline without it.
         """
         self.parent = parent
         self.db_session = db_session
+        self.writer = write_queue or InlineWriter(db_session)
         self.window = tk.Toplevel(parent)
         self.window.title("Add New Test")
         self.window.geometry("500x600")
@@ -141,32 +150,36 @@ class AddTestWindow:
                 )
                 return
 
-        try:
+        def work(session: Session):
             # Check if WIP exists
-            wip = self.db_session.query(WIP).filter_by(wip_number=wip_number).first()
+            wip = session.query(WIP).filter_by(wip_number=wip_number).first()
             if not wip:
                 raise InvalidDataError(f"No WIP found with number '{wip_number}'.")
 
-            # Handle Coldhead Serial Number if provided
-            coldhead_id = None
+            # Handle Coldhead Serial Number if provided; a test belongs to the
+            # coldhead of its WIP, so the two must agree
             if coldhead_serial:
                 coldhead = (
-                    self.db_session.query(Coldhead)
-                    .filter_by(coldhead_serial_number=coldhead_serial)
+                    session.query(Coldhead)
+                    .filter_by(serial_number=coldhead_serial)
                     .first()
                 )
                 if not coldhead:
                     raise InvalidDataError(
                         f"No Coldhead found with Serial Number '{coldhead_serial}'."
                     )
-                coldhead_id = coldhead.coldhead_id
+                if coldhead.coldhead_id != wip.coldhead_id:
+                    raise InvalidDataError(
+                        f"WIP '{wip_number}' is not on Coldhead '{coldhead_serial}'."
+                    )
 
-            # Create new Test instance
+            # Create new Test instance, numbered after the WIP's tests as the
+            # importers name them
+            attempt = len(wip.tests) + 1
             new_test = Test(
-                wip_number=wip_number,
-                coldhead_id=coldhead_id
-                if coldhead_id
-                else wip.coldhead_id,  # Fallback to WIP's coldhead_id
+                wip_id=wip.wip_id,
+                name=f"Test{attempt}",
+                test_attempt=attempt,
                 pass_fail=pass_fail,
                 notes=notes,
                 mode=mode,
@@ -174,21 +187,46 @@ class AddTestWindow:
                 # Add other fields as necessary
             )
 
-            self.db_session.add(new_test)
-            self.db_session.commit()
-            logger.info(f"Inserted new Test for WIP: {wip_number}")
-            messagebox.showinfo(
-                "Success",
-                f"Test added successfully with ID: {new_test.test_id}",
-            )
-            self.window.destroy()
-        except InvalidDataError as ide:
-            logger.error(ide)
-            messagebox.showerror("Invalid Data", str(ide))
-        except (EmptyUpdateError, DatabaseError) as e:
-            logger.error(e)
-            messagebox.showerror("Error", str(e))
-        except Exception as e:
-            self.db_session.rollback()
-            logger.exception(f"Unexpected error during Test insertion: {e}")
-            messagebox.showerror("Error", f"An unexpected error occurred:\n{e}")
+            session.add(new_test)
+            session.flush()
+            return new_test.test_id
+
+        # Hand the insert to the writer so the window stays responsive
+        self.insert_button.config(state="disabled")
+        self.writer.submit(
+            work,
+            on_success=lambda test_id: self.on_test_inserted(wip_number, test_id),
+            on_error=self.on_insert_failed,
+        )
+
+    def on_test_inserted(self, wip_number: str, test_id: int):
+        """
+        Report a successful insert.
+
+        :param wip_number: WIP the test was added to.
+        :param test_id: ID of the new test.
+        """
+        logger.info(f"Inserted new Test for WIP: {wip_number}")
+        messagebox.showinfo(
+            "Success",
+            f"Test added successfully with ID: {test_id}",
+        )
+        self.window.destroy()
+
+    def on_insert_failed(self, error: Exception):
+        """
+        Report a failed insert and re-enable the form.
+
+        :param error: The exception raised by the insert.
+        """
+        if self.window.winfo_exists():
+            self.insert_button.config(state="normal")
+        if isinstance(error, InvalidDataError):
+            logger.error(error)
+            messagebox.showerror("Invalid Data", str(error))
+        elif isinstance(error, (EmptyUpdateError, DatabaseError)):
+            logger.error(error)
+            messagebox.showerror("Error", str(error))
+        else:
+            logger.error(f"Unexpected error during Test insertion: {error}")
+            messagebox.showerror("Error", f"An unexpected error occurred:\n{error}")
@@ -2,10 +2,11 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from typing import List
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from db_ops.search import SearchOperator
-from db_ops.update_order import UpdateOrder
+from db_ops.update_order import UpdateOrder, parse_date
+from db_ops.write_queue import InlineWriter, WriteBehindQueue
 from db_ops.error_handler import (
     DuplicateEntryError,
     EmptyUpdateError,
@@ -22,6 +23,7 @@ class DetailWindow:
         wip_details: dict,
         test_list: List[dict],
         db_session: Session,
+        write_queue: Optional[WriteBehindQueue] = None,
     ):
         """
         Initialize the DetailWindow.
@@ -30,11 +32,12 @@ class DetailWindow:
         :param wip_details: Dictionary containing WIP details.
         :param test_list: List of dictionaries containing test details.
         :param db_session: SQLAlchemy session object.
+        :param write_queue: Optional background writer; saves run inline without it.
         """
         self.parent = parent
         self.db_session = db_session
         self.search_operator = SearchOperator(db_session)
-        self.update_order = UpdateOrder(db_session)
+        self.writer = write_queue or InlineWriter(db_session)
         self.window = tk.Toplevel(parent)
         self.window.title(f"WIP Details - {wip_details.get('wip_number', 'N/A')}")
         self.window.geometry("1000x700")
@@ -58,7 +61,12 @@ class DetailWindow:
         self.teardown_date_entry = None
         self.wip_status_entry = None
 
+        # Snapshots of the values as loaded, used to save only changed fields
+        self.wip_snapshot = None
+        self.test_snapshots = {}
+
         self.create_detail_fields()
+        self.wip_snapshot = self.collect_wip_data()
         self.create_tests_tabs()
         self.create_save_button()
 
@@ -174,6 +182,12 @@ class DetailWindow:
             entry.grid(row=idx, column=1, padx=10, pady=5)
             setattr(tab, f"{field}_entry", entry)  # Dynamically create attributes
 
+        try:
+            snapshot = self.collect_test_data(tab)
+            self.test_snapshots[snapshot["test_id"]] = snapshot
+        except (ValueError, InvalidDataError):
+            logger.warning(f"Could not snapshot test data: {test_data}")
+
         # Add a "Save Test" button
         save_test_button = ttk.Button(
             tab,
@@ -213,6 +227,71 @@ class DetailWindow:
         style = ttk.Style()
         style.configure("SaveAll.TButton", background="#4CAF50", foreground="white")
 
+    @staticmethod
+    def parse_entry(text: str, cast, default):
+        """
+        Convert an entry's text, treating blanks and the "N/A" placeholder as default.
+
+        :param text: Stripped entry text.
+        :param cast: Type to convert to (int or float).
+        :param default: Value used when the entry is empty.
+        """
+        if text in ("", "N/A", "None"):
+            return default
+        return cast(text)
+
+    def collect_wip_data(self) -> dict:
+        """
+        Collect WIP data from the detail fields.
+        """
+        return {
+            "wip_number": self.wip_number_entry.get().strip(),
+            "coldhead_id": self.coldhead_id_entry.get().strip(),
+            "coldhead_serial_number": self.coldhead_serial_number_entry.get().strip(),
+            "displacer_serial_number": self.displacer_serial_number_entry.get().strip(),
+            "arrival_date": parse_date(self.arrival_date_entry.get(), "arrival_date"),
+            "teardown_date": parse_date(
+                self.teardown_date_entry.get(), "teardown_date"
+            ),
+            "wip_status": self.wip_status_entry.get().strip(),
+            # Add other WIP fields if necessary
+        }
+
+    def collect_test_data(self, tab: ttk.Frame) -> dict:
+        """
+        Collect Test data from a test tab.
+
+        :param tab: The test tab to read.
+        """
+
+        def text(field):
+            return getattr(tab, f"{field}_entry").get().strip()
+
+        return {
+            "test_id": int(text("test_id")),
+            "pass_fail": text("pass_fail") or "Pending",
+            "notes": text("notes"),
+            "mode": text("mode"),
+            "turns": self.parse_entry(text("turns"), int, 0),
+            "first_stage_heaters": self.parse_entry(
+                text("first_stage_heaters"), float, 0.0
+            ),
+            "second_stage_heater": self.parse_entry(
+                text("second_stage_heater"), float, 0.0
+            ),
+            "first_stage_temp": self.parse_entry(text("first_stage_temp"), float, 0.0),
+            "second_stage_temp": self.parse_entry(
+                text("second_stage_temp"), float, 0.0
+            ),
+            "efficiency1": self.parse_entry(text("efficiency1"), float, 0.0),
+            "efficiency2": self.parse_entry(text("efficiency2"), float, 0.0),
+            "test_attempt": self.parse_entry(text("test_attempt"), int, 1),
+            "test_date": parse_date(text("test_date"), "test_date"),
+            "wip_number": self.wip_number_entry.get().strip(),
+            "coldhead_serial_number": self.coldhead_serial_number_entry.get().strip(),
+            "displacer_serial_number": self.displacer_serial_number_entry.get().strip(),
+        }
+
     def save_test(self, tab: ttk.Frame):
         """
         Save changes made to a specific test.
@@ -229,59 +308,47 @@ class DetailWindow:
                 logger.warning("Test ID missing in save_test.")
                 return
 
-            test_data = {
-                "test_id": int(getattr(tab, "test_id_entry").get().strip()),
-                "pass_fail": getattr(tab, "pass_fail_entry").get().strip() or "Pending",
-                "notes": getattr(tab, "notes_entry").get().strip(),
-                "mode": getattr(tab, "mode_entry").get().strip(),
-                "turns": int(getattr(tab, "turns_entry").get().strip() or 0),
-                "first_stage_heaters": float(
-                    getattr(tab, "first_stage_heaters_entry").get().strip() or 0.0
-                ),
-                "second_stage_heater": float(
-                    getattr(tab, "second_stage_heater_entry").get().strip() or 0.0
-                ),
-                "first_stage_temp": float(
-                    getattr(tab, "first_stage_temp_entry").get().strip() or 0.0
-                ),
-                "second_stage_temp": float(
-                    getattr(tab, "second_stage_temp_entry").get().strip() or 0.0
-                ),
-                "efficiency1": float(
-                    getattr(tab, "efficiency1_entry").get().strip() or 0.0
-                ),
-                "efficiency2": float(
-                    getattr(tab, "efficiency2_entry").get().strip() or 0.0
-                ),
-                "test_attempt": int(
-                    getattr(tab, "test_attempt_entry").get().strip() or 1
+            test_data = self.collect_test_data(tab)
+            original_tests = dict(self.test_snapshots)
+
+            def on_saved(_):
+                self.test_snapshots[test_data["test_id"]] = test_data
+                messagebox.showinfo("Success", "Test updated successfully.")
+                logger.info(f"Test '{test_data['test_id']}' updated successfully.")
+                # Optionally, refresh the treeview or other components if needed
+
+            # Hand the update to the writer, writing only the fields that changed
+            self.writer.submit(
+                lambda session: UpdateOrder(session).apply_changes(
+                    test_data_list=[test_data], original_tests=original_tests
                 ),
-                "test_date": getattr(tab, "test_date_entry").get().strip() or None,
-                "wip_number": self.wip_number_entry.get().strip(),
-                "coldhead_serial_number": self.coldhead_serial_number_entry.get().strip(),
-                "displacer_serial_number": self.displacer_serial_number_entry.get().strip(),
-            }
-
-            # Perform the update
-            self.update_order.update_test(test_data)
-            messagebox.showinfo("Success", "Test updated successfully.")
-            logger.info(f"Test '{test_data['test_id']}' updated successfully.")
-            # Optionally, refresh the treeview or other components if needed
+                on_success=on_saved,
+                on_error=lambda e: self.report_save_error("save_test", e),
+            )
+        except InvalidDataError as ide:
+            logger.error(f"Invalid input: {ide}")
+            messagebox.showerror("Input Error", str(ide))
         except ValueError as ve:
             logger.error(f"Data type conversion error: {ve}")
             messagebox.showerror("Data Error", f"Invalid data type: {ve}")
-        except (
-            DuplicateEntryError,
-            EmptyUpdateError,
-            InvalidDataError,
-            DatabaseError,
-        ) as e:
-            logger.error(f"Error during save_test: {e}")
-            messagebox.showerror("Error", str(e))
-        except Exception as e:
-            logger.exception(f"Error during save_test: {e}")
+
+    def report_save_error(self, operation: str, error: Exception):
+        """
+        Show an error raised by a queued save.
+
+        :param operation: Name of the save operation, for logging.
+        :param error: The exception raised by the save.
+        """
+        if isinstance(
+            error,
+            (DuplicateEntryError, EmptyUpdateError, InvalidDataError, DatabaseError),
+        ):
+            logger.error(f"Error during {operation}: {error}")
+            messagebox.showerror("Error", str(error))
+        else:
+            logger.error(f"Unexpected error during {operation}: {error}")
             messagebox.showerror(
-                "Error", f"An unexpected error occurred while saving the test:\n{e}"
+                "Error", f"An unexpected error occurred while saving:\n{error}"
             )
 
     def save_all_changes(self):
@@ -290,16 +357,7 @@ class DetailWindow:
         """
         try:
             # Collect updated WIP data
-            updated_wip = {
-                "wip_number": self.wip_number_entry.get().strip(),
-                "coldhead_id": self.coldhead_id_entry.get().strip(),
-                "coldhead_serial_number": self.coldhead_serial_number_entry.get().strip(),
-                "displacer_serial_number": self.displacer_serial_number_entry.get().strip(),
-                "arrival_date": self.arrival_date_entry.get().strip() or None,
-                "teardown_date": self.teardown_date_entry.get().strip() or None,
-                "wip_status": self.wip_status_entry.get().strip(),
-                # Add other WIP fields if necessary
-            }
+            updated_wip = self.collect_wip_data()
 
             # Validate required fields
             required_fields = [
@@ -330,92 +388,34 @@ class DetailWindow:
                 if hasattr(tab_widget, "test_id_entry"):
                     test_id = getattr(tab_widget, "test_id_entry").get().strip()
                     if test_id and test_id != "N/A":
-                        test_data = {
-                            "test_id": int(
-                                getattr(tab_widget, "test_id_entry").get().strip()
-                            ),
-                            "pass_fail": getattr(tab_widget, "pass_fail_entry")
-                            .get()
-                            .strip()
-                            or "Pending",
-                            "notes": getattr(tab_widget, "notes_entry").get().strip(),
-                            "mode": getattr(tab_widget, "mode_entry").get().strip(),
-                            "turns": int(
-                                getattr(tab_widget, "turns_entry").get().strip() or 0
-                            ),
-                            "first_stage_heaters": float(
-                                getattr(tab_widget, "first_stage_heaters_entry")
-                                .get()
-                                .strip()
-                                or 0.0
-                            ),
-                            "second_stage_heater": float(
-                                getattr(tab_widget, "second_stage_heater_entry")
-                                .get()
-                                .strip()
-                                or 0.0
-                            ),
-                            "first_stage_temp": float(
-                                getattr(tab_widget, "first_stage_temp_entry")
-                                .get()
-                                .strip()
-                                or 0.0
-                            ),
-                            "second_stage_temp": float(
-                                getattr(tab_widget, "second_stage_temp_entry")
-                                .get()
-                                .strip()
-                                or 0.0
-                            ),
-                            "efficiency1": float(
-                                getattr(tab_widget, "efficiency1_entry").get().strip()
-                                or 0.0
-                            ),
-                            "efficiency2": float(
-                                getattr(tab_widget, "efficiency2_entry").get().strip()
-                                or 0.0
-                            ),
-                            "test_attempt": int(
-                                getattr(tab_widget, "test_attempt_entry").get().strip()
-                                or 1
-                            ),
-                            "test_date": getattr(tab_widget, "test_date_entry")
-                            .get()
-                            .strip()
-                            or None,
-                            "wip_number": updated_wip["wip_number"],
-                            "coldhead_serial_number": updated_wip[
-                                "coldhead_serial_number"
-                            ],
-                            "displacer_serial_number": updated_wip[
-                                "displacer_serial_number"
-                            ],
-                        }
-                        updated_tests.append(test_data)
-
-            # Perform the updates
-            self.update_order.update_wip(updated_wip)
-            logger.info(f"WIP '{updated_wip['wip_number']}' updated successfully.")
-            for test_data in updated_tests:
-                self.update_order.update_test(test_data)
-                logger.info(f"Test '{test_data['test_id']}' updated successfully.")
-
-            messagebox.showinfo("Success", "All changes saved successfully.")
-            logger.info("All changes saved successfully.")
-            self.window.destroy()
+                        updated_tests.append(self.collect_test_data(tab_widget))
+
+            original_wip = dict(self.wip_snapshot)
+            original_tests = dict(self.test_snapshots)
+
+            def on_saved(_):
+                messagebox.showinfo("Success", "All changes saved successfully.")
+                logger.info("All changes saved successfully.")
+                self.window.destroy()
+
+            def on_failed(error):
+                self.save_button.config(state="normal")
+                self.report_save_error("save_all_changes", error)
+
+            # One save at a time: a second click while the write is queued
+            # would submit the same batch again
+            self.save_button.config(state="disabled")
+            # Perform the updates in one transaction, writing only changed fields
+            self.writer.submit(
+                lambda session: UpdateOrder(session).apply_changes(
+                    updated_wip, updated_tests, original_wip, original_tests
+                ),
+                on_success=on_saved,
+                on_error=on_failed,
+            )
+        except InvalidDataError as ide:
+            logger.error(f"Invalid input: {ide}")
+            messagebox.showerror("Input Error", str(ide))
         except ValueError as ve:
             logger.error(f"Data type conversion error: {ve}")
             messagebox.showerror("Data Error", f"Invalid data type: {ve}")
-        except (
-            DuplicateEntryError,
-            EmptyUpdateError,
-            InvalidDataError,
-            DatabaseError,
-        ) as e:
-            logger.error(f"Error during save_all_changes: {e}")
-            messagebox.showerror("Error", str(e))
-        except Exception as e:
-            logger.exception(f"Error during save_all_changes: {e}")
-            messagebox.showerror(
-                "Error", f"An unexpected error occurred while saving changes:\n{e}"
-            )
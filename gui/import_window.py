@@ -1,11 +1,16 @@
 # gui/import_window.py
 
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
+from db_ops.error_handler import ImportCancelledError
 from db_ops.mass_import import MassImporter
 from logger import logger
 
+POLL_INTERVAL_MS = 100
+
 
 class ImportWindow:
     def __init__(self, parent: tk.Tk, db_session: Session):
@@ -17,11 +22,13 @@ class ImportWindow:
         """
         self.parent = parent
         self.db_session = db_session
-        self.mass_importer = MassImporter(db_session)
+        # The import runs on a worker thread with its own session
+        self.session_factory = sessionmaker(bind=db_session.get_bind())
         self.window = tk.Toplevel(parent)
         self.window.title("Import Data from Excel")
-        self.window.geometry("600x300")
+        self.window.geometry("600x460")
         self.window.configure(padx=10, pady=10)
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Initialize instance attributes
         self.label = None
@@ -29,6 +36,16 @@ class ImportWindow:
         self.entry = None
         self.browse_button = None
         self.import_button = None
+        self.cancel_button = None
+        self.progress_bar = None
+        self.status_var = None
+        self.summary_text = None
+
+        # Worker state; the worker talks to the Tk thread only through events
+        self.worker = None
+        self.cancel_event = threading.Event()
+        self.events = queue.Queue()
+        self.close_requested = False
 
         self.create_widgets()
 
@@ -57,7 +74,28 @@ class ImportWindow:
             width=15,
             style="Import.TButton",
         )
-        self.import_button.pack(pady=20)
+        self.import_button.pack(pady=(20, 5))
+
+        self.cancel_button = ttk.Button(
+            self.window,
+            text="Cancel",
+            command=self.cancel_import,
+            width=15,
+            state="disabled",
+        )
+        self.cancel_button.pack(pady=5)
+
+        # Progress of the running import: rows, throughput and ETA
+        self.progress_bar = ttk.Progressbar(
+            self.window, orient="horizontal", length=560, mode="determinate"
+        )
+        self.progress_bar.pack(pady=5)
+        self.status_var = tk.StringVar()
+        ttk.Label(self.window, textvariable=self.status_var).pack(pady=5)
+
+        # Per-chunk timing summary once the import has ended
+        self.summary_text = tk.Text(self.window, height=8, width=70, state="disabled")
+        self.summary_text.pack(pady=5, fill="both", expand=True)
 
         # Configure style for Import button
         style = ttk.Style()
@@ -76,7 +114,7 @@ class ImportWindow:
 
     def import_data(self):
         """
-        Trigger the mass import process.
+        Start the import on a worker thread and follow its progress.
         """
         excel_path = self.file_path_var.get().strip()
         if not excel_path:
@@ -84,17 +122,178 @@ class ImportWindow:
                 "No File Selected", "Please select an Excel file to import."
             )
             return
+        if self.worker is not None and self.worker.is_alive():
+            return
+
+        self.cancel_event.clear()
+        self.import_button.config(state="disabled")
+        self.browse_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.progress_bar.config(mode="indeterminate")
+        self.progress_bar.start()
+        self.status_var.set("Reading the workbook...")
+        self.show_summary("")
+
+        self.worker = threading.Thread(
+            target=self.run_import, args=(excel_path,), name="ImportWorker", daemon=True
+        )
+        self.worker.start()
+        self.window.after(POLL_INTERVAL_MS, self.poll_events)
 
+    def run_import(self, excel_path: str):
+        """
+        Worker thread body: stream the workbook into the database and report
+        progress and the outcome through self.events.
+
+        :param excel_path: Path to the Excel file.
+        """
+        session = self.session_factory()
+        importer = MassImporter(session)
         try:
-            # Call the mass import function
-            self.mass_importer.mass_insert_from_excel(excel_path)
-            messagebox.showinfo(
-                "Import Successful", "Data imported successfully from Excel."
+            counts = importer.stream_insert_from_excel(
+                excel_path,
+                progress=lambda report: self.events.put(("progress", report)),
+                cancel=self.cancel_event,
             )
-            self.window.destroy()
-        except ValueError as ve:
-            logger.error(f"Import Error: {ve}")
-            messagebox.showerror("Import Error", str(ve))
+            self.events.put(("done", (counts, importer.last_timings)))
+        except ImportCancelledError as ice:
+            self.events.put(("cancelled", (ice.counts, importer.last_timings)))
         except Exception as e:
             logger.exception(f"Error during import_data: {e}")
-            messagebox.showerror("Error", f"An error occurred during import:\n{e}")
+            self.events.put(("error", e))
+        finally:
+            session.close()
+
+    def cancel_import(self):
+        """
+        Ask the worker to stop after the chunk it is writing.
+        """
+        self.cancel_event.set()
+        self.cancel_button.config(state="disabled")
+        self.status_var.set("Cancelling after the current chunk...")
+
+    def poll_events(self):
+        """
+        Apply the worker's events on the Tk thread; reschedules itself until the
+        worker has finished.
+        """
+        while True:
+            try:
+                kind, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self.show_progress(payload)
+            else:
+                self.finish_import(kind, payload)
+                return
+        self.window.after(POLL_INTERVAL_MS, self.poll_events)
+
+    def show_progress(self, report: dict):
+        """
+        Update the progress bar and the rows, rows/second and ETA line.
+
+        :param report: Progress dictionary from MassImporter.
+        """
+        rows_done, rows_total = report["rows_done"], report["rows_total"]
+        if rows_total:
+            self.progress_bar.stop()
+            self.progress_bar.config(
+                mode="determinate", maximum=rows_total, value=rows_done
+            )
+            status = f"{rows_done:,} of {rows_total:,} rows"
+        else:
+            status = f"{rows_done:,} rows"
+        if report["rows_per_second"]:
+            status += f" - {report['rows_per_second']:,.0f} rows/s"
+        if report["eta_seconds"] is not None:
+            minutes, seconds = divmod(int(report["eta_seconds"]), 60)
+            status += f" - ETA {minutes}:{seconds:02d}"
+        self.status_var.set(status)
+
+    def finish_import(self, kind: str, payload):
+        """
+        Show the outcome and the per-chunk timing summary, and re-enable the
+        controls.
+
+        :param kind: 'done', 'cancelled' or 'error'.
+        :param payload: (counts, timings) for 'done' and 'cancelled', else the error.
+        """
+        self.progress_bar.stop()
+        self.import_button.config(state="normal")
+        self.browse_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+        if self.close_requested:
+            self.window.destroy()
+            return
+
+        if kind == "error":
+            self.progress_bar.config(mode="determinate", value=0)
+            self.status_var.set("Import failed.")
+            if isinstance(payload, ValueError):
+                messagebox.showerror("Import Error", str(payload), parent=self.window)
+            else:
+                messagebox.showerror(
+                    "Error",
+                    f"An error occurred during import:\n{payload}",
+                    parent=self.window,
+                )
+            return
+
+        counts, timings = payload
+        if kind == "cancelled":
+            self.status_var.set(
+                f"Cancelled after {counts.get('rows', 0):,} rows; "
+                f"import the file again to resume."
+            )
+        else:
+            self.progress_bar.config(mode="determinate", maximum=1, value=1)
+            self.status_var.set(
+                f"Imported {counts.get('rows', 0):,} rows: "
+                f"{counts.get('wips', 0):,} new, {counts.get('updated', 0):,} updated, "
+                f"{counts.get('invalid', 0):,} invalid."
+            )
+        self.show_summary(self.timing_summary(timings))
+
+    @staticmethod
+    def timing_summary(timings: list) -> str:
+        """
+        Format per-chunk timings as one line per chunk plus a total.
+
+        :param timings: MassImporter.last_timings.
+        """
+        if not timings:
+            return "No chunks were written."
+        lines = [
+            f"Chunk {t['chunk']:>4}: {t['rows']:>6,} rows in {t['seconds']:6.2f}s "
+            f"({t['rows'] / t['seconds'] if t['seconds'] else 0:>9,.0f} rows/s)"
+            for t in timings
+        ]
+        rows = sum(t["rows"] for t in timings)
+        seconds = sum(t["seconds"] for t in timings)
+        slowest = max(timings, key=lambda t: t["seconds"])
+        lines.append(
+            f"Total: {rows:,} rows in {seconds:.2f}s over {len(timings)} chunk(s); "
+            f"slowest chunk {slowest['chunk']} ({slowest['seconds']:.2f}s)"
+        )
+        return "\n".join(lines)
+
+    def show_summary(self, text: str):
+        """
+        Replace the contents of the read-only summary box.
+        """
+        self.summary_text.config(state="normal")
+        self.summary_text.delete("1.0", tk.END)
+        self.summary_text.insert(tk.END, text)
+        self.summary_text.config(state="disabled")
+
+    def on_close(self):
+        """
+        Close the window; a running import is cancelled first and the window
+        closes once its current chunk is committed.
+        """
+        if self.worker is not None and self.worker.is_alive():
+            self.close_requested = True
+            self.cancel_import()
+            return
+        self.window.destroy()
@@ -2,15 +2,22 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from db_ops.models import Coldhead, Displacer, WIP
+from db_ops.error_handler import InvalidDataError
+from db_ops.models import Coldhead, Displacer, Test, WIP
+from db_ops.update_order import parse_date
+from db_ops.write_queue import InlineWriter, WriteBehindQueue
 from logger import logger
 from sqlalchemy.orm import Session
+from typing import Optional
 import datetime
 
 class InsertOrderWindow(tk.Toplevel):
-    def __init__(self, parent, session: Session):
+    def __init__(
+        self, parent, session: Session, write_queue: Optional[WriteBehindQueue] = None
+    ):
         super().__init__(parent)
         self.session = session
+        self.writer = write_queue or InlineWriter(session)
         self.title("Insert New Order")
         self.geometry("400x400")
         self.setup_ui()
@@ -42,63 +49,105 @@ class InsertOrderWindow(tk.Toplevel):
         self.test_id_input = ttk.Entry(self)
         self.test_id_input.pack(pady=5)
 
-        submit_button = ttk.Button(self, text="Submit", command=self.create_order)
-        submit_button.pack(pady=10)
+        self.submit_button = ttk.Button(self, text="Submit", command=self.create_order)
+        self.submit_button.pack(pady=10)
 
     def create_order(self):
         try:
             wip_number = self.wip_number_input.get().strip()
             coldhead_serial = self.coldhead_serial_input.get().strip()
             displacer_serial = self.displacer_serial_input.get().strip()
-            arrival_date = self.arrival_date_input.get().strip()  # Optional
-            teardown_date = self.teardown_date_input.get().strip()  # Optional
+            # Optional
+            arrival_date = parse_date(self.arrival_date_input.get(), "arrival_date")
+            teardown_date = parse_date(self.teardown_date_input.get(), "teardown_date")
             test_id = self.test_id_input.get().strip()  # Optional
 
             # Only validate required fields
             if not all([wip_number, coldhead_serial, displacer_serial]):
                 raise ValueError("Please fill in all required fields.")
-
-            # Remaining code for creating coldhead, displacer, and WIP entries remains the same
-            # Create Coldhead entry
-            coldhead = self.session.query(Coldhead).filter_by(serial_number=coldhead_serial).first()
-            if not coldhead:
-                coldhead = Coldhead(serial_number=coldhead_serial)
-                self.session.add(coldhead)
-                self.session.commit()
-                logger.info(
-                    f"Created new Coldhead with Serial Number '{coldhead_serial}' and ID {coldhead.coldhead_id}.")
-
-            # Create Displacer entry
-            displacer = self.session.query(Displacer).filter_by(displacer_serial_number=displacer_serial).first()
-            if not displacer:
-                displacer = Displacer(displacer_serial_number=displacer_serial)
-                self.session.add(displacer)
-                self.session.commit()
-                logger.info(
-                    f"Created new Displacer with Serial Number '{displacer_serial}' and ID {displacer.displacer_id}.")
-
-            # Create WIP entry
-            new_wip = WIP(
-                test_id=int(test_id) if test_id else None,
-                coldhead_id=coldhead.coldhead_id,
-                displacer_id=displacer.displacer_id,
-                wip_number=wip_number,
-                arrival_date=arrival_date if arrival_date else None,
-                teardown_date=teardown_date if teardown_date else None
+            if test_id and not test_id.isdigit():
+                raise ValueError("Test ID must be a number.")
+
+            def work(session: Session):
+                # Create Coldhead entry
+                coldhead = (
+                    session.query(Coldhead)
+                    .filter_by(serial_number=coldhead_serial)
+                    .first()
+                )
+                if not coldhead:
+                    coldhead = Coldhead(serial_number=coldhead_serial)
+                    session.add(coldhead)
+                    session.flush()
+                    logger.info(
+                        f"Created new Coldhead with Serial Number '{coldhead_serial}' "
+                        f"and ID {coldhead.coldhead_id}."
+                    )
+
+                # Create Displacer entry
+                displacer = (
+                    session.query(Displacer)
+                    .filter_by(displacer_serial_number=displacer_serial)
+                    .first()
+                )
+                if not displacer:
+                    displacer = Displacer(displacer_serial_number=displacer_serial)
+                    session.add(displacer)
+                    session.flush()
+                    logger.info(
+                        f"Created new Displacer with Serial Number "
+                        f"'{displacer_serial}' and ID {displacer.displacer_id}."
+                    )
+
+                # Create WIP entry
+                new_wip = WIP(
+                    coldhead_id=coldhead.coldhead_id,
+                    displacer_id=displacer.displacer_id,
+                    wip_number=wip_number,
+                    arrival_date=arrival_date,
+                    teardown_date=teardown_date
+                )
+                session.add(new_wip)
+                self.link_test(session, new_wip, test_id)
+                return wip_number
+
+            # Hand the inserts to the writer so the window stays responsive
+            self.submit_button.config(state="disabled")
+            self.writer.submit(
+                work, on_success=self.on_order_created, on_error=self.on_order_failed
             )
-            self.session.add(new_wip)
-            self.session.commit()
-            logger.info(f"Inserted new WIP with WIP Number '{wip_number}'.")
 
-            messagebox.showinfo("Success", "New order inserted successfully.")
-            self.destroy()
-
-        except ValueError as ve:
+        except (ValueError, InvalidDataError) as ve:
             logger.error(f"Value error: {ve}")
             messagebox.showerror("Input Error", str(ve))
-        except Exception as e:
-            logger.error(f"Unexpected error during order creation: {e}")
-            messagebox.showerror("Error", f"Failed to insert order:\n{e}")
+
+    @staticmethod
+    def link_test(session: Session, wip: WIP, test_id: str):
+        """
+        Attaches the test with the given ID to the WIP; tests reference their
+        WIP, not the other way round. Does nothing without an ID.
+        """
+        if not test_id:
+            return
+        test = session.get(Test, int(test_id))
+        if test is None:
+            raise ValueError(f"No Test found with ID {test_id}.")
+        wip.tests.append(test)
+
+    def on_order_created(self, wip_number):
+        logger.info(f"Inserted new WIP with WIP Number '{wip_number}'.")
+        messagebox.showinfo("Success", "New order inserted successfully.")
+        self.destroy()
+
+    def on_order_failed(self, error):
+        if self.winfo_exists():
+            self.submit_button.config(state="normal")
+        if isinstance(error, ValueError):
+            logger.error(f"Value error: {error}")
+            messagebox.showerror("Input Error", str(error))
+        else:
+            logger.error(f"Unexpected error during order creation: {error}")
+            messagebox.showerror("Error", f"Failed to insert order:\n{error}")
 
     def create_order_with_data(self, wip_number, coldhead_serial, displacer_serial, arrival_date, teardown_date,
                                test_id):
@@ -143,7 +192,6 @@ class InsertOrderWindow(tk.Toplevel):
 
             # Create WIP
             new_wip = WIP(
-                test_id=int(test_id),
                 coldhead_id=coldhead.coldhead_id,
                 displacer_id=displacer.displacer_id,
                 wip_number=wip_number,
@@ -151,6 +199,7 @@ class InsertOrderWindow(tk.Toplevel):
                 teardown_date=teardown_date_obj
             )
             self.session.add(new_wip)
+            self.link_test(self.session, new_wip, test_id)
             self.session.commit()
             logger.info(f"Inserted new WIP with WIP Number '{wip_number}'.")
 
@@ -159,4 +208,4 @@ class InsertOrderWindow(tk.Toplevel):
             raise ve
         except Exception as e:
             logger.error(f"Unexpected error during order creation: {e}")
-            raise e
\ No newline at end of file
+            raise e
@@ -2,11 +2,12 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 from db_ops.new_order import NewOrderInserter
 from db_ops.search import SearchOperator
 from db_ops.mass_import import MassImporter
 from db_ops.update_order import UpdateOrder
+from db_ops.write_queue import WriteBehindQueue
 from logger import logger
 from gui.insert_order_window import InsertOrderWindow
 from gui.displacer_window import DisplacerWindow
@@ -26,9 +27,19 @@ class GUIFace:
         self.update_order = UpdateOrder(db_session)
         logger.info("GUIFace initialized with Database operators.")
 
+        # Background writer so window saves never block the Tk thread
+        self.write_queue = WriteBehindQueue(sessionmaker(bind=db_session.get_bind()))
+        self.write_queue.attach(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
         # Initialize UI components
         self.setup_ui()
 
+    def on_close(self):
+        # Let queued saves finish before the application exits
+        self.write_queue.close(timeout=10)
+        self.root.destroy()
+
     def setup_ui(self):
         # Set up main window
         self.root.title("Database Management Hub")
@@ -222,7 +233,9 @@ class GUIFace:
             test_list = [dict(row) for row in tests] if tests else []
 
             try:
-                DetailWindow(self.root, wip_details, test_list, self.db_session)
+                DetailWindow(
+                    self.root, wip_details, test_list, self.db_session, self.write_queue
+                )
             except Exception as e:
                 logger.exception("Failed to open DetailWindow.")
                 messagebox.showerror("Error", f"Failed to open details: {e}")
@@ -236,7 +249,7 @@ class GUIFace:
 
     def open_insert_order_window(self):
         try:
-            InsertOrderWindow(self.root, self.db_session)
+            InsertOrderWindow(self.root, self.db_session, self.write_queue)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open InsertOrderWindow:\n{e}")
 
@@ -254,6 +267,6 @@ class GUIFace:
 
     def open_add_test_window(self):
         try:
-            AddTestWindow(self.root, self.db_session)
+            AddTestWindow(self.root, self.db_session, self.write_queue)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open AddTestWindow:\n{e}")
@@ -0,0 +1,73 @@
+# test_change_log.py
+
+import unittest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from db_ops.change_log import ChangeJournal
+from db_ops.database import configure_sqlite_transactions
+from db_ops.models import Base, Coldhead, Displacer, WIP
+
+
+class TestChangeJournal(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:', echo=False)
+        configure_sqlite_transactions(self.engine)
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.journal = ChangeJournal(self.session)
+
+        self.coldhead = Coldhead(serial_number='J03636')
+        self.displacer = Displacer(displacer_serial_number='R6650/R6071')
+        self.session.add_all([self.coldhead, self.displacer])
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def test_triggers_journal_inserts_in_order(self):
+        changes = self.journal.changes_since(0)
+        self.assertEqual(
+            [(c['table_name'], c['operation'], c['row_id']) for c in changes],
+            [
+                ('coldheads', 'INSERT', self.coldhead.coldhead_id),
+                ('displacers', 'INSERT', self.displacer.displacer_id),
+            ],
+        )
+        self.assertEqual([c['seq'] for c in changes], [1, 2])
+        self.assertEqual(self.journal.latest_seq(), 2)
+
+    def test_consumer_sees_only_new_changes(self):
+        spare = Displacer(displacer_serial_number='R0002')
+        self.session.add(spare)
+        self.session.commit()
+        seq = self.journal.latest_seq()
+        wip = WIP(
+            wip_number='398517',
+            coldhead_id=self.coldhead.coldhead_id,
+            displacer_id=self.displacer.displacer_id,
+        )
+        self.session.add(wip)
+        self.session.commit()
+        wip.status = 'Closed'
+        self.session.commit()
+        self.session.delete(spare)
+        self.session.commit()
+
+        changes = self.journal.changes_since(seq, tables=['wips'])
+        self.assertEqual(
+            [c['operation'] for c in changes], ['INSERT', 'UPDATE']
+        )
+
+        keys, high_water = self.journal.changed_keys_since(seq)
+        self.assertEqual(keys['wips'], {'upserted': {wip.wip_id}, 'deleted': set()})
+        self.assertEqual(
+            keys['displacers'],
+            {'upserted': set(), 'deleted': {spare.displacer_id}},
+        )
+        self.assertEqual(high_water, self.journal.latest_seq())
+        self.assertEqual(self.journal.changes_since(high_water), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+# test_csv_import.py
+
+import datetime
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db_ops.csv_import import PLACEHOLDER_DISPLACER, TrackerCsvImporter
+from db_ops.database import configure_sqlite_transactions
+from db_ops.models import Base, Coldhead, Test, WIP
+
+TRACKERS_CSV = (
+    "Part_Number,Organization,WIP,Coldhead_Serial_Number,Temps,Arrival_Date,"
+    "Teardown_Date,Test_Date,Date_Closed,depart_date,status\n"
+    "300388D,,UNKNOWN,SJ02894,,,,,2011-10-05 00:00:00,,\n"
+    "300388D.002,RCZ,29458,J02813,,2013-07-25T07:00:00,,2013-12-11 00:00:00,"
+    "2014-01-13 00:00:00,,Closed\n"
+    ",,32707,J02331,,2014-02-20 00:00:00,,,2014-04-22 00:00:00,,\n"
+    ",,32707,J02331,,,,,,,Open\n"
+)
+
+TESTS_CSV = (
+    "Test_ID,WIP,Coldhead_Serial_Number,Displacer_Serial_Number,Test_Date,Station,"
+    "Pass_Fail,Mode,Turns,First_Stage_Heaters,Second_Stage_Heater,First_Stage_Temp,"
+    "Second_Stage_Temp,Efficiency1,Passed,Test_Attempt,Efficiency2,Notes\n"
+    "1,29458,J02813,R4002/R4128,2023-11-01,2,Fail,LOAD,,65,149,84.6,28.2,1.1,0,,"
+    "1.41,\n"
+    "2,,J01710,,2023-11-01,3,PASS,LOAD,5,71,151,65.8,19,0.85,1,,0.95,\n"
+    "3,428523,SJ01800,,2023-11-02,2,Fail,NO LOAD,6,62,149,40,8.4,1.33,0,,1.05,\n"
+)
+
+
+class TestTrackerCsvImporter(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        configure_sqlite_transactions(self.engine)
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.importer = TrackerCsvImporter(self.session, chunk_size=2)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def write_csv(self, name, content):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_coldhead_trackers(self):
+        path = self.write_csv("trackers.csv", TRACKERS_CSV)
+        counts = self.importer.import_coldhead_trackers(path)
+
+        self.assertEqual((counts["rows"], counts["skipped"], counts["wips"]), (4, 1, 2))
+        # Includes the UNKNOWN row's
+        self.assertEqual(self.session.query(Coldhead).count(), 3)
+        wip = self.session.query(WIP).filter_by(wip_number="29458").one()
+        self.assertEqual(wip.arrival_date, datetime.date(2013, 7, 25))
+        self.assertEqual(wip.status, "Closed")
+        self.assertEqual(wip.displacer.displacer_serial_number, PLACEHOLDER_DISPLACER)
+        # The second 32707 row fills status without blanking the arrival date
+        wip = self.session.query(WIP).filter_by(wip_number="32707").one()
+        self.assertEqual(
+            (wip.arrival_date, wip.status), (datetime.date(2014, 2, 20), "Open")
+        )
+
+    def test_repair_tests_link_and_reimport(self):
+        self.importer.import_coldhead_trackers(
+            self.write_csv("trackers.csv", TRACKERS_CSV)
+        )
+        path = self.write_csv("tests.csv", TESTS_CSV)
+        counts = self.importer.import_repair_tests(path)
+
+        self.assertEqual(
+            (counts["tests"], counts["invalid"], counts["wips"]), (2, 1, 1)
+        )
+        self.assertEqual(
+            self.importer.last_report[["row", "column", "rule"]].values.tolist(),
+            [[3, "WIP", "missing_value"]],
+        )
+        test = self.session.query(Test).filter_by(name="RT-1").one()
+        self.assertEqual(test.wip.wip_number, "29458")
+        self.assertEqual(test.wip.displacer.displacer_serial_number, "R4002")
+
+        counts = self.importer.import_repair_tests(path)
+        self.assertEqual((counts["tests"], counts["tests_existing"]), (0, 2))
+        self.assertEqual(self.session.query(Test).count(), 2)
+
+    def test_dry_run_reports_without_writing(self):
+        self.importer.import_coldhead_trackers(
+            self.write_csv("trackers.csv", TRACKERS_CSV)
+        )
+        bad = TESTS_CSV.replace(
+            "2023-11-02,2,Fail,NO LOAD,6,62,149,40,",
+            "2023-13-45,2,Maybe,NO LOAD,6,62,149,900,",
+        )
+        bad += "1,29458,J09999,,2023-11-03,2,Pass,LOAD,5,60,150,50,10,x,1,,1.0,\n"
+        path = self.write_csv("tests.csv", bad)
+        tests_before = self.session.query(Test).count()
+
+        result = self.importer.dry_run_repair_tests(path)
+
+        self.assertEqual(self.session.query(Test).count(), tests_before)
+        issues = result["report"][["row", "column", "rule", "severity"]].values.tolist()
+        self.assertEqual(
+            issues,
+            [
+                [3, "WIP", "missing_value", "error"],
+                [4, "First_Stage_Temp", "out_of_range", "error"],
+                [4, "Pass_Fail", "unexpected_value", "warning"],
+                [4, "Test_Date", "invalid_date", "error"],
+                [5, "Coldhead_Serial_Number", "conflict", "error"],
+                [5, "Efficiency1", "not_a_number", "error"],
+                [5, "Test_ID", "duplicate", "error"],
+            ],
+        )
+        self.assertEqual(result["summary"]["error_rows"], 3)
+        self.assertEqual(result["summary"]["warnings"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+# test_db_operations.py
+
+import unittest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from db_ops.database import configure_sqlite_transactions
+from db_ops.db_operations import DBOperations
+from db_ops.models import Base, Displacer
+
+
+class TestUpsertMany(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:', echo=False)
+        configure_sqlite_transactions(self.engine)
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.db_operations = DBOperations(self.session)
+
+        self.session.add(Displacer(displacer_serial_number='R0001', status='Open'))
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def test_counts_inserts_and_updates(self):
+        rows = [
+            {'displacer_serial_number': 'R0001', 'status': 'Closed'},
+            {'displacer_serial_number': 'R0002', 'status': 'Open'},
+            {'displacer_serial_number': 'R0003', 'status': 'Open'},
+            {'displacer_serial_number': 'R0002', 'status': 'Scrapped'},
+        ]
+        counts = self.db_operations.upsert_many(
+            'displacers', rows, ['displacer_serial_number'], chunk_size=2
+        )
+
+        self.assertEqual(counts, {'inserted': 2, 'updated': 2, 'failed': 0})
+        statuses = {
+            d.displacer_serial_number: d.status
+            for d in self.session.query(Displacer).all()
+        }
+        self.assertEqual(
+            statuses, {'R0001': 'Closed', 'R0002': 'Scrapped', 'R0003': 'Open'}
+        )
+
+    def test_update_leaves_missing_columns_untouched(self):
+        self.db_operations.upsert_many(
+            'displacers',
+            [{'displacer_serial_number': 'R0001', 'notes': 'Re-lapped'}],
+            ['displacer_serial_number'],
+        )
+
+        displacer = self.session.query(Displacer).filter_by(
+            displacer_serial_number='R0001'
+        ).one()
+        self.assertEqual(displacer.status, 'Open')
+        self.assertEqual(displacer.notes, 'Re-lapped')
+
+    def test_failed_rows_do_not_block_the_chunk(self):
+        rows = [
+            {'displacer_serial_number': 'R0010'},
+            {'displacer_serial_number': None},
+            {'displacer_serial_number': 'R0011', 'displacer_id': 1},
+            {'displacer_serial_number': 'R0012'},
+        ]
+        counts = self.db_operations.upsert_many(
+            'displacers', rows, ['displacer_serial_number']
+        )
+
+        self.assertEqual(counts, {'inserted': 2, 'updated': 0, 'failed': 2})
+        self.assertEqual(self.session.query(Displacer).count(), 3)
+
+    def test_rejects_non_unique_conflict_target(self):
+        with self.assertRaises(ValueError):
+            self.db_operations.upsert_many(
+                'displacers', [{'status': 'Open'}], ['status']
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
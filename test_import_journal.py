@@ -0,0 +1,88 @@
+# test_import_journal.py
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db_ops.database import configure_sqlite_transactions
+from db_ops.import_journal import ImportCheckpoints
+from db_ops.import_pipeline import BulkOrderWriter
+from db_ops.mass_import import MassImporter
+from db_ops.models import Base, ImportJournal, Test, WIP
+from test_mass_import import make_sheet
+
+
+class TestResumableImport(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        configure_sqlite_transactions(self.engine)
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "orders.xlsx")
+        make_sheet().to_excel(self.path, index=False)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def interrupt_second_chunk(self):
+        write_chunk = BulkOrderWriter.write_chunk
+        calls = []
+
+        def failing(writer, session, orders, tests):
+            calls.append(len(orders))
+            if len(calls) == 2:
+                raise RuntimeError("application closed")
+            return write_chunk(writer, session, orders, tests)
+
+        return mock.patch.object(BulkOrderWriter, "write_chunk", failing)
+
+    def test_interrupted_import_resumes_after_last_committed_chunk(self):
+        importer = MassImporter(self.session)
+        with self.interrupt_second_chunk():
+            with self.assertRaises(RuntimeError):
+                importer.mass_insert_from_excel(self.path, chunk_size=2)
+
+        unfinished = ImportCheckpoints(self.session).unfinished()
+        self.assertEqual(len(unfinished), 1)
+        self.assertEqual(unfinished[0]["chunks_committed"], 1)
+        self.assertEqual(unfinished[0]["rows_committed"], 2)
+        self.assertEqual({wip.wip_number for wip in self.session.query(WIP)}, {"W1"})
+
+        counts = importer.mass_insert_from_excel(self.path, chunk_size=2)
+
+        self.assertEqual((counts["rows"], counts["resumed"]), (5, 2))
+        self.assertEqual((counts["wips"], counts["invalid"]), (1, 2))
+        # The resumed chunk's rows are neither re-reported nor reported as existing
+        self.assertEqual(
+            importer.last_report[["row", "rule"]].values.tolist(),
+            [[5, "duplicate"], [6, "missing_value"]],
+        )
+        self.assertEqual(
+            {wip.wip_number for wip in self.session.query(WIP)}, {"W1", "W3"}
+        )
+        self.assertEqual(self.session.query(Test).count(), 2)
+        self.assertEqual(ImportCheckpoints(self.session).unfinished(), [])
+
+    def test_changed_file_starts_afresh(self):
+        importer = MassImporter(self.session)
+        with self.interrupt_second_chunk():
+            with self.assertRaises(RuntimeError):
+                importer.stream_insert_from_excel(self.path, chunk_size=2)
+
+        make_sheet().iloc[::-1].to_excel(self.path, index=False)
+        counts = importer.stream_insert_from_excel(self.path, chunk_size=2)
+
+        self.assertNotIn("resumed", counts)
+        statuses = [entry.status for entry in self.session.query(ImportJournal)]
+        self.assertEqual(statuses, ["abandoned", "completed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+# test_import_profiles.py
+
+import datetime
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db_ops.database import configure_sqlite_transactions
+from db_ops.import_profiles import ImportProfile, load_profile
+from db_ops.import_validation import ImportValidator
+from db_ops.mass_import import MassImporter
+from db_ops.models import Base, WIP
+
+SHOP_PROFILE = """
+name: shop
+key: wip_number
+fields:
+  wip_number:
+    {column: Work Order, type: wip, required: true, not_null: true, unique: true}
+  coldhead_serial_number: {column: Coldhead, type: text, required: true, not_null: true}
+  displacer_serial_number:
+    {column: Displacer, type: text, required: true, not_null: true}
+  arrival_date: {column: Received, type: date}
+groups:
+  tests:
+    name: "Run {n}"
+    fields:
+      pass_fail: {column: "Run {n} Result", type: text, default: Pending}
+      first_stage_temp:
+        {column: "Run {n} T1 (C)", type: number, source_unit: C, unit: K, max: 400}
+"""
+
+
+def make_test_sheet():
+    return pd.DataFrame(
+        {
+            "WIP": ["W1", "W2"],
+            "Coldhead_Serial_Number": ["C1", "C2"],
+            "Displacer_Serial_Number": ["D1", "D2"],
+            "Arrival_Date": ["2024-01-05", None],
+            "Initial_Open_Date": [None, None],
+            "Test1_PassFail": ["Pass", None],
+            "Test1_First_Stage_Temp": [84.6, None],
+            "Test1_Turns": ["5", None],
+            "Test12_Mode": [None, "LOAD"],
+        }
+    )
+
+
+class TestImportProfiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_default_profile_reads_measurements(self):
+        profile = load_profile()
+        self.assertIs(profile, load_profile("orders"))
+
+        tests = profile.prepare(make_test_sheet())["tests"]
+
+        self.assertEqual(tests["name"].tolist(), ["Test1", "Test12"])
+        self.assertEqual(tests["first_stage_temp"].tolist(), [84.6, None])
+        self.assertEqual(tests["turns"].tolist(), [5, None])
+        self.assertEqual(tests["mode"].tolist(), ["", "LOAD"])
+        self.assertEqual(tests["pass_fail"].tolist(), ["Pass", "Pending"])
+        self.assertEqual(tests["test_attempt"].tolist(), [1, 1])
+
+    def test_rules_cover_the_files_group_columns(self):
+        rules = load_profile().rules(make_test_sheet().columns)
+
+        self.assertEqual(rules["ranges"]["Test1_First_Stage_Temp"], (0, 400))
+        self.assertEqual(
+            rules["choices"]["Test1_PassFail"], ["PASS", "FAIL", "PENDING"]
+        )
+        self.assertNotIn("Test2_PassFail", rules["choices"])
+
+        sheet = make_test_sheet()
+        sheet.loc[1, "Test1_Turns"] = "500"
+        clean = ImportValidator(rules).validate(sheet)
+        self.assertEqual(clean.tolist(), [True, False])
+
+    def test_yaml_profile_with_units(self):
+        profile = load_profile(self.write("shop.yaml", SHOP_PROFILE))
+        sheet = pd.DataFrame(
+            {
+                "Work Order": ["N/A", "7", "8"],
+                "Coldhead": ["C1", "C2", "C3"],
+                "Displacer": ["D1", "D2", "D3"],
+                "Received": ["2024-03-01", "2024-03-02", None],
+                "Run 2 T1 (C)": [-200.0, -250.0, None],
+            }
+        )
+
+        prepared = profile.prepare(sheet)
+
+        self.assertEqual(prepared["skipped"], 1)
+        self.assertEqual(prepared["orders"]["wip_number"].tolist(), ["7", "8"])
+        tests = prepared["tests"]
+        self.assertEqual(
+            tests[["wip_number", "name"]].values.tolist(), [["7", "Run 2"]]
+        )
+        self.assertAlmostEqual(tests["first_stage_temp"][0], 23.15)
+        # The 400 K bound is checked against the sheet's Celsius values
+        self.assertAlmostEqual(
+            profile.rules(sheet.columns)["ranges"]["Run 2 T1 (C)"][1], 126.85
+        )
+
+    def test_invalid_profiles_fail_to_compile(self):
+        base = {
+            "fields": {
+                "wip_number": {"column": "WIP"},
+                "coldhead_serial_number": {"column": "C"},
+                "displacer_serial_number": {"column": "D"},
+            }
+        }
+        broken_fields = [
+            {"arrival_date": {"column": "A", "type": "datetime"}},
+            {
+                "temp": {
+                    "column": "T",
+                    "type": "number",
+                    "source_unit": "F",
+                    "unit": "K",
+                }
+            },
+            {"temp": {"column": "T", "units": "K"}},
+        ]
+        for fields in broken_fields:
+            with self.assertRaises(ValueError):
+                ImportProfile({"fields": {**base["fields"], **fields}})
+        with self.assertRaises(ValueError):
+            ImportProfile(
+                {**base, "groups": {"tests": {"fields": {"mode": {"column": "Mode"}}}}}
+            )
+        with self.assertRaises(ValueError):
+            ImportProfile({"fields": {"wip_number": {"column": "WIP"}}})
+
+    def test_mass_importer_uses_profile(self):
+        engine = create_engine("sqlite:///:memory:", echo=False)
+        configure_sqlite_transactions(engine)
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        path = os.path.join(self.tmp_dir.name, "shop.xlsx")
+        pd.DataFrame(
+            {
+                "Work Order": ["7", "8"],
+                "Coldhead": ["C1", "C1"],
+                "Displacer": ["D1", "D2"],
+                "Received": ["2024-03-01", "bad"],
+                "Run 1 Result": ["Pass", None],
+            }
+        ).to_excel(path, index=False)
+
+        importer = MassImporter(session, self.write("shop.yaml", SHOP_PROFILE))
+        counts = importer.stream_insert_from_excel(path)
+
+        self.assertEqual(
+            (counts["wips"], counts["invalid"], counts["tests"]), (1, 1, 1)
+        )
+        wip = session.query(WIP).one()
+        self.assertEqual(wip.arrival_date, datetime.date(2024, 3, 1))
+        self.assertEqual([test.name for test in wip.tests], ["Run 1"])
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
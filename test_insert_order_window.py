@@ -99,6 +99,9 @@ class TestInsertOrderWindow(unittest.TestCase):
                 self.assertEqual(wip.coldhead.serial_number, data['coldhead_serial'])
                 self.assertEqual(wip.displacer.displacer_serial_number, data['displacer_serial'])
                 self.assertEqual(str(wip.arrival_date), data['arrival_date'])
+                self.assertEqual(
+                    [test.test_id for test in wip.tests], [int(data['test_id'])]
+                )
                 if data['teardown_date']:
                     self.assertEqual(str(wip.teardown_date), data['teardown_date'])
 
@@ -0,0 +1,271 @@
+# test_mass_import.py
+
+import datetime
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db_ops.chunk_readers import iter_excel_chunks
+from db_ops.database import configure_sqlite_transactions
+from db_ops.error_handler import ImportCancelledError
+from db_ops.import_profiles import prepare_orders
+from db_ops.mass_import import MassImporter
+from db_ops.models import Base, Coldhead, Displacer, Test, WIP
+
+
+def make_sheet():
+    return pd.DataFrame(
+        {
+            "WIP": ["W1", "W2", "W3", "W2", None],
+            "Coldhead_Serial_Number": [1001.0, 1002.0, 1001.0, 1002.0, 1003.0],
+            "Displacer_Serial_Number": ["D1", " D2 ", "D3", "D2", "D4"],
+            "Arrival_Date": ["2024-01-05", "not a date", None, "2024-01-06", None],
+            "Initial_Open_Date": [None, "2023-12-01", None, None, None],
+            "Test1_PassFail": ["Pass", None, None, "Fail", None],
+            "Test1_Mode": ["A", None, "B", None, None],
+            "Test2_PassFail": [None, "Fail", None, None, None],
+        }
+    )
+
+
+class TestPrepareOrders(unittest.TestCase):
+    def test_normalizes_columns(self):
+        prepared = prepare_orders(make_sheet())
+        orders = prepared["orders"]
+
+        self.assertEqual(prepared["skipped"], 2)  # Missing WIP, repeated W2
+        self.assertEqual(orders["wip_number"].tolist(), ["W1", "W2", "W3"])
+        self.assertEqual(
+            orders["coldhead_serial_number"].tolist(), ["1001", "1002", "1001"]
+        )
+        self.assertEqual(orders["displacer_serial_number"][1], "D2")
+        self.assertEqual(
+            orders["arrival_date"].tolist(), [datetime.date(2024, 1, 5), None, None]
+        )
+
+        tests = prepared["tests"].sort_values(["wip_number", "name"])
+        self.assertEqual(
+            tests[["wip_number", "name", "pass_fail", "mode"]].values.tolist(),
+            [
+                ["W1", "Test1", "Pass", "A"],
+                ["W2", "Test2", "Fail", ""],
+                ["W3", "Test1", "Pending", "B"],
+            ],
+        )
+
+    def test_missing_columns_raise(self):
+        with self.assertRaises(ValueError):
+            prepare_orders(pd.DataFrame({"WIP": ["W1"]}))
+
+
+class TestMassImporter(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        configure_sqlite_transactions(self.engine)
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "orders.xlsx")
+        make_sheet().to_excel(self.path, index=False)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def test_import_and_reimport(self):
+        importer = MassImporter(self.session)
+        counts = importer.mass_insert_from_excel(self.path, chunk_size=2)
+
+        # Invalid: W2's arrival date, the repeated W2 row and the row without a WIP
+        self.assertEqual(
+            counts,
+            {
+                "rows": 5, "invalid": 3, "skipped": 0, "coldheads": 1,
+                "displacers": 2, "wips": 2, "tests": 2, "updated": 0, "unchanged": 0,
+            },
+        )
+        self.assertEqual(
+            importer.last_report[["row", "rule"]].values.tolist(),
+            [[3, "invalid_date"], [5, "duplicate"], [6, "missing_value"]],
+        )
+        wip = self.session.query(WIP).filter_by(wip_number="W3").one()
+        self.assertEqual(wip.coldhead.serial_number, "1001")
+        self.assertEqual(wip.displacer.displacer_serial_number, "D3")
+        self.assertEqual([test.name for test in wip.tests], ["Test1"])
+
+        counts = importer.mass_insert_from_excel(self.path)
+        self.assertEqual(counts["wips"] + counts["tests"] + counts["coldheads"], 0)
+        self.assertEqual((counts["unchanged"], counts["updated"]), (2, 0))
+        self.assertIn("exists", importer.last_report["rule"].tolist())
+        self.assertEqual(self.session.query(Test).count(), 2)
+        self.assertEqual(self.session.query(Coldhead).count(), 1)
+        self.assertEqual(self.session.query(Displacer).count(), 2)
+
+    def test_reimport_writes_only_changed_rows(self):
+        importer = MassImporter(self.session)
+        importer.mass_insert_from_excel(self.path)
+
+        sheet = make_sheet()
+        sheet.loc[2, "Arrival_Date"] = "2024-02-01"
+        sheet.loc[2, "Test2_PassFail"] = "Pass"
+        sheet.to_excel(self.path, index=False)
+        counts = importer.mass_insert_from_excel(self.path)
+
+        self.assertEqual(
+            (counts["unchanged"], counts["updated"], counts["tests"]), (1, 1, 1)
+        )
+        wip = self.session.query(WIP).filter_by(wip_number="W3").one()
+        self.assertEqual(wip.arrival_date, datetime.date(2024, 2, 1))
+        self.assertEqual(sorted(test.name for test in wip.tests), ["Test1", "Test2"])
+
+        counts = importer.mass_insert_from_excel(self.path)
+        self.assertEqual(
+            (counts["unchanged"], counts["updated"], counts["tests"]), (2, 0, 0)
+        )
+
+    def test_progress_and_cancel_at_chunk_boundary(self):
+        importer = MassImporter(self.session)
+        cancel = threading.Event()
+        reports = []
+
+        def progress(report):
+            reports.append(report)
+            cancel.set()
+
+        with self.assertRaises(ImportCancelledError) as raised:
+            importer.stream_insert_from_excel(
+                self.path, chunk_size=2, progress=progress, cancel=cancel
+            )
+
+        self.assertEqual(raised.exception.counts["rows"], 2)
+        self.assertEqual(len(reports), 1)
+        self.assertEqual((reports[0]["rows_done"], reports[0]["rows_total"]), (2, 5))
+        self.assertGreater(reports[0]["eta_seconds"], 0)
+        self.assertEqual([timing["chunk"] for timing in importer.last_timings], [1])
+
+        counts = importer.stream_insert_from_excel(
+            self.path, chunk_size=2, progress=reports.append
+        )
+        self.assertEqual((counts["resumed"], counts["wips"]), (2, 1))
+        self.assertEqual([report["rows_done"] for report in reports[1:]], [4, 5])
+        self.assertEqual(reports[-1]["eta_seconds"], 0)
+
+    def test_either_reader_resumes_an_interrupted_import(self):
+        # A blank row mid-sheet is dropped by both readers alike
+        pd.DataFrame(
+            {
+                "WIP": ["A1", None, "A2", "A3", "A4"],
+                "Coldhead_Serial_Number": [1001.0, None, 1002.0, 1003.0, 1004.0],
+                "Displacer_Serial_Number": ["D1", None, "D2", "D3", "D4"],
+                "Arrival_Date": [None] * 5,
+                "Initial_Open_Date": [None] * 5,
+            }
+        ).to_excel(self.path, index=False)
+        importer = MassImporter(self.session)
+        cancel = threading.Event()
+
+        with self.assertRaises(ImportCancelledError):
+            importer.mass_insert_from_excel(
+                self.path, chunk_size=2, progress=lambda _: cancel.set(), cancel=cancel
+            )
+        counts = importer.stream_insert_from_excel(self.path, chunk_size=2)
+
+        self.assertEqual((counts["rows"], counts["resumed"], counts["wips"]), (4, 2, 2))
+        self.assertEqual(
+            sorted(wip.wip_number for wip in self.session.query(WIP)),
+            ["A1", "A2", "A3", "A4"],
+        )
+
+    def test_wips_may_share_a_displacer(self):
+        pd.DataFrame(
+            {
+                "WIP": ["398517", "401479"],
+                "Coldhead_Serial_Number": ["J03636", "J02813"],
+                "Displacer_Serial_Number": ["R6650/R6071", "R6650/R6071"],
+                "Arrival_Date": ["2024-01-05", "2024-02-05"],
+                "Initial_Open_Date": [None, None],
+            }
+        ).to_excel(self.path, index=False)
+
+        importer = MassImporter(self.session)
+        counts = importer.mass_insert_from_excel(self.path)
+
+        self.assertEqual((counts["wips"], counts["invalid"]), (2, 0))
+        self.assertTrue(importer.last_report.empty)
+        self.assertEqual(
+            {wip.displacer.displacer_serial_number for wip in self.session.query(WIP)},
+            {"R6650/R6071"},
+        )
+
+    def test_existing_wips_keep_their_coldhead(self):
+        for mode in ("bulk", "staging"):
+            with self.subTest(mode=mode):
+                engine = create_engine("sqlite:///:memory:", echo=False)
+                configure_sqlite_transactions(engine)
+                Base.metadata.create_all(engine)
+                session = sessionmaker(bind=engine)()
+                importer = MassImporter(session, mode=mode)
+                make_sheet().to_excel(self.path, index=False)
+                importer.mass_insert_from_excel(self.path)
+
+                sheet = make_sheet()
+                sheet.loc[0, "Coldhead_Serial_Number"] = 1009.0
+                sheet.loc[0, "Arrival_Date"] = "2024-03-01"
+                sheet.to_excel(self.path, index=False)
+                counts = importer.mass_insert_from_excel(self.path)
+
+                self.assertEqual((counts["invalid"], counts["updated"]), (4, 0))
+                self.assertIn(
+                    [2, "conflict"],
+                    importer.last_report[["row", "rule"]].values.tolist(),
+                )
+                wip = session.query(WIP).filter_by(wip_number="W1").one()
+                self.assertEqual(wip.coldhead.serial_number, "1001")
+                self.assertEqual(wip.arrival_date, datetime.date(2024, 1, 5))
+                session.close()
+                engine.dispose()
+
+    def test_dry_run_does_not_write(self):
+        result = MassImporter(self.session).dry_run_from_excel(self.path, chunk_size=2)
+
+        self.assertEqual(result["summary"]["error_rows"], 3)
+        self.assertEqual(len(result["report"]), 3)
+        self.assertEqual(self.session.query(WIP).count(), 0)
+
+    def test_streaming_import_matches_full_import(self):
+        chunks = list(iter_excel_chunks(self.path, chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(list(chunks[0].columns), list(make_sheet().columns))
+
+        importer = MassImporter(self.session)
+        counts = importer.stream_insert_from_excel(self.path, chunk_size=2)
+
+        self.assertEqual(
+            counts,
+            {
+                "rows": 5, "invalid": 3, "skipped": 0, "coldheads": 1,
+                "displacers": 2, "wips": 2, "tests": 2, "updated": 0, "unchanged": 0,
+            },
+        )
+        self.assertEqual(len(importer.last_report), 3)
+        wip = self.session.query(WIP).filter_by(wip_number="W1").one()
+        self.assertEqual(wip.arrival_date, datetime.date(2024, 1, 5))
+        self.assertEqual(wip.displacer.initial_open_date, None)
+
+    def test_xls_files_are_read_through_pandas(self):
+        with mock.patch("pandas.read_excel", return_value=make_sheet()) as read_excel:
+            chunks = list(iter_excel_chunks("orders.XLS", chunk_size=2))
+
+        read_excel.assert_called_once_with("orders.XLS", sheet_name=0)
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
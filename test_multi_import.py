@@ -0,0 +1,131 @@
+# test_multi_import.py
+
+import datetime
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db_ops.database import configure_sqlite_transactions
+from db_ops.models import Base, Test, WIP
+from db_ops.multi_import import (
+    ORDERS,
+    REPAIR_TESTS,
+    TRACKERS,
+    MultiFileImporter,
+    detect_kind,
+)
+from test_csv_import import TESTS_CSV, TRACKERS_CSV
+from test_mass_import import make_sheet
+
+
+class TestMultiFileImporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(
+            f"sqlite:///{os.path.join(self.tmp_dir.name, 'multi.db')}", echo=False
+        )
+        configure_sqlite_transactions(self.engine)
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+
+        self.orders = os.path.join(self.tmp_dir.name, "orders.xlsx")
+        make_sheet().to_excel(self.orders, index=False)
+        self.trackers = self.write("trackers.csv", TRACKERS_CSV)
+        self.tests = self.write("tests.csv", TESTS_CSV)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_detect_kind(self):
+        self.assertEqual(detect_kind(self.orders), ORDERS)
+        self.assertEqual(detect_kind(self.trackers), TRACKERS)
+        self.assertEqual(detect_kind(self.tests), REPAIR_TESTS)
+        with self.assertRaises(ValueError):
+            detect_kind(self.write("other.csv", "a,b\n1,2\n"))
+
+    def test_imports_all_files_through_one_writer(self):
+        bad = self.write("bad.csv", "a,b\n1,2\n")
+        self.importer = MultiFileImporter(self.session, workers=2, chunk_size=2)
+        results = self.importer.import_files(
+            [self.orders, self.trackers, self.tests, bad]
+        )
+
+        self.assertIn("error", results[bad])
+        self.assertEqual(results[self.orders]["rows"], 5)
+        self.assertEqual(results[self.trackers]["rows"], 4)
+        self.assertEqual(results[self.tests]["rows"], 3)
+        self.assertEqual(results[self.orders]["invalid"], 3)
+        self.assertEqual(results[self.tests]["invalid"], 1)
+        self.assertEqual(self.importer.last_reports[self.orders]["row"].nunique(), 3)
+        wip_numbers = {wip.wip_number for wip in self.session.query(WIP).all()}
+        self.assertTrue({"W1", "W3", "29458", "32707", "428523"} <= wip_numbers)
+        self.assertNotIn("W2", wip_numbers)
+        self.assertEqual(
+            self.session.query(Test).filter(Test.name.like("RT-%")).count(), 2
+        )
+
+    def test_existing_wips_keep_their_coldhead(self):
+        self.importer = MultiFileImporter(self.session, workers=1, chunk_size=2)
+        self.importer.import_files([self.orders])
+
+        sheet = make_sheet()
+        sheet.loc[0, "Coldhead_Serial_Number"] = 1009.0
+        sheet.loc[0, "Arrival_Date"] = "2024-03-01"
+        sheet.to_excel(self.orders, index=False)
+        results = self.importer.import_files([self.orders])
+
+        # Rejected as MassImporter rejects it, with the in-file errors
+        counts = results[self.orders]
+        self.assertEqual((counts["invalid"], counts["updated"]), (4, 0))
+        self.assertIn(
+            [2, "conflict"],
+            self.importer.last_reports[self.orders][["row", "rule"]].values.tolist(),
+        )
+        wip = self.session.query(WIP).filter_by(wip_number="W1").one()
+        self.assertEqual(wip.coldhead.serial_number, "1001")
+        self.assertEqual(wip.arrival_date, datetime.date(2024, 1, 5))
+
+    def test_write_failure_stops_the_file(self):
+        self.importer = MultiFileImporter(self.session, workers=1, chunk_size=2)
+        write_batch = self.importer.write_batch
+        calls = []
+
+        def fail_first_tracker_chunk(kind, prepared):
+            calls.append(kind)
+            if kind == TRACKERS and calls.count(TRACKERS) == 1:
+                raise RuntimeError("disk I/O error")
+            return write_batch(kind, prepared)
+
+        self.importer.write_batch = fail_first_tracker_chunk
+        results = self.importer.import_files([self.trackers, self.tests])
+
+        self.assertEqual(results[self.trackers], {"error": "disk I/O error"})
+        self.assertEqual(calls.count(TRACKERS), 1)
+        # The second chunk (WIP 32707) was not written after the first failed
+        wip_numbers = {wip.wip_number for wip in self.session.query(WIP).all()}
+        self.assertFalse({"UNKNOWN", "32707"} & wip_numbers)
+        self.assertEqual(results[self.tests]["rows"], 3)
+
+    def test_dry_run_writes_nothing(self):
+        results = MultiFileImporter(self.session, workers=1).dry_run(
+            [self.orders, self.tests]
+        )
+
+        self.assertEqual(results[self.orders]["summary"]["error_rows"], 3)
+        self.assertEqual(results[self.tests]["summary"]["error_rows"], 1)
+        self.assertEqual(self.session.query(WIP).count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+# test_schema_reconcile.py
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, text
+from sqlalchemy.exc import IntegrityError
+
+from db_ops.error_handler import SchemaReconcileError
+from db_ops.models import Base
+from db_ops.schema_reconcile import reconcile_schema
+
+# An older site database: no journal tables, and columns added since missing
+OLD_SCHEMA = """
+    CREATE TABLE coldheads (
+        coldhead_id INTEGER PRIMARY KEY, serial_number VARCHAR NOT NULL UNIQUE
+    );
+    CREATE TABLE displacers (
+        displacer_id INTEGER PRIMARY KEY,
+        displacer_serial_number VARCHAR NOT NULL UNIQUE, status VARCHAR,
+        Legacy_Notes TEXT
+    );
+    CREATE TABLE wips (
+        wip_id INTEGER PRIMARY KEY, coldhead_id INTEGER NOT NULL,
+        displacer_id INTEGER NOT NULL, wip_number VARCHAR NOT NULL UNIQUE,
+        arrival_date DATE, teardown_date DATE, status VARCHAR
+    );
+    CREATE TABLE Tests (test_id INTEGER PRIMARY KEY, NAME VARCHAR NOT NULL);
+    INSERT INTO coldheads VALUES (1, 'C1');
+    INSERT INTO displacers VALUES (1, 'D1', NULL, 'kept');
+    INSERT INTO wips VALUES (1, 1, 1, 'W1', NULL, NULL, NULL);
+    INSERT INTO Tests VALUES (1, 'Test1');
+"""
+
+
+class TestSchemaReconcile(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "site.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(OLD_SCHEMA)
+        conn.close()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def query(self, sql):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def columns(self, table):
+        return [row[1] for row in self.query(f"PRAGMA table_info({table})")]
+
+    def test_old_database_is_brought_up_to_date(self):
+        result = reconcile_schema(self.db_path)
+
+        self.assertEqual(
+            sorted(result["tables_created"]),
+            [
+                "change_log",
+                "coldhead_test_summary",
+                "displacer_test_summary",
+                "import_journal",
+                "import_row_hashes",
+            ],
+        )
+        self.assertIn(
+            "ALTER TABLE displacers ADD COLUMN initial_open_date DATE",
+            result["statements"],
+        )
+        self.assertIn(
+            "ALTER TABLE tests ADD COLUMN wip_id INTEGER REFERENCES wips (wip_id)",
+            result["statements"],
+        )
+        self.assertEqual(result["extra_columns"], {"displacers": ["legacy_notes"]})
+        self.assertEqual(
+            self.columns("Tests")[:4], ["test_id", "NAME", "wip_id", "test_date"]
+        )
+        self.assertEqual(self.query("SELECT Legacy_Notes FROM displacers"), [("kept",)])
+        # The journal tables come with their index and triggers
+        names = {row[0] for row in self.query("SELECT name FROM sqlite_master")}
+        self.assertIn("ix_import_journal_fingerprint", names)
+        self.assertIn("trg_wips_update_log", names)
+
+        self.assertEqual(reconcile_schema(self.db_path)["statements"], [])
+
+    def test_dry_run_changes_nothing(self):
+        result = reconcile_schema(self.db_path, dry_run=True)
+
+        self.assertTrue(result["statements"])
+        self.assertEqual(
+            self.columns("displacers"),
+            ["displacer_id", "displacer_serial_number", "status", "Legacy_Notes"],
+        )
+        self.assertEqual(
+            self.query("SELECT name FROM sqlite_master WHERE name = 'change_log'"), []
+        )
+
+    def test_unsupported_changes_apply_nothing(self):
+        metadata = MetaData()
+        for table in Base.metadata.sorted_tables:
+            table.to_metadata(metadata)
+        metadata.tables["wips"].append_column(Column("site", String, nullable=False))
+
+        with self.assertRaises(SchemaReconcileError) as raised:
+            reconcile_schema(self.db_path, metadata)
+
+        self.assertEqual(
+            raised.exception.problems,
+            ["wips.site is NOT NULL without a server default"],
+        )
+        self.assertNotIn("initial_open_date", self.columns("displacers"))
+
+    def test_failure_rolls_back_every_change(self):
+        metadata = MetaData()
+        for table in Base.metadata.sorted_tables:
+            table.to_metadata(metadata)
+        # Unique, so a unique index is created beside it; W1 and W2 collide
+        metadata.tables["wips"].append_column(
+            Column("tag", String, unique=True, server_default="x")
+        )
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("INSERT INTO wips VALUES (2, 1, 1, 'W2', NULL, NULL, NULL)")
+        conn.commit()
+        conn.close()
+
+        with self.assertRaises(IntegrityError):
+            reconcile_schema(self.db_path, metadata)
+
+        self.assertNotIn("tag", self.columns("wips"))
+        self.assertNotIn("initial_open_date", self.columns("displacers"))
+        self.assertEqual(
+            self.query("SELECT name FROM sqlite_master WHERE name = 'change_log'"), []
+        )
+
+    def test_constant_text_default_is_accepted(self):
+        metadata = MetaData()
+        Table(
+            "tests",
+            metadata,
+            Column("test_id", Integer, primary_key=True),
+            Column("attempt", Integer, nullable=False, server_default=text("1")),
+        )
+
+        reconcile_schema(self.db_path, metadata)
+
+        self.assertEqual(self.query("SELECT attempt FROM tests"), [(1,)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+# test_snapshot_db.py
+
+import datetime
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from db_mngt.dbs import snapshot_db
+
+
+class TestSnapshotDb(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "New_Database.db")
+        self.snapshot_dir = os.path.join(self.tmp_dir.name, "snapshots")
+        # The app's connection, open for the whole test
+        self.app = sqlite3.connect(self.db_path, isolation_level=None)
+        self.app.execute(
+            "CREATE TABLE wips (wip_id INTEGER PRIMARY KEY, wip_number TEXT)"
+        )
+        with self.app:
+            self.app.execute("BEGIN")
+            self.app.executemany(
+                "INSERT INTO wips (wip_number) VALUES (?)",
+                [(f"W{i}",) for i in range(2000)],
+            )
+        print_patch = mock.patch("builtins.print")
+        print_patch.start()
+        self.addCleanup(print_patch.stop)
+
+    def tearDown(self):
+        self.app.close()
+        self.tmp_dir.cleanup()
+
+    def count(self, path):
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM wips").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_snapshot_is_consistent_while_the_app_writes(self):
+        writes = []
+
+        def write_between_steps(*args):
+            # Runs between backup steps, as another connection would
+            if len(writes) < 3:
+                self.app.execute("INSERT INTO wips (wip_number) VALUES ('new')")
+                writes.append(1)
+
+        with mock.patch.object(snapshot_db.time, "sleep", write_between_steps):
+            stats = snapshot_db.snapshot(
+                self.db_path, self.snapshot_dir, pages_per_step=1
+            )
+
+        self.assertGreater(stats["steps"], 1)
+        self.assertEqual(len(writes), 3)
+        self.assertEqual(self.count(stats["path"]), self.count(self.db_path))
+        self.assertEqual(
+            os.listdir(self.snapshot_dir), [os.path.basename(stats["path"])]
+        )
+
+    def test_steady_writes_fall_back_to_one_step(self):
+        def write_between_steps(*args):
+            self.app.execute("INSERT INTO wips (wip_number) VALUES ('new')")
+
+        with mock.patch.object(snapshot_db.time, "sleep", write_between_steps):
+            stats = snapshot_db.snapshot(
+                self.db_path, self.snapshot_dir, pages_per_step=1
+            )
+
+        self.assertEqual(stats["restarts"], snapshot_db.MAX_RESTARTS + 1)
+        self.assertEqual(self.count(stats["path"]), self.count(self.db_path))
+
+    def test_wal_snapshot_reads_one_snapshot_without_restarts(self):
+        self.app.execute("PRAGMA journal_mode = WAL")
+        before = self.count(self.db_path)
+
+        def write_between_steps(*args):
+            self.app.execute("INSERT INTO wips (wip_number) VALUES ('new')")
+
+        with mock.patch.object(snapshot_db.time, "sleep", write_between_steps):
+            stats = snapshot_db.snapshot(
+                self.db_path, self.snapshot_dir, pages_per_step=1
+            )
+
+        self.assertEqual(stats["restarts"], 0)
+        self.assertEqual(self.count(stats["path"]), before)
+        self.assertEqual(self.count(self.db_path), before + stats["steps"] - 1)
+
+    def test_retention_keeps_the_newest_snapshots(self):
+        paths = []
+        for day in range(1, 6):
+            taken_at = datetime.datetime(2024, 1, day, 12)
+            with mock.patch.object(snapshot_db, "utc_now", return_value=taken_at):
+                stats = snapshot_db.snapshot(self.db_path, self.snapshot_dir, keep=3)
+                paths.append(stats["path"])
+
+        snapshots = snapshot_db.list_snapshots(self.db_path, self.snapshot_dir)
+        self.assertEqual([path for _, path in snapshots], paths[2:])
+        deleted = snapshot_db.prune_snapshots(
+            self.db_path,
+            self.snapshot_dir,
+            keep=3,
+            max_age_days=2.5,
+            now=datetime.datetime(2024, 1, 6, 12),
+        )
+        self.assertEqual(deleted, [paths[2]])
+        # The newest snapshot survives any age limit
+        snapshot_db.prune_snapshots(self.db_path, self.snapshot_dir, max_age_days=0)
+        self.assertEqual(
+            snapshot_db.list_snapshots(self.db_path, self.snapshot_dir)[0][1], paths[4]
+        )
+
+    def test_restore_is_seen_by_open_connections(self):
+        snapshot_db.snapshot(self.db_path, self.snapshot_dir)
+        self.app.execute("DELETE FROM wips WHERE wip_id > 10")
+
+        stats = snapshot_db.restore(self.db_path, snapshot_dir=self.snapshot_dir)
+
+        self.assertEqual(
+            self.app.execute("SELECT COUNT(*) FROM wips").fetchone()[0], 2000
+        )
+        # The data the restore replaced was snapshotted first
+        self.assertEqual(self.count(stats["snapshot_first"]), 10)
+        self.assertNotEqual(stats["snapshot_first"], stats["path"])
+
+    def test_restore_without_snapshots_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            snapshot_db.restore(self.db_path, snapshot_dir=self.snapshot_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
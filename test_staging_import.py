@@ -0,0 +1,128 @@
+# test_staging_import.py
+
+import datetime
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db_ops.database import configure_sqlite_transactions
+from db_ops.import_pipeline import BulkOrderWriter
+from db_ops.import_profiles import prepare_orders
+from db_ops.mass_import import MassImporter
+from db_ops.models import Base, WIP
+from db_ops.staging_import import StagingOrderWriter
+from test_mass_import import make_sheet
+
+SNAPSHOT_QUERIES = [
+    "SELECT serial_number FROM coldheads ORDER BY 1",
+    "SELECT displacer_serial_number, initial_open_date FROM displacers ORDER BY 1",
+    "SELECT w.wip_number, c.serial_number, d.displacer_serial_number, w.arrival_date "
+    "FROM wips w JOIN coldheads c USING (coldhead_id) "
+    "JOIN displacers d USING (displacer_id) ORDER BY 1",
+    "SELECT w.wip_number, t.name FROM tests t JOIN wips w USING (wip_id) ORDER BY 1, 2",
+    "SELECT natural_key, content_hash FROM import_row_hashes ORDER BY 1",
+]
+
+
+def make_session():
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    configure_sqlite_transactions(engine)
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(bind=engine)()
+
+
+def changed_sheet():
+    sheet = make_sheet()
+    sheet.loc[0, "Arrival_Date"] = None  # Blank cells never clear stored values
+    sheet.loc[0, "Initial_Open_Date"] = "2023-11-20"
+    sheet.loc[2, "Arrival_Date"] = "2024-02-01"
+    sheet.loc[2, "Test2_PassFail"] = "Pass"
+    sheet.loc[4, "WIP"] = "W5"
+    return sheet
+
+
+class TestStagingOrderWriter(unittest.TestCase):
+    def setUp(self):
+        self.sessions = {}
+        for writer in (BulkOrderWriter, StagingOrderWriter):
+            self.sessions[writer] = make_session()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        for engine, session in self.sessions.values():
+            session.close()
+            engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def import_with_both(self, sheet):
+        counts = {}
+        for writer, (_, session) in self.sessions.items():
+            counts[writer] = writer(session, chunk_size=2).write(prepare_orders(sheet))
+        return counts
+
+    def snapshot(self, writer):
+        connection = self.sessions[writer][1].connection()
+        return [connection.exec_driver_sql(sql).all() for sql in SNAPSHOT_QUERIES]
+
+    def test_merge_matches_bulk_writer(self):
+        for sheet in (make_sheet(), changed_sheet(), changed_sheet()):
+            counts = self.import_with_both(sheet)
+            self.assertEqual(counts[StagingOrderWriter], counts[BulkOrderWriter])
+            self.assertEqual(
+                self.snapshot(StagingOrderWriter), self.snapshot(BulkOrderWriter)
+            )
+        staging = counts[StagingOrderWriter]
+        self.assertEqual((staging["unchanged"], staging["wips"]), (4, 0))
+
+    def test_part_changes_apply_to_existing_wips(self):
+        self.import_with_both(make_sheet())
+        sheet = make_sheet()
+        sheet.loc[0, "Coldhead_Serial_Number"] = 1009.0
+        sheet.loc[0, "Displacer_Serial_Number"] = "D9"
+        counts = self.import_with_both(sheet)
+
+        self.assertEqual(counts[StagingOrderWriter], counts[BulkOrderWriter])
+        self.assertEqual(
+            (counts[StagingOrderWriter]["updated"], counts[StagingOrderWriter]["wips"]),
+            (1, 0),
+        )
+        self.assertEqual(
+            self.snapshot(StagingOrderWriter), self.snapshot(BulkOrderWriter)
+        )
+        snapshot = self.snapshot(StagingOrderWriter)
+        wips, hashes = snapshot[2], snapshot[4]
+        self.assertEqual(wips[0][:3], ("W1", "1009", "D9"))
+        self.assertEqual([row[0] for row in hashes], ["W1", "W2", "W3"])
+
+    def test_merge_keeps_columns_the_sheet_does_not_carry(self):
+        _, session = self.sessions[StagingOrderWriter]
+        importer = MassImporter(session, mode="staging")
+        path = os.path.join(self.tmp_dir.name, "orders.xlsx")
+        make_sheet().to_excel(path, index=False)
+        importer.mass_insert_from_excel(path)
+        wip = session.query(WIP).filter_by(wip_number="W1").one()
+        wip.status = "Teardown"
+        wip.teardown_date = datetime.date(2024, 2, 1)
+        session.commit()
+
+        changed_sheet().to_excel(path, index=False)
+        counts = importer.mass_insert_from_excel(path)
+
+        self.assertEqual((counts["updated"], counts["wips"]), (2, 1))
+        session.refresh(wip)
+        self.assertEqual(
+            (wip.status, wip.teardown_date, wip.arrival_date),
+            ("Teardown", datetime.date(2024, 2, 1), datetime.date(2024, 1, 5)),
+        )
+        self.assertEqual(wip.displacer.initial_open_date, datetime.date(2023, 11, 20))
+
+    def test_unknown_mode_raises(self):
+        with self.assertRaises(ValueError):
+            MassImporter(self.sessions[StagingOrderWriter][1], mode="replace")
+
+
+if __name__ == "__main__":
+    unittest.main()
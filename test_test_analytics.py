@@ -0,0 +1,145 @@
+# test_test_analytics.py
+
+import unittest
+from unittest import mock
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db_ops.database import configure_sqlite_transactions
+from db_ops.models import WIP, Base, Coldhead, Displacer, Test
+from db_ops.test_analytics import FleetAnalytics
+
+
+class TestFleetAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        configure_sqlite_transactions(self.engine)
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+
+        coldheads = [Coldhead(serial_number="J1"), Coldhead(serial_number="J2")]
+        displacers = [Displacer(displacer_serial_number="R1")]
+        self.wips = [
+            WIP(wip_number="W1", coldhead=coldheads[0], displacer=displacers[0]),
+            WIP(wip_number="W2", coldhead=coldheads[1], displacer=displacers[0]),
+        ]
+        self.session.add_all(coldheads + displacers + self.wips)
+        self.session.flush()
+        # J1: four tests, one pending; J2: two tests; one test has no WIP
+        for i, (wip, result, temp, station) in enumerate(
+            [
+                (self.wips[0], "Pass", 40.0, 1),
+                (self.wips[0], "Fail", 50.0, 1),
+                (self.wips[0], "Pass", 60.0, 2),
+                (self.wips[0], "Pending", None, 2),
+                (self.wips[1], "PASS", 45.0, 2),
+                (self.wips[1], "Fail", 47.0, None),
+                (None, "Pass", 41.0, 3),
+            ]
+        ):
+            self.session.add(
+                Test(
+                    name=f"Test {i}",
+                    wip=wip,
+                    pass_fail=result,
+                    station=station,
+                    first_stage_temp=temp,
+                    efficiency1=0.1 * (i + 1),
+                )
+            )
+        self.session.commit()
+        self.analytics = FleetAnalytics(self.session)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def test_stats_per_coldhead(self):
+        stats = self.analytics.group_stats("coldhead", percentiles=(25, 50))
+
+        self.assertEqual(list(stats.index), ["J1", "J2", None])
+        j1 = stats.loc["J1"]
+        self.assertEqual((j1["tests"], j1["passed"], j1["failed"]), (4, 2, 1))
+        self.assertAlmostEqual(j1["pass_rate"], 2 / 3)
+        self.assertEqual(j1["first_stage_temp_count"], 3)
+        self.assertAlmostEqual(j1["first_stage_temp_mean"], 50.0)
+        self.assertAlmostEqual(j1["first_stage_temp_std"], np.std([40.0, 50.0, 60.0]))
+        for percentile in (25, 50):
+            self.assertAlmostEqual(
+                j1[f"first_stage_temp_p{percentile}"],
+                np.percentile([40.0, 50.0, 60.0], percentile),
+            )
+        self.assertEqual(
+            (j1["first_stage_temp_min"], j1["first_stage_temp_max"]), (40.0, 60.0)
+        )
+        self.assertAlmostEqual(stats.loc["J2", "pass_rate"], 0.5)
+        self.assertEqual(stats.loc[None, "tests"], 1)
+
+    def test_stats_per_station_and_distribution(self):
+        stats = self.analytics.group_stats("station", measurements=["efficiency1"])
+
+        self.assertEqual(list(stats.index), [1, 2, 3, None])
+        self.assertEqual(list(stats["tests"]), [2, 3, 1, 1])
+        self.assertAlmostEqual(
+            stats.loc[2, "efficiency1_p50"], np.median([0.3, 0.4, 0.5])
+        )
+
+        histogram = self.analytics.distribution(
+            "displacer", "first_stage_temp", [40, 45, 50, 60]
+        )
+        self.assertEqual(list(histogram.columns), ["40", "45", "50"])
+        self.assertEqual(histogram.loc["R1"].tolist(), [1, 2, 2])
+        self.assertEqual(histogram.loc[None].tolist(), [1, 0, 0])
+
+    def test_refresh_reloads_only_changes(self):
+        self.analytics.group_stats("coldhead")
+        tests = self.session.query(Test).order_by(Test.test_id).all()
+        tests[0].first_stage_temp = 70.0
+        tests[1].wip = self.wips[1]
+        self.session.delete(tests[2])
+        self.session.add(
+            Test(name="New", wip=self.wips[1], pass_fail="Pass", first_stage_temp=52.0)
+        )
+        self.session.commit()
+
+        refreshed = self.analytics.group_stats("coldhead")
+
+        self.assertEqual(len(self.analytics.tests["test_id"]), 7)
+        fresh = FleetAnalytics(self.session).group_stats("coldhead")
+        self.assertTrue(refreshed.equals(fresh))
+        self.assertEqual(refreshed.loc["J2", "tests"], 4)
+        self.assertAlmostEqual(refreshed.loc["J1", "first_stage_temp_max"], 70.0)
+
+    def test_refresh_patches_the_runs(self):
+        self.analytics.fleet_report()
+        self.wips[1].coldhead = Coldhead(serial_number="J3")
+        tests = self.session.query(Test).order_by(Test.test_id).all()
+        tests[4].first_stage_temp = 41.0
+        tests[6].pass_fail = "Fail"
+        self.session.add(Test(name="New", pass_fail="Pass", efficiency1=0.5))
+        self.session.commit()
+
+        with mock.patch.object(FleetAnalytics, "_build_runs") as build_runs:
+            refreshed = self.analytics.fleet_report()
+            histogram = self.analytics.distribution("coldhead", "efficiency1", [0, 1])
+
+        build_runs.assert_not_called()
+        fresh = FleetAnalytics(self.session)
+        for by, frame in fresh.fleet_report().items():
+            self.assertTrue(refreshed[by].equals(frame))
+        self.assertTrue(
+            histogram.equals(fresh.distribution("coldhead", "efficiency1", [0, 1]))
+        )
+        self.assertEqual(list(refreshed["coldhead"].index), ["J1", "J3", None])
+        self.assertEqual(refreshed["station"].loc[3, "failed"], 1)
+        self.assertEqual(refreshed["coldhead"].loc[None, "tests"], 2)
+
+    def test_unknown_grouping(self):
+        with self.assertRaises(ValueError):
+            self.analytics.group_stats("part_number")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+# test_test_measurements_migration.py
+
+import datetime
+import importlib.util
+import os
+import unittest
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import Date, column, create_engine, select, table
+
+from db_ops.change_log import change_trigger_ddl
+
+MIGRATION_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "alembic",
+    "versions",
+    "e81f4a6c2d57_add_test_measurements.py",
+)
+
+# The tables as the revisions before e81f4a6c2d57 leave them
+HEAD_SCHEMA = [
+    """CREATE TABLE coldheads (
+        coldhead_id INTEGER PRIMARY KEY, serial_number VARCHAR NOT NULL UNIQUE
+    )""",
+    """CREATE TABLE displacers (
+        displacer_id INTEGER PRIMARY KEY, displacer_serial_number VARCHAR NOT NULL
+    )""",
+    """CREATE TABLE wips (
+        wip_id INTEGER PRIMARY KEY, test_id INTEGER REFERENCES tests (test_id),
+        coldhead_id INTEGER NOT NULL, displacer_id INTEGER NOT NULL,
+        wip_number VARCHAR NOT NULL UNIQUE
+    )""",
+    """CREATE TABLE change_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT, table_name VARCHAR NOT NULL,
+        operation VARCHAR NOT NULL, row_id INTEGER NOT NULL,
+        changed_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL
+    )""",
+]
+
+# tests as copied from the Repair_Tracker database, every value stored as text
+LEGACY_TESTS = """
+    CREATE TABLE tests (
+        test_id INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR NOT NULL, WIP TEXT,
+        Test_Date TEXT, station TEXT, Pass_Fail TEXT, mode TEXT, turns TEXT,
+        first_stage_temp TEXT, passed TEXT
+    )
+"""
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location(
+        "add_test_measurements", MIGRATION_PATH
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestTestMeasurementsMigration(unittest.TestCase):
+    def setUp(self):
+        self.migration = load_migration()
+        self.engine = create_engine("sqlite://")
+        self.connection = self.engine.connect()
+        self.connection.exec_driver_sql("PRAGMA foreign_keys = ON")
+        self.connection.commit()
+        with self.connection.begin():
+            for statement in HEAD_SCHEMA:
+                self.connection.exec_driver_sql(statement)
+            self.connection.exec_driver_sql("INSERT INTO coldheads VALUES (1, 'C1')")
+            self.connection.exec_driver_sql("INSERT INTO displacers VALUES (1, 'D1')")
+
+    def tearDown(self):
+        self.connection.close()
+        self.engine.dispose()
+
+    def run_migration(self, step):
+        with self.connection.begin():
+            with Operations.context(MigrationContext.configure(self.connection)):
+                getattr(self.migration, step)()
+
+    def query(self, sql):
+        return self.connection.exec_driver_sql(sql).fetchall()
+
+    def create_tests(self, ddl, rows):
+        with self.connection.begin():
+            self.connection.exec_driver_sql(ddl)
+            for row in rows:
+                self.connection.exec_driver_sql(row)
+            self.connection.exec_driver_sql(
+                "INSERT INTO wips VALUES (1, 1, 1, 1, '415481')"
+            )
+            for statement in change_trigger_ddl():
+                self.connection.exec_driver_sql(statement)
+
+    def test_adds_typed_columns_and_keeps_rows(self):
+        self.create_tests(
+            "CREATE TABLE tests (test_id INTEGER PRIMARY KEY, name VARCHAR NOT NULL)",
+            ["INSERT INTO tests VALUES (1, 'Load test')"],
+        )
+
+        self.run_migration("upgrade")
+
+        columns = {row[1]: row[2] for row in self.query("PRAGMA table_info(tests)")}
+        self.assertEqual(columns["first_stage_temp"], "FLOAT")
+        self.assertEqual(columns["turns"], "INTEGER")
+        self.assertEqual(columns["test_date"], "DATE")
+        self.assertEqual(
+            self.query("SELECT test_id, name, wip_id FROM tests"),
+            [(1, "Load test", None)],
+        )
+        self.assertEqual(
+            self.query(
+                'SELECT "table", "from" FROM pragma_foreign_key_list(\'tests\')'
+            ),
+            [("wips", "wip_id")],
+        )
+        indexes = {row[1] for row in self.query("PRAGMA index_list(tests)")}
+        self.assertTrue(
+            {"ix_tests_wip_id", "ix_tests_test_date", "ix_tests_station"} <= indexes
+        )
+        # The journal triggers survive the table being recreated
+        self.connection.exec_driver_sql("UPDATE tests SET turns = 5")
+        self.assertEqual(
+            self.query("SELECT table_name, operation, row_id FROM change_log"),
+            [("tests", "UPDATE", 1)],
+        )
+
+    def test_backfills_legacy_text_values(self):
+        self.create_tests(
+            LEGACY_TESTS,
+            [
+                "INSERT INTO tests VALUES (1, 'a', ' 415481', '2023-11-01 08:30:00', "
+                "'2', 'PASS', 'LOAD', '5', '84.6', '1')",
+                "INSERT INTO tests VALUES "
+                "(2, 'b', '999', '', '', '', '', '', 'n/a', '0')",
+            ],
+        )
+
+        self.run_migration("upgrade")
+
+        self.assertEqual(
+            self.query(
+                "SELECT test_id, wip_id, test_date, station, pass_fail, mode, turns, "
+                "first_stage_temp FROM tests"
+            ),
+            [
+                (1, 1, "2023-11-01", 2, "Pass", "LOAD", 5, 84.6),
+                (2, None, None, None, "Fail", None, None, None),
+            ],
+        )
+        # Text a numeric column cannot hold is kept in the notes
+        self.assertEqual(
+            self.query("SELECT notes FROM tests ORDER BY test_id"),
+            [(None,), ("first_stage_temp: n/a",)],
+        )
+        # Legacy column names and AUTOINCREMENT are kept; the backfill is not journaled
+        self.assertIn(
+            "Pass_Fail", [row[1] for row in self.query("PRAGMA table_info(tests)")]
+        )
+        self.assertIn(
+            "AUTOINCREMENT",
+            self.query("SELECT sql FROM sqlite_master WHERE name = 'tests'")[0][0],
+        )
+        self.assertEqual(self.query("SELECT count(*) FROM change_log"), [(0,)])
+
+    def test_backfills_legacy_dates_that_are_not_iso(self):
+        self.create_tests(
+            LEGACY_TESTS,
+            [
+                f"INSERT INTO tests (test_id, name, Test_Date, passed) "
+                f"VALUES ({test_id}, 'Load test', '{test_date}', '1')"
+                for test_id, test_date in enumerate(
+                    ["01/05/2024", "1/5/24 0:00:00", "next week", "31/12/2023"], 1
+                )
+            ],
+        )
+
+        self.run_migration("upgrade")
+
+        # Month-first dates are converted and the rest are kept in the notes
+        self.assertEqual(
+            self.query("SELECT test_date, notes FROM tests ORDER BY test_id"),
+            [
+                ("2024-01-05", None),
+                ("2024-01-05", None),
+                (None, "test_date: next week"),
+                (None, "test_date: 31/12/2023"),
+            ],
+        )
+        tests = table("tests", column("test_id"), column("test_date", Date()))
+        dates = select(tests.c.test_date).order_by(tests.c.test_id)
+        self.assertEqual(
+            self.connection.execute(dates).scalars().all(),
+            [datetime.date(2024, 1, 5), datetime.date(2024, 1, 5), None, None],
+        )
+
+    def test_downgrade_drops_the_columns(self):
+        self.create_tests(
+            "CREATE TABLE tests (test_id INTEGER PRIMARY KEY, name VARCHAR NOT NULL)",
+            ["INSERT INTO tests VALUES (1, 'Load test')"],
+        )
+        self.run_migration("upgrade")
+
+        self.run_migration("downgrade")
+
+        self.assertEqual(
+            [row[1] for row in self.query("PRAGMA table_info(tests)")],
+            ["test_id", "name"],
+        )
+        self.assertEqual(
+            self.query("SELECT count(*) FROM sqlite_master WHERE type = 'trigger'"),
+            [(12,)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
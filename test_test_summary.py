@@ -0,0 +1,254 @@
+# test_test_summary.py
+
+import datetime
+import importlib.util
+import os
+import unittest
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from db_ops.database import configure_sqlite_transactions
+from db_ops.models import WIP, Base, Coldhead, Displacer, Test
+from db_ops.schema_reconcile import reconcile_schema
+from db_ops.test_summary import SUMMARY_TABLES, PartSummaries, rebuild_summaries
+
+MIGRATION_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "alembic",
+    "versions",
+    "f3a9c7d15b20_add_test_summaries.py",
+)
+
+
+def day(n):
+    return datetime.date(2024, 1, n)
+
+
+class TestPartSummaries(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", echo=False)
+        configure_sqlite_transactions(self.engine)
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.summaries = PartSummaries(self.session)
+
+        self.coldheads = [Coldhead(serial_number="J1"), Coldhead(serial_number="J2")]
+        self.displacer = Displacer(displacer_serial_number="R1")
+        self.wips = [
+            WIP(wip_number="W1", coldhead=self.coldheads[0], displacer=self.displacer),
+            WIP(wip_number="W2", coldhead=self.coldheads[1], displacer=self.displacer),
+        ]
+        self.session.add_all(self.coldheads + [self.displacer] + self.wips)
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def add_test(self, wip, result, date):
+        test = Test(name="Load test", wip=wip, pass_fail=result, test_date=date)
+        self.session.add(test)
+        self.session.commit()
+        return test
+
+    def assert_matches_rebuild(self):
+        """The maintained summaries equal the ones computed from scratch."""
+        maintained = (self.summaries.for_coldheads(), self.summaries.for_displacers())
+        rebuild_summaries(self.session.connection())
+        self.session.commit()
+        self.assertEqual(
+            maintained,
+            (self.summaries.for_coldheads(), self.summaries.for_displacers()),
+        )
+
+    def test_inserts_update_counts_and_last_test(self):
+        self.add_test(self.wips[0], "Fail", day(2))
+        self.add_test(self.wips[0], "Pass", day(1))  # Entered late
+        self.add_test(self.wips[0], "Pending", None)
+        last = self.add_test(self.wips[1], "Pass", day(3))
+        self.add_test(None, "Fail", day(4))
+
+        self.assertEqual(
+            self.summaries.for_coldheads(),
+            {
+                self.coldheads[0].coldhead_id: {
+                    "attempts": 3,
+                    "fail_count": 1,
+                    "pass_count": 1,
+                    "last_test_id": 1,
+                    "last_test_date": day(2),
+                    "last_result": "Fail",
+                },
+                self.coldheads[1].coldhead_id: {
+                    "attempts": 1,
+                    "fail_count": 0,
+                    "pass_count": 1,
+                    "last_test_id": last.test_id,
+                    "last_test_date": day(3),
+                    "last_result": "Pass",
+                },
+            },
+        )
+        displacer = self.summaries.for_displacers([self.displacer.displacer_id])
+        self.assertEqual(displacer[self.displacer.displacer_id]["attempts"], 4)
+        self.assert_matches_rebuild()
+
+    def test_updates_and_deletes_recompute_the_parts_involved(self):
+        first = self.add_test(self.wips[0], "Fail", day(1))
+        second = self.add_test(self.wips[0], "Fail", day(2))
+
+        second.pass_fail = "Pass"
+        self.session.commit()
+        self.assertEqual(
+            self.summaries.for_coldheads([self.coldheads[0].coldhead_id])[1][
+                "last_result"
+            ],
+            "Pass",
+        )
+        first.test_date = day(3)
+        self.session.commit()
+        summary = self.summaries.for_coldheads()[1]
+        self.assertEqual(
+            (summary["fail_count"], summary["last_test_id"], summary["last_result"]),
+            (1, first.test_id, "Fail"),
+        )
+        self.assert_matches_rebuild()
+
+        # Moving a test, then its WIP, to the other coldhead
+        first.wip = self.wips[1]
+        self.session.commit()
+        self.assertEqual(
+            {
+                key: row["attempts"]
+                for key, row in self.summaries.for_coldheads().items()
+            },
+            {1: 1, 2: 1},
+        )
+        self.wips[0].coldhead = self.coldheads[1]
+        self.session.commit()
+        self.assertEqual(
+            {
+                key: row["attempts"]
+                for key, row in self.summaries.for_coldheads().items()
+            },
+            {2: 2},
+        )
+        self.assert_matches_rebuild()
+
+        self.session.delete(second)
+        self.session.commit()
+        summary = self.summaries.for_coldheads()[2]
+        self.assertEqual((summary["attempts"], summary["fail_count"]), (1, 1))
+        self.assertEqual(summary["last_test_id"], first.test_id)
+        self.session.delete(first)
+        self.session.commit()
+        self.assertEqual(self.summaries.for_coldheads(), {})
+        self.assertEqual(self.summaries.for_displacers(), {})
+
+    def test_results_count_whatever_their_case(self):
+        self.add_test(self.wips[0], "PASS", day(1))
+        test = self.add_test(self.wips[0], "fail", day(2))
+        summary = self.summaries.for_coldheads()[1]
+        self.assertEqual((summary["fail_count"], summary["pass_count"]), (1, 1))
+
+        test.pass_fail = "pass"
+        self.session.commit()
+        summary = self.summaries.for_coldheads()[1]
+        self.assertEqual(
+            (summary["fail_count"], summary["pass_count"], summary["last_result"]),
+            (0, 2, "pass"),
+        )
+        self.assert_matches_rebuild()
+
+    def test_reconcile_summarizes_existing_tests(self):
+        self.add_test(self.wips[0], "Fail", day(1))
+        with self.engine.begin() as connection:
+            for table in SUMMARY_TABLES:
+                connection.execute(text(f"DROP TABLE {table}"))
+
+        result = reconcile_schema(self.engine)
+
+        self.assertEqual(sorted(result["tables_created"]), sorted(SUMMARY_TABLES))
+        self.assertEqual(self.summaries.for_coldheads()[1]["fail_count"], 1)
+        self.add_test(self.wips[0], "Fail", day(2))
+        self.assertEqual(self.summaries.for_coldheads()[1]["fail_count"], 2)
+
+
+class TestSummaryMigration(unittest.TestCase):
+    @staticmethod
+    def run_migration(connection, step):
+        with connection.begin():
+            with Operations.context(MigrationContext.configure(connection)):
+                step()
+
+    @staticmethod
+    def query(connection, sql):
+        return connection.exec_driver_sql(sql).fetchall()
+
+    def test_upgrade_backfills_and_downgrade_removes(self):
+        spec = importlib.util.spec_from_file_location(
+            "add_test_summaries", MIGRATION_PATH
+        )
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+        engine = create_engine("sqlite://")
+        tables = [
+            table
+            for table in Base.metadata.sorted_tables
+            if table.name not in SUMMARY_TABLES
+        ]
+        with engine.connect() as connection:
+            with connection.begin():
+                Base.metadata.create_all(connection, tables=tables)
+                for index in ("ix_wips_coldhead_id", "ix_wips_displacer_id"):
+                    connection.exec_driver_sql(f"DROP INDEX {index}")
+                connection.exec_driver_sql("INSERT INTO coldheads VALUES (1, 'J1')")
+                connection.exec_driver_sql(
+                    "INSERT INTO displacers (displacer_id, displacer_serial_number) "
+                    "VALUES (1, 'R1')"
+                )
+                connection.exec_driver_sql(
+                    "INSERT INTO wips (wip_id, coldhead_id, displacer_id, wip_number) "
+                    "VALUES (1, 1, 1, 'W1')"
+                )
+                connection.exec_driver_sql(
+                    "INSERT INTO tests (name, wip_id, pass_fail, test_date) "
+                    "VALUES ('a', 1, 'Fail', '2024-01-02'), "
+                    "('b', 1, 'PASS', '2024-01-01')"
+                )
+
+            self.run_migration(connection, migration.upgrade)
+            with connection.begin():
+                self.assertEqual(
+                    self.query(connection, "SELECT * FROM coldhead_test_summary"),
+                    [(1, 2, 1, 1, 1, "2024-01-02", "Fail")],
+                )
+                connection.exec_driver_sql(
+                    "INSERT INTO tests (name, wip_id, pass_fail) "
+                    "VALUES ('c', 1, 'fail')"
+                )
+                self.assertEqual(
+                    self.query(
+                        connection,
+                        "SELECT attempts, fail_count FROM displacer_test_summary",
+                    ),
+                    [(3, 2)],
+                )
+
+            self.run_migration(connection, migration.downgrade)
+            with connection.begin():
+                self.assertEqual(
+                    self.query(
+                        connection,
+                        "SELECT name FROM sqlite_master WHERE name LIKE '%summary%'",
+                    ),
+                    [],
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,261 @@
+# test_transfer_db.py
+
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from db_mngt.dbs import transfer_db
+
+
+def make_legacy_db(path, coldheads=7):
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE coldheads (
+            Coldhead_Serial_Number TEXT, WIP TEXT, Legacy_Flag TEXT
+        );
+        CREATE TABLE displacers (
+            Displacer_Serial_Number TEXT, Initial_Open DATE,
+            WIP_1 TEXT, Coldhead_Serial_Number_1 TEXT, Installation_Date_1 DATE,
+            WIP_2 TEXT, Coldhead_Serial_Number_2 TEXT, Fail_Count_2 INTEGER,
+            WIP_3 TEXT, Coldhead_Serial_Number_3 TEXT
+        );
+        CREATE TABLE tests (WIP TEXT, pass_fail TEXT, turns INTEGER);
+        """
+    )
+    conn.executemany(
+        "INSERT INTO coldheads VALUES (?, ?, 'x')",
+        [(f"C{i}", f"W{i}") for i in range(coldheads)] + [(None, "W99")],
+    )
+    conn.executemany(
+        "INSERT INTO displacers VALUES (?, '2023-01-01', ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            ("D1", "W1", "C1", "2023-02-01", "W7", "C5", 2, " ", None),
+            ("D2", "", "", None, None, None, None, "W3", "C3"),
+        ],
+    )
+    conn.executemany("INSERT INTO tests VALUES (?, 'Pass', 5)", [("W1",), ("W2",)])
+    conn.commit()
+    conn.close()
+
+
+class TestTransferDb(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.old_db = os.path.join(self.tmp_dir.name, "Repair_Tracker.db")
+        self.new_db = os.path.join(self.tmp_dir.name, "CH_DB.db")
+        self.rejects = os.path.join(self.tmp_dir.name, "rejects.jsonl")
+        make_legacy_db(self.old_db)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def query(self, sql):
+        conn = sqlite3.connect(self.new_db)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def count(self, table):
+        return self.query(f"SELECT COUNT(*) FROM {table}")[0][0]
+
+    def test_copies_tables_and_rejects_bad_rows(self):
+        for mode in transfer_db.MIGRATION_MODES:
+            with self.subTest(mode=mode):
+                if os.path.exists(self.new_db):
+                    os.remove(self.new_db)
+                with mock.patch("builtins.print"):
+                    stats = transfer_db.migrate_data(
+                        self.old_db, self.new_db, self.rejects, batch_size=3, mode=mode
+                    )
+
+                self.assertEqual(stats["coldheads"]["read"], 8)
+                self.assertEqual(
+                    (stats["coldheads"]["inserted"], stats["coldheads"]["rejected"]),
+                    (7, 1),
+                )
+                self.assertEqual((self.count("coldheads"), self.count("tests")), (7, 2))
+                self.assertEqual(
+                    self.query("SELECT Initial_Open FROM displacers"),
+                    [("2023-01-01",), ("2023-01-01",)],
+                )
+                with open(self.rejects) as f:
+                    rejects = [json.loads(line) for line in f]
+                self.assertEqual(len(rejects), 1)
+                self.assertEqual(rejects[0]["table"], "coldheads")
+                self.assertEqual(
+                    rejects[0]["row"], {"Coldhead_Serial_Number": None, "WIP": "W99"}
+                )
+                # Indexes dropped for the load are rebuilt
+                indexes = self.query(
+                    "SELECT name FROM sqlite_master WHERE type = 'index'"
+                )
+                self.assertIn(("idx_tests_wip",), indexes)
+
+    def test_displacer_history_is_unpivoted_and_linked(self):
+        with mock.patch("builtins.print"):
+            stats = transfer_db.migrate_data(self.old_db, self.new_db, self.rejects)
+
+        self.assertEqual(stats["displacer_coldhead_wip"]["inserted"], 3)
+        # W7 only appears in D1's history; it is added to wip with C5's coldhead
+        self.assertEqual(stats["displacer_coldhead_wip"]["wips"], 8)
+        rows = self.query(
+            """
+            SELECT d.Displacer_Serial_Number, c.Coldhead_Serial_Number, c.WIP,
+                   w.wip_number, l.installation_date, l.fail_count
+            FROM displacer_coldhead_wip l
+            JOIN displacers d USING (displacer_id)
+            JOIN coldheads c USING (coldhead_id)
+            JOIN wip w USING (wip_id)
+            ORDER BY l.id
+            """
+        )
+        self.assertEqual(
+            rows,
+            [
+                ("D1", "C1", "W1", "W1", "2023-02-01", 0),
+                ("D1", "C5", "W5", "W7", None, 2),
+                ("D2", "C3", "W3", "W3", None, 0),
+            ],
+        )
+
+    def test_sync_copies_only_new_and_changed_rows(self):
+        with mock.patch("builtins.print"):
+            transfer_db.migrate_data(
+                self.old_db, self.new_db, self.rejects, mode="sync"
+            )
+
+            conn = sqlite3.connect(self.old_db)
+            conn.execute(
+                "UPDATE coldheads SET WIP = 'W2b' WHERE Coldhead_Serial_Number = 'C2'"
+            )
+            conn.execute(
+                "UPDATE coldheads SET Coldhead_Serial_Number = 'C8' WHERE WIP = 'W99'"
+            )
+            conn.execute("INSERT INTO coldheads VALUES ('C9', 'W9', 'x')")
+            conn.commit()
+            conn.close()
+            stats = transfer_db.migrate_data(
+                self.old_db, self.new_db, self.rejects, mode="sync"
+            )
+            again = transfer_db.migrate_data(
+                self.old_db, self.new_db, self.rejects, mode="sync"
+            )
+
+        # The row rejected by the first run is retried once fixed
+        self.assertEqual(
+            {
+                key: stats["coldheads"][key]
+                for key in ("read", "inserted", "updated", "rejected")
+            },
+            {"read": 3, "inserted": 2, "updated": 1, "rejected": 0},
+        )
+        self.assertEqual((stats["tests"]["read"], stats["displacers"]["read"]), (0, 0))
+        # Copying coldheads only relinks the slots left without one, here none
+        self.assertEqual(stats["displacer_coldhead_wip"]["read"], 0)
+        self.assertEqual(again["coldheads"]["read"], 0)
+        self.assertEqual(
+            self.query("SELECT COUNT(*), SUM(WIP = 'W2b') FROM coldheads"), [(9, 1)]
+        )
+        self.assertEqual(
+            self.query(
+                "SELECT high_water_mark FROM sync_state WHERE table_name = 'coldheads'"
+            ),
+            [(9,)],
+        )
+
+    def test_sync_relinks_only_changed_displacers(self):
+        links = (
+            "SELECT l.id, d.Displacer_Serial_Number, w.wip_number "
+            "FROM displacer_coldhead_wip l JOIN displacers d USING (displacer_id) "
+            "JOIN wip w USING (wip_id) ORDER BY l.id"
+        )
+        with mock.patch("builtins.print"):
+            transfer_db.migrate_data(
+                self.old_db, self.new_db, self.rejects, mode="sync"
+            )
+            before = self.query(links)
+
+            conn = sqlite3.connect(self.old_db)
+            conn.execute(
+                "UPDATE displacers SET WIP_1 = 'W4', Coldhead_Serial_Number_1 = 'C4' "
+                "WHERE Displacer_Serial_Number = 'D2'"
+            )
+            conn.commit()
+            conn.close()
+            stats = transfer_db.migrate_data(
+                self.old_db, self.new_db, self.rejects, mode="sync"
+            )
+
+        self.assertEqual(stats["displacer_coldhead_wip"]["read"], 2)
+        after = self.query(links)
+        # D1's links are kept as they were; D2's are replaced
+        self.assertEqual([row for row in after if row[1] == "D1"], before[:2])
+        self.assertEqual(
+            [row[1:] for row in after if row[1] == "D2"], [("D2", "W4"), ("D2", "W3")]
+        )
+
+    def test_sync_links_slots_to_coldheads_copied_later(self):
+        # C1, named by D1's first slot, is only copied by the second sync
+        make_legacy_db(self.old_db + ".partial", coldheads=1)
+        os.replace(self.old_db + ".partial", self.old_db)
+        slot = (
+            "SELECT l.coldhead_id FROM displacer_coldhead_wip l "
+            "JOIN wip w USING (wip_id) WHERE w.wip_number = 'W1'"
+        )
+        with mock.patch("builtins.print"):
+            transfer_db.migrate_data(
+                self.old_db, self.new_db, self.rejects, mode="sync"
+            )
+            self.assertEqual(self.query(slot), [(None,)])
+
+            conn = sqlite3.connect(self.old_db)
+            conn.execute("INSERT INTO coldheads VALUES ('C1', 'W1', 'x')")
+            conn.commit()
+            conn.close()
+            stats = transfer_db.migrate_data(
+                self.old_db, self.new_db, self.rejects, mode="sync"
+            )
+
+        self.assertEqual(stats["displacers"]["inserted"], 0)
+        self.assertEqual(
+            self.query(slot),
+            self.query(
+                "SELECT coldhead_id FROM coldheads "
+                "WHERE Coldhead_Serial_Number = 'C1'"
+            ),
+        )
+
+    def test_sync_refuses_a_database_it_did_not_fill(self):
+        with mock.patch("builtins.print"):
+            transfer_db.migrate_data(
+                self.old_db, self.new_db, self.rejects, mode="attach"
+            )
+            with self.assertRaises(ValueError):
+                transfer_db.migrate_data(
+                    self.old_db, self.new_db, self.rejects, mode="sync"
+                )
+
+    def test_failure_rolls_back_every_table(self):
+        migrate_table = transfer_db.migrate_table
+
+        def failing(cursor_old, cursor_new, table_name, *args):
+            if table_name == "tests":
+                raise RuntimeError("disk full")
+            return migrate_table(cursor_old, cursor_new, table_name, *args)
+
+        with mock.patch("builtins.print"), mock.patch.object(
+            transfer_db, "migrate_table", failing
+        ):
+            with self.assertRaises(RuntimeError):
+                transfer_db.migrate_data(self.old_db, self.new_db, self.rejects)
+
+        self.assertEqual((self.count("coldheads"), self.count("displacers")), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
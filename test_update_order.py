@@ -0,0 +1,131 @@
+# test_update_order.py
+
+import datetime
+import unittest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from db_ops.database import configure_sqlite_transactions
+from db_ops.error_handler import InvalidDataError
+from db_ops.models import Base, Coldhead, Displacer, Test, WIP
+from db_ops.update_order import UpdateOrder
+
+
+class TestUpdateOrder(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:', echo=False)
+        configure_sqlite_transactions(self.engine)
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.update_order = UpdateOrder(self.session)
+
+        coldhead = Coldhead(serial_number='J03636')
+        displacer = Displacer(displacer_serial_number='R6650/R6071')
+        self.session.add_all([coldhead, displacer])
+        self.session.flush()
+        wip = WIP(
+            wip_number='398517',
+            coldhead_id=coldhead.coldhead_id,
+            displacer_id=displacer.displacer_id,
+            status='Open',
+        )
+        self.session.add_all([wip, Test(test_id=1, name='Test 1', wip=wip)])
+        self.session.commit()
+
+        self.original = {
+            'wip_number': '398517',
+            'coldhead_serial_number': 'J03636',
+            'displacer_serial_number': 'R6650/R6071',
+            'arrival_date': None,
+            'wip_status': 'Open',
+        }
+
+        self.statements = []
+        self.commits = []
+
+        @event.listens_for(self.engine, 'before_cursor_execute')
+        def record(conn, cursor, statement, parameters, context, executemany):
+            self.statements.append(statement)
+
+        @event.listens_for(self.engine, 'commit')
+        def record_commit(conn):
+            self.commits.append(conn)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def test_changed_fields(self):
+        edited = dict(self.original, wip_status='Closed')
+        self.assertEqual(
+            UpdateOrder.changed_fields(self.original, edited), {'wip_status': 'Closed'}
+        )
+        self.assertEqual(UpdateOrder.changed_fields(None, edited), edited)
+
+    def test_only_changed_columns_are_written(self):
+        edited = dict(self.original, arrival_date=datetime.date(2023, 10, 3))
+        self.update_order.save_changes(
+            edited,
+            [{'test_id': 1, 'pass_fail': 'Pass'}],
+            original_wip=self.original,
+            original_tests={1: {'test_id': 1, 'pass_fail': 'Pass'}},
+        )
+
+        updates = [s for s in self.statements if s.startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('arrival_date', updates[0])
+        self.assertNotIn('status', updates[0])
+        self.assertEqual(len(self.commits), 1)
+
+        wip = self.session.query(WIP).filter_by(wip_number='398517').one()
+        self.assertEqual(wip.arrival_date, datetime.date(2023, 10, 3))
+        self.assertEqual(wip.status, 'Open')
+
+    def test_edited_dates_are_saved_as_dates(self):
+        self.update_order.save_changes(
+            dict(self.original, arrival_date='2024-01-05'),
+            [{'test_id': 1, 'test_date': '2024-02-01'}],
+            original_wip=self.original,
+            original_tests={1: {'test_id': 1, 'test_date': None}},
+        )
+
+        wip = self.session.query(WIP).filter_by(wip_number='398517').one()
+        self.assertEqual(wip.arrival_date, datetime.date(2024, 1, 5))
+        self.assertEqual(wip.tests[0].test_date, datetime.date(2024, 2, 1))
+
+        # The same day as text is no change
+        self.statements.clear()
+        self.update_order.save_changes(
+            dict(self.original, arrival_date='2024-01-05'),
+            original_wip=dict(self.original, arrival_date=datetime.date(2024, 1, 5)),
+        )
+        self.assertFalse([s for s in self.statements if s.startswith('UPDATE')])
+
+    def test_bad_date_is_rejected(self):
+        with self.assertRaises(InvalidDataError):
+            self.update_order.save_changes(
+                dict(self.original, wip_status='Closed', arrival_date='01/05/2024'),
+                original_wip=self.original,
+            )
+
+        wip = self.session.query(WIP).filter_by(wip_number='398517').one()
+        self.assertEqual((wip.status, wip.arrival_date), ('Open', None))
+
+    def test_unchanged_save_issues_no_update(self):
+        self.update_order.save_changes(dict(self.original), original_wip=self.original)
+        self.assertFalse([s for s in self.statements if s.startswith('UPDATE')])
+
+    def test_failed_save_rolls_back_every_change(self):
+        edited = dict(self.original, wip_status='Closed')
+        with self.assertRaises(Exception):
+            self.update_order.save_changes(
+                edited,
+                [{'test_id': 999, 'pass_fail': 'Pass'}],
+                original_wip=self.original,
+            )
+
+        wip = self.session.query(WIP).filter_by(wip_number='398517').one()
+        self.assertEqual(wip.status, 'Open')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+# test_verify.py
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from db_mngt.dbs import verify
+
+
+def make_db(path, rows=25):
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE tests (
+            test_id INTEGER PRIMARY KEY, WIP TEXT, turns INTEGER, notes TEXT
+        );
+        CREATE TABLE coldheads (Coldhead_Serial_Number TEXT, WIP TEXT);
+        """
+    )
+    conn.executemany(
+        "INSERT INTO tests VALUES (?, ?, ?, NULL)",
+        [(i, f"W{i}", i % 7) for i in range(1, rows + 1)],
+    )
+    conn.executemany(
+        "INSERT INTO coldheads VALUES (?, ?)", [(f"C{i}", f"W{i}") for i in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+
+
+class TestVerify(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp_dir.name, "source.db")
+        self.target = os.path.join(self.tmp_dir.name, "target.db")
+        make_db(self.source)
+        make_db(self.target)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def change_target(self, *statements):
+        conn = sqlite3.connect(self.target)
+        for sql in statements:
+            conn.execute(sql)
+        conn.commit()
+        conn.close()
+
+    def verify(self, **kwargs):
+        with mock.patch("builtins.print"):
+            return verify.verify_databases(
+                self.source, self.target, bucket_size=10, **kwargs
+            )
+
+    def test_identical_databases_match(self):
+        stats = self.verify()
+
+        self.assertEqual(stats["tests"]["rows"], (25, 25))
+        self.assertEqual(
+            (stats["tests"]["buckets"], stats["tests"]["mismatched_buckets"]), (3, 0)
+        )
+        self.assertEqual(stats["coldheads"]["differences"], 0)
+
+    def test_only_mismatched_buckets_are_drilled_into(self):
+        self.change_target(
+            "UPDATE tests SET turns = turns + 1 WHERE test_id = 3",
+            "UPDATE tests SET notes = 'x', WIP = 'W' WHERE test_id = 4",
+            "DELETE FROM tests WHERE test_id = 5",
+            "INSERT INTO tests VALUES (40, 'W40', 1, NULL)",
+        )
+
+        with mock.patch.object(
+            verify, "diff_bucket", wraps=verify.diff_bucket
+        ) as diff_bucket:
+            stats = self.verify()["tests"]
+
+        self.assertEqual(diff_bucket.call_count, 2)
+        self.assertEqual((stats["buckets"], stats["mismatched_buckets"]), (4, 2))
+        self.assertEqual(
+            stats["rows_differing"],
+            [
+                (3, "changed", ["turns"]),
+                (4, "changed", ["WIP", "notes"]),
+                (5, "only in source", []),
+                (40, "only in target", []),
+            ],
+        )
+
+    def test_storage_classes_differ_in_buckets_and_rows(self):
+        for path in (self.source, self.target):
+            conn = sqlite3.connect(path)
+            conn.execute("ALTER TABLE tests ADD COLUMN reading")  # No affinity
+            conn.execute("UPDATE tests SET reading = 5")
+            conn.commit()
+            conn.close()
+        self.change_target(
+            "UPDATE tests SET reading = 5.0 WHERE test_id = 2",
+            "UPDATE tests SET reading = '5' WHERE test_id = 12",
+            "UPDATE tests SET notes = 5 WHERE test_id = 22",  # Stored as '5'
+        )
+
+        stats = self.verify(tables=["tests"])["tests"]
+
+        self.assertEqual(stats["mismatched_buckets"], 3)
+        self.assertEqual(
+            stats["rows_differing"],
+            [
+                (2, "changed", ["reading"]),
+                (12, "changed", ["reading"]),
+                (22, "changed", ["notes"]),
+            ],
+        )
+
+    def test_rowid_tables_and_column_differences(self):
+        self.change_target(
+            "ALTER TABLE coldheads ADD COLUMN Legacy_Flag TEXT",
+            "UPDATE coldheads SET WIP = 'W0b' WHERE rowid = 1",
+        )
+
+        stats = self.verify(tables=["coldheads"], max_rows=0)["coldheads"]
+
+        self.assertEqual(stats["columns_only_in_target"], ["Legacy_Flag"])
+        self.assertEqual((stats["differences"], stats["rows_differing"]), (1, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+# test_write_coordination.py
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from db_ops.database import configure_sqlite_transactions
+from db_ops.error_handler import DatabaseError
+from db_ops.models import Base, Displacer
+from db_ops.write_coordination import is_busy_error, retry_on_busy, run_write_unit
+
+
+class TestRetryOnBusy(unittest.TestCase):
+    @mock.patch('db_ops.write_coordination.time.sleep')
+    def test_retries_locked_database_until_success(self, sleep):
+        calls = []
+
+        def work():
+            calls.append(1)
+            if len(calls) < 3:
+                raise sqlite3.OperationalError('database is locked')
+            return 'done'
+
+        self.assertEqual(retry_on_busy(work, attempts=5), 'done')
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(sleep.call_count, 2)
+
+    @mock.patch('db_ops.write_coordination.time.sleep')
+    def test_other_errors_are_not_retried(self, sleep):
+        def work():
+            raise sqlite3.OperationalError('no such table: wips')
+
+        with self.assertRaises(sqlite3.OperationalError):
+            retry_on_busy(work)
+        sleep.assert_not_called()
+
+    @mock.patch('db_ops.write_coordination.time.sleep')
+    def test_gives_up_after_max_attempts(self, sleep):
+        def work():
+            raise sqlite3.OperationalError('database is locked')
+
+        with self.assertRaises(sqlite3.OperationalError):
+            retry_on_busy(work, attempts=3)
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_is_busy_error(self):
+        self.assertTrue(is_busy_error(sqlite3.OperationalError('database is locked')))
+        self.assertFalse(is_busy_error(ValueError('database is locked')))
+
+
+class TestRunWriteUnit(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmp_dir.name, 'contention.db')
+        self.engine = create_engine(f'sqlite:///{db_path}')
+        configure_sqlite_transactions(self.engine, busy_timeout_ms=0)
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.blocker = sqlite3.connect(db_path, isolation_level=None, timeout=0)
+
+    def tearDown(self):
+        self.blocker.close()
+        self.session.close()
+        self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def test_write_unit_begins_immediate(self):
+        statements = []
+
+        @event.listens_for(self.engine, 'before_cursor_execute')
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        run_write_unit(
+            self.session,
+            lambda s: s.add(Displacer(displacer_serial_number='R0001')),
+        )
+        self.assertEqual(statements[0], 'BEGIN IMMEDIATE')
+        self.assertEqual(self.session.query(Displacer).count(), 1)
+
+    def test_write_unit_refuses_pending_changes(self):
+        self.session.query(Displacer).count()
+        run_write_unit(self.session, lambda s: None)  # A read transaction is ended
+
+        self.session.add(Displacer(displacer_serial_number='R0001'))
+        with self.assertRaises(DatabaseError):
+            run_write_unit(
+                self.session,
+                lambda s: s.add(Displacer(displacer_serial_number='R0002')),
+            )
+        self.session.rollback()
+        self.assertEqual(self.session.query(Displacer).count(), 0)
+
+    @mock.patch('db_ops.write_coordination.time.sleep')
+    def test_whole_unit_is_retried_while_another_writer_holds_the_lock(self, sleep):
+        self.blocker.execute('BEGIN IMMEDIATE')
+        sleep.side_effect = lambda delay: self.blocker.execute('COMMIT')
+        attempts = []
+
+        def work(session):
+            attempts.append(1)
+            session.add(Displacer(displacer_serial_number='R0002'))
+
+        run_write_unit(self.session, work)
+        self.assertEqual(len(attempts), 1)
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(self.session.query(Displacer).count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# test_write_queue.py
+
+import os
+import tempfile
+import unittest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from db_ops.database import configure_sqlite_transactions
+from db_ops.models import Base, Displacer
+from db_ops.write_queue import WriteBehindQueue
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmp_dir.name, 'queue.db')
+        self.engine = create_engine(f'sqlite:///{db_path}')
+        configure_sqlite_transactions(self.engine)
+        Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+
+        self.commits = []
+
+        @event.listens_for(self.engine, 'commit')
+        def record_commit(conn):
+            self.commits.append(conn)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def insert_displacer(serial):
+        def work(session):
+            displacer = Displacer(displacer_serial_number=serial)
+            session.add(displacer)
+            session.flush()
+            return displacer.displacer_id
+
+        return work
+
+    def test_batches_commands_and_reports_each_outcome(self):
+        write_queue = WriteBehindQueue(self.session_factory, linger=0.5)
+        successes, errors = [], []
+
+        write_queue.submit(
+            self.insert_displacer('R0001'), successes.append, errors.append
+        )
+        write_queue.submit(
+            self.insert_displacer('R0001'), successes.append, errors.append
+        )
+        write_queue.submit(
+            self.insert_displacer('R0002'), successes.append, errors.append
+        )
+        write_queue.close(timeout=5)
+
+        # Callbacks run only on the thread that delivers them
+        self.assertEqual(successes, [])
+        write_queue.deliver_callbacks()
+
+        self.assertEqual(len(successes), 2)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(len(self.commits), 1)
+
+        session = self.session_factory()
+        self.assertEqual(
+            sorted(d.displacer_serial_number for d in session.query(Displacer)),
+            ['R0001', 'R0002'],
+        )
+        session.close()
+
+
+if __name__ == '__main__':
+    unittest.main()